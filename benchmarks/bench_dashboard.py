@@ -0,0 +1,104 @@
+"""
+Карточки дашборда за год: прежние агрегаты по сырым заказам/закупкам
+против одного sp_dashboard_kpis по kpi_daily при растущей истории.
+
+История генерируется внутри транзакции, которая в конце откатывается.
+
+    python benchmarks/bench_dashboard.py [заказов ...]   # по умолчанию 10000 100000
+"""
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+REPEAT = 5
+PERIOD = ("2024-01-01", "2024-12-31")
+
+# Запросы DashboardTab.fetch_metrics до kpi_daily
+RAW_QUERIES = [
+    """SELECT COALESCE(SUM(сумма_заказа), 0), COUNT(*) FROM заказы
+       WHERE статус IN ('выполнен', 'завершен', 'отгружен') AND дата_заказа BETWEEN %s AND %s""",
+    """SELECT COALESCE(SUM(sz.количество * sz.цена_закупки), 0)
+       FROM закупки_материалов zm JOIN состав_закупки sz ON zm.id_закупки = sz.id_закупки
+       WHERE zm.статус = 'выполнено' AND дата_закупки BETWEEN %s AND %s""",
+    "SELECT COUNT(*) FROM заказы WHERE статус = 'отменен' AND дата_заказа BETWEEN %s AND %s",
+    "SELECT COUNT(*) FROM сотрудники WHERE дата_увольнения IS NULL",
+]
+
+
+def generate_history(cur, total):
+    """Заказы и закупки за 10 лет до 2025 года"""
+    cur.execute("SELECT COUNT(*) FROM заказы")
+    missing = total - cur.fetchone()[0]
+    if missing <= 0:
+        return
+    cur.execute(
+        """
+        INSERT INTO заказы (id_клиента, дата_заказа, дата_готовности, статус, сумма_заказа)
+        SELECT k.ids[1 + g %% array_length(k.ids, 1)], DATE '2025-01-01' - g %% 3650,
+               DATE '2025-01-01' - g %% 3650 + 14,
+               (ARRAY['завершен', 'отгружен', 'отменен', 'принят'])[1 + g %% 4], g %% 1000 * 10
+        FROM generate_series(1, %s) g,
+             (SELECT array_agg(id_клиента) AS ids FROM клиенты) k
+        """,
+        (missing,),
+    )
+    cur.execute(
+        """
+        WITH p AS (
+            INSERT INTO закупки_материалов (дата_закупки, поставщик, статус)
+            SELECT DATE '2025-01-01' - g %% 3650, 'Поставщик', 'выполнено'
+            FROM generate_series(1, %s) g
+            RETURNING id_закупки
+        )
+        INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки)
+        SELECT p.id_закупки, m.id_материала, 10, 5
+        FROM p, (SELECT id_материала FROM материалы ORDER BY id_материала LIMIT 3) m
+        """,
+        (missing // 10,),
+    )
+    cur.execute("ANALYZE заказы")
+    cur.execute("ANALYZE закупки_материалов")
+    cur.execute("ANALYZE состав_закупки")
+
+
+def timed(fn):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        cur = conn.cursor()
+
+        def raw():
+            for query in RAW_QUERIES:
+                cur.execute(query, PERIOD if "%s" in query else None)
+                cur.fetchall()
+
+        def rollup():
+            cur.execute("SELECT * FROM sp_dashboard_kpis(%s, %s)", PERIOD)
+            cur.fetchall()
+
+        print(f"{'заказов':>8} {'4 агрегата':>12} {'sp_dashboard_kpis':>18}   (мс, медиана)")
+        for n in sizes:
+            generate_history(cur, n)
+            print(f"{n:>8} {timed(raw):>12.2f} {timed(rollup):>18.2f}")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
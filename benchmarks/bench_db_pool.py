@@ -0,0 +1,68 @@
+"""
+Сравнение задержки одного вызова БД: соединение на каждый запрос (как было)
+против пула соединений.
+
+    python benchmarks/bench_db_pool.py [итераций]
+"""
+import os
+import statistics
+import sys
+import time
+
+from psycopg2.extras import RealDictCursor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import Database
+
+QUERIES = {
+    "SELECT 1": ("SELECT 1", None),
+    "sp_search_orders": (
+        "SELECT * FROM sp_search_orders(%s, %s, %s, %s, %s)",
+        (None, "", None, None, None),
+    ),
+}
+
+
+def per_call_connect(query, params):
+    conn = Database.connect()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(query, params)
+        cur.fetchall()
+        cur.close()
+    finally:
+        conn.close()
+
+
+def pooled(query, params):
+    Database.fetch_all(query, params)
+
+
+def measure(fn, query, params, iterations):
+    fn(query, params)  # прогрев
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(query, params)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return (
+        statistics.mean(timings),
+        timings[len(timings) // 2],
+        timings[int(len(timings) * 0.95) - 1],
+    )
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"Итераций: {iterations}, задержка в мс (mean / p50 / p95)\n")
+    print(f"{'запрос':<20}{'режим':<14}{'mean':>9}{'p50':>9}{'p95':>9}")
+    for name, (query, params) in QUERIES.items():
+        for mode, fn in (("connect", per_call_connect), ("pool", pooled)):
+            mean, p50, p95 = measure(fn, query, params, iterations)
+            print(f"{name:<20}{mode:<14}{mean:>9.2f}{p50:>9.2f}{p95:>9.2f}")
+    Database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
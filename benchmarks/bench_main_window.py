@@ -0,0 +1,72 @@
+"""
+Время до готовности главного окна после входа (TTI): окно построено,
+первая вкладка получила данные. Сравнивается прежнее поведение (все
+вкладки роли создаются сразу, их запросы идут одновременно) и ленивое
+создание вкладок (TAB_REGISTRY, остальные — в фоне после готовности).
+
+Каждый замер — в отдельном процессе (холодные импорты и пул соединений).
+Рендер offscreen, нужна БД с данными.
+
+    python benchmarks/bench_main_window.py [повторов]   # 5
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROLES = ("директор", "менеджер", "сборщик")
+
+
+def measure(role, eager):
+    """TTI одного входа в мс (выполняется в дочернем процессе)"""
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication([])
+    from db.database import Database
+    from ui.windows.main_window import MainWindow
+
+    user = Database.fetch_one(
+        "SELECT id_сотрудника FROM сотрудники WHERE LOWER(должность) = %s LIMIT 1", (role,)
+    )
+    started = time.perf_counter()
+    window = MainWindow(user["id_сотрудника"] if user else 1, role, "Бенчмарк", started_at=started)
+    if eager:
+        # Как раньше: все вкладки создаются в конструкторе окна
+        for index in range(window.stacked_widget.count()):
+            window.ensure_tab(index)
+    window.show()
+    while window.tti_ms is None:
+        app.processEvents()
+        time.sleep(0.001)
+    window.close()
+    return window.tti_ms
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(measure(sys.argv[2], sys.argv[3] == "eager"))
+        return
+
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env = dict(os.environ, TAB_PREFETCH_DELAY_MS="-1")
+    print(f"{'роль':<10} {'все вкладки сразу':>18} {'лениво':>10}   (медиана из {repeats}, мс)")
+    for role in ROLES:
+        results = {}
+        for mode in ("eager", "lazy"):
+            runs = [
+                float(subprocess.run(
+                    [sys.executable, __file__, "--child", role, mode],
+                    env=env, capture_output=True, text=True, check=True,
+                ).stdout.strip().splitlines()[-1])
+                for _ in range(repeats)
+            ]
+            results[mode] = statistics.median(runs)
+        print(f"{role:<10} {results['eager']:>18.0f} {results['lazy']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
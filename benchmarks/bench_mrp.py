@@ -0,0 +1,94 @@
+"""
+Разузлование потребности в изделиях до материалов (business_logic.mrp.explode) на
+синтетических данных: векторный расчет против обхода каждой позиции
+заказа по спецификациям в словарях.
+
+    python benchmarks/bench_mrp.py [заказов] [позиций_справочников]   # 10000 1000
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from business_logic.mrp import SparseBOM, explode, first_need
+
+LINES_PER_ORDER = 5
+BLANKS_PER_PRODUCT = 8
+MATERIALS_PER_BLANK = 4
+HORIZON_DAYS = 365
+
+
+def generate(orders, items, rng):
+    """Заказы (срок, изделие, количество) и спецификации на items изделий/заготовок/материалов"""
+    lines = orders * LINES_PER_ORDER
+    due = np.datetime64("2025-01-01") + np.repeat(rng.integers(0, HORIZON_DAYS, orders), LINES_PER_ORDER)
+    order_lines = (due, rng.integers(0, items, lines), rng.integers(1, 5, lines).astype(float))
+    pb = (np.repeat(np.arange(items), BLANKS_PER_PRODUCT), rng.integers(0, items, items * BLANKS_PER_PRODUCT),
+          rng.integers(1, 4, items * BLANKS_PER_PRODUCT))
+    bm = (np.repeat(np.arange(items), MATERIALS_PER_BLANK), rng.integers(0, items, items * MATERIALS_PER_BLANK),
+          rng.integers(1, 10, items * MATERIALS_PER_BLANK))
+    stock = [rng.integers(0, 50, items).astype(float) for _ in range(3)]
+    return order_lines, pb, bm, stock
+
+
+def vectorized(order_lines, pb, bm, stock, items):
+    due, product, qty = order_lines
+    dates, date_idx = np.unique(due, return_inverse=True)
+    demand = np.zeros((len(dates), items))
+    np.add.at(demand, (date_idx, product), qty)
+    result = explode(demand, *stock, SparseBOM(*pb, (items, items)), SparseBOM(*bm, (items, items)))
+    return result["материалы"].sum(axis=0), first_need(result["материалы"], dates)
+
+
+def per_line(order_lines, pb, bm, stock, items):
+    """Тот же расчет «в лоб»: позиции по срокам, остатки в словарях"""
+    product_bom, blank_bom = defaultdict(list), defaultdict(list)
+    for p, b, q in zip(*pb):
+        product_bom[int(p)].append((int(b), float(q)))
+    for b, m, q in zip(*bm):
+        blank_bom[int(b)].append((int(m), float(q)))
+    left = [dict(enumerate(s.tolist())) for s in stock]
+    shortage, need_by = defaultdict(float), {}
+    due, product, qty = order_lines
+    for i in np.argsort(due, kind="stable"):
+        make = qty[i] - min(qty[i], left[0][product[i]])
+        left[0][product[i]] -= qty[i] - make
+        for blank, per_product in product_bom[product[i]]:
+            need = make * per_product
+            produce = need - min(need, left[1][blank])
+            left[1][blank] -= need - produce
+            for material, per_blank in blank_bom[blank]:
+                need_m = produce * per_blank
+                short = need_m - min(need_m, left[2][material])
+                left[2][material] -= need_m - short
+                if short > 0:
+                    shortage[material] += short
+                    need_by.setdefault(material, due[i])
+    return shortage, need_by
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    data = generate(orders, items, np.random.default_rng(0))
+
+    start = time.perf_counter()
+    shortage, need_by = vectorized(*data, items)
+    vector_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected, expected_by = per_line(*data, items)
+    loop_time = time.perf_counter() - start
+
+    assert np.allclose([expected.get(m, 0) for m in range(items)], shortage), "нехватка не совпала"
+    assert all(need_by[m] == d for m, d in expected_by.items()), "даты не совпали"
+    print(f"{orders} заказов x {LINES_PER_ORDER} позиций, {items} изделий/заготовок/материалов")
+    print(f"  numpy:     {vector_time * 1000:8.1f} мс")
+    print(f"  по строкам:{loop_time * 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Вставка позиций заказов: построчный trg_calc_sum (как было в create_logic.sql)
+против триггеров уровня оператора из order_sum_v13.sql.
+
+Два сценария на каждый вариант:
+  bulk     — один INSERT ... SELECT на все строки;
+  per-line — отдельный INSERT на каждую позицию (как добавление из интерфейса).
+Все изменения делаются в транзакции и откатываются.
+
+    python benchmarks/bench_order_sum.py [позиций] [позиций_в_заказе]   # 10000 50
+"""
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Прежняя реализация (create_logic.sql) — для сравнения
+ROW_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS trg_order_amount_ins ON состав_заказа;
+CREATE OR REPLACE FUNCTION pg_temp.trg_update_order_sum_func() RETURNS TRIGGER AS $$
+BEGIN
+    IF (TG_OP = 'DELETE') THEN
+        UPDATE заказы SET сумма_заказа = (
+            SELECT COALESCE(SUM(количество_изделий * цена_фиксированная), 0)
+            FROM состав_заказа WHERE id_заказа = OLD.id_заказа
+        ) WHERE id_заказа = OLD.id_заказа;
+        RETURN OLD;
+    ELSE
+        UPDATE заказы SET сумма_заказа = (
+            SELECT COALESCE(SUM(количество_изделий * цена_фиксированная), 0)
+            FROM состав_заказа WHERE id_заказа = NEW.id_заказа
+        ) WHERE id_заказа = NEW.id_заказа;
+        RETURN NEW;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER trg_calc_sum
+AFTER INSERT OR UPDATE OR DELETE ON состав_заказа
+FOR EACH ROW EXECUTE FUNCTION pg_temp.trg_update_order_sum_func();
+"""
+
+
+def prepare(cur, lines, per_order):
+    """Создает заказы и изделия под lines позиций; возвращает список (заказ, изделие)"""
+    orders = (lines + per_order - 1) // per_order
+    cur.execute("SELECT id_клиента FROM клиенты LIMIT 1")
+    client_id = cur.fetchone()[0]
+    cur.execute(
+        "INSERT INTO заказы (id_клиента) SELECT %s FROM generate_series(1, %s) RETURNING id_заказа",
+        (client_id, orders),
+    )
+    order_ids = [r[0] for r in cur.fetchall()]
+    cur.execute(
+        "INSERT INTO изделия (артикул_изделия, наименование, стоимость)"
+        " SELECT 'BENCH-' || g, 'Изделие ' || g, 100 FROM generate_series(1, %s) g RETURNING id_изделия",
+        (per_order,),
+    )
+    product_ids = [r[0] for r in cur.fetchall()]
+    return [(order_ids[i // per_order], product_ids[i % per_order]) for i in range(lines)]
+
+
+def insert_bulk(cur, pairs):
+    cur.execute(
+        "INSERT INTO состав_заказа (id_заказа, id_изделия, цена_фиксированная, количество_изделий)"
+        " SELECT o, p, 100, 2 FROM unnest(%s::int[], %s::int[]) AS t(o, p)",
+        ([o for o, _ in pairs], [p for _, p in pairs]),
+    )
+
+
+def insert_per_line(cur, pairs):
+    for order_id, product_id in pairs:
+        cur.execute(
+            "INSERT INTO состав_заказа (id_заказа, id_изделия, цена_фиксированная, количество_изделий)"
+            " VALUES (%s, %s, 100, 2)",
+            (order_id, product_id),
+        )
+
+
+def run(conn, variant, scenario, lines, per_order):
+    cur = conn.cursor()
+    try:
+        if variant == "row":
+            cur.execute(ROW_TRIGGER_SQL)
+        pairs = prepare(cur, lines, per_order)
+        start = time.perf_counter()
+        scenario(cur, pairs)
+        elapsed = time.perf_counter() - start
+
+        cur.execute(
+            "SELECT COUNT(*) FROM заказы z WHERE z.id_заказа = ANY(%s) AND z.сумма_заказа <> %s",
+            (list({o for o, _ in pairs}), per_order * 200),
+        )
+        assert cur.fetchone()[0] <= 1, "суммы заказов не совпали"
+        return elapsed
+    finally:
+        conn.rollback()
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    per_order = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        print(f"{lines} позиций, по {per_order} в заказе (сек)")
+        print(f"{'':>10} {'FOR EACH ROW':>14} {'STATEMENT':>11}")
+        for name, scenario in (("bulk", insert_bulk), ("per-line", insert_per_line)):
+            row = run(conn, "row", scenario, lines, per_order)
+            stmt = run(conn, "statement", scenario, lines, per_order)
+            print(f"{name:>10} {row:>14.3f} {stmt:>11.3f}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Первая страница списка заказов: sp_search_orders (все строки) против
+sp_search_orders_page (одна страница по ключу) при растущем числе заказов.
+
+Заказы генерируются внутри транзакции, которая в конце откатывается.
+
+    python benchmarks/bench_orders_paging.py [заказов ...]   # по умолчанию 10000 100000
+"""
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+REPEAT = 5
+CASES = {
+    "sp_search_orders": (
+        "SELECT * FROM sp_search_orders(%s, %s, %s, %s, %s)",
+        (None, None, None, None, None),
+    ),
+    "sp_search_orders_page": (
+        "SELECT * FROM sp_search_orders_page(%s, %s, %s, %s, %s, %s, %s, %s)",
+        (None, None, None, None, None, None, None, config.ORDERS_PAGE_SIZE),
+    ),
+    "page + поиск клиента": (
+        "SELECT * FROM sp_search_orders_page(%s, %s, %s, %s, %s, %s, %s, %s)",
+        (None, "а", None, None, None, None, None, config.ORDERS_PAGE_SIZE),
+    ),
+}
+
+
+def generate_orders(cur, total):
+    cur.execute("SELECT COUNT(*) FROM заказы")
+    missing = total - cur.fetchone()[0]
+    if missing <= 0:
+        return
+    cur.execute(
+        """
+        INSERT INTO заказы (id_клиента, id_менеджера, дата_заказа, дата_готовности, статус, сумма_заказа)
+        SELECT k.ids[1 + g %% array_length(k.ids, 1)], NULL,
+               CURRENT_DATE - g %% 3650, CURRENT_DATE - g %% 3650 + 14,
+               'завершен', g %% 1000 * 10
+        FROM generate_series(1, %s) g,
+             (SELECT array_agg(id_клиента) AS ids FROM клиенты) k
+        """,
+        (missing,),
+    )
+    cur.execute("ANALYZE заказы")
+
+
+def timed(cur, query, params):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        cur.execute(query, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        print(f"{'заказов':>8}  " + "  ".join(f"{name:>22}" for name in CASES) + "   (мс, медиана)")
+        for n in sizes:
+            generate_orders(cur, n)
+            times = [timed(cur, *case) for case in CASES.values()]
+            print(f"{n:>8}  " + "  ".join(f"{t:>22.2f}" for t in times))
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Database.call_procedure: обычный запрос против подготовленного (db.prepared)
+на горячих вызовах. Вызовы не меняют данные: заказ и логин несуществующие,
+но разбор, планирование и выполнение процедуры проходят полностью.
+
+    python benchmarks/bench_prepared.py [вызовов] [повторов]   # 2000 5
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import database
+from db.database import Database
+
+CALLS = (
+    ("sp_update_order_status", [-1, "в_работе"]),
+    ("sp_login", ["бенчмарк_нет_такого", "пароль"]),
+)
+
+
+def run(proc_name, params, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        Database.call_procedure(proc_name, params)
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    prepared = database._prepared
+    print(f"{calls} вызовов подряд, медиана из {repeats}, мкс на вызов")
+    print(f"{'процедура':<24} {'обычный':>10} {'PREPARE':>10} {'выигрыш':>9}")
+    try:
+        for proc_name, params in CALLS:
+            results = {}
+            for enabled in (False, True):
+                prepared.enabled = enabled
+                run(proc_name, params, 50)  # прогрев пула и PREPARE
+                results[enabled] = statistics.median(run(proc_name, params, calls) for _ in range(repeats))
+            gain = (1 - results[True] / results[False]) * 100
+            print(f"{proc_name:<24} {results[False]:>10.0f} {results[True]:>10.0f} {gain:>8.0f}%")
+    finally:
+        Database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Память и время разбора строк в режимах Database.fetch_all (db.rows):
+RealDictRow (как было) против записей с __slots__, namedtuple, колонок
+и доменной записи Order. Строки формы списка заказов генерируются на
+сервере (generate_series), данные в таблицах не нужны.
+
+Каждый режим меряется в отдельном процессе: время — выборка и разбор
+(лучшее из 3), память — прирост tracemalloc на удерживаемый результат.
+
+    python benchmarks/bench_row_modes.py [строк]   # 100000
+"""
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ("dict", "record", "namedtuple", "columns", "Order")
+QUERY = """
+    SELECT g AS id_заказа,
+        'Клиент ' || g %% 997 AS клиент,
+        'Менеджер ' || g %% 13 AS менеджер,
+        DATE '2024-01-01' + g %% 365 AS дата_заказа,
+        DATE '2024-01-15' + g %% 365 AS дата_готовности,
+        (ARRAY['принят', 'в_работе', 'выполнен', 'отгружен'])[1 + g %% 4] AS статус_заказа,
+        (g %% 10000)::NUMERIC + 0.5 AS сумма_заказа,
+        (1 + g %% 7)::BIGINT AS позиций_в_заказе,
+        CASE WHEN g %% 11 = 0 THEN 'ПРОСРОЧЕН' ELSE 'В СРОК' END AS состояние_сроков
+    FROM generate_series(1, %s) g
+"""
+
+
+def measure(mode, count):
+    from db.database import Database
+    from db.records import Order
+
+    fetch_mode = Order if mode == "Order" else mode
+    Database.fetch_all("SELECT 1")  # соединение и импорты — вне замера
+
+    best = None
+    for _ in range(3):
+        gc.collect()
+        start = time.perf_counter()
+        rows = Database.fetch_all(QUERY, (count,), fetch_mode)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del rows
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = Database.fetch_all(QUERY, (count,), fetch_mode)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(rows) == count
+    return best * 1000, retained / 1024 / 1024
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        ms, mb = measure(sys.argv[2], int(sys.argv[3]))
+        print(f"{ms} {mb}")
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{count} строк списка заказов (9 колонок)")
+    print(f"{'режим':<12} {'выборка+разбор, мс':>20} {'память, МБ':>12}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, str(count)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        ms, mb = float(out[-2]), float(out[-1])
+        print(f"{mode:<12} {ms:>20.0f} {mb:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
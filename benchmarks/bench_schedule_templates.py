@@ -0,0 +1,91 @@
+"""
+График на год для 500 сотрудников: шаблон 5/2 одной записью отрезков
+(schedule_templates_v23.sql, schedule_ranges_v24.sql) против INSERT на
+сотрудника и день в представление график_работы (цикл меряется на 25
+сотрудниках и пересчитывается на 500).
+Сотрудники для замера создаются отдельной транзакцией (как настоящие,
+уже существующие) и удаляются в конце вместе с графиком; остальное
+откатывается.
+
+    python benchmarks/bench_schedule_templates.py [сотрудников]   # 500
+"""
+import datetime
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+START = datetime.date(2031, 1, 1)
+END = datetime.date(2031, 12, 31)
+LOOP_EMPLOYEES = 25
+
+
+def create_employees(cur, count):
+    cur.execute(
+        "INSERT INTO сотрудники (фио, номер_телефона, должность, login, password_hash)"
+        " SELECT 'Бенчмарк ' || i, 'bench-' || i, 'сборщик', 'bench_' || i, 'x'"
+        " FROM generate_series(1, %s) i RETURNING id_сотрудника",
+        (count,),
+    )
+    return [r[0] for r in cur.fetchall()]
+
+
+def timed(cur, query, params):
+    start = time.perf_counter()
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    return (time.perf_counter() - start) * 1000, rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    days = (END - START).days + 1
+    conn = psycopg2.connect(config.DATABASE_URL)
+    cur = conn.cursor()
+    employees = create_employees(cur, count)
+    conn.commit()
+    try:
+        args = ("5/2", employees, START, END)
+
+        diff_ms, diff = timed(cur, "SELECT COUNT(*) FROM sp_schedule_template_diff(%s, %s, %s, %s)", args)
+        apply_ms, applied = timed(cur, "SELECT * FROM sp_apply_schedule_template(%s, %s, %s, %s)", args)
+        again_ms, again = timed(cur, "SELECT * FROM sp_apply_schedule_template(%s, %s, %s, %s)", args)
+
+        cur.execute("SELECT COUNT(*) FROM график_периоды WHERE id_сотрудника = ANY(%s)", (employees,))
+        runs = cur.fetchone()[0]
+        read_ms, month = timed(
+            cur, "SELECT * FROM sp_график_за_период(%s, %s, %s)",
+            (employees[:1], datetime.date(2031, 6, 1), datetime.date(2031, 6, 30)),
+        )
+
+        cur.execute("DELETE FROM график_периоды WHERE id_сотрудника = ANY(%s)", (employees,))
+        start = time.perf_counter()
+        for emp_id in employees[:LOOP_EMPLOYEES]:
+            for offset in range(days):
+                day = START + datetime.timedelta(days=offset)
+                cur.execute(
+                    "INSERT INTO график_работы (id_сотрудника, дата, статус) VALUES (%s, %s, %s)",
+                    (emp_id, day, "выходной" if day.weekday() >= 5 else "рабочий"),
+                )
+        loop_ms = (time.perf_counter() - start) * 1000 * count / LOOP_EMPLOYEES
+
+        print(f"{count} сотрудников × {days} дн. = {count * days} записей")
+        print(f"  пробный прогон (diff):        {diff_ms:>9.1f} мс  ({diff[0][0]} изменений)")
+        print(f"  шаблон, первая запись:        {apply_ms:>9.1f} мс  ({applied[0][2]} записей)")
+        print(f"  шаблон, повторно (без правок): {again_ms:>8.1f} мс  ({again[0][2]} записей)")
+        print(f"  хранится отрезков:            {runs:>9}")
+        print(f"  месяц одного сотрудника:      {read_ms:>9.1f} мс  ({len(month)} дн.)")
+        print(f"  INSERT на день (оценка):      {loop_ms:>9.1f} мс")
+    finally:
+        conn.rollback()
+        cur.execute("DELETE FROM сотрудники WHERE id_сотрудника = ANY(%s)", (employees,))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
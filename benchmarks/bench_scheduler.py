@@ -0,0 +1,58 @@
+"""
+Автопланирование (business_logic.scheduler.schedule) на синтетических
+задачах: время распределения и сколько задач не успевает к сроку.
+
+    python benchmarks/bench_scheduler.py [задач] [сборщиков]   # 5000 40
+"""
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from business_logic.scheduler import WorkerCalendar, schedule
+
+START = datetime.date(2025, 1, 1)
+HORIZON_DAYS = 365
+
+
+def generate(tasks, workers, rng):
+    calendars = {}
+    for worker_id in range(1, workers + 1):
+        # Пятидневка и случайные отпуска/больничные
+        days = [START + datetime.timedelta(days=i) for i in range(HORIZON_DAYS)]
+        days = [d for d in days if d.weekday() < 5 and rng.random() > 0.05]
+        calendars[worker_id] = WorkerCalendar(worker_id, days)
+    items = [
+        {
+            "id_заготовки": i % 50 + 1,
+            "id_заказа": i,
+            "заготовка": f"Заготовка {i % 50 + 1}",
+            "трудоемкость": rng.choice((0.25, 0.5, 1, 1.5, 2, 3)),
+            "срок": START + datetime.timedelta(days=rng.randint(5, 300)),
+            "id_сотрудника": None,
+            "в_работе": False,
+        }
+        for i in range(tasks)
+    ]
+    return items, calendars
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    items, calendars = generate(tasks, workers, random.Random(0))
+
+    start = time.perf_counter()
+    assignments, late, unscheduled = schedule(items, calendars)
+    elapsed = time.perf_counter() - start
+
+    loads = [c.load for c in calendars.values()]
+    print(f"{tasks} задач, {workers} сборщиков: {elapsed * 1000:.0f} мс")
+    print(f"  назначено {len(assignments)}, опаздывают {len(late)}, не распределены {len(unscheduled)}")
+    print(f"  загрузка сборщиков, смен: {min(loads):.1f} .. {max(loads):.1f}")
+
+
+if __name__ == "__main__":
+    main()
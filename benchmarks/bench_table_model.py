@@ -0,0 +1,117 @@
+"""
+Заполнение таблицы заказов: QTableWidget (как было — QTableWidgetItem на
+каждую ячейку, цвет строки заранее) против RecordTableView (модель + прокси).
+
+Каждый замер идет в отдельном процессе, чтобы RSS не смешивались.
+Рендер offscreen, БД не нужна — строки генерируются.
+
+    python benchmarks/bench_table_model.py [строк ...]   # по умолчанию 10000 100000
+"""
+import datetime
+import os
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ["принят", "в_работе", "выполнен", "отменен", "отгружен"]
+COLORS = {"выполнен": "#E8F5E9", "отменен": "#FFEBEE", "в_работе": "#E3F2FD"}
+
+
+def make_rows(n):
+    day = datetime.date(2024, 1, 1)
+    return [
+        {
+            "id_заказа": i,
+            "дата_заказа": day + datetime.timedelta(days=i % 365),
+            "клиент": f"Клиент {i % 997}",
+            "статус": STATUSES[i % len(STATUSES)],
+            "сумма_заказа": Decimal(i % 10000) + Decimal("0.50"),
+            "менеджер": f"Менеджер {i % 13}",
+        }
+        for i in range(n)
+    ]
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def fill_widget(rows):
+    from PyQt6.QtGui import QColor
+    from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
+
+    table = QTableWidget()
+    table.setColumnCount(6)
+    table.setRowCount(0)
+    for i, r in enumerate(rows):
+        table.insertRow(i)
+        cells = [
+            str(r["id_заказа"]), str(r["дата_заказа"]), r["клиент"],
+            r["статус"], f"{r['сумма_заказа']:,.2f} ₽", r["менеджер"],
+        ]
+        color = COLORS.get(r["статус"])
+        for col, text in enumerate(cells):
+            item = QTableWidgetItem(text)
+            if color:
+                item.setBackground(QColor(color))
+            table.setItem(i, col, item)
+    return table
+
+
+def fill_model(rows):
+    from ui.widgets.record_table import Column, RecordTableView
+
+    table = RecordTableView([
+        Column("ID", "id_заказа"),
+        Column("Дата", "дата_заказа"),
+        Column("Клиент", "клиент"),
+        Column("Статус", "статус"),
+        Column("Сумма", "сумма_заказа", fmt=lambda v, r: f"{v:,.2f} ₽"),
+        Column("Менеджер", "менеджер"),
+    ], row_style=lambda r: (COLORS.get(r["статус"]), None))
+    table.set_rows(rows)
+    return table
+
+
+def measure(kind, n):
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication([])
+    rows = make_rows(n)
+    base = rss_mb()
+    fill = fill_widget if kind == "widget" else fill_model
+    start = time.perf_counter()
+    table = fill(rows)
+    table.resize(1000, 700)
+    table.show()
+    app.processEvents()  # первая отрисовка видимых строк
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed:.4f} {rss_mb() - base:.1f}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        measure(sys.argv[2], int(sys.argv[3]))
+        return
+
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'строк':>8} {'вариант':<16} {'время, с':>9} {'+RSS, МБ':>9}")
+    for n in sizes:
+        for kind, label in (("widget", "QTableWidget"), ("model", "RecordTableView")):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", kind, str(n)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            print(f"{n:>8} {label:<16} {float(out[0]):>9.3f} {float(out[1]):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Взятие задачи в работу для заготовки с 5, 50 и 500 строками норм расхода:
+прежний цикл (SELECT + UPDATE на каждый материал, fix_error_message.sql)
+против резерва одним оператором (task_materials_set_based_v19.sql).
+Все изменения делаются в транзакции и откатываются.
+
+    python benchmarks/bench_task_materials.py [повторов]   # 50
+"""
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+LINE_COUNTS = (5, 50, 500)
+
+# Прежняя реализация (fix_error_message.sql) на составном ключе — для сравнения
+LOOP_PROCEDURE_SQL = """
+CREATE OR REPLACE PROCEDURE pg_temp.take_task_loop(p_id_заготовки INTEGER, p_id_заказа INTEGER, p_id_сборщика INTEGER)
+LANGUAGE plpgsql AS $$
+DECLARE
+    rec RECORD;
+    v_plan_qty INTEGER;
+    v_status VARCHAR;
+    v_mat_name VARCHAR;
+    v_required_qty INTEGER;
+    v_stock_qty INTEGER;
+BEGIN
+    SELECT плановое_количество, статус INTO v_plan_qty, v_status
+    FROM план_заготовок WHERE id_заготовки = p_id_заготовки AND id_заказа = p_id_заказа;
+    IF v_status != 'принято' THEN
+        RAISE EXCEPTION 'Задача уже в работе или выполнена/отменена';
+    END IF;
+    FOR rec IN SELECT id_материала, количество_материала FROM расход_материалов WHERE id_заготовки = p_id_заготовки
+    LOOP
+        v_required_qty := rec.количество_материала * v_plan_qty;
+        SELECT количество_на_складе, наименование INTO v_stock_qty, v_mat_name
+        FROM материалы WHERE id_материала = rec.id_материала;
+        IF v_stock_qty < v_required_qty THEN
+            RAISE EXCEPTION 'Недостаточно материала "%" (Нужно: %, Есть: %)', v_mat_name, v_required_qty, v_stock_qty;
+        END IF;
+    END LOOP;
+    FOR rec IN SELECT id_материала, количество_материала FROM расход_материалов WHERE id_заготовки = p_id_заготовки
+    LOOP
+        UPDATE материалы
+        SET количество_на_складе = количество_на_складе - (rec.количество_материала * v_plan_qty)
+        WHERE id_материала = rec.id_материала;
+    END LOOP;
+    UPDATE план_заготовок SET статус = 'в_работе', id_сотрудника = p_id_сборщика
+    WHERE id_заготовки = p_id_заготовки AND id_заказа = p_id_заказа;
+END;
+$$;
+"""
+
+
+def prepare(cur, lines):
+    """Заготовка с lines материалами и задача по ней; возвращает (заготовка, заказ, сборщик)"""
+    cur.execute(
+        "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе)"
+        " SELECT 'BENCH-' || %s || '-' || g, 'Материал ' || g, 1000000000 FROM generate_series(1, %s) g"
+        " RETURNING id_материала",
+        (lines, lines),
+    )
+    materials = [r[0] for r in cur.fetchall()]
+    cur.execute(
+        "INSERT INTO заготовки (артикул_заготовки, наименование) VALUES (%s, 'Бенчмарк') RETURNING id_заготовки",
+        (f"BENCH-{lines}",),
+    )
+    blank = cur.fetchone()[0]
+    cur.execute(
+        "INSERT INTO расход_материалов (id_заготовки, id_материала, количество_материала)"
+        " SELECT %s, m, 1 FROM unnest(%s::int[]) m",
+        (blank, materials),
+    )
+    cur.execute("SELECT id_клиента FROM клиенты LIMIT 1")
+    cur.execute("INSERT INTO заказы (id_клиента) VALUES (%s) RETURNING id_заказа", (cur.fetchone()[0],))
+    order = cur.fetchone()[0]
+    cur.execute(
+        "INSERT INTO план_заготовок (id_заготовки, id_заказа, плановое_количество, дата_план)"
+        " VALUES (%s, %s, 10, CURRENT_DATE)",
+        (blank, order),
+    )
+    cur.execute("SELECT id_сотрудника FROM сотрудники WHERE должность = 'сборщик' LIMIT 1")
+    return blank, order, cur.fetchone()[0]
+
+
+def measure(cur, procedure, task, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cur.execute(f"CALL {procedure}(%s, %s, %s)", task)
+        samples.append((time.perf_counter() - start) * 1000)
+        cur.execute(
+            "UPDATE план_заготовок SET статус = 'принято', id_сотрудника = NULL"
+            " WHERE id_заготовки = %s AND id_заказа = %s",
+            task[:2],
+        )
+    return statistics.median(samples)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        cur = conn.cursor()
+        cur.execute(LOOP_PROCEDURE_SQL)
+        print(f"{'строк':>6} {'цикл, мс':>10} {'UPDATE FROM, мс':>16}")
+        for lines in LINE_COUNTS:
+            task = prepare(cur, lines)
+            loop = measure(cur, "pg_temp.take_task_loop", task, repeat)
+            set_based = measure(cur, "sp_взять_задачу_в_работу", task, repeat)
+            print(f"{lines:>6} {loop:>10.2f} {set_based:>16.2f}")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
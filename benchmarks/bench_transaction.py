@@ -0,0 +1,60 @@
+"""
+Создание закупки с N позициями: как было (insert_returning и цикл
+Database.execute — каждый шаг на своем соединении со своим коммитом)
+против Database.transaction() с execute_values и одним коммитом.
+Созданные закупки удаляются.
+
+    python benchmarks/bench_transaction.py [позиций] [повторов]   # 50 20
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import Database
+
+SUPPLIER = "БЕНЧМАРК Транзакция"
+HEAD = "INSERT INTO закупки_материалов (поставщик) VALUES (%s) RETURNING id_закупки"
+LINE = "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES (%s, %s, %s, %s)"
+
+
+def per_statement(materials):
+    purchase_id = Database.insert_returning(HEAD, (SUPPLIER,))["id_закупки"]
+    for material in materials:
+        Database.execute(LINE, (purchase_id, material, 1, 10))
+
+
+def in_transaction(materials):
+    with Database.transaction() as tx:
+        purchase_id = tx.fetch_one(HEAD, (SUPPLIER,))["id_закупки"]
+        tx.execute_values(
+            "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES %s",
+            [(purchase_id, material, 1, 10) for material in materials],
+        )
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    materials = [
+        r["id_материала"]
+        for r in Database.fetch_all("SELECT id_материала FROM материалы ORDER BY id_материала LIMIT %s", (lines,))
+    ]
+    print(f"Закупка с {len(materials)} позициями (медиана из {repeats}, мс)")
+    try:
+        for name, create in (("по одному запросу", per_statement), ("transaction()", in_transaction)):
+            create(materials)  # прогрев пула
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                create(materials)
+                runs.append((time.perf_counter() - start) * 1000)
+            print(f"  {name:<20} {statistics.median(runs):>8.1f}")
+    finally:
+        Database.execute("DELETE FROM закупки_материалов WHERE поставщик = %s", (SUPPLIER,))
+        Database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+MRP: потребность открытого производства в материалах.
+
+Спецификации хранятся разреженными матрицами (изделие → заготовка,
+заготовка → материал), потребность — плотной матрицей «дата × позиция».
+
+Потребность считается от открытых заданий план_заготовок, а не от позиций
+заказов: при создании заказа готовые изделия уже зарезервированы со склада,
+а на нехватку созданы задания (sp_create_order_with_items); задание в работе
+уже списало свои материалы (sp_взять_задачу_в_работу). Поэтому:
+
+    невыполненный остаток заданий «принято»/«просрочено» (заготовки)
+        → материалы (v_нормы_расхода) → минус остаток (в порядке сроков)
+        → нехватка
+
+Остаток списывается на самые ранние сроки, поэтому для каждого материала
+известна дата, к которой он понадобится впервые (нужно_к). explode —
+полное разузлование изделия → заготовки → материалы для произвольной
+потребности в изделиях (см. benchmarks/bench_mrp.py).
+
+    from business_logic.mrp import material_shortages
+    for row in material_shortages():
+        print(row["наименование"], row["нехватка"], row["нужно_к"])
+"""
+import numpy as np
+
+from db.database import Database
+
+# Задания, материалы которых еще не списаны
+OPEN_TASK_STATUSES = ("принято", "просрочено")
+
+
+class SparseBOM:
+    """
+    Разреженная матрица спецификации в формате COO (строка — родитель,
+    колонка — компонент, значение — количество на единицу родителя).
+    Элементы отсортированы по колонке, чтобы умножение сводилось
+    к одному np.add.reduceat.
+    """
+
+    __slots__ = ("rows", "cols", "vals", "shape", "_targets", "_starts")
+
+    def __init__(self, rows, cols, vals, shape):
+        order = np.argsort(cols, kind="stable")
+        self.rows = np.asarray(rows, dtype=np.intp)[order]
+        self.cols = np.asarray(cols, dtype=np.intp)[order]
+        self.vals = np.asarray(vals, dtype=np.float64)[order]
+        self.shape = shape
+        self._targets, self._starts = np.unique(self.cols, return_index=True)
+
+    @classmethod
+    def from_ids(cls, parent_ids, component_ids, qty, parents, components):
+        """Строит матрицу по id; parents/components — отсортированные массивы id (индексы осей)"""
+        parent_ids = np.asarray(parent_ids, dtype=np.int64)
+        component_ids = np.asarray(component_ids, dtype=np.int64)
+        qty = np.asarray(qty, dtype=np.float64)
+        rows = np.searchsorted(parents, parent_ids)
+        cols = np.searchsorted(components, component_ids)
+        # Позиции, которых нет в справочниках, отбрасываем
+        known = (rows < len(parents)) & (cols < len(components))
+        known[known] &= (parents[rows[known]] == parent_ids[known]) & (components[cols[known]] == component_ids[known])
+        return cls(rows[known], cols[known], qty[known], (len(parents), len(components)))
+
+    def rmatmul(self, dense):
+        """dense (T × родители) @ self → T × компоненты"""
+        out = np.zeros((dense.shape[0], self.shape[1]))
+        if self.vals.size:
+            contrib = dense[:, self.rows] * self.vals
+            out[:, self._targets] = np.add.reduceat(contrib, self._starts, axis=1)
+        return out
+
+
+def net_requirements(gross, on_hand):
+    """
+    Чистая потребность по срокам: gross (T × n) упорядочен по датам,
+    остаток on_hand (n) покрывает сначала самые ранние сроки.
+    """
+    covered = np.maximum(np.cumsum(gross, axis=0) - np.maximum(on_hand, 0), 0)
+    return np.diff(covered, axis=0, prepend=0)
+
+
+def explode(demand, product_stock, blank_stock, material_stock, product_bom, blank_bom):
+    """
+    Разузлование по всем уровням.
+
+    demand — T × изделия (строки по возрастанию даты), *_stock — остатки
+    по осям, product_bom — изделия × заготовки, blank_bom — заготовки × материалы.
+    Возвращает словарь матриц T × позиции: валовая и чистая потребность
+    по заготовкам и материалам.
+    """
+    net_products = net_requirements(demand, product_stock)
+    gross_blanks = product_bom.rmatmul(net_products)
+    net_blanks = net_requirements(gross_blanks, blank_stock)
+    gross_materials = blank_bom.rmatmul(net_blanks)
+    net_materials = net_requirements(gross_materials, material_stock)
+    return {
+        "изделия": net_products,
+        "заготовки_брутто": gross_blanks,
+        "заготовки": net_blanks,
+        "материалы_брутто": gross_materials,
+        "материалы": net_materials,
+    }
+
+
+def first_need(net, dates):
+    """Дата первой ненулевой чистой потребности по каждой колонке (NaT, если нет)"""
+    result = np.full(net.shape[1], np.datetime64("NaT"), dtype="datetime64[D]")
+    if not len(dates):
+        return result
+    need = net > 0
+    first = np.argmax(need, axis=0)
+    has = need.any(axis=0)
+    result[has] = dates[first[has]]
+    return result
+
+
+def _ids(rows, field):
+    return np.fromiter((r[field] for r in rows), dtype=np.int64, count=len(rows))
+
+
+def _values(rows, field):
+    return np.fromiter((r[field] or 0 for r in rows), dtype=np.float64, count=len(rows))
+
+
+def load_demand(blanks):
+    """Невыполненный остаток открытых заданий: (даты, T × заготовки) по дате плана"""
+    rows = Database.fetch_all(
+        """
+        SELECT дата_план AS срок, id_заготовки,
+               SUM(GREATEST(плановое_количество - фактическое_количество, 0)) AS количество
+        FROM план_заготовок
+        WHERE статус IN %s
+        GROUP BY 1, 2
+        """,
+        (OPEN_TASK_STATUSES,),
+    )
+    due = np.array([r["срок"] for r in rows], dtype="datetime64[D]")
+    dates, date_idx = np.unique(due, return_inverse=True)
+    demand = np.zeros((len(dates), len(blanks)))
+    np.add.at(demand, (date_idx, np.searchsorted(blanks, _ids(rows, "id_заготовки"))), _values(rows, "количество"))
+    return dates, demand
+
+
+def material_requirements():
+    """
+    Потребность в материалах под открытые задания производства.
+
+    Возвращает список словарей по всем материалам: id_материала,
+    артикул_материала, наименование, единица_измерения, потребность
+    (валовая: то, что спишут задания при взятии в работу), на_складе,
+    нехватка, нужно_к (datetime.date первой нехватки или None).
+    """
+    blanks = Database.fetch_all("SELECT id_заготовки FROM заготовки ORDER BY id_заготовки")
+    materials = Database.fetch_all(
+        """
+        SELECT id_материала, артикул_материала, наименование, единица_измерения, количество_на_складе
+        FROM материалы ORDER BY id_материала
+        """
+    )
+    blank_ids, material_ids = _ids(blanks, "id_заготовки"), _ids(materials, "id_материала")
+
+    # расход_материалов, дополненный парами из состав_заготовки
+    bm = Database.fetch_all("SELECT id_заготовки, id_материала, количество_материала FROM v_нормы_расхода")
+    blank_bom = SparseBOM.from_ids(
+        _ids(bm, "id_заготовки"), _ids(bm, "id_материала"), _values(bm, "количество_материала"),
+        blank_ids, material_ids)
+
+    dates, demand = load_demand(blank_ids)
+    material_stock = _values(materials, "количество_на_складе")
+    gross_materials = blank_bom.rmatmul(demand)
+    net_materials = net_requirements(gross_materials, material_stock)
+
+    gross = gross_materials.sum(axis=0)
+    shortage = net_materials.sum(axis=0)
+    need_by = first_need(net_materials, dates)
+    return [
+        {
+            "id_материала": m["id_материала"],
+            "артикул_материала": m["артикул_материала"],
+            "наименование": m["наименование"],
+            "единица_измерения": m["единица_измерения"],
+            "потребность": int(gross[i]),
+            "на_складе": int(material_stock[i]),
+            "нехватка": int(shortage[i]),
+            "нужно_к": need_by[i].item(),
+        }
+        for i, m in enumerate(materials)
+    ]
+
+
+def material_shortages():
+    """Материалы с нехваткой (см. material_requirements), по возрастанию нужно_к"""
+    rows = [r for r in material_requirements() if r["нехватка"] > 0]
+    rows.sort(key=lambda r: (r["нужно_к"], -r["нехватка"]))
+    return rows
@@ -261,11 +261,9 @@ class PDFGenerator:
         )
 
         query = """
-            SELECT дата, статус FROM график_работы 
-            WHERE id_сотрудника = %s AND дата BETWEEN %s AND %s
-            ORDER BY дата
+            SELECT дата, статус FROM sp_график_за_период(%s, %s, %s)
         """
-        schedule = Database.fetch_all(query, (user_id, start_date, end_date))
+        schedule = Database.fetch_all(query, ([user_id], start_date, end_date))
 
         # --- РИСОВАНИЕ ---
         c = self.c
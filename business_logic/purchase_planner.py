@@ -0,0 +1,46 @@
+"""
+Автоматические предложения закупок.
+
+Потребность открытых заданий производства считает business_logic.mrp,
+остальное — в БД (purchase_proposals_v16.sql, purchase_drafts_supplier_v25.sql):
+учет минимального остатка и уже заказанного, поставщик из последней
+закупки, черновики одной транзакцией. Строки без поставщика или цены
+помечаются замечанием и в черновики не попадают.
+
+    rows = propose_purchases()            # предпросмотр
+    result = create_purchase_drafts()     # {status, message, purchase_ids}
+"""
+from psycopg2.extras import Json
+
+from business_logic.mrp import material_requirements
+from db.database import Database
+
+
+def requirements_payload():
+    """Потребность по материалам в формате sp_purchase_proposals"""
+    return [
+        {
+            "id_материала": r["id_материала"],
+            "потребность": r["потребность"],
+            "нужно_к": r["нужно_к"].isoformat() if r["нужно_к"] else None,
+        }
+        for r in material_requirements()
+        if r["потребность"] > 0
+    ]
+
+
+def propose_purchases(requirements=None):
+    """Что и у кого заказать: строки sp_purchase_proposals, сгруппированные по поставщику"""
+    if requirements is None:
+        requirements = requirements_payload()
+    return Database.fetch_all("SELECT * FROM sp_purchase_proposals(%s)", (Json(requirements),))
+
+
+def create_purchase_drafts(requirements=None):
+    """
+    Создает черновики закупок (по одной на поставщика) в одной транзакции.
+    status = 'WARNING', если часть строк пропущена (нет поставщика или цены).
+    """
+    if requirements is None:
+        requirements = requirements_payload()
+    return Database.call_procedure("sp_create_purchase_drafts", [Json(requirements)])
@@ -0,0 +1,172 @@
+"""
+Автопланирование производства по график_работы.
+
+Задачи план_заготовок, еще не взятые в работу, распределяются по сборщикам
+и дням эвристикой с очередью приоритетов:
+
+  * задачи извлекаются по раннему сроку (EDD); срок — день перед
+    готовностью заказа, при равных сроках сначала более трудоемкие;
+  * задача отдается сборщику, который закончит ее раньше всех по своим
+    рабочим дням, при равенстве — наименее загруженному;
+  * задачи в работе сначала занимают мощность своих сборщиков.
+
+Трудоемкость — оставшееся количество / заготовки.норма_в_смену (в сменах).
+Рабочий день — статус 'рабочий' в график_работы; дни без записи в графике
+по умолчанию считаются рабочими с понедельника по пятницу.
+
+    plan = build_schedule()
+    plan["назначения"], plan["опаздывают"], plan["не_распределены"]
+    apply_schedule(plan["назначения"])   # одним вызовом в БД
+"""
+import datetime
+import heapq
+import math
+
+from psycopg2.extras import Json
+
+from db.database import Database
+
+OPEN_TASK_STATUSES = ("принято", "просрочено")
+# Запас горизонта планирования после самого позднего срока
+HORIZON_SLACK_DAYS = 60
+EPS = 1e-9
+
+
+class WorkerCalendar:
+    """Рабочие дни сборщика и то, насколько они уже заняты"""
+
+    __slots__ = ("worker_id", "days", "position", "used", "load")
+
+    def __init__(self, worker_id, days):
+        self.worker_id = worker_id
+        self.days = days  # рабочие дни по возрастанию
+        self.position = 0  # первый день со свободной мощностью
+        self.used = 0.0  # занятая доля этого дня
+        self.load = 0.0  # всего назначено смен
+
+    def finish_index(self, work):
+        """Индекс дня, в который закончится работа (в сменах), или None, если не помещается"""
+        end = self.position + max(math.ceil(self.used + work - EPS), 1) - 1
+        return end if end < len(self.days) else None
+
+    def book(self, work):
+        total = self.used + work
+        whole = math.floor(total + EPS)
+        self.position += whole
+        self.used = max(total - whole, 0.0)
+        self.load += work
+
+
+def schedule(tasks, calendars):
+    """
+    Распределяет задачи по календарям сборщиков.
+
+    tasks — словари с ключами id_заготовки, id_заказа, заготовка,
+    трудоемкость, срок, id_сотрудника, в_работе; calendars — {id: WorkerCalendar}.
+    Возвращает (назначения, опаздывают, не_распределены).
+    """
+    queue = []
+    for i, task in enumerate(tasks):
+        if task["в_работе"]:
+            calendar = calendars.get(task["id_сотрудника"])
+            if calendar is not None:
+                calendar.book(task["трудоемкость"])
+        else:
+            heapq.heappush(queue, (task["срок"], -task["трудоемкость"], i))
+
+    assignments, late, unscheduled = [], [], []
+    while queue:
+        _, _, i = heapq.heappop(queue)
+        task = tasks[i]
+        best = None
+        for calendar in calendars.values():
+            end = calendar.finish_index(task["трудоемкость"])
+            if end is None:
+                continue
+            key = (calendar.days[end], calendar.load, calendar.worker_id)
+            if best is None or key < best[0]:
+                best = (key, calendar)
+        if best is None:
+            unscheduled.append(task)
+            continue
+
+        (finish, _, _), calendar = best
+        calendar.book(task["трудоемкость"])
+        assignment = {
+            "id_заготовки": task["id_заготовки"],
+            "id_заказа": task["id_заказа"],
+            "id_сотрудника": calendar.worker_id,
+            "дата_план": finish,
+        }
+        assignments.append(assignment)
+        if finish > task["срок"]:
+            late.append(dict(assignment, заготовка=task["заготовка"], срок=task["срок"],
+                             опоздание=(finish - task["срок"]).days))
+    return assignments, late, unscheduled
+
+
+def load_tasks():
+    """Задачи к планированию и задачи в работе (занимают своих сборщиков)"""
+    rows = Database.fetch_all(
+        """
+        SELECT pz.id_заготовки, pz.id_заказа, pz.id_сотрудника, z.наименование AS заготовка,
+               pz.статус = 'в_работе' AS в_работе,
+               GREATEST(pz.плановое_количество - pz.фактическое_количество, 0)::FLOAT
+                   / z.норма_в_смену AS трудоемкость,
+               COALESCE(zk.дата_готовности - 1, pz.дата_план) AS срок
+        FROM план_заготовок pz
+        JOIN заготовки z ON z.id_заготовки = pz.id_заготовки
+        JOIN заказы zk ON zk.id_заказа = pz.id_заказа
+        WHERE pz.статус IN %s OR (pz.статус = 'в_работе' AND pz.id_сотрудника IS NOT NULL)
+        """,
+        (OPEN_TASK_STATUSES,),
+    )
+    return [dict(r) for r in rows]
+
+
+def load_calendars(start, end, assume_weekdays=True):
+    """Календари действующих сборщиков на дни [start, end]"""
+    workers = [
+        r["id_сотрудника"]
+        for r in Database.fetch_all(
+            "SELECT id_сотрудника FROM сотрудники WHERE должность = 'сборщик' AND дата_увольнения IS NULL"
+            " ORDER BY id_сотрудника"
+        )
+    ]
+    marked = {
+        (r["id_сотрудника"], r["дата"]): r["статус"]
+        for r in Database.fetch_all(
+            "SELECT id_сотрудника, дата, статус FROM sp_график_за_период(%s, %s, %s)",
+            (workers, start, end),
+        )
+    }
+    horizon = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    calendars = {}
+    for worker_id in workers:
+        days = []
+        for day in horizon:
+            status = marked.get((worker_id, day))
+            if status == "рабочий" or (status is None and assume_weekdays and day.weekday() < 5):
+                days.append(day)
+        calendars[worker_id] = WorkerCalendar(worker_id, days)
+    return calendars
+
+
+def build_schedule(start=None, assume_weekdays=True):
+    """
+    Строит план с даты start (по умолчанию сегодня), ничего не записывая.
+    Возвращает словарь: назначения, опаздывают (с опозданием в днях),
+    не_распределены (не нашлось рабочих дней в горизонте).
+    """
+    start = start or datetime.date.today()
+    tasks = load_tasks()
+    latest = max((t["срок"] for t in tasks), default=start)
+    end = max(latest, start) + datetime.timedelta(days=HORIZON_SLACK_DAYS)
+    assignments, late, unscheduled = schedule(tasks, load_calendars(start, end, assume_weekdays))
+    return {"назначения": assignments, "опаздывают": late, "не_распределены": unscheduled}
+
+
+def apply_schedule(assignments):
+    """Записывает все назначения одним вызовом sp_apply_production_schedule"""
+    payload = [dict(a, дата_план=a["дата_план"].isoformat()) for a in assignments]
+    return Database.call_procedure("sp_apply_production_schedule", [Json(payload)])
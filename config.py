@@ -13,6 +13,29 @@ class Config:
     DB_HOST = os.getenv("DB_HOST")
     DB_PORT = os.getenv("DB_PORT")
 
+    # Пул соединений (время — в секундах)
+    DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+    DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300))
+    DB_POOL_HEALTHCHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTHCHECK_INTERVAL", 30))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    # PREPARE для вызовов процедур (db.prepared); 0 — обычные запросы
+    DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") != "0"
+
+    # Задержка поиска при вводе (мс)
+    SEARCH_DEBOUNCE_MS = int(os.getenv("SEARCH_DEBOUNCE_MS", 300))
+
+    # Размер страницы при подгрузке списка заказов
+    ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", 200))
+    # Размер страницы списка закупок
+    PURCHASES_PAGE_SIZE = int(os.getenv("PURCHASES_PAGE_SIZE", 200))
+
+    # Вкладки главного окна: пауза перед фоновой подгрузкой следующей
+    # вкладки (мс, отрицательное значение — не подгружать) и целевое время
+    # до готовности окна после входа (мс)
+    TAB_PREFETCH_DELAY_MS = int(os.getenv("TAB_PREFETCH_DELAY_MS", 200))
+    TTI_TARGET_MS = int(os.getenv("TTI_TARGET_MS", 1000))
+
     # Строка подключения для psycopg2
     @property
     def DATABASE_URL(self):
@@ -0,0 +1,145 @@
+"""
+Фоновое выполнение запросов к БД для Qt-интерфейса.
+
+Вызовы Database выполняются в QThreadPool, результат возвращается в GUI-поток
+через сигнал. Для каждой пары (виджет, ключ) ведется счетчик поколений:
+новый запрос делает предыдущий устаревшим — его результат отбрасывается,
+а выполняющийся SQL прерывается через connection.cancel().
+
+    run_async(self, Database.fetch_all, query, params,
+              on_result=self.populate_table, key="load")
+"""
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from db.cancellation import CancelToken, bind_token
+
+
+class _TaskSignals(QObject):
+    done = pyqtSignal(object, object, object)  # task, result, error
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, owner_key, generation, fn, args, kwargs, on_result, on_error):
+        super().__init__()
+        self.owner_key = owner_key
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_result = on_result
+        self.on_error = on_error
+        self.owner = None
+        self.token = CancelToken()
+        self.signals = _TaskSignals()
+
+    def run(self):
+        result, error = None, None
+        if not self.token.cancelled:
+            with bind_token(self.token):
+                try:
+                    result = self.fn(*self.args, **self.kwargs)
+                except Exception as e:
+                    error = e
+        self.signals.done.emit(self, result, error)
+
+
+class AsyncExecutor(QObject):
+    """Очередь фоновых запросов с поколениями на каждый виджет"""
+
+    # Все запущенные запросы вернулись и их результаты разосланы
+    idle = pyqtSignal()
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._generations = {}
+        self._running = {}  # (owner, key) -> последняя запущенная задача
+        self._tasks = set()  # держим ссылки, пока задача не вернулась
+
+    def submit(self, owner, fn, *args, on_result=None, on_error=None, key="default", **kwargs):
+        """
+        Запускает fn(*args, **kwargs) в фоне. on_result/on_error вызываются
+        в GUI-потоке и только если за это время для (owner, key) не был
+        запущен более новый запрос. Возвращает номер поколения.
+        """
+        owner_key = (id(owner), key)
+        generation = self._generations.get(owner_key, 0) + 1
+        self._generations[owner_key] = generation
+
+        previous = self._running.get(owner_key)
+        if previous is not None:
+            previous.token.cancel()
+
+        task = _QueryTask(owner_key, generation, fn, args, kwargs, on_result, on_error)
+        task.owner = owner
+        task.setAutoDelete(False)
+        task.signals.done.connect(self._on_done)
+        self._running[owner_key] = task
+        self._tasks.add(task)
+        self.pool.start(task)
+        return generation
+
+    def cancel(self, owner, key="default"):
+        """Делает текущий запрос (owner, key) устаревшим и прерывает его"""
+        owner_key = (id(owner), key)
+        self._generations[owner_key] = self._generations.get(owner_key, 0) + 1
+        task = self._running.pop(owner_key, None)
+        if task is not None:
+            task.token.cancel()
+
+    def is_pending(self, owner, key="default"):
+        return (id(owner), key) in self._running
+
+    def has_pending(self):
+        """Есть ли незавершенные запросы (включая прерванные, но еще не вернувшиеся)"""
+        return bool(self._tasks)
+
+    def wait_for_done(self, msecs=-1):
+        return self.pool.waitForDone(msecs)
+
+    def _on_done(self, task, result, error):
+        self._tasks.discard(task)
+        owner_key = task.owner_key
+        if self._running.get(owner_key) is task:
+            del self._running[owner_key]
+
+        self._deliver(task, result, error)
+        # Обработчик результата мог запустить следующий запрос
+        if not self._tasks:
+            self.idle.emit()
+
+    def _deliver(self, task, result, error):
+        owner_key = task.owner_key
+        owner, task.owner = task.owner, None
+        if task.token.cancelled or self._generations.get(owner_key) != task.generation:
+            return  # устаревший результат
+        if isinstance(owner, sip.simplewrapper) and sip.isdeleted(owner):
+            return  # виджет уже уничтожен
+
+        if error is not None:
+            if task.on_error:
+                task.on_error(error)
+            else:
+                print(f"❌ Ошибка фонового запроса: {error}")
+        elif task.on_result:
+            task.on_result(result)
+
+
+_executor = None
+
+
+def executor():
+    """Общий экземпляр AsyncExecutor (создается в GUI-потоке при первом вызове)"""
+    global _executor
+    if _executor is None:
+        _executor = AsyncExecutor()
+    return _executor
+
+
+def run_async(owner, fn, *args, on_result=None, on_error=None, key="default", **kwargs):
+    return executor().submit(
+        owner, fn, *args, on_result=on_result, on_error=on_error, key=key, **kwargs
+    )
@@ -0,0 +1,60 @@
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class QueryCancelled(Exception):
+    """Запрос отменен, потому что его результат больше не нужен"""
+
+
+class CancelToken:
+    """
+    Признак отмены фоновой задачи.
+    Database привязывает к нему соединение, взятое из пула в этом потоке,
+    чтобы cancel() мог прервать уже выполняющийся запрос.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self.cancelled = False
+
+    def attach(self, conn):
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelled()
+            self._conn = conn
+
+    def detach(self):
+        with self._lock:
+            self._conn = None
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None and not self._conn.closed:
+                try:
+                    self._conn.cancel()
+                except Exception:
+                    pass
+
+
+def current_token():
+    """Токен задачи, выполняемой в текущем потоке (или None)"""
+    return getattr(_local, "token", None)
+
+
+def is_cancelled():
+    token = current_token()
+    return token is not None and token.cancelled
+
+
+@contextmanager
+def bind_token(token):
+    """Привязывает токен к текущему потоку на время выполнения задачи"""
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = None
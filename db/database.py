@@ -1,12 +1,84 @@
 import os
 import sys
+import threading
+from contextlib import contextmanager
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
 # Добавляем путь к конфигу
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import config
+from db.cancellation import current_token, is_cancelled
+from db.pool import ConnectionPool
+from db.prepared import PreparedStatements, plain_query
+from db.rows import decode
+
+_pool = None
+_pool_lock = threading.Lock()
+_prepared = PreparedStatements(config.DB_PREPARED_STATEMENTS)
+
+
+class Transaction:
+    """
+    Единица работы на одном соединении (см. Database.transaction).
+    Методы повторяют Database, но не коммитят и не глотают ошибки:
+    исключение откатывает весь блок.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        """Выполняет запрос, возвращает число затронутых строк"""
+        with self.conn.cursor() as cur:
+            cur.execute(query, params)
+            return cur.rowcount
+
+    def executemany(self, query, params_seq):
+        """Один запрос для каждого набора параметров (без лишних коммитов)"""
+        with self.conn.cursor() as cur:
+            cur.executemany(query, params_seq)
+            return cur.rowcount
+
+    def execute_values(self, query, argslist, template=None, page_size=100, fetch=False):
+        """
+        Пакетная вставка: INSERT ... VALUES %s раскрывается в многострочный
+        VALUES (psycopg2.extras.execute_values). fetch=True — строки RETURNING.
+        """
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            return execute_values(cur, query, argslist, template, page_size, fetch)
+
+    def fetch_one(self, query, params=None):
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            return cur.fetchone()
+
+    def fetch_all(self, query, params=None, mode="dict"):
+        if mode == "dict":
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(query, params)
+                return cur.fetchall()
+        with self.conn.cursor() as cur:
+            cur.execute(query, params)
+            return decode([c.name for c in cur.description], cur.fetchall(), mode)
+
+    def call_procedure(self, proc_name, params=None):
+        """
+        Как Database.call_procedure, но ответ со status = 'ERROR' поднимает
+        TransactionError, чтобы откатить и предыдущие шаги блока.
+        """
+        result = self.fetch_one(plain_query(proc_name, len(params or [])), params)
+        if not result:
+            raise TransactionError("Процедура ничего не вернула")
+        result = dict(result)
+        if result.get("status") == "ERROR":
+            raise TransactionError(result.get("message") or "Ошибка процедуры")
+        return result
+
+
+class TransactionError(Exception):
+    """Шаг транзакции вернул ошибку (ответ процедуры со status = 'ERROR')"""
 
 
 class Database:
@@ -14,59 +86,162 @@ class Database:
 
     @staticmethod
     def connect():
+        """Отдельное (не пуловое) соединение — для скриптов и тестов"""
         return psycopg2.connect(config.DATABASE_URL)
 
+    @staticmethod
+    def pool():
+        global _pool
+        if _pool is None:
+            with _pool_lock:
+                if _pool is None:
+                    _pool = ConnectionPool(
+                        config.DATABASE_URL,
+                        min_size=config.DB_POOL_MIN,
+                        max_size=config.DB_POOL_MAX,
+                        idle_timeout=config.DB_POOL_IDLE_TIMEOUT,
+                        healthcheck_interval=config.DB_POOL_HEALTHCHECK_INTERVAL,
+                        checkout_timeout=config.DB_POOL_TIMEOUT,
+                    )
+        return _pool
+
+    @staticmethod
+    def close_pool():
+        global _pool
+        with _pool_lock:
+            if _pool is not None:
+                _pool.closeall()
+                _pool = None
+
+    @staticmethod
+    def _run(work, retry=False):
+        """
+        Выполняет work(conn) на соединении из пула.
+        Если соединение оказалось разорванным (например, сервер перезапущен),
+        остальные свободные соединения сбрасываются. retry=True — запрос
+        повторяется один раз на новом соединении; только для чтения: запись
+        могла дойти до сервера и закоммититься до разрыва.
+
+        В фоновой задаче (db.async_executor) соединение привязывается к ее
+        токену отмены, чтобы устаревший запрос можно было прервать.
+        """
+        pool = Database.pool()
+        token = current_token()
+        for attempt in (1, 2):
+            conn = pool.getconn()
+            try:
+                if token is not None:
+                    token.attach(conn)
+                result = work(conn)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                Database._release(pool, conn, token)
+                if conn.closed:
+                    pool.clear_idle()
+                    if retry and attempt == 1:
+                        continue
+                raise
+            except Exception:
+                Database._release(pool, conn, token)
+                raise
+            Database._release(pool, conn, token)
+            return result
+
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """
+        Закрепляет одно соединение из пула на весь блок и коммитит один раз
+        в конце; при исключении все шаги откатываются, ошибка пробрасывается.
+
+            with Database.transaction() as tx:
+                row = tx.fetch_one("INSERT ... RETURNING id", ...)
+                tx.execute_values("INSERT INTO ... VALUES %s", rows)
+
+        Как и запись через Database._run, блок не повторяется при разрыве
+        соединения: часть шагов могла уже выполниться.
+        """
+        pool = Database.pool()
+        token = current_token()
+        conn = pool.getconn()
+        try:
+            if token is not None:
+                token.attach(conn)
+            yield Transaction(conn)
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if conn.closed:
+                pool.clear_idle()
+            raise
+        finally:
+            # Незавершенная транзакция откатывается в pool.putconn
+            Database._release(pool, conn, token)
+
+    @staticmethod
+    def invalidate_prepared():
+        """Сбрасывает подготовленные вызовы процедур (после миграций)"""
+        _prepared.invalidate()
+
+    @staticmethod
+    def _release(pool, conn, token):
+        # Отвязываем до возврата в пул: cancel() не должен задеть чужой запрос
+        if token is not None:
+            token.detach()
+        pool.putconn(conn)
+
+    @staticmethod
+    def _log_error(where, error):
+        if not is_cancelled():
+            print(f"❌ Ошибка БД ({where}): {error}")
+
     @staticmethod
     def call_procedure(proc_name, params=None):
         """
         Вызывает хранимую процедуру и возвращает стандартный ответ:
         {status: 'OK'|'ERROR', message: '...', ...data}
         """
-        conn = None
-        try:
-            conn = Database.connect()
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Формируем SQL: SELECT * FROM proc_name(%s, %s)
-            # Если params пустой, просто proc_name()
-            placeholders = ",".join(["%s"] * len(params)) if params else ""
-            query = f"SELECT * FROM {proc_name}({placeholders})"
-            
-            cur.execute(query, params)
-            result = cur.fetchone()
-            
-            conn.commit() # Важно закоммитить, если процедура меняет данные
-            cur.close()
-            
-            if result:
-                return dict(result)
-            return {"status": "ERROR", "message": "Процедура ничего не вернула"}
+        # SELECT * FROM proc_name(...) — подготовленным запросом (db.prepared)
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                _prepared.execute(cur, proc_name, params)
+                result = cur.fetchone()
+            conn.commit()  # Важно закоммитить, если процедура меняет данные
+            return result
 
+        try:
+            # Процедура может менять данные: при разрыве не повторяется
+            result = Database._run(work)
         except Exception as e:
-            if conn:
-                conn.rollback()
             return {"status": "ERROR", "message": f"Ошибка соединения: {str(e)}"}
-        finally:
-            if conn:
-                conn.close()
+
+        if result:
+            return dict(result)
+        return {"status": "ERROR", "message": "Процедура ничего не вернула"}
 
     @staticmethod
-    def fetch_all(query, params=None):
-        """Выполняет SELECT и возвращает список словарей"""
-        conn = None
+    def fetch_all(query, params=None, mode="dict"):
+        """
+        Выполняет SELECT и возвращает список словарей. mode — компактный вид
+        строк (db.rows): "record", "namedtuple", "columns" или класс записи
+        из db.records.
+        """
+        if mode == "dict":
+            def work(conn):
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    return cur.fetchall()
+        else:
+            def work(conn):
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    fields = [c.name for c in cur.description]
+                    return decode(fields, cur.fetchall(), mode)
+
         try:
-            conn = Database.connect()
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, params)
-            result = cur.fetchall()
-            cur.close()
-            return result
+            # Только чтение (без коммита) — повтор после разрыва безопасен
+            return Database._run(work, retry=True)
         except Exception as e:
-            print(f"❌ Ошибка БД (fetch_all): {e}")
-            return []
-        finally:
-            if conn:
-                conn.close()
+            Database._log_error("fetch_all", e)
+            return [] if mode != "columns" else decode((), [], mode)
 
     # Legacy methods for compatibility, but we should move away from them
     @staticmethod
@@ -79,40 +254,36 @@ class Database:
         [DEPRECATED] Direct SQL execution.
         Use call_procedure for logic.
         """
-        conn = None
-        try:
-            conn = Database.connect()
-            cur = conn.cursor()
-            cur.execute(query, params)
+
+        def work(conn):
+            with conn.cursor() as cur:
+                cur.execute(query, params)
             conn.commit()
-            cur.close()
+
+        try:
+            Database._run(work)
             return True, "Успешно"
         except Exception as e:
-            if conn:
-                conn.rollback()
             return False, str(e)
-        finally:
-            if conn:
-                conn.close()
 
     @staticmethod
     def fetch_one(query, params=None):
         """Возвращает одну строку"""
-        conn = None
-        try:
-            conn = Database.connect()
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute(query, params)
-            result = cur.fetchone()
-            # Если это insert/update returning, надо коммитить!
-            if query.strip().upper().startswith("INSERT") or query.strip().upper().startswith("UPDATE"):
+        # Если это insert/update returning, надо коммитить!
+        head = query.strip().upper()
+        needs_commit = head.startswith("INSERT") or head.startswith("UPDATE")
+
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(query, params)
+                result = cur.fetchone()
+            if needs_commit:
                 conn.commit()
-            
-            cur.close()
             return result
+
+        try:
+            # Без коммита сервер откатит запрос при разрыве — его можно повторить
+            return Database._run(work, retry=not needs_commit)
         except Exception as e:
-            print(f"❌ Ошибка БД (fetch_one): {e}")
+            Database._log_error("fetch_one", e)
             return None
-        finally:
-            if conn:
-                conn.close()
@@ -0,0 +1,201 @@
+-- Phase 18: Очередь задач сборщиков ("взять следующую")
+-- ====================================================
+-- Два сборщика, одновременно бравшие одну строку 'принято', оба получали ее,
+-- а материалы проверялись и списывались циклом без блокировок
+-- (потерянные обновления остатков).
+-- Теперь:
+--   * sp_claim_next_task выбирает задачу с FOR UPDATE SKIP LOCKED — занятые
+--     другим сборщиком строки пропускаются, а не ожидаются;
+--   * материалы резервируются одним оператором под блокировками строк,
+--     которые берутся всегда в порядке id_материала (без взаимоблокировок).
+--
+--   SELECT * FROM sp_claim_next_task(5, '{"id_заказа": 10}');
+-- Фильтры (все необязательны): id_заказа, id_заготовки (массив), срок_до.
+
+-- 1. Нормы расхода: расход_материалов, дополненный парами из состав_заготовки
+CREATE OR REPLACE VIEW v_нормы_расхода AS
+SELECT r.id_заготовки,
+    r.id_материала,
+    r.количество_материала
+FROM расход_материалов r
+UNION ALL
+SELECT s.id_заготовки,
+    s.id_материала,
+    s.количество_материала
+FROM состав_заготовки s
+WHERE NOT EXISTS (
+        SELECT 1
+        FROM расход_материалов r
+        WHERE r.id_заготовки = s.id_заготовки
+            AND r.id_материала = s.id_материала
+    );
+
+-- 2. Нехватка материалов под задачу (NULL — хватает всего)
+CREATE OR REPLACE FUNCTION sp_task_material_shortages(p_id_заготовки INTEGER, p_количество INTEGER) RETURNS JSONB LANGUAGE sql STABLE AS $$
+SELECT jsonb_agg(
+        jsonb_build_object(
+            'id_материала',
+            m.id_материала,
+            'наименование',
+            m.наименование,
+            'нужно',
+            n.количество_материала * p_количество,
+            'есть',
+            COALESCE(m.количество_на_складе, 0)
+        )
+        ORDER BY m.id_материала
+    )
+FROM v_нормы_расхода n
+    JOIN материалы m ON m.id_материала = n.id_материала
+WHERE n.id_заготовки = p_id_заготовки
+    AND COALESCE(m.количество_на_складе, 0) < n.количество_материала * p_количество;
+$$;
+
+-- 3. Резерв материалов под задачу: все или ничего.
+--    Возвращает NULL при успехе, иначе список нехваток (ничего не списано).
+CREATE OR REPLACE FUNCTION sp_reserve_task_materials(p_id_заготовки INTEGER, p_количество INTEGER) RETURNS JSONB LANGUAGE plpgsql AS $$
+DECLARE v_shortages JSONB;
+BEGIN IF p_количество <= 0 THEN RETURN NULL;
+END IF;
+-- Блокировки строго по возрастанию id_материала
+PERFORM 1
+FROM материалы m
+WHERE m.id_материала IN (
+        SELECT n.id_материала
+        FROM v_нормы_расхода n
+        WHERE n.id_заготовки = p_id_заготовки
+    )
+ORDER BY m.id_материала FOR NO KEY UPDATE;
+
+-- Проверка уже по заблокированным (актуальным) остаткам
+v_shortages := sp_task_material_shortages(p_id_заготовки, p_количество);
+IF v_shortages IS NOT NULL THEN RETURN v_shortages;
+END IF;
+
+UPDATE материалы m
+SET количество_на_складе = m.количество_на_складе - n.количество_материала * p_количество
+FROM v_нормы_расхода n
+WHERE n.id_заготовки = p_id_заготовки
+    AND n.id_материала = m.id_материала;
+RETURN NULL;
+END;
+$$;
+
+-- 4. Очередь: сначала назначенные этому сборщику, затем общие; по сроку
+CREATE INDEX IF NOT EXISTS idx_план_заготовок_очередь ON план_заготовок (дата_план, id_заказа, id_заготовки)
+WHERE статус IN ('принято', 'просрочено');
+
+DROP FUNCTION IF EXISTS sp_claim_next_task(INTEGER, JSONB);
+CREATE OR REPLACE FUNCTION sp_claim_next_task(p_worker_id INTEGER, p_filters JSONB DEFAULT '{}') RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        claimed_blank_id INTEGER,
+        claimed_order_id INTEGER,
+        blank_name VARCHAR,
+        quantity INTEGER,
+        shortages JSONB
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_order_id INTEGER := (p_filters->>'id_заказа')::INTEGER;
+v_blank_ids INTEGER [] := (
+    SELECT array_agg(x::INTEGER)
+    FROM jsonb_array_elements_text(p_filters->'id_заготовки') AS x
+);
+v_due_to DATE := (p_filters->>'срок_до')::DATE;
+v_skip_blanks INTEGER [] := '{}';
+v_skip_orders INTEGER [] := '{}';
+v_first_shortages JSONB;
+v_blank INTEGER;
+v_order INTEGER;
+v_qty INTEGER;
+v_missing JSONB;
+BEGIN
+-- Задачи, на которые не хватает материалов, пропускаются (не больше 100 за вызов)
+FOR attempt IN 1..100 LOOP
+SELECT pz.id_заготовки,
+    pz.id_заказа,
+    GREATEST(pz.плановое_количество - pz.фактическое_количество, 0) INTO v_blank,
+    v_order,
+    v_qty
+FROM план_заготовок pz
+WHERE pz.статус IN ('принято', 'просрочено')
+    AND (
+        pz.id_сотрудника IS NULL
+        OR pz.id_сотрудника = p_worker_id
+    )
+    AND (
+        v_order_id IS NULL
+        OR pz.id_заказа = v_order_id
+    )
+    AND (
+        v_blank_ids IS NULL
+        OR pz.id_заготовки = ANY(v_blank_ids)
+    )
+    AND (
+        v_due_to IS NULL
+        OR pz.дата_план <= v_due_to
+    )
+    AND NOT EXISTS (
+        SELECT 1
+        FROM unnest(v_skip_blanks, v_skip_orders) AS s(b, o)
+        WHERE s.b = pz.id_заготовки
+            AND s.o = pz.id_заказа
+    )
+ORDER BY pz.id_сотрудника IS NULL,
+    pz.дата_план,
+    pz.id_заказа,
+    pz.id_заготовки
+LIMIT 1 FOR NO KEY UPDATE OF pz SKIP LOCKED;
+EXIT WHEN NOT FOUND;
+
+-- Проверка без блокировок: материалы блокируются только под одну задачу,
+-- иначе порядок блокировок по разным задачам мог бы перекреститься
+v_missing := sp_task_material_shortages(v_blank, v_qty);
+IF v_missing IS NOT NULL THEN v_first_shortages := COALESCE(v_first_shortages, v_missing);
+v_skip_blanks := v_skip_blanks || v_blank;
+v_skip_orders := v_skip_orders || v_order;
+CONTINUE;
+END IF;
+
+v_missing := sp_reserve_task_materials(v_blank, v_qty);
+IF v_missing IS NOT NULL THEN -- Материалы успел забрать другой сборщик
+status := 'ERROR';
+message := 'Материалы закончились, пока задача бралась в работу. Повторите попытку';
+shortages := v_missing;
+RETURN NEXT;
+RETURN;
+END IF;
+
+UPDATE план_заготовок pz
+SET статус = 'в_работе',
+    id_сотрудника = p_worker_id
+WHERE pz.id_заготовки = v_blank
+    AND pz.id_заказа = v_order;
+
+status := 'OK';
+claimed_blank_id := v_blank;
+claimed_order_id := v_order;
+quantity := v_qty;
+SELECT z.наименование INTO blank_name
+FROM заготовки z
+WHERE z.id_заготовки = v_blank;
+message := 'Задача "' || blank_name || '" по заказу №' || v_order || ' взята в работу';
+RETURN NEXT;
+RETURN;
+END LOOP;
+
+status := 'WARNING';
+shortages := v_first_shortages;
+message := CASE
+    WHEN v_first_shortages IS NULL THEN 'Нет свободных задач'
+    ELSE 'Нет задач, для которых хватает материалов'
+END;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка: ' || SQLERRM;
+claimed_blank_id := NULL;
+claimed_order_id := NULL;
+shortages := NULL;
+RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,171 @@
+-- Phase 14: Создание заказа с позициями одним вызовом
+-- ===================================================
+-- Раньше: sp_create_order + sp_add_order_item на каждую строку корзины,
+-- каждый вызов — отдельная транзакция (заказ мог остаться недособранным).
+-- Теперь корзина передается целиком в JSONB:
+--   [{"id_изделия": 1, "количество": 2}, ...]
+-- Шапка, позиции, резерв склада и задания на производство создаются
+-- одной транзакцией и множественными операторами; по каждой позиции,
+-- которую не удалось закрыть со склада, возвращается предупреждение.
+
+DROP FUNCTION IF EXISTS sp_create_order_with_items(INTEGER, INTEGER, DATE, JSONB);
+CREATE OR REPLACE FUNCTION sp_create_order_with_items(
+        p_client_id INTEGER,
+        p_manager_id INTEGER,
+        p_date_ready DATE,
+        p_items JSONB
+    ) RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        new_order_id INTEGER,
+        warnings JSONB
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_id INTEGER;
+v_bad TEXT;
+v_warnings JSONB;
+BEGIN -- 1. Проверка корзины
+IF p_items IS NULL
+OR jsonb_typeof(p_items) <> 'array'
+OR jsonb_array_length(p_items) = 0 THEN status := 'ERROR';
+message := 'Корзина пуста';
+warnings := '[]'::JSONB;
+RETURN NEXT;
+RETURN;
+END IF;
+SELECT string_agg(DISTINCT t.id_изделия::TEXT, ', ') INTO v_bad
+FROM jsonb_to_recordset(p_items) AS t(id_изделия INTEGER, количество INTEGER)
+    LEFT JOIN изделия i ON i.id_изделия = t.id_изделия
+WHERE i.id_изделия IS NULL
+    OR t.количество IS NULL
+    OR t.количество <= 0;
+IF v_bad IS NOT NULL THEN status := 'ERROR';
+message := 'Неверные позиции корзины (изделие/количество): ' || v_bad;
+warnings := '[]'::JSONB;
+RETURN NEXT;
+RETURN;
+END IF;
+
+-- 2. Шапка
+INSERT INTO заказы (
+        id_клиента,
+        id_менеджера,
+        дата_готовности,
+        статус
+    )
+VALUES (
+        p_client_id,
+        p_manager_id,
+        p_date_ready,
+        'принят'
+    )
+RETURNING id_заказа INTO v_id;
+
+-- 3. Позиции, резерв и задания — одним оператором.
+--    Изделия блокируются в порядке id, чтобы параллельные заказы
+--    с пересекающимися корзинами не взаимоблокировались.
+WITH cart AS (
+    SELECT t.id_изделия,
+        SUM(t.количество)::INTEGER AS количество
+    FROM jsonb_to_recordset(p_items) AS t(id_изделия INTEGER, количество INTEGER)
+    GROUP BY t.id_изделия
+),
+locked AS (
+    SELECT i.id_изделия,
+        i.наименование,
+        i.стоимость,
+        COALESCE(i.количество_на_складе, 0) AS остаток
+    FROM изделия i
+    WHERE i.id_изделия IN (
+            SELECT id_изделия
+            FROM cart
+        )
+    ORDER BY i.id_изделия FOR NO KEY UPDATE
+),
+calc AS (
+    SELECT c.id_изделия,
+        l.наименование,
+        l.стоимость,
+        c.количество,
+        LEAST(c.количество, l.остаток) AS резерв,
+        c.количество - LEAST(c.количество, l.остаток) AS нехватка
+    FROM cart c
+        JOIN locked l ON l.id_изделия = c.id_изделия
+),
+ins_lines AS (
+    INSERT INTO состав_заказа (
+            id_заказа,
+            id_изделия,
+            количество_изделий,
+            цена_фиксированная
+        )
+    SELECT v_id,
+        id_изделия,
+        количество,
+        COALESCE(стоимость, 0)
+    FROM calc
+),
+reserve AS (
+    UPDATE изделия i
+    SET количество_на_складе = i.количество_на_складе - c.резерв
+    FROM calc c
+    WHERE i.id_изделия = c.id_изделия
+        AND c.резерв > 0
+),
+plan AS (
+    -- Одна задача на заготовку: разные изделия могут требовать одну и ту же
+    INSERT INTO план_заготовок (
+            id_заказа,
+            id_заготовки,
+            плановое_количество,
+            дата_план,
+            статус
+        )
+    SELECT v_id,
+        si.id_заготовки,
+        SUM(si.количество_заготовки * c.нехватка),
+        COALESCE(p_date_ready - 1, CURRENT_DATE),
+        'принято'
+    FROM calc c
+        JOIN состав_изделия si ON si.id_изделия = c.id_изделия
+    WHERE c.нехватка > 0
+    GROUP BY si.id_заготовки
+)
+SELECT jsonb_agg(
+        jsonb_build_object(
+            'id_изделия',
+            c.id_изделия,
+            'наименование',
+            c.наименование,
+            'статус',
+            'WARNING',
+            'сообщение',
+            CASE
+                WHEN EXISTS (
+                    SELECT 1
+                    FROM состав_изделия si
+                    WHERE si.id_изделия = c.id_изделия
+                ) THEN 'Недостаточно на складе. Созданы задания на производство ' || c.нехватка || ' ед.'
+                ELSE 'Недостаточно на складе (' || c.нехватка || ' ед.), состав изделия не задан — задания не созданы'
+            END
+        )
+        ORDER BY c.id_изделия
+    ) INTO v_warnings
+FROM calc c
+WHERE c.нехватка > 0;
+
+status := CASE
+    WHEN v_warnings IS NULL THEN 'OK'
+    ELSE 'WARNING'
+END;
+message := 'Заказ №' || v_id || ' создан';
+new_order_id := v_id;
+warnings := COALESCE(v_warnings, '[]'::JSONB);
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка создания заказа: ' || SQLERRM;
+new_order_id := NULL;
+warnings := '[]'::JSONB;
+RETURN NEXT;
+END;
+$$;
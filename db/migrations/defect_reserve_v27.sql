@@ -0,0 +1,124 @@
+-- Phase 27: Брак по заданию в работе резервирует материалы
+-- ========================================================
+-- sp_report_defect (task_materials_set_based_v19.sql) увеличивал
+-- плановое_количество задания через ON CONFLICT. Для задания в статусе
+-- 'в_работе' материалы уже были списаны при взятии в работу, поэтому
+-- добавка изготавливалась без списания, и остатки материалов расходились.
+-- Теперь добавка к заданиям в работе резервируется тем же
+-- sp_reserve_task_materials, что и при взятии задания; при нехватке
+-- вызов возвращает ERROR со всеми нехватками и ничего не меняет.
+-- Задания 'принято'/'просрочено' и переоткрытые резервируют материалы
+-- на весь остаток при взятии в работу, как и раньше.
+
+DROP FUNCTION IF EXISTS sp_report_defect(INTEGER, INTEGER, INTEGER, VARCHAR);
+CREATE OR REPLACE FUNCTION sp_report_defect(
+        p_order_id INTEGER,
+        p_product_id INTEGER,
+        p_defect_qty INTEGER,
+        p_reason VARCHAR
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_current_qty INTEGER;
+v_tasks INTEGER;
+v_reserved INTEGER := 0;
+v_task RECORD;
+v_shortages JSONB;
+v_all_shortages JSONB := '[]'::JSONB;
+BEGIN
+SELECT количество_изделий INTO v_current_qty
+FROM состав_заказа
+WHERE id_заказа = p_order_id
+    AND id_изделия = p_product_id FOR NO KEY UPDATE;
+IF NOT FOUND THEN status := 'ERROR';
+message := 'Позиция не найдена в заказе';
+RETURN NEXT;
+RETURN;
+END IF;
+IF p_defect_qty > v_current_qty THEN status := 'ERROR';
+message := 'Количество брака превышает количество в заказе';
+RETURN NEXT;
+RETURN;
+END IF;
+
+UPDATE состав_заказа
+SET количество_изделий = количество_изделий - p_defect_qty
+WHERE id_заказа = p_order_id
+    AND id_изделия = p_product_id;
+
+UPDATE заказы
+SET статус = 'в_работе'
+WHERE id_заказа = p_order_id
+    AND статус IN ('выполнен', 'готов_к_отгрузке');
+
+-- Задание в работе уже списало материалы на свой остаток: на добавку
+-- материалы резервируются сейчас, как при взятии задания в работу.
+-- Не хватает хотя бы одного — брак не фиксируется (откат всего вызова).
+-- Задания блокируются заранее: их статус не должен смениться до ON CONFLICT.
+PERFORM 1
+FROM план_заготовок
+WHERE id_заказа = p_order_id
+    AND id_заготовки IN (
+        SELECT id_заготовки
+        FROM состав_изделия
+        WHERE id_изделия = p_product_id
+    )
+ORDER BY id_заготовки FOR NO KEY UPDATE;
+FOR v_task IN
+SELECT si.id_заготовки,
+    SUM(si.количество_заготовки * p_defect_qty)::INTEGER AS добавка
+FROM состав_изделия si
+    JOIN план_заготовок p ON p.id_заготовки = si.id_заготовки
+    AND p.id_заказа = p_order_id
+WHERE si.id_изделия = p_product_id
+    AND p.статус = 'в_работе'
+GROUP BY si.id_заготовки
+ORDER BY si.id_заготовки LOOP
+v_shortages := sp_reserve_task_materials(v_task.id_заготовки, v_task.добавка);
+IF v_shortages IS NOT NULL THEN v_all_shortages := v_all_shortages || v_shortages;
+END IF;
+v_reserved := v_reserved + 1;
+END LOOP;
+IF jsonb_array_length(v_all_shortages) > 0 THEN RAISE EXCEPTION '%',
+fn_format_shortages(v_all_shortages);
+END IF;
+
+-- Задания по всем заготовкам изделия одним оператором; уже выполненное
+-- или отмененное задание снова открывается на доизготовление
+INSERT INTO план_заготовок (
+        id_заготовки,
+        id_заказа,
+        плановое_количество,
+        дата_план,
+        статус
+    )
+SELECT si.id_заготовки,
+    p_order_id,
+    SUM(si.количество_заготовки * p_defect_qty),
+    COALESCE(z.дата_готовности - 1, CURRENT_DATE),
+    'принято'
+FROM состав_изделия si
+    JOIN заказы z ON z.id_заказа = p_order_id
+WHERE si.id_изделия = p_product_id
+GROUP BY si.id_заготовки,
+    z.дата_готовности ON CONFLICT (id_заготовки, id_заказа) DO
+UPDATE
+SET плановое_количество = план_заготовок.плановое_количество + EXCLUDED.плановое_количество,
+    статус = CASE
+        WHEN план_заготовок.статус IN ('выполнено', 'отменено') THEN 'принято'
+        ELSE план_заготовок.статус
+    END;
+GET DIAGNOSTICS v_tasks = ROW_COUNT;
+
+status := 'WARNING';
+message := 'Брак зафиксирован (' || p_defect_qty || ' шт). Созданы задания на доизготовление ('
+    || v_tasks || ')' || CASE
+        WHEN v_reserved > 0 THEN ', материалы на добавку к заданиям в работе списаны ('
+            || v_reserved || ')'
+        ELSE ''
+    END || '. Причина: ' || p_reason;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка: ' || SQLERRM;
+RETURN NEXT;
+END;
+$$;
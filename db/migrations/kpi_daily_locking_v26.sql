@@ -0,0 +1,107 @@
+-- Phase 26: kpi_daily без потерянных обновлений
+-- =============================================
+-- sp_refresh_kpi_days (kpi_daily_v15.sql) пересчитывал день по исходным
+-- таблицам и записывал итог через ON CONFLICT DO UPDATE. При READ COMMITTED
+-- два параллельных писателя одного дня агрегировали каждый по своему снимку,
+-- и закоммитивший вторым затирал итог первого устаревшими числами.
+-- Теперь строки затронутых дней вставляются (если их нет) и блокируются
+-- до агрегации: второй писатель ждет, затем считает по новому снимку.
+-- Дни без заказов и расходов по-прежнему удаляются.
+
+CREATE OR REPLACE FUNCTION sp_refresh_kpi_days(p_days DATE []) RETURNS VOID LANGUAGE plpgsql AS $$ BEGIN IF p_days IS NULL
+    OR cardinality(p_days) = 0 THEN RETURN;
+END IF;
+-- Строки дней создаются и блокируются до агрегации (по порядку дат, без
+-- взаимоблокировок). Параллельный писатель того же дня ждет коммита, а его
+-- следующий оператор берет новый снимок и видит закоммиченные изменения.
+INSERT INTO kpi_daily (день)
+SELECT DISTINCT d
+FROM unnest(p_days) AS d
+WHERE d IS NOT NULL
+ORDER BY d ON CONFLICT (день) DO NOTHING;
+PERFORM 1
+FROM kpi_daily
+WHERE день = ANY(p_days)
+ORDER BY день FOR NO KEY UPDATE;
+
+WITH days AS (
+    SELECT DISTINCT d AS день
+    FROM unnest(p_days) AS d
+    WHERE d IS NOT NULL
+),
+orders AS (
+    SELECT z.дата_заказа AS день,
+        COALESCE(
+            SUM(z.сумма_заказа) FILTER (
+                WHERE z.статус IN ('выполнен', 'завершен', 'отгружен')
+            ),
+            0
+        ) AS выручка,
+        COUNT(*) FILTER (
+            WHERE z.статус IN ('выполнен', 'завершен', 'отгружен')
+        ) AS заказов_закрыто,
+        COUNT(*) FILTER (
+            WHERE z.статус = 'отменен'
+        ) AS отмен,
+        COUNT(*) AS заказов_всего
+    FROM заказы z
+    WHERE z.дата_заказа IN (
+            SELECT день
+            FROM days
+        )
+    GROUP BY z.дата_заказа
+),
+purchases AS (
+    SELECT zm.дата_закупки AS день,
+        SUM(sz.количество * sz.цена_закупки) AS расходы
+    FROM закупки_материалов zm
+        JOIN состав_закупки sz ON sz.id_закупки = zm.id_закупки
+    WHERE zm.статус = 'выполнено'
+        AND zm.дата_закупки IN (
+            SELECT день
+            FROM days
+        )
+    GROUP BY zm.дата_закупки
+),
+totals AS (
+    SELECT d.день,
+        COALESCE(o.выручка, 0) AS выручка,
+        COALESCE(o.заказов_закрыто, 0) AS заказов_закрыто,
+        COALESCE(o.отмен, 0) AS отмен,
+        COALESCE(o.заказов_всего, 0) AS заказов_всего,
+        COALESCE(p.расходы, 0) AS расходы
+    FROM days d
+        LEFT JOIN orders o ON o.день = d.день
+        LEFT JOIN purchases p ON p.день = d.день
+),
+removed AS (
+    DELETE FROM kpi_daily k USING totals t
+    WHERE k.день = t.день
+        AND t.заказов_всего = 0
+        AND t.расходы = 0
+)
+INSERT INTO kpi_daily (
+        день,
+        выручка,
+        заказов_закрыто,
+        отмен,
+        заказов_всего,
+        расходы
+    )
+SELECT день,
+    выручка,
+    заказов_закрыто,
+    отмен,
+    заказов_всего,
+    расходы
+FROM totals
+WHERE заказов_всего > 0
+    OR расходы <> 0 ON CONFLICT (день) DO
+UPDATE
+SET выручка = EXCLUDED.выручка,
+    заказов_закрыто = EXCLUDED.заказов_закрыто,
+    отмен = EXCLUDED.отмен,
+    заказов_всего = EXCLUDED.заказов_всего,
+    расходы = EXCLUDED.расходы;
+END;
+$$;
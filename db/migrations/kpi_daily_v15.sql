@@ -0,0 +1,324 @@
+-- Phase 15: Дневные итоги для дашборда (kpi_daily)
+-- =================================================
+-- Дашборд при каждом "Применить" агрегировал всю историю заказов и закупок,
+-- а клик по карточке — еще раз. Теперь показатели хранятся по дням в
+-- kpi_daily и обновляются триггерами уровня оператора: для каждого
+-- изменения пересчитываются только затронутые дни (по индексам дат).
+-- Запрос дашборда читает не больше одной строки на день периода.
+--
+--   SELECT * FROM sp_dashboard_kpis('2024-01-01', '2024-12-31');  -- все карточки
+--   SELECT * FROM sp_rebuild_kpi_daily();                       -- полная перестройка
+
+-- 1. Таблица
+CREATE TABLE IF NOT EXISTS kpi_daily (
+    день DATE PRIMARY KEY,
+    выручка NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    -- заказы в финальных статусах (выполнен, завершен, отгружен)
+    заказов_закрыто INTEGER NOT NULL DEFAULT 0,
+    отмен INTEGER NOT NULL DEFAULT 0,
+    заказов_всего INTEGER NOT NULL DEFAULT 0,
+    расходы NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    средний_чек NUMERIC(14, 2) GENERATED ALWAYS AS (
+        CASE
+            WHEN заказов_закрыто > 0 THEN выручка / заказов_закрыто
+        END
+    ) STORED
+);
+
+-- Пересчет дня по закупкам идет по дате закупки
+CREATE INDEX IF NOT EXISTS idx_закупки_материалов_дата ON закупки_материалов (дата_закупки);
+
+-- 2. Пересчет дней из исходных таблиц
+CREATE OR REPLACE FUNCTION sp_refresh_kpi_days(p_days DATE []) RETURNS VOID LANGUAGE plpgsql AS $$ BEGIN IF p_days IS NULL
+    OR cardinality(p_days) = 0 THEN RETURN;
+END IF;
+WITH days AS (
+    SELECT DISTINCT d AS день
+    FROM unnest(p_days) AS d
+    WHERE d IS NOT NULL
+),
+orders AS (
+    SELECT z.дата_заказа AS день,
+        COALESCE(
+            SUM(z.сумма_заказа) FILTER (
+                WHERE z.статус IN ('выполнен', 'завершен', 'отгружен')
+            ),
+            0
+        ) AS выручка,
+        COUNT(*) FILTER (
+            WHERE z.статус IN ('выполнен', 'завершен', 'отгружен')
+        ) AS заказов_закрыто,
+        COUNT(*) FILTER (
+            WHERE z.статус = 'отменен'
+        ) AS отмен,
+        COUNT(*) AS заказов_всего
+    FROM заказы z
+    WHERE z.дата_заказа IN (
+            SELECT день
+            FROM days
+        )
+    GROUP BY z.дата_заказа
+),
+purchases AS (
+    SELECT zm.дата_закупки AS день,
+        SUM(sz.количество * sz.цена_закупки) AS расходы
+    FROM закупки_материалов zm
+        JOIN состав_закупки sz ON sz.id_закупки = zm.id_закупки
+    WHERE zm.статус = 'выполнено'
+        AND zm.дата_закупки IN (
+            SELECT день
+            FROM days
+        )
+    GROUP BY zm.дата_закупки
+),
+totals AS (
+    SELECT d.день,
+        COALESCE(o.выручка, 0) AS выручка,
+        COALESCE(o.заказов_закрыто, 0) AS заказов_закрыто,
+        COALESCE(o.отмен, 0) AS отмен,
+        COALESCE(o.заказов_всего, 0) AS заказов_всего,
+        COALESCE(p.расходы, 0) AS расходы
+    FROM days d
+        LEFT JOIN orders o ON o.день = d.день
+        LEFT JOIN purchases p ON p.день = d.день
+),
+removed AS (
+    DELETE FROM kpi_daily k USING totals t
+    WHERE k.день = t.день
+        AND t.заказов_всего = 0
+        AND t.расходы = 0
+)
+INSERT INTO kpi_daily (
+        день,
+        выручка,
+        заказов_закрыто,
+        отмен,
+        заказов_всего,
+        расходы
+    )
+SELECT день,
+    выручка,
+    заказов_закрыто,
+    отмен,
+    заказов_всего,
+    расходы
+FROM totals
+WHERE заказов_всего > 0
+    OR расходы <> 0 ON CONFLICT (день) DO
+UPDATE
+SET выручка = EXCLUDED.выручка,
+    заказов_закрыто = EXCLUDED.заказов_закрыто,
+    отмен = EXCLUDED.отмен,
+    заказов_всего = EXCLUDED.заказов_всего,
+    расходы = EXCLUDED.расходы;
+END;
+$$;
+
+-- 3. Триггеры уровня оператора: собрать затронутые дни и пересчитать их
+CREATE OR REPLACE FUNCTION trg_kpi_orders_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN PERFORM sp_refresh_kpi_days(
+        ARRAY(
+            SELECT DISTINCT дата_заказа
+            FROM new_rows
+        )
+    );
+ELSIF TG_OP = 'UPDATE' THEN -- только строки, где поменялось что-то, влияющее на показатели
+PERFORM sp_refresh_kpi_days(
+    ARRAY(
+        SELECT d
+        FROM new_rows n
+            JOIN old_rows o ON o.id_заказа = n.id_заказа,
+            LATERAL (
+                VALUES (n.дата_заказа),
+                    (o.дата_заказа)
+            ) v(d)
+        WHERE n.статус IS DISTINCT FROM o.статус
+            OR n.сумма_заказа IS DISTINCT FROM o.сумма_заказа
+            OR n.дата_заказа IS DISTINCT FROM o.дата_заказа
+    )
+);
+ELSE PERFORM sp_refresh_kpi_days(
+    ARRAY(
+        SELECT DISTINCT дата_заказа
+        FROM old_rows
+    )
+);
+END IF;
+RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_kpi_purchases_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN PERFORM sp_refresh_kpi_days(
+        ARRAY(
+            SELECT DISTINCT дата_закупки
+            FROM new_rows
+            WHERE статус = 'выполнено'
+        )
+    );
+ELSIF TG_OP = 'UPDATE' THEN PERFORM sp_refresh_kpi_days(
+    ARRAY(
+        SELECT d
+        FROM new_rows n
+            JOIN old_rows o ON o.id_закупки = n.id_закупки,
+            LATERAL (
+                VALUES (n.дата_закупки),
+                    (o.дата_закупки)
+            ) v(d)
+        WHERE (
+                n.статус = 'выполнено'
+                OR o.статус = 'выполнено'
+            )
+            AND (
+                n.статус IS DISTINCT FROM o.статус
+                OR n.дата_закупки IS DISTINCT FROM o.дата_закупки
+            )
+    )
+);
+ELSE -- позиции удаляются каскадом раньше, поэтому день пересчитывается здесь
+PERFORM sp_refresh_kpi_days(
+    ARRAY(
+        SELECT DISTINCT дата_закупки
+        FROM old_rows
+        WHERE статус = 'выполнено'
+    )
+);
+END IF;
+RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_kpi_purchase_lines_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE v_ids INTEGER [];
+BEGIN IF TG_OP = 'INSERT' THEN v_ids := ARRAY(
+    SELECT DISTINCT id_закупки
+    FROM new_rows
+);
+ELSIF TG_OP = 'UPDATE' THEN v_ids := ARRAY(
+    SELECT id_закупки
+    FROM new_rows
+    UNION
+    SELECT id_закупки
+    FROM old_rows
+);
+ELSE v_ids := ARRAY(
+    SELECT DISTINCT id_закупки
+    FROM old_rows
+);
+END IF;
+PERFORM sp_refresh_kpi_days(
+    ARRAY(
+        SELECT DISTINCT дата_закупки
+        FROM закупки_материалов
+        WHERE id_закупки = ANY(v_ids)
+            AND статус = 'выполнено'
+    )
+);
+RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_kpi_ins ON заказы;
+DROP TRIGGER IF EXISTS trg_kpi_upd ON заказы;
+DROP TRIGGER IF EXISTS trg_kpi_del ON заказы;
+CREATE TRIGGER trg_kpi_ins
+AFTER
+INSERT ON заказы REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_orders_func();
+CREATE TRIGGER trg_kpi_upd
+AFTER
+UPDATE ON заказы REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_orders_func();
+CREATE TRIGGER trg_kpi_del
+AFTER DELETE ON заказы REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_orders_func();
+
+DROP TRIGGER IF EXISTS trg_kpi_ins ON закупки_материалов;
+DROP TRIGGER IF EXISTS trg_kpi_upd ON закупки_материалов;
+DROP TRIGGER IF EXISTS trg_kpi_del ON закупки_материалов;
+CREATE TRIGGER trg_kpi_ins
+AFTER
+INSERT ON закупки_материалов REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_purchases_func();
+CREATE TRIGGER trg_kpi_upd
+AFTER
+UPDATE ON закупки_материалов REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_purchases_func();
+CREATE TRIGGER trg_kpi_del
+AFTER DELETE ON закупки_материалов REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_purchases_func();
+
+DROP TRIGGER IF EXISTS trg_kpi_ins ON состав_закупки;
+DROP TRIGGER IF EXISTS trg_kpi_upd ON состав_закупки;
+DROP TRIGGER IF EXISTS trg_kpi_del ON состав_закупки;
+CREATE TRIGGER trg_kpi_ins
+AFTER
+INSERT ON состав_закупки REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_purchase_lines_func();
+CREATE TRIGGER trg_kpi_upd
+AFTER
+UPDATE ON состав_закупки REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_purchase_lines_func();
+CREATE TRIGGER trg_kpi_del
+AFTER DELETE ON состав_закупки REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_kpi_purchase_lines_func();
+
+-- 4. Перестройка
+CREATE OR REPLACE FUNCTION sp_rebuild_kpi_daily() RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_count INTEGER;
+BEGIN LOCK TABLE kpi_daily IN EXCLUSIVE MODE;
+DELETE FROM kpi_daily;
+PERFORM sp_refresh_kpi_days(
+    ARRAY(
+        SELECT дата_заказа
+        FROM заказы
+        UNION
+        SELECT дата_закупки
+        FROM закупки_материалов
+        WHERE статус = 'выполнено'
+    )
+);
+SELECT COUNT(*) INTO v_count
+FROM kpi_daily;
+status := 'OK';
+message := 'kpi_daily перестроена, дней: ' || v_count;
+RETURN NEXT;
+END;
+$$;
+
+SELECT *
+FROM sp_rebuild_kpi_daily();
+
+-- 5. Все карточки дашборда за период одним вызовом
+DROP FUNCTION IF EXISTS sp_dashboard_kpis(DATE, DATE);
+CREATE OR REPLACE FUNCTION sp_dashboard_kpis(p_from DATE, p_to DATE) RETURNS TABLE (
+        выручка NUMERIC,
+        расходы NUMERIC,
+        прибыль NUMERIC,
+        заказов_закрыто BIGINT,
+        отмен BIGINT,
+        средний_чек NUMERIC,
+        рентабельность NUMERIC,
+        процент_отмен NUMERIC,
+        сотрудников BIGINT
+    ) LANGUAGE sql STABLE AS $$ WITH t AS (
+        SELECT COALESCE(SUM(k.выручка), 0) AS выручка,
+            COALESCE(SUM(k.расходы), 0) AS расходы,
+            COALESCE(SUM(k.заказов_закрыто), 0)::BIGINT AS закрыто,
+            COALESCE(SUM(k.отмен), 0)::BIGINT AS отмен
+        FROM kpi_daily k
+        WHERE k.день BETWEEN p_from AND p_to
+    )
+SELECT t.выручка,
+    t.расходы,
+    t.выручка - t.расходы,
+    t.закрыто,
+    t.отмен,
+    CASE
+        WHEN t.закрыто > 0 THEN t.выручка / t.закрыто
+        ELSE 0
+    END,
+    CASE
+        WHEN t.выручка > 0 THEN (t.выручка - t.расходы) / t.выручка * 100
+        ELSE 0
+    END,
+    CASE
+        WHEN t.закрыто + t.отмен > 0 THEN t.отмен::NUMERIC / (t.закрыто + t.отмен) * 100
+        ELSE 0
+    END,
+    (
+        SELECT COUNT(*)
+        FROM сотрудники
+        WHERE дата_увольнения IS NULL
+    )
+FROM t;
+$$;
@@ -0,0 +1,166 @@
+-- Phase 31: Номер заказа в поиске вне диапазона INTEGER
+-- ======================================================
+-- sp_search_orders и sp_search_orders_page (search_orders_v10.sql,
+-- order_search_projection_v12.sql) приводили текст из цифр к INTEGER:
+-- номер длиннее 10 цифр или больше 2147483647 давал ошибку
+-- "integer out of range" вместо пустого результата. Теперь номер
+-- вычисляет fn_order_id: NULL, если текст не число или не помещается в
+-- INTEGER, и условие id_заказа = NULL не находит ни одного заказа (как
+-- OrdersTab.order_matches). Сравнение по-прежнему с INTEGER — индекс
+-- первичного ключа используется.
+
+-- 1. Номер заказа из текста поиска
+CREATE OR REPLACE FUNCTION fn_order_id(p_text TEXT) RETURNS INTEGER LANGUAGE sql IMMUTABLE STRICT AS $$
+SELECT CASE
+        WHEN p_text ~ '^[0-9]+$'
+        AND length(ltrim(p_text, '0')) <= 10 THEN CASE
+            WHEN p_text::NUMERIC <= 2147483647 THEN p_text::INTEGER
+        END
+    END;
+$$;
+
+-- 2. Поиск заказов (определения из search_like_escape_v30.sql)
+DROP FUNCTION IF EXISTS sp_search_orders(INTEGER, VARCHAR, VARCHAR, DATE, DATE);
+CREATE OR REPLACE FUNCTION sp_search_orders(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_id INTEGER := fn_order_id(p_search_text);
+BEGIN RETURN QUERY
+SELECT p.id_заказа,
+    COALESCE(p.клиент, 'Неизвестный клиент')::VARCHAR,
+    COALESCE(p.менеджер, '—')::VARCHAR,
+    p.дата_заказа,
+    p.дата_готовности,
+    p.статус,
+    p.сумма_заказа::NUMERIC,
+    p.позиций::BIGINT,
+    CASE
+        WHEN p.статус = 'выполнено' THEN 'Готов к отгрузке'
+        WHEN p.статус = 'отменен' THEN 'Отмена'
+        WHEN p.статус = 'завершен' THEN 'Завершен'
+        WHEN p.статус = 'отгружен' THEN 'Отгружен'
+        WHEN p.дата_готовности < CURRENT_DATE
+        AND p.статус NOT IN ('выполнено', 'отгружен', 'завершен', 'отменен') THEN 'ПРОСРОЧЕН'
+        ELSE 'В норме'
+    END::TEXT
+FROM заказы_поиск p
+WHERE (
+        p_search_text IS NULL
+        OR p_search_text = ''
+        OR CASE
+            WHEN p_search_text ~ '^[0-9]+$' THEN p.id_заказа = v_id
+            ELSE COALESCE(p.клиент, '') ILIKE fn_contains_pattern(p_search_text)
+        END
+    )
+    AND (
+        p_status IS NULL
+        OR p_status = 'Все статусы'
+        OR (
+            p_status = 'ПРОСРОЧЕН'
+            AND (
+                p.дата_готовности < CURRENT_DATE
+                AND p.статус NOT IN ('выполнено', 'отгружен', 'завершен', 'отменен')
+            )
+        )
+        OR (p.статус = p_status)
+    )
+    AND (
+        p_date_from IS NULL
+        OR p.дата_заказа >= p_date_from
+    )
+    AND (
+        p_date_to IS NULL
+        OR p.дата_заказа <= p_date_to
+    )
+ORDER BY p.id_заказа DESC;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS sp_search_orders_page(INTEGER, VARCHAR, VARCHAR, DATE, DATE, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_search_orders_page(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql STABLE AS $$
+DECLARE v_where TEXT := '';
+v_pattern TEXT := fn_contains_pattern(COALESCE(p_search_text, ''));
+v_id INTEGER := fn_order_id(p_search_text);
+BEGIN
+-- Параметры в EXECUTE: $1 номер заказа, $2 статус, $3/$4 период, $5/$6 ключ, $7 лимит, $8 шаблон
+IF p_search_text ~ '^[0-9]+$' THEN v_where := v_where || ' AND p.id_заказа = $1';
+ELSIF COALESCE(p_search_text, '') <> '' THEN v_where := v_where || ' AND p.клиент ILIKE $8';
+END IF;
+IF p_status = 'ПРОСРОЧЕН' THEN v_where := v_where || ' AND p.дата_готовности < CURRENT_DATE'
+    || ' AND p.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'')';
+ELSIF p_status IS NOT NULL
+AND p_status <> 'Все статусы' THEN v_where := v_where || ' AND p.статус = $2';
+END IF;
+IF p_date_from IS NOT NULL THEN v_where := v_where || ' AND p.дата_заказа >= $3';
+END IF;
+IF p_date_to IS NOT NULL THEN v_where := v_where || ' AND p.дата_заказа <= $4';
+END IF;
+IF p_after_date IS NOT NULL
+AND p_after_id IS NOT NULL THEN v_where := v_where || ' AND (p.дата_заказа, p.id_заказа) < ($5, $6)';
+END IF;
+
+RETURN QUERY EXECUTE '
+SELECT p.id_заказа,
+    COALESCE(p.клиент, ''Неизвестный клиент'')::VARCHAR,
+    COALESCE(p.менеджер, ''—'')::VARCHAR,
+    p.дата_заказа,
+    p.дата_готовности,
+    p.статус,
+    p.сумма_заказа::NUMERIC,
+    p.позиций::BIGINT,
+    CASE
+        WHEN p.статус = ''выполнено'' THEN ''Готов к отгрузке''
+        WHEN p.статус = ''отменен'' THEN ''Отмена''
+        WHEN p.статус = ''завершен'' THEN ''Завершен''
+        WHEN p.статус = ''отгружен'' THEN ''Отгружен''
+        WHEN p.дата_готовности < CURRENT_DATE
+        AND p.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'') THEN ''ПРОСРОЧЕН''
+        ELSE ''В норме''
+    END::TEXT
+FROM заказы_поиск p
+WHERE TRUE' || v_where || '
+ORDER BY p.дата_заказа DESC,
+    p.id_заказа DESC
+LIMIT $7' USING v_id,
+    p_status,
+    p_date_from,
+    p_date_to,
+    p_after_date,
+    p_after_id,
+    p_limit,
+    v_pattern;
+END;
+$$;
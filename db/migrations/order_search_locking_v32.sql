@@ -0,0 +1,55 @@
+-- Phase 32: Проекция заказы_поиск без устаревших ФИО
+-- =================================================
+-- sp_refresh_order_search (order_search_projection_v12.sql) брал ФИО клиента
+-- и менеджера из снимка своей транзакции. Проверка внешнего ключа при
+-- вставке заказа блокирует строку клиента только FOR KEY SHARE, что не
+-- мешает переименованию (FOR NO KEY UPDATE). Если клиента переименовали и
+-- закоммитили, пока заказ еще не закоммичен, триггер переименования не
+-- видел новой строки проекции, а заказ записывал в нее старое ФИО — навсегда.
+-- Теперь строки клиентов и менеджеров блокируются FOR SHARE до upsert
+-- (по порядку id, без взаимоблокировок): вторая из двух транзакций ждет
+-- первую и следующим оператором читает закоммиченное ФИО.
+
+CREATE OR REPLACE FUNCTION sp_refresh_order_search(p_ids INTEGER []) RETURNS VOID LANGUAGE plpgsql AS $$ BEGIN IF p_ids IS NULL
+    OR cardinality(p_ids) = 0 THEN RETURN;
+END IF;
+PERFORM 1
+FROM клиенты k
+WHERE k.id_клиента IN (
+        SELECT z.id_клиента
+        FROM заказы z
+        WHERE z.id_заказа = ANY(p_ids)
+    )
+ORDER BY k.id_клиента FOR SHARE;
+PERFORM 1
+FROM сотрудники s
+WHERE s.id_сотрудника IN (
+        SELECT z.id_менеджера
+        FROM заказы z
+        WHERE z.id_заказа = ANY(p_ids)
+    )
+ORDER BY s.id_сотрудника FOR SHARE;
+
+INSERT INTO заказы_поиск
+SELECT *
+FROM v_заказы_поиск_источник
+WHERE id_заказа = ANY(p_ids) ON CONFLICT (id_заказа) DO
+UPDATE
+SET id_клиента = EXCLUDED.id_клиента,
+    id_менеджера = EXCLUDED.id_менеджера,
+    клиент = EXCLUDED.клиент,
+    менеджер = EXCLUDED.менеджер,
+    дата_заказа = EXCLUDED.дата_заказа,
+    дата_готовности = EXCLUDED.дата_готовности,
+    статус = EXCLUDED.статус,
+    сумма_заказа = EXCLUDED.сумма_заказа,
+    позиций = EXCLUDED.позиций;
+DELETE FROM заказы_поиск p
+WHERE p.id_заказа = ANY(p_ids)
+    AND NOT EXISTS (
+        SELECT 1
+        FROM заказы z
+        WHERE z.id_заказа = p.id_заказа
+    );
+END;
+$$;
@@ -0,0 +1,347 @@
+-- Phase 12: Проекция заказы_поиск для списка заказов и дашборда
+-- ===============================================================
+-- Поиск заказов соединял заказы с клиентами и сотрудниками и считал
+-- позиции подзапросом COUNT(*) по состав_заказа для каждой строки.
+-- Теперь эти значения хранятся готовыми в таблице заказы_поиск и
+-- поддерживаются триггерами уровня оператора (FOR EACH STATEMENT с
+-- таблицами переходов): один пересчет на оператор, а не на строку.
+--
+-- Обслуживание:
+--   SELECT * FROM sp_rebuild_order_search();  -- полная перестройка
+--   SELECT * FROM sp_check_order_search();    -- расхождения с исходными таблицами
+-- (или python utils/order_search_projection.py rebuild|check)
+
+-- 1. Эталон: как должна выглядеть проекция по исходным таблицам
+CREATE OR REPLACE VIEW v_заказы_поиск_источник AS
+SELECT z.id_заказа,
+    z.id_клиента,
+    z.id_менеджера,
+    k.фио::VARCHAR AS клиент,
+    s.фио::VARCHAR AS менеджер,
+    z.дата_заказа,
+    z.дата_готовности,
+    z.статус::VARCHAR AS статус,
+    COALESCE(z.сумма_заказа, 0)::NUMERIC(12, 2) AS сумма_заказа,
+    (
+        SELECT COUNT(*)
+        FROM состав_заказа sz
+        WHERE sz.id_заказа = z.id_заказа
+    )::INTEGER AS позиций
+FROM заказы z
+    LEFT JOIN клиенты k ON z.id_клиента = k.id_клиента
+    LEFT JOIN сотрудники s ON z.id_менеджера = s.id_сотрудника;
+
+-- 2. Таблица проекции
+CREATE TABLE IF NOT EXISTS заказы_поиск (
+    id_заказа INTEGER PRIMARY KEY,
+    id_клиента INTEGER,
+    id_менеджера INTEGER,
+    клиент VARCHAR(100),
+    менеджер VARCHAR(100),
+    дата_заказа DATE NOT NULL,
+    дата_готовности DATE,
+    статус VARCHAR(20),
+    сумма_заказа NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    позиций INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_заказы_поиск_дата_id ON заказы_поиск (дата_заказа DESC, id_заказа DESC);
+-- дашборд: выручка/отмены за период по статусу без чтения таблицы
+CREATE INDEX IF NOT EXISTS idx_заказы_поиск_статус_дата ON заказы_поиск (статус, дата_заказа) INCLUDE (сумма_заказа);
+CREATE INDEX IF NOT EXISTS idx_заказы_поиск_клиент_id ON заказы_поиск (id_клиента);
+CREATE INDEX IF NOT EXISTS idx_заказы_поиск_менеджер_id ON заказы_поиск (id_менеджера);
+DO $$ BEGIN IF EXISTS (
+    SELECT 1
+    FROM pg_extension
+    WHERE extname = 'pg_trgm'
+) THEN
+CREATE INDEX IF NOT EXISTS idx_заказы_поиск_клиент_trgm ON заказы_поиск USING GIN (клиент gin_trgm_ops);
+END IF;
+END $$;
+
+-- 3. Пересчет строк проекции по списку заказов (upsert + удаление исчезнувших)
+CREATE OR REPLACE FUNCTION sp_refresh_order_search(p_ids INTEGER []) RETURNS VOID LANGUAGE plpgsql AS $$ BEGIN IF p_ids IS NULL
+    OR cardinality(p_ids) = 0 THEN RETURN;
+END IF;
+INSERT INTO заказы_поиск
+SELECT *
+FROM v_заказы_поиск_источник
+WHERE id_заказа = ANY(p_ids) ON CONFLICT (id_заказа) DO
+UPDATE
+SET id_клиента = EXCLUDED.id_клиента,
+    id_менеджера = EXCLUDED.id_менеджера,
+    клиент = EXCLUDED.клиент,
+    менеджер = EXCLUDED.менеджер,
+    дата_заказа = EXCLUDED.дата_заказа,
+    дата_готовности = EXCLUDED.дата_готовности,
+    статус = EXCLUDED.статус,
+    сумма_заказа = EXCLUDED.сумма_заказа,
+    позиций = EXCLUDED.позиций;
+DELETE FROM заказы_поиск p
+WHERE p.id_заказа = ANY(p_ids)
+    AND NOT EXISTS (
+        SELECT 1
+        FROM заказы z
+        WHERE z.id_заказа = p.id_заказа
+    );
+END;
+$$;
+
+-- 4. Триггеры уровня оператора
+-- (у триггера с таблицами переходов может быть только одно событие,
+--  поэтому на каждое событие свой триггер, а функция общая на таблицу)
+
+-- 4.1 заказы и состав_заказа: затронутые заказы берутся прямо из переходов
+CREATE OR REPLACE FUNCTION trg_order_search_orders_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN PERFORM sp_refresh_order_search(
+        ARRAY(
+            SELECT DISTINCT id_заказа
+            FROM new_rows
+        )
+    );
+ELSIF TG_OP = 'UPDATE' THEN PERFORM sp_refresh_order_search(
+    ARRAY(
+        SELECT id_заказа
+        FROM new_rows
+        UNION
+        SELECT id_заказа
+        FROM old_rows
+    )
+);
+ELSE PERFORM sp_refresh_order_search(
+    ARRAY(
+        SELECT DISTINCT id_заказа
+        FROM old_rows
+    )
+);
+END IF;
+RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_order_search_ins ON заказы;
+DROP TRIGGER IF EXISTS trg_order_search_upd ON заказы;
+DROP TRIGGER IF EXISTS trg_order_search_del ON заказы;
+CREATE TRIGGER trg_order_search_ins
+AFTER
+INSERT ON заказы REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_orders_func();
+CREATE TRIGGER trg_order_search_upd
+AFTER
+UPDATE ON заказы REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_orders_func();
+CREATE TRIGGER trg_order_search_del
+AFTER DELETE ON заказы REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_orders_func();
+
+DROP TRIGGER IF EXISTS trg_order_search_ins ON состав_заказа;
+DROP TRIGGER IF EXISTS trg_order_search_upd ON состав_заказа;
+DROP TRIGGER IF EXISTS trg_order_search_del ON состав_заказа;
+CREATE TRIGGER trg_order_search_ins
+AFTER
+INSERT ON состав_заказа REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_orders_func();
+CREATE TRIGGER trg_order_search_upd
+AFTER
+UPDATE ON состав_заказа REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_orders_func();
+CREATE TRIGGER trg_order_search_del
+AFTER DELETE ON состав_заказа REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_orders_func();
+
+-- 4.2 клиенты и сотрудники: важна только смена ФИО
+CREATE OR REPLACE FUNCTION trg_order_search_names_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN IF TG_TABLE_NAME = 'клиенты' THEN
+UPDATE заказы_поиск p
+SET клиент = n.фио
+FROM new_rows n
+    JOIN old_rows o ON o.id_клиента = n.id_клиента
+WHERE p.id_клиента = n.id_клиента
+    AND n.фио IS DISTINCT FROM o.фио;
+ELSE
+UPDATE заказы_поиск p
+SET менеджер = n.фио
+FROM new_rows n
+    JOIN old_rows o ON o.id_сотрудника = n.id_сотрудника
+WHERE p.id_менеджера = n.id_сотрудника
+    AND n.фио IS DISTINCT FROM o.фио;
+END IF;
+RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_order_search_upd ON клиенты;
+CREATE TRIGGER trg_order_search_upd
+AFTER
+UPDATE ON клиенты REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_names_func();
+DROP TRIGGER IF EXISTS trg_order_search_upd ON сотрудники;
+CREATE TRIGGER trg_order_search_upd
+AFTER
+UPDATE ON сотрудники REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_search_names_func();
+
+-- 5. Перестройка и проверка
+CREATE OR REPLACE FUNCTION sp_rebuild_order_search() RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_count INTEGER;
+BEGIN LOCK TABLE заказы_поиск IN EXCLUSIVE MODE;
+DELETE FROM заказы_поиск;
+INSERT INTO заказы_поиск
+SELECT *
+FROM v_заказы_поиск_источник;
+GET DIAGNOSTICS v_count = ROW_COUNT;
+status := 'OK';
+message := 'Проекция заказы_поиск перестроена, строк: ' || v_count;
+RETURN NEXT;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sp_check_order_search() RETURNS TABLE (id_заказа INTEGER, проблема TEXT) LANGUAGE sql STABLE AS $$
+SELECT COALESCE(e.id_заказа, p.id_заказа),
+    CASE
+        WHEN p.id_заказа IS NULL THEN 'нет в проекции'
+        WHEN e.id_заказа IS NULL THEN 'лишняя строка в проекции'
+        ELSE 'расхождение: ' || e::TEXT || ' <> ' || p::TEXT
+    END
+FROM v_заказы_поиск_источник e
+    FULL JOIN заказы_поиск p ON p.id_заказа = e.id_заказа
+WHERE p.id_заказа IS NULL
+    OR e.id_заказа IS NULL
+    OR (e.*) IS DISTINCT FROM (p.*)
+ORDER BY 1;
+$$;
+
+SELECT *
+FROM sp_rebuild_order_search();
+
+-- 6. Поиск заказов читает проекцию (без соединений и подсчета позиций)
+DROP FUNCTION IF EXISTS sp_search_orders(INTEGER, VARCHAR, VARCHAR, DATE, DATE);
+CREATE OR REPLACE FUNCTION sp_search_orders(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql AS $$ BEGIN RETURN QUERY
+SELECT p.id_заказа,
+    COALESCE(p.клиент, 'Неизвестный клиент')::VARCHAR,
+    COALESCE(p.менеджер, '—')::VARCHAR,
+    p.дата_заказа,
+    p.дата_готовности,
+    p.статус,
+    p.сумма_заказа::NUMERIC,
+    p.позиций::BIGINT,
+    CASE
+        WHEN p.статус = 'выполнено' THEN 'Готов к отгрузке'
+        WHEN p.статус = 'отменен' THEN 'Отмена'
+        WHEN p.статус = 'завершен' THEN 'Завершен'
+        WHEN p.статус = 'отгружен' THEN 'Отгружен'
+        WHEN p.дата_готовности < CURRENT_DATE
+        AND p.статус NOT IN ('выполнено', 'отгружен', 'завершен', 'отменен') THEN 'ПРОСРОЧЕН'
+        ELSE 'В норме'
+    END::TEXT
+FROM заказы_поиск p
+WHERE (
+        p_search_text IS NULL
+        OR p_search_text = ''
+        OR CASE
+            WHEN p_search_text ~ '^[0-9]+$' THEN p.id_заказа = p_search_text::INTEGER
+            ELSE COALESCE(p.клиент, '') ILIKE '%' || p_search_text || '%'
+        END
+    )
+    AND (
+        p_status IS NULL
+        OR p_status = 'Все статусы'
+        OR (
+            p_status = 'ПРОСРОЧЕН'
+            AND (
+                p.дата_готовности < CURRENT_DATE
+                AND p.статус NOT IN ('выполнено', 'отгружен', 'завершен', 'отменен')
+            )
+        )
+        OR (p.статус = p_status)
+    )
+    AND (
+        p_date_from IS NULL
+        OR p.дата_заказа >= p_date_from
+    )
+    AND (
+        p_date_to IS NULL
+        OR p.дата_заказа <= p_date_to
+    )
+ORDER BY p.id_заказа DESC;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS sp_search_orders_page(INTEGER, VARCHAR, VARCHAR, DATE, DATE, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_search_orders_page(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql STABLE AS $$
+DECLARE v_where TEXT := '';
+v_pattern TEXT := '%' || COALESCE(p_search_text, '') || '%';
+BEGIN
+-- Параметры в EXECUTE: $1 текст, $2 статус, $3/$4 период, $5/$6 ключ, $7 лимит, $8 шаблон
+IF p_search_text ~ '^[0-9]+$' THEN v_where := v_where || ' AND p.id_заказа = $1::INTEGER';
+ELSIF COALESCE(p_search_text, '') <> '' THEN v_where := v_where || ' AND p.клиент ILIKE $8';
+END IF;
+IF p_status = 'ПРОСРОЧЕН' THEN v_where := v_where || ' AND p.дата_готовности < CURRENT_DATE'
+    || ' AND p.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'')';
+ELSIF p_status IS NOT NULL
+AND p_status <> 'Все статусы' THEN v_where := v_where || ' AND p.статус = $2';
+END IF;
+IF p_date_from IS NOT NULL THEN v_where := v_where || ' AND p.дата_заказа >= $3';
+END IF;
+IF p_date_to IS NOT NULL THEN v_where := v_where || ' AND p.дата_заказа <= $4';
+END IF;
+IF p_after_date IS NOT NULL
+AND p_after_id IS NOT NULL THEN v_where := v_where || ' AND (p.дата_заказа, p.id_заказа) < ($5, $6)';
+END IF;
+
+RETURN QUERY EXECUTE '
+SELECT p.id_заказа,
+    COALESCE(p.клиент, ''Неизвестный клиент'')::VARCHAR,
+    COALESCE(p.менеджер, ''—'')::VARCHAR,
+    p.дата_заказа,
+    p.дата_готовности,
+    p.статус,
+    p.сумма_заказа::NUMERIC,
+    p.позиций::BIGINT,
+    CASE
+        WHEN p.статус = ''выполнено'' THEN ''Готов к отгрузке''
+        WHEN p.статус = ''отменен'' THEN ''Отмена''
+        WHEN p.статус = ''завершен'' THEN ''Завершен''
+        WHEN p.статус = ''отгружен'' THEN ''Отгружен''
+        WHEN p.дата_готовности < CURRENT_DATE
+        AND p.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'') THEN ''ПРОСРОЧЕН''
+        ELSE ''В норме''
+    END::TEXT
+FROM заказы_поиск p
+WHERE TRUE' || v_where || '
+ORDER BY p.дата_заказа DESC,
+    p.id_заказа DESC
+LIMIT $7' USING p_search_text,
+    p_status,
+    p_date_from,
+    p_date_to,
+    p_after_date,
+    p_after_id,
+    p_limit,
+    v_pattern;
+END;
+$$;
@@ -0,0 +1,84 @@
+-- Phase 13: Сумма заказа — триггеры уровня оператора
+-- ===================================================
+-- Было: trg_calc_sum FOR EACH ROW пересчитывал SUM по всем позициям заказа
+-- на каждую вставленную/измененную строку (заказ из n позиций — O(n^2)).
+-- Стало: по одному триггеру на событие FOR EACH STATEMENT с таблицами
+-- переходов; изменения суммируются по заказам и применяются одной
+-- дельтой на заказ за оператор.
+
+-- 1. Старый построчный триггер
+DROP TRIGGER IF EXISTS trg_calc_sum ON состав_заказа;
+DROP FUNCTION IF EXISTS trg_update_order_sum_func();
+
+-- 2. Функция применения дельт
+CREATE OR REPLACE FUNCTION trg_order_amount_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN
+UPDATE заказы z
+SET сумма_заказа = COALESCE(z.сумма_заказа, 0) + d.delta
+FROM (
+        SELECT id_заказа,
+            SUM(количество_изделий * цена_фиксированная) AS delta
+        FROM new_rows
+        GROUP BY id_заказа
+    ) d
+WHERE z.id_заказа = d.id_заказа
+    AND d.delta <> 0;
+ELSIF TG_OP = 'UPDATE' THEN
+UPDATE заказы z
+SET сумма_заказа = COALESCE(z.сумма_заказа, 0) + d.delta
+FROM (
+        SELECT id_заказа,
+            SUM(amount) AS delta
+        FROM (
+                SELECT id_заказа,
+                    количество_изделий * цена_фиксированная AS amount
+                FROM new_rows
+                UNION ALL
+                SELECT id_заказа,
+                    - количество_изделий * цена_фиксированная
+                FROM old_rows
+            ) t
+        GROUP BY id_заказа
+    ) d
+WHERE z.id_заказа = d.id_заказа
+    AND d.delta <> 0;
+ELSE
+UPDATE заказы z
+SET сумма_заказа = COALESCE(z.сумма_заказа, 0) - d.delta
+FROM (
+        SELECT id_заказа,
+            SUM(количество_изделий * цена_фиксированная) AS delta
+        FROM old_rows
+        GROUP BY id_заказа
+    ) d
+WHERE z.id_заказа = d.id_заказа
+    AND d.delta <> 0;
+END IF;
+RETURN NULL;
+END;
+$$;
+
+-- 3. Триггеры (имя раньше trg_order_search_* — сумма обновляется до проекции)
+DROP TRIGGER IF EXISTS trg_order_amount_ins ON состав_заказа;
+DROP TRIGGER IF EXISTS trg_order_amount_upd ON состав_заказа;
+DROP TRIGGER IF EXISTS trg_order_amount_del ON состав_заказа;
+CREATE TRIGGER trg_order_amount_ins
+AFTER
+INSERT ON состав_заказа REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_amount_func();
+CREATE TRIGGER trg_order_amount_upd
+AFTER
+UPDATE ON состав_заказа REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_amount_func();
+CREATE TRIGGER trg_order_amount_del
+AFTER DELETE ON состав_заказа REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_order_amount_func();
+
+-- 4. Дельты верны только от верной базы: выравниваем суммы один раз
+UPDATE заказы z
+SET сумма_заказа = s.total
+FROM (
+        SELECT z2.id_заказа,
+            COALESCE(SUM(sz.количество_изделий * sz.цена_фиксированная), 0) AS total
+        FROM заказы z2
+            LEFT JOIN состав_заказа sz ON sz.id_заказа = z2.id_заказа
+        GROUP BY z2.id_заказа
+    ) s
+WHERE z.id_заказа = s.id_заказа
+    AND z.сумма_заказа IS DISTINCT FROM s.total;
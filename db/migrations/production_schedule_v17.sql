@@ -0,0 +1,59 @@
+-- Phase 17: Автопланирование производства (business_logic.scheduler)
+-- =================================================================
+-- Планировщик распределяет задачи план_заготовок по сборщикам и дням
+-- с учетом график_работы и нормы выработки заготовки, а результат
+-- записывает одним вызовом sp_apply_production_schedule.
+--
+--   SELECT * FROM sp_apply_production_schedule(
+--       '[{"id_заготовки": 1, "id_заказа": 10, "id_сотрудника": 5, "дата_план": "2025-03-01"}]');
+
+-- 1. Норма выработки: сколько заготовок один сборщик делает за рабочий день
+ALTER TABLE заготовки
+ADD COLUMN IF NOT EXISTS норма_в_смену INTEGER NOT NULL DEFAULT 10 CHECK (норма_в_смену > 0);
+
+-- 2. Пакетная запись назначений.
+--    Обновляются только задачи, которые еще не взяты в работу: если сборщик
+--    успел взять задачу, пока считался план, его назначение не трогаем.
+DROP FUNCTION IF EXISTS sp_apply_production_schedule(JSONB);
+CREATE OR REPLACE FUNCTION sp_apply_production_schedule(p_assignments JSONB) RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        updated INTEGER
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_total INTEGER;
+BEGIN
+SELECT COUNT(*) INTO v_total
+FROM jsonb_array_elements(COALESCE(p_assignments, '[]'::JSONB));
+
+WITH a AS (
+    SELECT *
+    FROM jsonb_to_recordset(COALESCE(p_assignments, '[]'::JSONB)) AS t(
+            id_заготовки INTEGER,
+            id_заказа INTEGER,
+            id_сотрудника INTEGER,
+            дата_план DATE
+        )
+)
+UPDATE план_заготовок pz
+SET id_сотрудника = a.id_сотрудника,
+    дата_план = a.дата_план
+FROM a
+WHERE pz.id_заготовки = a.id_заготовки
+    AND pz.id_заказа = a.id_заказа
+    AND pz.статус IN ('принято', 'просрочено')
+    AND (
+        pz.id_сотрудника IS DISTINCT FROM a.id_сотрудника
+        OR pz.дата_план IS DISTINCT FROM a.дата_план
+    );
+GET DIAGNOSTICS updated = ROW_COUNT;
+
+status := 'OK';
+message := 'План применен: изменено задач ' || updated || ' из ' || v_total;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка применения плана: ' || SQLERRM;
+updated := 0;
+RETURN NEXT;
+END;
+$$;
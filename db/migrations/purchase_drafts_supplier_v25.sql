@@ -0,0 +1,165 @@
+-- Phase 25: Черновики закупок только с известным поставщиком и ценой
+-- ================================================================
+-- purchase_proposals_v16.sql подставлял в черновик строку
+-- 'Поставщик не определен' и цену 0, если материал ни разу не закупался:
+-- в закупки попадал несуществующий поставщик. Теперь:
+--   * sp_purchase_proposals возвращает цену NULL, если ее неоткуда взять,
+--     и замечание по строке, которую нельзя включить в черновик;
+--   * sp_create_purchase_drafts создает черновики только по строкам без
+--     замечаний, остальные перечисляет в сообщении (status = 'WARNING').
+-- Потребность передается из business_logic.mrp (открытые задания производства).
+
+DROP FUNCTION IF EXISTS sp_purchase_proposals(JSONB);
+CREATE OR REPLACE FUNCTION sp_purchase_proposals(p_requirements JSONB DEFAULT '[]') RETURNS TABLE (
+        id_материала INTEGER,
+        артикул_материала VARCHAR,
+        наименование VARCHAR,
+        единица_измерения VARCHAR,
+        на_складе INTEGER,
+        в_пути INTEGER,
+        потребность INTEGER,
+        минимальный_остаток INTEGER,
+        количество INTEGER,
+        поставщик VARCHAR,
+        цена NUMERIC,
+        нужно_к DATE,
+        замечание VARCHAR
+    ) LANGUAGE sql STABLE AS $$ WITH req AS (
+        SELECT r.id_материала,
+            SUM(r.потребность)::INTEGER AS потребность,
+            MIN(r.нужно_к) AS нужно_к
+        FROM jsonb_to_recordset(COALESCE(p_requirements, '[]'::JSONB)) AS r(
+                id_материала INTEGER,
+                потребность NUMERIC,
+                нужно_к DATE
+            )
+        GROUP BY r.id_материала
+    ),
+    on_order AS (
+        SELECT sz.id_материала,
+            SUM(sz.количество)::INTEGER AS в_пути
+        FROM состав_закупки sz
+            JOIN закупки_материалов zm ON zm.id_закупки = sz.id_закупки
+        WHERE zm.статус NOT IN ('выполнено', 'отменено')
+        GROUP BY sz.id_материала
+    ),
+    calc AS (
+        SELECT m.id_материала,
+            m.артикул_материала,
+            m.наименование,
+            m.единица_измерения,
+            COALESCE(m.количество_на_складе, 0) AS на_складе,
+            COALESCE(o.в_пути, 0) AS в_пути,
+            COALESCE(r.потребность, 0) AS потребность,
+            COALESCE(m.минимальный_остаток, 0) AS минимальный_остаток,
+            m.цена_за_единицу,
+            r.нужно_к
+        FROM материалы m
+            LEFT JOIN req r ON r.id_материала = m.id_материала
+            LEFT JOIN on_order o ON o.id_материала = m.id_материала
+    ),
+    priced AS (
+        SELECT c.*,
+            p.поставщик,
+            NULLIF(COALESCE(p.цена_закупки, c.цена_за_единицу), 0) AS цена
+        FROM calc c
+            LEFT JOIN v_материал_последняя_закупка p ON p.id_материала = c.id_материала
+        WHERE c.потребность + c.минимальный_остаток - c.на_складе - c.в_пути > 0
+    )
+SELECT id_материала,
+    артикул_материала,
+    наименование,
+    единица_измерения,
+    на_складе,
+    в_пути,
+    потребность,
+    минимальный_остаток,
+    потребность + минимальный_остаток - на_складе - в_пути,
+    поставщик,
+    цена,
+    нужно_к,
+    CASE
+        WHEN поставщик IS NULL
+        AND цена IS NULL THEN 'Нет поставщика и цены'
+        WHEN поставщик IS NULL THEN 'Нет поставщика'
+        WHEN цена IS NULL THEN 'Нет цены'
+    END::VARCHAR
+FROM priced
+ORDER BY поставщик NULLS LAST,
+    нужно_к NULLS LAST,
+    id_материала;
+$$;
+
+DROP FUNCTION IF EXISTS sp_create_purchase_drafts(JSONB);
+CREATE OR REPLACE FUNCTION sp_create_purchase_drafts(p_requirements JSONB DEFAULT '[]') RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        purchase_ids INTEGER []
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_ids INTEGER [];
+v_lines INTEGER;
+v_skipped TEXT;
+BEGIN -- Параллельный запуск не должен заказать то же самое второй раз:
+-- второй вызов ждет и видит черновики первого в "уже заказано"
+PERFORM pg_advisory_xact_lock(hashtext('sp_create_purchase_drafts'));
+
+CREATE TEMP TABLE tmp_предложения ON COMMIT DROP AS
+SELECT *
+FROM sp_purchase_proposals(p_requirements);
+
+WITH heads AS (
+    INSERT INTO закупки_материалов (поставщик, статус)
+    SELECT DISTINCT поставщик,
+        'ожидает_подтверждения'
+    FROM tmp_предложения
+    WHERE замечание IS NULL
+    RETURNING id_закупки,
+        поставщик
+),
+lines AS (
+    INSERT INTO состав_закупки (
+            id_закупки,
+            id_материала,
+            количество,
+            цена_закупки
+        )
+    SELECT h.id_закупки,
+        p.id_материала,
+        p.количество,
+        p.цена
+    FROM tmp_предложения p
+        JOIN heads h ON h.поставщик = p.поставщик
+    WHERE p.замечание IS NULL
+    RETURNING id_закупки
+)
+SELECT array_agg(DISTINCT id_закупки ORDER BY id_закупки),
+    COUNT(*) INTO v_ids,
+    v_lines
+FROM lines;
+
+SELECT string_agg(наименование || ' (' || замечание || ')', ', ' ORDER BY id_материала) INTO v_skipped
+FROM tmp_предложения
+WHERE замечание IS NOT NULL;
+DROP TABLE tmp_предложения;
+
+status := CASE
+    WHEN v_skipped IS NULL THEN 'OK'
+    ELSE 'WARNING'
+END;
+purchase_ids := COALESCE(v_ids, '{}');
+IF v_lines = 0 THEN message := 'Закупать нечего: остатков достаточно';
+ELSE message := 'Создано закупок: ' || cardinality(v_ids) || ', позиций: ' || v_lines;
+END IF;
+IF v_skipped IS NOT NULL THEN message := CASE
+    WHEN v_lines = 0 THEN 'Черновики не созданы'
+    ELSE message
+END || '. Не включены (укажите поставщика и цену вручную): ' || v_skipped;
+END IF;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка формирования закупок: ' || SQLERRM;
+purchase_ids := '{}';
+RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,163 @@
+-- Phase 16: Предложения закупок по нехватке и минимальному остатку
+-- ===============================================================
+-- Раньше закупка собиралась вручную, по одному материалу.
+-- Теперь по каждому материалу за один проход считается количество к заказу:
+--   потребность открытых заказов (business_logic.mrp) + минимальный_остаток
+--   − на складе − уже заказано (закупки, которые еще не выполнены и не отменены).
+-- Поставщик и цена берутся из последней закупки материала. Черновики
+-- создаются одной транзакцией: одна закупка на поставщика со всеми позициями.
+--
+--   SELECT * FROM sp_purchase_proposals('[{"id_материала": 1, "потребность": 40, "нужно_к": "2025-03-01"}]');
+--   SELECT * FROM sp_create_purchase_drafts('[...]');
+-- Без потребности ('[]') учитывается только минимальный остаток.
+
+-- 1. Последняя закупка материала (поставщик, цена)
+CREATE INDEX IF NOT EXISTS idx_состав_закупки_материал ON состав_закупки (id_материала);
+
+CREATE OR REPLACE VIEW v_материал_последняя_закупка AS
+SELECT DISTINCT ON (sz.id_материала) sz.id_материала,
+    zm.поставщик,
+    sz.цена_закупки,
+    zm.дата_закупки
+FROM состав_закупки sz
+    JOIN закупки_материалов zm ON zm.id_закупки = sz.id_закупки
+WHERE zm.статус <> 'отменено'
+    AND NULLIF(TRIM(zm.поставщик), '') IS NOT NULL
+ORDER BY sz.id_материала,
+    zm.дата_закупки DESC NULLS LAST,
+    zm.id_закупки DESC;
+
+-- 2. Предложения (только материалы, которые нужно заказать)
+DROP FUNCTION IF EXISTS sp_purchase_proposals(JSONB);
+CREATE OR REPLACE FUNCTION sp_purchase_proposals(p_requirements JSONB DEFAULT '[]') RETURNS TABLE (
+        id_материала INTEGER,
+        артикул_материала VARCHAR,
+        наименование VARCHAR,
+        единица_измерения VARCHAR,
+        на_складе INTEGER,
+        в_пути INTEGER,
+        потребность INTEGER,
+        минимальный_остаток INTEGER,
+        количество INTEGER,
+        поставщик VARCHAR,
+        цена NUMERIC,
+        нужно_к DATE
+    ) LANGUAGE sql STABLE AS $$ WITH req AS (
+        SELECT r.id_материала,
+            SUM(r.потребность)::INTEGER AS потребность,
+            MIN(r.нужно_к) AS нужно_к
+        FROM jsonb_to_recordset(COALESCE(p_requirements, '[]'::JSONB)) AS r(
+                id_материала INTEGER,
+                потребность NUMERIC,
+                нужно_к DATE
+            )
+        GROUP BY r.id_материала
+    ),
+    on_order AS (
+        SELECT sz.id_материала,
+            SUM(sz.количество)::INTEGER AS в_пути
+        FROM состав_закупки sz
+            JOIN закупки_материалов zm ON zm.id_закупки = sz.id_закупки
+        WHERE zm.статус NOT IN ('выполнено', 'отменено')
+        GROUP BY sz.id_материала
+    ),
+    calc AS (
+        SELECT m.id_материала,
+            m.артикул_материала,
+            m.наименование,
+            m.единица_измерения,
+            COALESCE(m.количество_на_складе, 0) AS на_складе,
+            COALESCE(o.в_пути, 0) AS в_пути,
+            COALESCE(r.потребность, 0) AS потребность,
+            COALESCE(m.минимальный_остаток, 0) AS минимальный_остаток,
+            m.цена_за_единицу,
+            r.нужно_к
+        FROM материалы m
+            LEFT JOIN req r ON r.id_материала = m.id_материала
+            LEFT JOIN on_order o ON o.id_материала = m.id_материала
+    )
+SELECT c.id_материала,
+    c.артикул_материала,
+    c.наименование,
+    c.единица_измерения,
+    c.на_складе,
+    c.в_пути,
+    c.потребность,
+    c.минимальный_остаток,
+    c.потребность + c.минимальный_остаток - c.на_складе - c.в_пути,
+    p.поставщик,
+    COALESCE(p.цена_закупки, c.цена_за_единицу, 0),
+    c.нужно_к
+FROM calc c
+    LEFT JOIN v_материал_последняя_закупка p ON p.id_материала = c.id_материала
+WHERE c.потребность + c.минимальный_остаток - c.на_складе - c.в_пути > 0
+ORDER BY p.поставщик NULLS LAST,
+    c.нужно_к NULLS LAST,
+    c.id_материала;
+$$;
+
+-- 3. Черновики закупок: одна на поставщика
+DROP FUNCTION IF EXISTS sp_create_purchase_drafts(JSONB);
+CREATE OR REPLACE FUNCTION sp_create_purchase_drafts(p_requirements JSONB DEFAULT '[]') RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        purchase_ids INTEGER []
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_ids INTEGER [];
+v_lines INTEGER;
+BEGIN -- Параллельный запуск не должен заказать то же самое второй раз:
+-- второй вызов ждет и видит черновики первого в "уже заказано"
+PERFORM pg_advisory_xact_lock(hashtext('sp_create_purchase_drafts'));
+
+WITH prop AS (
+    SELECT p.id_материала,
+        p.количество,
+        p.цена,
+        COALESCE(p.поставщик, 'Поставщик не определен') AS поставщик
+    FROM sp_purchase_proposals(p_requirements) p
+),
+heads AS (
+    INSERT INTO закупки_материалов (поставщик, статус)
+    SELECT DISTINCT поставщик,
+        'ожидает_подтверждения'
+    FROM prop
+    RETURNING id_закупки,
+        поставщик
+),
+lines AS (
+    INSERT INTO состав_закупки (
+            id_закупки,
+            id_материала,
+            количество,
+            цена_закупки
+        )
+    SELECT h.id_закупки,
+        p.id_материала,
+        p.количество,
+        p.цена
+    FROM prop p
+        JOIN heads h ON h.поставщик = p.поставщик
+    RETURNING id_закупки
+)
+SELECT array_agg(DISTINCT id_закупки ORDER BY id_закупки),
+    COUNT(*) INTO v_ids,
+    v_lines
+FROM lines;
+
+IF v_lines = 0 THEN status := 'OK';
+message := 'Закупать нечего: остатков достаточно';
+purchase_ids := '{}';
+RETURN NEXT;
+RETURN;
+END IF;
+status := 'OK';
+message := 'Создано закупок: ' || cardinality(v_ids) || ', позиций: ' || v_lines;
+purchase_ids := v_ids;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка формирования закупок: ' || SQLERRM;
+purchase_ids := '{}';
+RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,15 @@
+-- Phase 28: Дата закупки обязательна (ключ страниц sp_get_purchases)
+-- ================================================================
+-- sp_get_purchases (purchases_set_based_v21.sql) листает по ключу
+-- (дата_закупки, id_закупки). При NULL в дате последней строки страницы
+-- сравнение строк давало NULL, и следующая страница начиналась сначала:
+-- список закупок показывал дубли. Как для заказов (search_orders_v10.sql),
+-- пустые даты заполняются и колонка становится NOT NULL (DEFAULT CURRENT_DATE
+-- уже задан).
+
+UPDATE закупки_материалов
+SET дата_закупки = CURRENT_DATE
+WHERE дата_закупки IS NULL;
+ALTER TABLE закупки_материалов
+ALTER COLUMN дата_закупки
+SET NOT NULL;
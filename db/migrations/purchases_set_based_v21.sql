@@ -0,0 +1,191 @@
+-- Phase 21: Список закупок и подтверждение закупок одним вызовом
+-- ==============================================================
+-- PurchasesTab считал сумму каждой закупки отдельным запросом (N+1), а при
+-- подтверждении менял статус и остаток каждого материала отдельными
+-- Database.execute на разных соединениях — сбой посередине оставлял склад
+-- пополненным наполовину. Теперь:
+--   * sp_get_purchases — страница закупок (ключ последней строки, как в
+--     sp_search_orders_page) с суммами одним сгруппированным соединением;
+--   * sp_confirm_purchase — подтверждение одной или нескольких закупок
+--     в одной транзакции: все или ничего, остатки одним UPDATE ... FROM.
+--
+--   SELECT * FROM sp_get_purchases('поставщик', NULL, NULL, 200);
+--   SELECT * FROM sp_confirm_purchase(ARRAY[12, 15]);
+
+-- 1. Страница закупок с суммами
+CREATE INDEX IF NOT EXISTS idx_закупки_материалов_дата_id ON закупки_материалов (дата_закупки DESC, id_закупки DESC);
+
+DROP FUNCTION IF EXISTS sp_get_purchases(VARCHAR, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_get_purchases(
+        p_search_text VARCHAR DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_закупки INTEGER,
+        дата_закупки DATE,
+        поставщик VARCHAR,
+        статус VARCHAR,
+        сумма NUMERIC,
+        позиций BIGINT
+    ) LANGUAGE sql STABLE AS $$ WITH page AS (
+        SELECT z.id_закупки,
+            z.дата_закупки,
+            z.поставщик,
+            z.статус
+        FROM закупки_материалов z
+        WHERE (
+                COALESCE(p_search_text, '') = ''
+                OR z.поставщик ILIKE '%' || p_search_text || '%'
+                OR z.статус ILIKE '%' || p_search_text || '%'
+            )
+            AND (
+                p_after_date IS NULL
+                OR p_after_id IS NULL
+                OR (z.дата_закупки, z.id_закупки) < (p_after_date, p_after_id)
+            )
+        ORDER BY z.дата_закупки DESC,
+            z.id_закупки DESC
+        LIMIT p_limit
+    ),
+    totals AS (
+        -- Суммы только по закупкам страницы
+        SELECT sz.id_закупки,
+            SUM(sz.количество * COALESCE(sz.цена_закупки, 0)) AS сумма,
+            COUNT(*) AS позиций
+        FROM состав_закупки sz
+        WHERE sz.id_закупки IN (
+                SELECT id_закупки
+                FROM page
+            )
+        GROUP BY sz.id_закупки
+    )
+SELECT p.id_закупки,
+    p.дата_закупки,
+    p.поставщик,
+    p.статус,
+    COALESCE(t.сумма, 0)::NUMERIC,
+    COALESCE(t.позиций, 0)::BIGINT
+FROM page p
+    LEFT JOIN totals t ON t.id_закупки = p.id_закупки
+ORDER BY p.дата_закупки DESC,
+    p.id_закупки DESC;
+$$;
+
+-- 2. Подтверждение закупок: статус и остатки одной транзакцией
+DROP FUNCTION IF EXISTS sp_confirm_purchase(INTEGER []);
+CREATE OR REPLACE FUNCTION sp_confirm_purchase(p_purchase_ids INTEGER []) RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        confirmed INTEGER
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_ids INTEGER [] := (
+    SELECT array_agg(DISTINCT x ORDER BY x)
+    FROM unnest(p_purchase_ids) AS x
+    WHERE x IS NOT NULL
+);
+v_problems TEXT;
+v_found INTEGER;
+BEGIN confirmed := 0;
+IF v_ids IS NULL THEN status := 'ERROR';
+message := 'Не выбраны закупки';
+RETURN NEXT;
+RETURN;
+END IF;
+
+-- Блокируем закупки (по возрастанию id) и проверяем все сразу
+WITH locked AS (
+    SELECT z.id_закупки,
+        z.статус
+    FROM закупки_материалов z
+    WHERE z.id_закупки = ANY(v_ids)
+    ORDER BY z.id_закупки FOR
+    UPDATE
+)
+SELECT COUNT(*),
+    string_agg(
+        '№' || l.id_закупки || CASE
+            WHEN l.статус = 'выполнено' THEN ' уже выполнена'
+            ELSE ' отменена'
+        END,
+        ', '
+        ORDER BY l.id_закупки
+    ) FILTER (
+        WHERE l.статус IN ('выполнено', 'отменено')
+    ) INTO v_found,
+    v_problems
+FROM locked l;
+IF v_found < array_length(v_ids, 1) THEN v_problems := concat_ws(
+    ', ',
+    v_problems,
+    'не найдено закупок: ' || (array_length(v_ids, 1) - v_found)
+);
+END IF;
+IF v_problems IS NOT NULL THEN status := 'ERROR';
+message := 'Закупки не подтверждены: ' || v_problems;
+RETURN NEXT;
+RETURN;
+END IF;
+
+UPDATE закупки_материалов
+SET статус = 'выполнено'
+WHERE id_закупки = ANY(v_ids);
+GET DIAGNOSTICS confirmed = ROW_COUNT;
+
+-- Материалы блокируются в порядке id_материала, как при резерве под задачи
+PERFORM 1
+FROM материалы m
+WHERE m.id_материала IN (
+        SELECT sz.id_материала
+        FROM состав_закупки sz
+        WHERE sz.id_закупки = ANY(v_ids)
+    )
+ORDER BY m.id_материала FOR NO KEY UPDATE;
+
+PERFORM set_config('nova.тип_движения', 'приход', true),
+    set_config(
+        'nova.основание',
+        left('закупка №' || array_to_string(v_ids, ', №'), 200),
+        true
+    );
+UPDATE материалы m
+SET количество_на_складе = COALESCE(m.количество_на_складе, 0) + s.количество
+FROM (
+        SELECT sz.id_материала,
+            SUM(sz.количество) AS количество
+        FROM состав_закупки sz
+        WHERE sz.id_закупки = ANY(v_ids)
+        GROUP BY sz.id_материала
+    ) s
+WHERE m.id_материала = s.id_материала;
+PERFORM set_config('nova.тип_движения', '', true),
+    set_config('nova.основание', '', true);
+
+status := 'OK';
+message := CASE
+    WHEN confirmed = 1 THEN 'Закупка подтверждена и склад обновлён'
+    ELSE 'Подтверждено закупок: ' || confirmed || ', склад обновлён'
+END;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка подтверждения закупки: ' || SQLERRM;
+confirmed := 0;
+RETURN NEXT;
+END;
+$$;
+
+-- 3. Старая процедура подтверждения — обертка над sp_confirm_purchase
+CREATE OR REPLACE PROCEDURE sp_подтвердить_закупку(p_id_закупки INTEGER) LANGUAGE plpgsql AS $$
+DECLARE v_status VARCHAR;
+v_message VARCHAR;
+BEGIN
+SELECT c.status,
+    c.message INTO v_status,
+    v_message
+FROM sp_confirm_purchase(ARRAY [p_id_закупки]) c;
+IF v_status <> 'OK' THEN RAISE EXCEPTION '%',
+v_message;
+END IF;
+END;
+$$;
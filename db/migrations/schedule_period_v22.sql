@@ -0,0 +1,92 @@
+-- Phase 22: Пакетная правка графика работы
+-- ========================================
+-- ManagerScheduleTab вызывал sp_установить_статус_дня на каждую выделенную
+-- ячейку отдельным соединением: месяц отпуска для 20 сотрудников — сотни
+-- обращений к БД. sp_установить_статус_периода записывает все пары
+-- сотрудник × дата одним INSERT ... ON CONFLICT.
+--
+--   SELECT * FROM sp_установить_статус_периода(ARRAY[4, 5], ARRAY['2025-03-03', '2025-03-05']::DATE[], 'отпуск');
+--   SELECT * FROM sp_установить_статус_периода(ARRAY[4, 5], '[2025-03-01,2025-04-01)'::DATERANGE, 'отпуск');
+
+-- 1. Отдельные даты
+DROP FUNCTION IF EXISTS sp_установить_статус_периода(INTEGER [], DATE [], VARCHAR);
+CREATE OR REPLACE FUNCTION sp_установить_статус_периода(
+        p_id_сотрудников INTEGER [],
+        p_даты DATE [],
+        p_статус VARCHAR
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR, updated INTEGER) LANGUAGE plpgsql AS $$
+DECLARE v_employees INTEGER;
+v_days INTEGER;
+BEGIN updated := 0;
+IF p_статус IS NULL
+OR p_статус NOT IN ('рабочий', 'выходной', 'отпуск', 'больничный') THEN status := 'ERROR';
+message := 'Неизвестный статус дня: ' || COALESCE(p_статус, 'NULL');
+RETURN NEXT;
+RETURN;
+END IF;
+SELECT COUNT(DISTINCT e) INTO v_employees
+FROM unnest(p_id_сотрудников) AS e;
+SELECT COUNT(DISTINCT d) INTO v_days
+FROM unnest(p_даты) AS d;
+IF v_employees = 0
+OR v_days = 0 THEN status := 'ERROR';
+message := 'Не выбраны сотрудники или дни';
+RETURN NEXT;
+RETURN;
+END IF;
+
+-- Повторы в массивах убираем: ON CONFLICT не может обновить строку дважды
+INSERT INTO график_работы (id_сотрудника, дата, статус)
+SELECT e.id,
+    d.day,
+    p_статус
+FROM (
+        SELECT DISTINCT unnest(p_id_сотрудников) AS id
+    ) e
+    CROSS JOIN (
+        SELECT DISTINCT unnest(p_даты) AS day
+    ) d
+WHERE e.id IS NOT NULL
+    AND d.day IS NOT NULL ON CONFLICT (id_сотрудника, дата) DO
+UPDATE
+SET статус = EXCLUDED.статус
+WHERE график_работы.статус IS DISTINCT FROM EXCLUDED.статус;
+GET DIAGNOSTICS updated = ROW_COUNT;
+
+status := 'OK';
+message := 'Статус "' || p_статус || '" установлен: ' || v_days || ' дн. × ' || v_employees
+    || ' сотр. (изменено записей: ' || updated || ')';
+RETURN NEXT;
+EXCEPTION
+WHEN foreign_key_violation THEN status := 'ERROR';
+message := 'Сотрудник не найден';
+updated := 0;
+RETURN NEXT;
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка: ' || SQLERRM;
+updated := 0;
+RETURN NEXT;
+END;
+$$;
+
+-- 2. Непрерывный период
+DROP FUNCTION IF EXISTS sp_установить_статус_периода(INTEGER [], DATERANGE, VARCHAR);
+CREATE OR REPLACE FUNCTION sp_установить_статус_периода(
+        p_id_сотрудников INTEGER [],
+        p_период DATERANGE,
+        p_статус VARCHAR
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR, updated INTEGER) LANGUAGE sql AS $$
+SELECT *
+FROM sp_установить_статус_периода(
+        p_id_сотрудников,
+        ARRAY(
+            SELECT d::DATE
+            FROM generate_series(
+                    lower(p_период),
+                    upper(p_период) - 1,
+                    INTERVAL '1 day'
+                ) AS d
+        ),
+        p_статус
+    );
+$$;
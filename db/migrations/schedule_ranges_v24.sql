@@ -0,0 +1,479 @@
+-- Phase 24: График работы периодами (daterange) вместо строки на день
+-- ====================================================================
+-- график_работы хранил строку на сотрудника и день, а календари читали всю
+-- историю сотрудника при каждой смене месяца. Теперь:
+--   * график_периоды — непрерывные отрезки с одним статусом; соседние
+--     отрезки одного сотрудника всегда с разными статусами (год 5/2 —
+--     около сотни строк вместо 365);
+--   * пересечения запрещены ограничением-исключением. btree_gist есть не
+--     везде, поэтому сотрудник и период сведены в один box (ключ): по x —
+--     дни отрезка от 2000-01-01 включительно, по y — id_сотрудника (высота
+--     0.5, чтобы соседние сотрудники не касались). По этому же ключу GiST
+--     находит отрезки сотрудника за месяц;
+--   * график_работы — представление прежней формы (строка на день) для
+--     чтения и совместимости; запись через него тоже работает;
+--   * sp_график_за_период — дни только нужного периода (по индексу ключа);
+--   * все записи идут через sp_записать_график: затронутые отрезки
+--     разворачиваются в дни, правятся и снова сжимаются одним оператором.
+--
+--   SELECT * FROM sp_график_за_период(ARRAY[4, 5], '2025-03-01', '2025-03-31');
+
+-- 1. Хранение отрезками
+CREATE OR REPLACE FUNCTION fn_график_ключ(p_id_сотрудника INTEGER, p_период DATERANGE) RETURNS BOX LANGUAGE sql IMMUTABLE AS $$
+SELECT box(
+        point(lower(p_период) - DATE '2000-01-01', p_id_сотрудника),
+        point(upper(p_период) - 1 - DATE '2000-01-01', p_id_сотрудника + 0.5)
+    );
+$$;
+
+CREATE TABLE IF NOT EXISTS график_периоды (
+    id_периода SERIAL PRIMARY KEY,
+    id_сотрудника INTEGER NOT NULL REFERENCES сотрудники(id_сотрудника) ON DELETE CASCADE,
+    период DATERANGE NOT NULL CHECK (
+        NOT isempty(период)
+        AND NOT lower_inf(период)
+        AND NOT upper_inf(период)
+    ),
+    статус VARCHAR(20) NOT NULL CHECK (
+        статус IN ('рабочий', 'выходной', 'отпуск', 'больничный')
+    ),
+    ключ BOX GENERATED ALWAYS AS (fn_график_ключ(id_сотрудника, период)) STORED,
+    CONSTRAINT график_периоды_без_пересечений EXCLUDE USING gist (ключ WITH &&)
+);
+
+-- 2. Перенос существующих дней: острова подряд идущих дней с одним статусом
+DO $$ BEGIN IF EXISTS (
+    SELECT 1
+    FROM pg_class
+    WHERE relname = 'график_работы'
+        AND relkind = 'r'
+) THEN
+INSERT INTO график_периоды (id_сотрудника, период, статус)
+SELECT id_сотрудника,
+    daterange(MIN(дата), MAX(дата) + 1),
+    статус
+FROM (
+        SELECT id_сотрудника,
+            дата,
+            статус,
+            дата - (
+                ROW_NUMBER() OVER (
+                    PARTITION BY id_сотрудника,
+                    статус
+                    ORDER BY дата
+                )
+            )::INTEGER AS grp
+        FROM график_работы
+        WHERE id_сотрудника IS NOT NULL
+            AND статус IS NOT NULL
+    ) d
+GROUP BY id_сотрудника,
+    статус,
+    grp
+ORDER BY id_сотрудника,
+    MIN(дата);
+DROP TABLE график_работы;
+END IF;
+END $$;
+
+-- 3. Прежняя форма: строка на сотрудника и день
+CREATE OR REPLACE VIEW график_работы AS
+SELECT p.id_сотрудника,
+    d::DATE AS дата,
+    p.статус
+FROM график_периоды p
+    CROSS JOIN LATERAL generate_series(
+        lower(p.период),
+        upper(p.период) - 1,
+        INTERVAL '1 day'
+    ) AS d;
+
+-- 4. Дни сотрудников за период (читаются только пересекающиеся отрезки)
+DROP FUNCTION IF EXISTS sp_график_за_период(INTEGER [], DATE, DATE);
+CREATE OR REPLACE FUNCTION sp_график_за_период(p_id_сотрудников INTEGER [], p_с DATE, p_по DATE) RETURNS TABLE (
+        id_сотрудника INTEGER,
+        дата DATE,
+        статус VARCHAR
+    ) LANGUAGE sql STABLE AS $$
+SELECT p.id_сотрудника,
+    d::DATE,
+    p.статус
+FROM (
+        SELECT DISTINCT unnest(p_id_сотрудников) AS id
+    ) e
+    JOIN график_периоды p ON p.ключ && fn_график_ключ(e.id, daterange(p_с, p_по, '[]'))
+    CROSS JOIN LATERAL generate_series(
+        GREATEST(lower(p.период), p_с),
+        LEAST(upper(p.период) - 1, p_по),
+        INTERVAL '1 day'
+    ) AS d
+ORDER BY 1,
+    2;
+$$;
+
+-- 5. Запись дней (параллельные массивы; статус NULL — убрать день из графика).
+--    Возвращает число изменившихся дней.
+DROP FUNCTION IF EXISTS sp_записать_график(INTEGER [], DATE [], VARCHAR [], BOOLEAN);
+CREATE OR REPLACE FUNCTION sp_записать_график(
+        p_id_сотрудников INTEGER [],
+        p_даты DATE [],
+        p_статусы VARCHAR [],
+        p_сохранять_отсутствия BOOLEAN DEFAULT FALSE
+    ) RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE v_changed INTEGER;
+BEGIN
+-- Правки одного сотрудника последовательны (переписываются его отрезки)
+PERFORM pg_advisory_xact_lock(hashtext('график_периоды'), e.id)
+FROM (
+        SELECT DISTINCT unnest(p_id_сотрудников) AS id
+    ) e
+WHERE e.id IS NOT NULL
+ORDER BY e.id;
+
+WITH req AS (
+    SELECT DISTINCT ON (r.emp, r.day) r.emp,
+        r.day,
+        r.status
+    FROM unnest(p_id_сотрудников, p_даты, p_статусы) AS r(emp, day, status)
+    WHERE r.emp IS NOT NULL
+        AND r.day IS NOT NULL
+    ORDER BY r.emp,
+        r.day
+),
+win AS (
+    -- ±1 день: соседние отрезки того же статуса сливаются с новыми днями
+    SELECT emp,
+        MIN(day) - 1 AS lo,
+        MAX(day) + 1 AS hi
+    FROM req
+    GROUP BY emp
+),
+cur_runs AS MATERIALIZED (
+    SELECT p.id_периода,
+        p.id_сотрудника,
+        p.период,
+        p.статус
+    FROM win w
+        JOIN график_периоды p ON p.ключ && fn_график_ключ(w.emp, daterange(w.lo, w.hi, '[]'))
+),
+cur_days AS (
+    SELECT r.id_сотрудника AS emp,
+        d::DATE AS day,
+        r.статус AS status
+    FROM cur_runs r
+        CROSS JOIN LATERAL generate_series(
+            lower(r.период),
+            upper(r.период) - 1,
+            INTERVAL '1 day'
+        ) AS d
+),
+changes AS MATERIALIZED (
+    SELECT q.emp,
+        q.day,
+        q.status
+    FROM req q
+        LEFT JOIN cur_days c ON c.emp = q.emp
+        AND c.day = q.day
+    WHERE c.status IS DISTINCT FROM q.status
+        AND NOT (
+            p_сохранять_отсутствия
+            AND COALESCE(c.status IN ('отпуск', 'больничный'), FALSE)
+        )
+),
+removed AS (
+    -- Переписываются только отрезки сотрудников, у которых что-то меняется
+    DELETE FROM график_периоды p USING cur_runs r
+    WHERE p.id_периода = r.id_периода
+        AND r.id_сотрудника IN (
+            SELECT emp
+            FROM changes
+        )
+    RETURNING p.id_сотрудника,
+        p.период,
+        p.статус
+),
+final_days AS (
+    SELECT COALESCE(c.emp, o.emp) AS emp,
+        COALESCE(c.day, o.day) AS day,
+        CASE
+            WHEN c.emp IS NULL THEN o.status
+            ELSE c.status
+        END AS status
+    FROM (
+            SELECT r.id_сотрудника AS emp,
+                d::DATE AS day,
+                r.статус AS status
+            FROM removed r
+                CROSS JOIN LATERAL generate_series(
+                    lower(r.период),
+                    upper(r.период) - 1,
+                    INTERVAL '1 day'
+                ) AS d
+        ) o
+        FULL JOIN changes c ON c.emp = o.emp
+        AND c.day = o.day
+),
+islands AS (
+    SELECT emp,
+        day,
+        status,
+        day - (
+            ROW_NUMBER() OVER (
+                PARTITION BY emp,
+                status
+                ORDER BY day
+            )
+        )::INTEGER AS grp
+    FROM final_days
+    WHERE status IS NOT NULL
+),
+inserted AS (
+    INSERT INTO график_периоды (id_сотрудника, период, статус)
+    SELECT emp,
+        daterange(MIN(day), MAX(day) + 1),
+        status
+    FROM islands
+    GROUP BY emp,
+        status,
+        grp
+    ORDER BY emp,
+        MIN(day)
+)
+SELECT COUNT(*) INTO v_changed
+FROM changes;
+RETURN v_changed;
+END;
+$$;
+
+-- 6. Прежние точки записи — через sp_записать_график
+CREATE OR REPLACE PROCEDURE sp_установить_статус_дня(
+        p_id_сотрудника INTEGER,
+        p_дата DATE,
+        p_статус VARCHAR
+    ) LANGUAGE plpgsql AS $$ BEGIN PERFORM sp_записать_график(ARRAY [p_id_сотрудника], ARRAY [p_дата], ARRAY [p_статус]);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_график_работы_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN IF TG_OP IN ('UPDATE', 'DELETE') THEN PERFORM sp_записать_график(
+        ARRAY [OLD.id_сотрудника],
+        ARRAY [OLD.дата],
+        ARRAY [NULL::VARCHAR]
+    );
+END IF;
+IF TG_OP IN ('INSERT', 'UPDATE') THEN PERFORM sp_записать_график(
+    ARRAY [NEW.id_сотрудника],
+    ARRAY [NEW.дата],
+    ARRAY [NEW.статус]
+);
+RETURN NEW;
+END IF;
+RETURN OLD;
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_график_работы ON график_работы;
+CREATE TRIGGER trg_график_работы INSTEAD OF
+INSERT
+    OR
+UPDATE
+    OR DELETE ON график_работы FOR EACH ROW EXECUTE FUNCTION trg_график_работы_func();
+
+DROP FUNCTION IF EXISTS sp_установить_статус_периода(INTEGER [], DATE [], VARCHAR);
+CREATE OR REPLACE FUNCTION sp_установить_статус_периода(
+        p_id_сотрудников INTEGER [],
+        p_даты DATE [],
+        p_статус VARCHAR
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR, updated INTEGER) LANGUAGE plpgsql AS $$
+DECLARE v_employees INTEGER;
+v_days INTEGER;
+BEGIN updated := 0;
+IF p_статус IS NULL
+OR p_статус NOT IN ('рабочий', 'выходной', 'отпуск', 'больничный') THEN status := 'ERROR';
+message := 'Неизвестный статус дня: ' || COALESCE(p_статус, 'NULL');
+RETURN NEXT;
+RETURN;
+END IF;
+SELECT COUNT(DISTINCT e) INTO v_employees
+FROM unnest(p_id_сотрудников) AS e;
+SELECT COUNT(DISTINCT d) INTO v_days
+FROM unnest(p_даты) AS d;
+IF v_employees = 0
+OR v_days = 0 THEN status := 'ERROR';
+message := 'Не выбраны сотрудники или дни';
+RETURN NEXT;
+RETURN;
+END IF;
+
+SELECT sp_записать_график(
+        array_agg(e.id),
+        array_agg(d.day),
+        array_agg(p_статус)
+    ) INTO updated
+FROM (
+        SELECT DISTINCT unnest(p_id_сотрудников) AS id
+    ) e
+    CROSS JOIN (
+        SELECT DISTINCT unnest(p_даты) AS day
+    ) d
+WHERE e.id IS NOT NULL
+    AND d.day IS NOT NULL;
+
+status := 'OK';
+message := 'Статус "' || p_статус || '" установлен: ' || v_days || ' дн. × ' || v_employees
+    || ' сотр. (изменено записей: ' || updated || ')';
+RETURN NEXT;
+EXCEPTION
+WHEN foreign_key_violation THEN status := 'ERROR';
+message := 'Сотрудник не найден';
+updated := 0;
+RETURN NEXT;
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка: ' || SQLERRM;
+updated := 0;
+RETURN NEXT;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS sp_schedule_template_diff(VARCHAR, INTEGER [], DATE, DATE, INTEGER [], BOOLEAN);
+CREATE OR REPLACE FUNCTION sp_schedule_template_diff(
+        p_шаблон VARCHAR,
+        p_id_сотрудников INTEGER [],
+        p_с DATE,
+        p_по DATE,
+        p_сдвиги INTEGER [] DEFAULT NULL,
+        p_сохранять_отсутствия BOOLEAN DEFAULT TRUE
+    ) RETURNS TABLE (
+        id_сотрудника INTEGER,
+        дата DATE,
+        было VARCHAR,
+        станет VARCHAR
+    ) LANGUAGE sql STABLE AS $$
+SELECT n.id_сотрудника,
+    n.дата,
+    g.статус,
+    n.статус
+FROM sp_schedule_template_days(p_шаблон, p_id_сотрудников, p_с, p_по, p_сдвиги) n
+    LEFT JOIN sp_график_за_период(p_id_сотрудников, p_с, p_по) g ON g.id_сотрудника = n.id_сотрудника
+    AND g.дата = n.дата
+WHERE g.статус IS DISTINCT FROM n.статус
+    AND NOT (
+        p_сохранять_отсутствия
+        AND COALESCE(g.статус IN ('отпуск', 'больничный'), FALSE)
+    )
+ORDER BY n.id_сотрудника,
+    n.дата;
+$$;
+
+DROP FUNCTION IF EXISTS sp_apply_schedule_template(VARCHAR, INTEGER [], DATE, DATE, INTEGER [], BOOLEAN);
+CREATE OR REPLACE FUNCTION sp_apply_schedule_template(
+        p_шаблон VARCHAR,
+        p_id_сотрудников INTEGER [],
+        p_с DATE,
+        p_по DATE,
+        p_сдвиги INTEGER [] DEFAULT NULL,
+        p_сохранять_отсутствия BOOLEAN DEFAULT TRUE
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR, updated INTEGER) LANGUAGE plpgsql AS $$ BEGIN updated := 0;
+IF NOT EXISTS (
+    SELECT 1
+    FROM шаблоны_графика
+    WHERE наименование = p_шаблон
+) THEN status := 'ERROR';
+message := 'Шаблон графика не найден: ' || COALESCE(p_шаблон, 'NULL');
+RETURN NEXT;
+RETURN;
+END IF;
+IF p_с IS NULL
+OR p_по IS NULL
+OR p_по < p_с THEN status := 'ERROR';
+message := 'Неверный период';
+RETURN NEXT;
+RETURN;
+END IF;
+IF p_сдвиги IS NOT NULL
+AND cardinality(p_сдвиги) <> cardinality(p_id_сотрудников) THEN status := 'ERROR';
+message := 'Сдвигов должно быть столько же, сколько сотрудников';
+RETURN NEXT;
+RETURN;
+END IF;
+
+SELECT sp_записать_график(
+        array_agg(n.id_сотрудника),
+        array_agg(n.дата),
+        array_agg(n.статус),
+        p_сохранять_отсутствия
+    ) INTO updated
+FROM sp_schedule_template_days(p_шаблон, p_id_сотрудников, p_с, p_по, p_сдвиги) n;
+
+status := 'OK';
+message := 'Шаблон "' || p_шаблон || '" применен с ' || to_char(p_с, 'DD.MM.YYYY') || ' по '
+    || to_char(p_по, 'DD.MM.YYYY') || ': изменено дней ' || updated;
+RETURN NEXT;
+EXCEPTION
+WHEN foreign_key_violation THEN status := 'ERROR';
+message := 'Сотрудник не найден';
+updated := 0;
+RETURN NEXT;
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка применения шаблона: ' || SQLERRM;
+updated := 0;
+RETURN NEXT;
+END;
+$$;
+
+-- 7. Вход: статус на сегодня — один отрезок по индексу ключа
+CREATE OR REPLACE FUNCTION sp_login(p_login VARCHAR, p_password VARCHAR) RETURNS TABLE (
+        status VARCHAR,
+        message VARCHAR,
+        user_id INTEGER,
+        role VARCHAR,
+        fio VARCHAR
+    ) LANGUAGE plpgsql AS $$
+DECLARE rec RECORD;
+v_schedule_status VARCHAR;
+BEGIN -- Find user
+SELECT id_сотрудника,
+    password_hash,
+    должность,
+    фио INTO rec
+FROM сотрудники
+WHERE login = p_login;
+IF NOT FOUND THEN status := 'ERROR';
+message := 'Пользователь не найден';
+RETURN NEXT;
+RETURN;
+END IF;
+-- Check password
+IF NOT (
+    rec.password_hash = crypt(p_password, rec.password_hash)
+) THEN status := 'ERROR';
+message := 'Неверный пароль';
+RETURN NEXT;
+RETURN;
+END IF;
+-- Check schedule for today
+SELECT g.статус INTO v_schedule_status
+FROM график_периоды g
+WHERE g.ключ && fn_график_ключ(
+        rec.id_сотрудника,
+        daterange(CURRENT_DATE, CURRENT_DATE, '[]')
+    );
+-- If schedule record exists and it's NOT 'рабочий', block login
+IF FOUND
+AND v_schedule_status IS NOT NULL
+AND v_schedule_status != 'рабочий' THEN status := 'ERROR';
+message := 'Доступ запрещен: ' || v_schedule_status;
+RETURN NEXT;
+RETURN;
+END IF;
+-- Success
+status := 'OK';
+message := 'Успешный вход';
+user_id := rec.id_сотрудника;
+role := rec.должность;
+fio := rec.фио;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка БД: ' || SQLERRM;
+RETURN NEXT;
+END;
+$$;
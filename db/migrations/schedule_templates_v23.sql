@@ -0,0 +1,205 @@
+-- Phase 23: Шаблоны графика работы (5/2, 2/2, свои чередования) и праздники
+-- ========================================================================
+-- График работы заполнялся только сидом (INSERT на сотрудника и день) и
+-- вручную в ManagerScheduleTab. Шаблон — цикл статусов, привязанный к дате
+-- начала цикла, плюс необязательный календарь праздников (праздник —
+-- выходной, перенесенный рабочий день — рабочий). Развертка шаблона по
+-- сотрудникам и периоду — один generate_series, запись — один
+-- INSERT ... ON CONFLICT. Отпуск и больничный по умолчанию не затираются.
+--
+--   SELECT * FROM sp_schedule_template_diff('5/2', ARRAY[4, 5], '2025-01-01', '2025-12-31');   -- пробный прогон
+--   SELECT * FROM sp_apply_schedule_template('5/2', ARRAY[4, 5], '2025-01-01', '2025-12-31');
+--   -- 2/2 двумя сменами: второй сотрудник сдвинут на 2 дня
+--   SELECT * FROM sp_apply_schedule_template('2/2', ARRAY[6, 7], '2025-01-01', '2025-12-31', ARRAY[0, 2]);
+
+-- 1. Шаблоны и праздничные календари
+CREATE TABLE IF NOT EXISTS шаблоны_графика (
+    id_шаблона SERIAL PRIMARY KEY,
+    наименование VARCHAR(50) NOT NULL UNIQUE,
+    цикл VARCHAR(20) [] NOT NULL CHECK (
+        cardinality(цикл) > 0
+        AND цикл <@ ARRAY ['рабочий', 'выходной']::VARCHAR []
+    ),
+    -- С этой даты начинается первый день цикла (для 5/2 — понедельник)
+    начало_цикла DATE NOT NULL DEFAULT '2024-01-01',
+    -- NULL — праздники не учитываются (сменный график)
+    календарь VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS праздничные_дни (
+    календарь VARCHAR(20) NOT NULL,
+    дата DATE NOT NULL,
+    наименование VARCHAR(100),
+    статус VARCHAR(20) NOT NULL DEFAULT 'выходной' CHECK (статус IN ('рабочий', 'выходной')),
+    PRIMARY KEY (календарь, дата)
+);
+
+INSERT INTO шаблоны_графика (наименование, цикл, начало_цикла, календарь)
+VALUES (
+        '5/2',
+        ARRAY ['рабочий', 'рабочий', 'рабочий', 'рабочий', 'рабочий', 'выходной', 'выходной'],
+        '2024-01-01',
+        'RU'
+    ),
+    (
+        '2/2',
+        ARRAY ['рабочий', 'рабочий', 'выходной', 'выходной'],
+        '2024-01-01',
+        NULL
+    ),
+    (
+        '3/3',
+        ARRAY ['рабочий', 'рабочий', 'рабочий', 'выходной', 'выходной', 'выходной'],
+        '2024-01-01',
+        NULL
+    ) ON CONFLICT (наименование) DO NOTHING;
+
+-- Нерабочие праздничные дни РФ с фиксированной датой; переносы добавляются
+-- в праздничные_дни на каждый год отдельно
+INSERT INTO праздничные_дни (календарь, дата, наименование)
+SELECT 'RU',
+    make_date(y, h.m, h.d),
+    h.name
+FROM generate_series(2024, 2030) AS y
+    CROSS JOIN (
+        VALUES (1, 1, 'Новогодние каникулы'),
+            (1, 2, 'Новогодние каникулы'),
+            (1, 3, 'Новогодние каникулы'),
+            (1, 4, 'Новогодние каникулы'),
+            (1, 5, 'Новогодние каникулы'),
+            (1, 6, 'Новогодние каникулы'),
+            (1, 7, 'Рождество Христово'),
+            (1, 8, 'Новогодние каникулы'),
+            (2, 23, 'День защитника Отечества'),
+            (3, 8, 'Международный женский день'),
+            (5, 1, 'Праздник Весны и Труда'),
+            (5, 9, 'День Победы'),
+            (6, 12, 'День России'),
+            (11, 4, 'День народного единства')
+    ) AS h(m, d, name) ON CONFLICT (календарь, дата) DO NOTHING;
+
+-- 2. Развертка шаблона: сотрудник × день → статус.
+--    p_сдвиги (параллельно p_id_сотрудников) сдвигают цикл, например смены 2/2.
+DROP FUNCTION IF EXISTS sp_schedule_template_days(VARCHAR, INTEGER [], DATE, DATE, INTEGER []);
+CREATE OR REPLACE FUNCTION sp_schedule_template_days(
+        p_шаблон VARCHAR,
+        p_id_сотрудников INTEGER [],
+        p_с DATE,
+        p_по DATE,
+        p_сдвиги INTEGER [] DEFAULT NULL
+    ) RETURNS TABLE (
+        id_сотрудника INTEGER,
+        дата DATE,
+        статус VARCHAR
+    ) LANGUAGE sql STABLE AS $$
+SELECT e.id,
+    d.day,
+    COALESCE(
+        h.статус,
+        t.цикл [1 + (((d.day - t.начало_цикла) + COALESCE(e.shift, 0)) % cardinality(t.цикл) + cardinality(t.цикл)) % cardinality(t.цикл)]
+    )::VARCHAR
+FROM шаблоны_графика t
+    CROSS JOIN unnest(p_id_сотрудников, p_сдвиги) AS e(id, shift)
+    CROSS JOIN LATERAL (
+        SELECT g::DATE AS day
+        FROM generate_series(p_с, p_по, INTERVAL '1 day') AS g
+    ) d
+    LEFT JOIN праздничные_дни h ON h.календарь = t.календарь
+    AND h.дата = d.day
+WHERE t.наименование = p_шаблон
+    AND e.id IS NOT NULL;
+$$;
+
+-- 3. Пробный прогон: что изменится (было NULL — дня в графике еще нет)
+DROP FUNCTION IF EXISTS sp_schedule_template_diff(VARCHAR, INTEGER [], DATE, DATE, INTEGER [], BOOLEAN);
+CREATE OR REPLACE FUNCTION sp_schedule_template_diff(
+        p_шаблон VARCHAR,
+        p_id_сотрудников INTEGER [],
+        p_с DATE,
+        p_по DATE,
+        p_сдвиги INTEGER [] DEFAULT NULL,
+        p_сохранять_отсутствия BOOLEAN DEFAULT TRUE
+    ) RETURNS TABLE (
+        id_сотрудника INTEGER,
+        дата DATE,
+        было VARCHAR,
+        станет VARCHAR
+    ) LANGUAGE sql STABLE AS $$
+SELECT n.id_сотрудника,
+    n.дата,
+    g.статус,
+    n.статус
+FROM sp_schedule_template_days(p_шаблон, p_id_сотрудников, p_с, p_по, p_сдвиги) n
+    LEFT JOIN график_работы g ON g.id_сотрудника = n.id_сотрудника
+    AND g.дата = n.дата
+WHERE g.статус IS DISTINCT FROM n.статус
+    AND NOT (
+        p_сохранять_отсутствия
+        AND COALESCE(g.статус IN ('отпуск', 'больничный'), FALSE)
+    )
+ORDER BY n.id_сотрудника,
+    n.дата;
+$$;
+
+-- 4. Применение шаблона одним INSERT ... ON CONFLICT
+DROP FUNCTION IF EXISTS sp_apply_schedule_template(VARCHAR, INTEGER [], DATE, DATE, INTEGER [], BOOLEAN);
+CREATE OR REPLACE FUNCTION sp_apply_schedule_template(
+        p_шаблон VARCHAR,
+        p_id_сотрудников INTEGER [],
+        p_с DATE,
+        p_по DATE,
+        p_сдвиги INTEGER [] DEFAULT NULL,
+        p_сохранять_отсутствия BOOLEAN DEFAULT TRUE
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR, updated INTEGER) LANGUAGE plpgsql AS $$ BEGIN updated := 0;
+IF NOT EXISTS (
+    SELECT 1
+    FROM шаблоны_графика
+    WHERE наименование = p_шаблон
+) THEN status := 'ERROR';
+message := 'Шаблон графика не найден: ' || COALESCE(p_шаблон, 'NULL');
+RETURN NEXT;
+RETURN;
+END IF;
+IF p_с IS NULL
+OR p_по IS NULL
+OR p_по < p_с THEN status := 'ERROR';
+message := 'Неверный период';
+RETURN NEXT;
+RETURN;
+END IF;
+IF p_сдвиги IS NOT NULL
+AND cardinality(p_сдвиги) <> cardinality(p_id_сотрудников) THEN status := 'ERROR';
+message := 'Сдвигов должно быть столько же, сколько сотрудников';
+RETURN NEXT;
+RETURN;
+END IF;
+
+INSERT INTO график_работы AS g (id_сотрудника, дата, статус)
+SELECT DISTINCT ON (n.id_сотрудника, n.дата) n.id_сотрудника,
+    n.дата,
+    n.статус
+FROM sp_schedule_template_days(p_шаблон, p_id_сотрудников, p_с, p_по, p_сдвиги) n ON CONFLICT (id_сотрудника, дата) DO
+UPDATE
+SET статус = EXCLUDED.статус
+WHERE g.статус IS DISTINCT FROM EXCLUDED.статус
+    AND NOT (
+        p_сохранять_отсутствия
+        AND COALESCE(g.статус IN ('отпуск', 'больничный'), FALSE)
+    );
+GET DIAGNOSTICS updated = ROW_COUNT;
+
+status := 'OK';
+message := 'Шаблон "' || p_шаблон || '" применен с ' || to_char(p_с, 'DD.MM.YYYY') || ' по '
+    || to_char(p_по, 'DD.MM.YYYY') || ': изменено дней ' || updated;
+RETURN NEXT;
+EXCEPTION
+WHEN foreign_key_violation THEN status := 'ERROR';
+message := 'Сотрудник не найден';
+updated := 0;
+RETURN NEXT;
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка применения шаблона: ' || SQLERRM;
+updated := 0;
+RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,216 @@
+-- Phase 30: Поиск "содержит" без подстановочных символов пользователя
+-- ================================================================
+-- Поиск заказов и закупок подставлял текст в шаблон ILIKE как есть: % и _
+-- во введенном тексте работали как подстановочные символы, а \ — как
+-- экранирующий. Фильтр уточнения в памяти (ui/widgets/search_controller.py,
+-- OrdersTab.order_matches) ищет буквальную подстроку, поэтому результат
+-- зависел от того, пришел он из БД или из кеша. Теперь шаблон строит
+-- fn_contains_pattern: %, _ и \ экранируются (\ — экранирующий символ LIKE
+-- по умолчанию), как и в contains_pattern для запросов вкладок.
+-- Триграммные индексы (trigram_search_v11.sql) такой шаблон используют.
+
+-- 1. Шаблон "содержит p_text"
+CREATE OR REPLACE FUNCTION fn_contains_pattern(p_text TEXT) RETURNS TEXT LANGUAGE sql IMMUTABLE STRICT AS $$
+SELECT '%' || replace(replace(replace(p_text, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+$$;
+
+-- 2. Поиск заказов (определения из order_search_projection_v12.sql)
+DROP FUNCTION IF EXISTS sp_search_orders(INTEGER, VARCHAR, VARCHAR, DATE, DATE);
+CREATE OR REPLACE FUNCTION sp_search_orders(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql AS $$ BEGIN RETURN QUERY
+SELECT p.id_заказа,
+    COALESCE(p.клиент, 'Неизвестный клиент')::VARCHAR,
+    COALESCE(p.менеджер, '—')::VARCHAR,
+    p.дата_заказа,
+    p.дата_готовности,
+    p.статус,
+    p.сумма_заказа::NUMERIC,
+    p.позиций::BIGINT,
+    CASE
+        WHEN p.статус = 'выполнено' THEN 'Готов к отгрузке'
+        WHEN p.статус = 'отменен' THEN 'Отмена'
+        WHEN p.статус = 'завершен' THEN 'Завершен'
+        WHEN p.статус = 'отгружен' THEN 'Отгружен'
+        WHEN p.дата_готовности < CURRENT_DATE
+        AND p.статус NOT IN ('выполнено', 'отгружен', 'завершен', 'отменен') THEN 'ПРОСРОЧЕН'
+        ELSE 'В норме'
+    END::TEXT
+FROM заказы_поиск p
+WHERE (
+        p_search_text IS NULL
+        OR p_search_text = ''
+        OR CASE
+            WHEN p_search_text ~ '^[0-9]+$' THEN p.id_заказа = p_search_text::INTEGER
+            ELSE COALESCE(p.клиент, '') ILIKE fn_contains_pattern(p_search_text)
+        END
+    )
+    AND (
+        p_status IS NULL
+        OR p_status = 'Все статусы'
+        OR (
+            p_status = 'ПРОСРОЧЕН'
+            AND (
+                p.дата_готовности < CURRENT_DATE
+                AND p.статус NOT IN ('выполнено', 'отгружен', 'завершен', 'отменен')
+            )
+        )
+        OR (p.статус = p_status)
+    )
+    AND (
+        p_date_from IS NULL
+        OR p.дата_заказа >= p_date_from
+    )
+    AND (
+        p_date_to IS NULL
+        OR p.дата_заказа <= p_date_to
+    )
+ORDER BY p.id_заказа DESC;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS sp_search_orders_page(INTEGER, VARCHAR, VARCHAR, DATE, DATE, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_search_orders_page(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql STABLE AS $$
+DECLARE v_where TEXT := '';
+v_pattern TEXT := fn_contains_pattern(COALESCE(p_search_text, ''));
+BEGIN
+-- Параметры в EXECUTE: $1 текст, $2 статус, $3/$4 период, $5/$6 ключ, $7 лимит, $8 шаблон
+IF p_search_text ~ '^[0-9]+$' THEN v_where := v_where || ' AND p.id_заказа = $1::INTEGER';
+ELSIF COALESCE(p_search_text, '') <> '' THEN v_where := v_where || ' AND p.клиент ILIKE $8';
+END IF;
+IF p_status = 'ПРОСРОЧЕН' THEN v_where := v_where || ' AND p.дата_готовности < CURRENT_DATE'
+    || ' AND p.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'')';
+ELSIF p_status IS NOT NULL
+AND p_status <> 'Все статусы' THEN v_where := v_where || ' AND p.статус = $2';
+END IF;
+IF p_date_from IS NOT NULL THEN v_where := v_where || ' AND p.дата_заказа >= $3';
+END IF;
+IF p_date_to IS NOT NULL THEN v_where := v_where || ' AND p.дата_заказа <= $4';
+END IF;
+IF p_after_date IS NOT NULL
+AND p_after_id IS NOT NULL THEN v_where := v_where || ' AND (p.дата_заказа, p.id_заказа) < ($5, $6)';
+END IF;
+
+RETURN QUERY EXECUTE '
+SELECT p.id_заказа,
+    COALESCE(p.клиент, ''Неизвестный клиент'')::VARCHAR,
+    COALESCE(p.менеджер, ''—'')::VARCHAR,
+    p.дата_заказа,
+    p.дата_готовности,
+    p.статус,
+    p.сумма_заказа::NUMERIC,
+    p.позиций::BIGINT,
+    CASE
+        WHEN p.статус = ''выполнено'' THEN ''Готов к отгрузке''
+        WHEN p.статус = ''отменен'' THEN ''Отмена''
+        WHEN p.статус = ''завершен'' THEN ''Завершен''
+        WHEN p.статус = ''отгружен'' THEN ''Отгружен''
+        WHEN p.дата_готовности < CURRENT_DATE
+        AND p.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'') THEN ''ПРОСРОЧЕН''
+        ELSE ''В норме''
+    END::TEXT
+FROM заказы_поиск p
+WHERE TRUE' || v_where || '
+ORDER BY p.дата_заказа DESC,
+    p.id_заказа DESC
+LIMIT $7' USING p_search_text,
+    p_status,
+    p_date_from,
+    p_date_to,
+    p_after_date,
+    p_after_id,
+    p_limit,
+    v_pattern;
+END;
+$$;
+
+-- 3. Страница закупок (определение из purchases_set_based_v21.sql)
+DROP FUNCTION IF EXISTS sp_get_purchases(VARCHAR, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_get_purchases(
+        p_search_text VARCHAR DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_закупки INTEGER,
+        дата_закупки DATE,
+        поставщик VARCHAR,
+        статус VARCHAR,
+        сумма NUMERIC,
+        позиций BIGINT
+    ) LANGUAGE sql STABLE AS $$ WITH page AS (
+        SELECT z.id_закупки,
+            z.дата_закупки,
+            z.поставщик,
+            z.статус
+        FROM закупки_материалов z
+        WHERE (
+                COALESCE(p_search_text, '') = ''
+                OR z.поставщик ILIKE fn_contains_pattern(p_search_text)
+                OR z.статус ILIKE fn_contains_pattern(p_search_text)
+            )
+            AND (
+                p_after_date IS NULL
+                OR p_after_id IS NULL
+                OR (z.дата_закупки, z.id_закупки) < (p_after_date, p_after_id)
+            )
+        ORDER BY z.дата_закупки DESC,
+            z.id_закупки DESC
+        LIMIT p_limit
+    ),
+    totals AS (
+        -- Суммы только по закупкам страницы
+        SELECT sz.id_закупки,
+            SUM(sz.количество * COALESCE(sz.цена_закупки, 0)) AS сумма,
+            COUNT(*) AS позиций
+        FROM состав_закупки sz
+        WHERE sz.id_закупки IN (
+                SELECT id_закупки
+                FROM page
+            )
+        GROUP BY sz.id_закупки
+    )
+SELECT p.id_закупки,
+    p.дата_закупки,
+    p.поставщик,
+    p.статус,
+    COALESCE(t.сумма, 0)::NUMERIC,
+    COALESCE(t.позиций, 0)::BIGINT
+FROM page p
+    LEFT JOIN totals t ON t.id_закупки = p.id_закупки
+ORDER BY p.дата_закупки DESC,
+    p.id_закупки DESC;
+$$;
@@ -0,0 +1,98 @@
+-- Phase 10: Постраничный поиск заказов (keyset)
+-- =============================================
+-- sp_search_orders_page возвращает одну страницу заказов в порядке
+-- (дата_заказа DESC, id_заказа DESC). Следующая страница запрашивается
+-- по ключу последней строки (p_after_date, p_after_id), а не через OFFSET,
+-- поэтому первая и любая следующая страница читают только p_limit строк индекса.
+-- В запрос попадают только активные фильтры (динамический SQL), чтобы
+-- планировщик не видел условий вида "p IS NULL OR ...".
+
+-- 1. Ключ сортировки должен быть полным: пустых дат заказа не бывает
+UPDATE заказы
+SET дата_заказа = CURRENT_DATE
+WHERE дата_заказа IS NULL;
+ALTER TABLE заказы
+ALTER COLUMN дата_заказа
+SET NOT NULL;
+
+-- 2. Индекс под порядок страниц
+CREATE INDEX IF NOT EXISTS idx_заказы_дата_id ON заказы (дата_заказа DESC, id_заказа DESC);
+
+-- 3. Функция постраничного поиска (те же колонки, что у sp_search_orders)
+DROP FUNCTION IF EXISTS sp_search_orders_page(INTEGER, VARCHAR, VARCHAR, DATE, DATE, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_search_orders_page(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql STABLE AS $$
+DECLARE v_where TEXT := '';
+BEGIN
+-- Параметры в EXECUTE: $1 текст, $2 статус, $3/$4 период, $5/$6 ключ, $7 лимит
+IF p_search_text ~ '^[0-9]+$' THEN v_where := v_where || ' AND z.id_заказа = $1::INTEGER';
+ELSIF COALESCE(p_search_text, '') <> '' THEN v_where := v_where || ' AND LOWER(k.фио) LIKE ''%'' || LOWER($1) || ''%''';
+END IF;
+IF p_status = 'ПРОСРОЧЕН' THEN v_where := v_where || ' AND z.дата_готовности < CURRENT_DATE'
+    || ' AND z.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'')';
+ELSIF p_status IS NOT NULL
+AND p_status <> 'Все статусы' THEN v_where := v_where || ' AND z.статус = $2';
+END IF;
+IF p_date_from IS NOT NULL THEN v_where := v_where || ' AND z.дата_заказа >= $3';
+END IF;
+IF p_date_to IS NOT NULL THEN v_where := v_where || ' AND z.дата_заказа <= $4';
+END IF;
+IF p_after_date IS NOT NULL
+AND p_after_id IS NOT NULL THEN v_where := v_where || ' AND (z.дата_заказа, z.id_заказа) < ($5, $6)';
+END IF;
+
+RETURN QUERY EXECUTE '
+SELECT z.id_заказа,
+    COALESCE(k.фио, ''Неизвестный клиент'')::VARCHAR,
+    COALESCE(s.фио, ''—'')::VARCHAR,
+    z.дата_заказа,
+    z.дата_готовности,
+    z.статус::VARCHAR,
+    COALESCE(z.сумма_заказа, 0)::NUMERIC,
+    (
+        SELECT COUNT(*)
+        FROM состав_заказа sz
+        WHERE sz.id_заказа = z.id_заказа
+    )::BIGINT,
+    CASE
+        WHEN z.статус = ''выполнено'' THEN ''Готов к отгрузке''
+        WHEN z.статус = ''отменен'' THEN ''Отмена''
+        WHEN z.статус = ''завершен'' THEN ''Завершен''
+        WHEN z.статус = ''отгружен'' THEN ''Отгружен''
+        WHEN z.дата_готовности < CURRENT_DATE
+        AND z.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'') THEN ''ПРОСРОЧЕН''
+        ELSE ''В норме''
+    END::TEXT
+FROM заказы z
+    LEFT JOIN клиенты k ON z.id_клиента = k.id_клиента
+    LEFT JOIN сотрудники s ON z.id_менеджера = s.id_сотрудника
+WHERE TRUE' || v_where || '
+ORDER BY z.дата_заказа DESC,
+    z.id_заказа DESC
+LIMIT $7' USING p_search_text,
+    p_status,
+    p_date_from,
+    p_date_to,
+    p_after_date,
+    p_after_id,
+    p_limit;
+END;
+$$;
@@ -0,0 +1,116 @@
+-- Phase 29: Граница снимка остатков без потерянных движений
+-- ========================================================
+-- В stock_ledger_v20.sql момент движения брался как now() — время начала
+-- транзакции. Транзакция, начатая до полуночи и записавшая движение после
+-- снимка за этот день, получала момент "вчера": снимок его не видел, а
+-- sp_stock_as_of после снимка читает только моменты >= дата + 1. Движение
+-- выпадало из остатков навсегда. Теперь:
+--   * момент = clock_timestamp(), время самой вставки;
+--   * sp_snapshot_stock берет LOCK движения_склада IN SHARE MODE: ждет
+--     коммита транзакций, уже записавших движения (в т.ч. с моментом до
+--     границы), а новые вставки ждут конца снимка и получают момент позже
+--     границы. Снимок за прошедший день видит все его движения.
+--
+-- Счетчики (количество_на_складе, количество_готовых) по-прежнему
+-- обновляются в транзакции писателя, а не пакетно: резервирование материалов
+-- (sp_reserve_task_materials, sp_report_defect) проверяет и блокирует текущий
+-- остаток, чтобы он не ушел в минус. Отстающий кеш пропустил бы перерасход.
+-- Журнал остается источником истины: sp_check_stock_cache /
+-- sp_rebuild_stock_cache сверяют и перестраивают счетчики по нему.
+
+ALTER TABLE движения_склада
+ALTER COLUMN момент
+SET DEFAULT clock_timestamp();
+
+-- Движения текущей транзакции имеют момент позже now(): по умолчанию — на
+-- момент вызова
+DROP FUNCTION IF EXISTS sp_stock_as_of(TIMESTAMPTZ, VARCHAR, INTEGER);
+CREATE OR REPLACE FUNCTION sp_stock_as_of(
+        p_at TIMESTAMPTZ DEFAULT clock_timestamp(),
+        p_kind VARCHAR DEFAULT NULL,
+        p_id INTEGER DEFAULT NULL
+    ) RETURNS TABLE (
+        вид VARCHAR,
+        id_позиции INTEGER,
+        количество INTEGER
+    ) LANGUAGE sql STABLE AS $$ WITH snap AS (
+        -- Снимок на конец дня d покрывает движения до d + 1 (00:00)
+        SELECT MAX(s.дата) AS d
+        FROM снимки_остатков s
+        WHERE (s.дата + 1)::TIMESTAMPTZ <= p_at
+    ),
+    base AS (
+        SELECT s.вид,
+            s.id_позиции,
+            s.количество
+        FROM снимки_остатков s,
+            snap
+        WHERE s.дата = snap.d
+            AND (
+                p_kind IS NULL
+                OR s.вид = p_kind
+            )
+            AND (
+                p_id IS NULL
+                OR s.id_позиции = p_id
+            )
+    ),
+    delta AS (
+        SELECT m.вид,
+            m.id_позиции,
+            SUM(m.количество)::INTEGER AS количество
+        FROM движения_склада m,
+            snap
+        WHERE m.момент >= COALESCE((snap.d + 1)::TIMESTAMPTZ, '-infinity')
+            AND m.момент < p_at
+            AND (
+                p_kind IS NULL
+                OR m.вид = p_kind
+            )
+            AND (
+                p_id IS NULL
+                OR m.id_позиции = p_id
+            )
+        GROUP BY m.вид,
+            m.id_позиции
+    )
+SELECT COALESCE(b.вид, d.вид)::VARCHAR,
+    COALESCE(b.id_позиции, d.id_позиции),
+    (COALESCE(b.количество, 0) + COALESCE(d.количество, 0))::INTEGER
+FROM base b
+    FULL JOIN delta d ON d.вид = b.вид
+    AND d.id_позиции = b.id_позиции
+WHERE COALESCE(b.количество, 0) + COALESCE(d.количество, 0) <> 0
+ORDER BY 1,
+    2;
+$$;
+
+CREATE OR REPLACE FUNCTION sp_snapshot_stock(p_date DATE DEFAULT CURRENT_DATE - 1) RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_rows INTEGER;
+BEGIN IF p_date >= CURRENT_DATE THEN status := 'ERROR';
+message := 'Снимок можно сделать только за прошедший день';
+RETURN NEXT;
+RETURN;
+END IF;
+-- Ожидание незакоммиченных движений работает, только если следующий
+-- оператор берет новый снимок данных
+IF current_setting('transaction_isolation') <> 'read committed' THEN status := 'ERROR';
+message := 'Снимок остатков делается в транзакции READ COMMITTED';
+RETURN NEXT;
+RETURN;
+END IF;
+LOCK TABLE движения_склада IN SHARE MODE;
+DELETE FROM снимки_остатков
+WHERE дата = p_date;
+INSERT INTO снимки_остатков (дата, вид, id_позиции, количество)
+SELECT p_date,
+    a.вид,
+    a.id_позиции,
+    a.количество
+FROM sp_stock_as_of((p_date + 1)::TIMESTAMPTZ) a;
+GET DIAGNOSTICS v_rows = ROW_COUNT;
+status := 'OK';
+message := 'Снимок на ' || to_char(p_date, 'DD.MM.YYYY') || ': позиций ' || v_rows;
+RETURN NEXT;
+END;
+$$;
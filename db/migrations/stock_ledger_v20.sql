@@ -0,0 +1,352 @@
+-- Phase 20: Журнал движений склада и снимки остатков
+-- ==================================================
+-- Остатки (материалы.количество_на_складе, заготовки.количество_готовых,
+-- изделия.количество_на_складе) меняли на месте полдюжины процедур и
+-- PurchasesTab, без истории. Теперь каждое изменение попадает в
+-- append-only журнал движения_склада (триггеры уровня оператора — одна
+-- вставка на оператор, кто бы ни менял остаток), а счетчики считаются
+-- кешем журнала: их можно сверить и перестроить.
+--
+-- Остаток на любой момент = последний снимок (снимки_остатков, на конец дня)
+-- + движения после него (один диапазонный проход по индексу на момент).
+--
+--   SELECT * FROM sp_stock_as_of('2025-03-01 12:00');                 -- все позиции
+--   SELECT * FROM sp_stock_as_of(now(), 'материал', 5);                -- одна позиция
+--   SELECT * FROM sp_snapshot_stock(CURRENT_DATE - 1);                 -- снимок (ежедневно)
+--   SELECT * FROM sp_check_stock_cache();                              -- расхождения счетчиков
+--
+-- Тип движения определяется по таблице и знаку изменения; процедура может
+-- задать его явно: set_config('nova.тип_движения', 'брак', true),
+-- основание — set_config('nova.основание', 'заказ 15', true).
+
+-- 1. Журнал
+CREATE TABLE IF NOT EXISTS движения_склада (
+    id_движения BIGSERIAL PRIMARY KEY,
+    момент TIMESTAMPTZ NOT NULL DEFAULT now(),
+    вид VARCHAR(10) NOT NULL CHECK (вид IN ('материал', 'заготовка', 'изделие')),
+    id_позиции INTEGER NOT NULL,
+    количество INTEGER NOT NULL CHECK (количество <> 0),
+    тип VARCHAR(20) NOT NULL CHECK (
+        тип IN (
+            'начальный_остаток',
+            'приход',
+            'резерв',
+            'производство',
+            'брак',
+            'списание',
+            'корректировка'
+        )
+    ),
+    основание VARCHAR(200)
+);
+CREATE INDEX IF NOT EXISTS idx_движения_склада_момент ON движения_склада (момент);
+CREATE INDEX IF NOT EXISTS idx_движения_склада_позиция ON движения_склада (вид, id_позиции, момент);
+
+-- Журнал только дополняется
+CREATE OR REPLACE FUNCTION trg_stock_ledger_append_only_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$ BEGIN RAISE EXCEPTION 'движения_склада: журнал только дополняется (исправление — новым движением)';
+END;
+$$;
+DROP TRIGGER IF EXISTS trg_stock_ledger_append_only ON движения_склада;
+CREATE TRIGGER trg_stock_ledger_append_only BEFORE
+UPDATE
+    OR DELETE ON движения_склада FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_append_only_func();
+
+-- 2. Снимки остатков на конец дня
+CREATE TABLE IF NOT EXISTS снимки_остатков (
+    дата DATE NOT NULL,
+    вид VARCHAR(10) NOT NULL,
+    id_позиции INTEGER NOT NULL,
+    количество INTEGER NOT NULL,
+    PRIMARY KEY (дата, вид, id_позиции)
+);
+
+-- 3. Запись движений из триггеров на таблицах остатков.
+--    Аргументы: вид, колонка id, колонка остатка, тип прихода, тип расхода.
+CREATE OR REPLACE FUNCTION trg_stock_ledger_func() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+DECLARE v_type TEXT := NULLIF(current_setting('nova.тип_движения', true), '');
+v_basis TEXT := NULLIF(current_setting('nova.основание', true), '');
+BEGIN IF current_setting('nova.без_журнала', true) = 'on' THEN RETURN NULL;
+END IF;
+IF TG_OP = 'INSERT' THEN EXECUTE format(
+    $q$
+    INSERT INTO движения_склада (вид, id_позиции, количество, тип, основание)
+    SELECT %L, n.%I, n.%I, COALESCE($1, 'начальный_остаток'), $2
+    FROM new_rows n
+    WHERE COALESCE(n.%I, 0) <> 0 $q$,
+    TG_ARGV [0],
+    TG_ARGV [1],
+    TG_ARGV [2],
+    TG_ARGV [2]
+) USING v_type,
+v_basis;
+ELSE EXECUTE format(
+    $q$
+    INSERT INTO движения_склада (вид, id_позиции, количество, тип, основание)
+    SELECT %L, d.id, d.delta, COALESCE($1, CASE WHEN d.delta > 0 THEN %L ELSE %L END), $2
+    FROM (
+        SELECT n.%I AS id, COALESCE(n.%I, 0) - COALESCE(o.%I, 0) AS delta
+        FROM new_rows n
+        JOIN old_rows o ON o.%I = n.%I
+    ) d
+    WHERE d.delta <> 0 $q$,
+    TG_ARGV [0],
+    TG_ARGV [3],
+    TG_ARGV [4],
+    TG_ARGV [1],
+    TG_ARGV [2],
+    TG_ARGV [2],
+    TG_ARGV [1],
+    TG_ARGV [1]
+) USING v_type,
+v_basis;
+END IF;
+RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_stock_ledger_ins ON материалы;
+DROP TRIGGER IF EXISTS trg_stock_ledger_upd ON материалы;
+CREATE TRIGGER trg_stock_ledger_ins
+AFTER
+INSERT ON материалы REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_func(
+        'материал',
+        'id_материала',
+        'количество_на_складе',
+        'приход',
+        'резерв'
+    );
+CREATE TRIGGER trg_stock_ledger_upd
+AFTER
+UPDATE ON материалы REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_func(
+        'материал',
+        'id_материала',
+        'количество_на_складе',
+        'приход',
+        'резерв'
+    );
+
+DROP TRIGGER IF EXISTS trg_stock_ledger_ins ON заготовки;
+DROP TRIGGER IF EXISTS trg_stock_ledger_upd ON заготовки;
+CREATE TRIGGER trg_stock_ledger_ins
+AFTER
+INSERT ON заготовки REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_func(
+        'заготовка',
+        'id_заготовки',
+        'количество_готовых',
+        'производство',
+        'списание'
+    );
+CREATE TRIGGER trg_stock_ledger_upd
+AFTER
+UPDATE ON заготовки REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_func(
+        'заготовка',
+        'id_заготовки',
+        'количество_готовых',
+        'производство',
+        'списание'
+    );
+
+DROP TRIGGER IF EXISTS trg_stock_ledger_ins ON изделия;
+DROP TRIGGER IF EXISTS trg_stock_ledger_upd ON изделия;
+CREATE TRIGGER trg_stock_ledger_ins
+AFTER
+INSERT ON изделия REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_func(
+        'изделие',
+        'id_изделия',
+        'количество_на_складе',
+        'корректировка',
+        'резерв'
+    );
+CREATE TRIGGER trg_stock_ledger_upd
+AFTER
+UPDATE ON изделия REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION trg_stock_ledger_func(
+        'изделие',
+        'id_изделия',
+        'количество_на_складе',
+        'корректировка',
+        'резерв'
+    );
+
+-- 4. Текущие остатки как движения на начало журнала (один раз)
+INSERT INTO движения_склада (вид, id_позиции, количество, тип, основание)
+SELECT s.вид,
+    s.id,
+    s.q,
+    'начальный_остаток',
+    'stock_ledger_v20'
+FROM (
+        SELECT 'материал' AS вид,
+            id_материала AS id,
+            COALESCE(количество_на_складе, 0) AS q
+        FROM материалы
+        UNION ALL
+        SELECT 'заготовка',
+            id_заготовки,
+            COALESCE(количество_готовых, 0)
+        FROM заготовки
+        UNION ALL
+        SELECT 'изделие',
+            id_изделия,
+            COALESCE(количество_на_складе, 0)
+        FROM изделия
+    ) s
+WHERE s.q <> 0
+    AND NOT EXISTS (
+        SELECT 1
+        FROM движения_склада
+    );
+
+-- 5. Остатки на момент: снимок + один диапазон журнала
+DROP FUNCTION IF EXISTS sp_stock_as_of(TIMESTAMPTZ, VARCHAR, INTEGER);
+CREATE OR REPLACE FUNCTION sp_stock_as_of(
+        p_at TIMESTAMPTZ DEFAULT now(),
+        p_kind VARCHAR DEFAULT NULL,
+        p_id INTEGER DEFAULT NULL
+    ) RETURNS TABLE (
+        вид VARCHAR,
+        id_позиции INTEGER,
+        количество INTEGER
+    ) LANGUAGE sql STABLE AS $$ WITH snap AS (
+        -- Снимок на конец дня d покрывает движения до d + 1 (00:00)
+        SELECT MAX(s.дата) AS d
+        FROM снимки_остатков s
+        WHERE (s.дата + 1)::TIMESTAMPTZ <= p_at
+    ),
+    base AS (
+        SELECT s.вид,
+            s.id_позиции,
+            s.количество
+        FROM снимки_остатков s,
+            snap
+        WHERE s.дата = snap.d
+            AND (
+                p_kind IS NULL
+                OR s.вид = p_kind
+            )
+            AND (
+                p_id IS NULL
+                OR s.id_позиции = p_id
+            )
+    ),
+    delta AS (
+        SELECT m.вид,
+            m.id_позиции,
+            SUM(m.количество)::INTEGER AS количество
+        FROM движения_склада m,
+            snap
+        WHERE m.момент >= COALESCE((snap.d + 1)::TIMESTAMPTZ, '-infinity')
+            AND m.момент < p_at
+            AND (
+                p_kind IS NULL
+                OR m.вид = p_kind
+            )
+            AND (
+                p_id IS NULL
+                OR m.id_позиции = p_id
+            )
+        GROUP BY m.вид,
+            m.id_позиции
+    )
+SELECT COALESCE(b.вид, d.вид)::VARCHAR,
+    COALESCE(b.id_позиции, d.id_позиции),
+    (COALESCE(b.количество, 0) + COALESCE(d.количество, 0))::INTEGER
+FROM base b
+    FULL JOIN delta d ON d.вид = b.вид
+    AND d.id_позиции = b.id_позиции
+WHERE COALESCE(b.количество, 0) + COALESCE(d.количество, 0) <> 0
+ORDER BY 1,
+    2;
+$$;
+
+-- 6. Снимок на конец дня: предыдущий снимок + движения за период
+DROP FUNCTION IF EXISTS sp_snapshot_stock(DATE);
+CREATE OR REPLACE FUNCTION sp_snapshot_stock(p_date DATE DEFAULT CURRENT_DATE - 1) RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_rows INTEGER;
+BEGIN IF p_date >= CURRENT_DATE THEN status := 'ERROR';
+message := 'Снимок можно сделать только за прошедший день';
+RETURN NEXT;
+RETURN;
+END IF;
+DELETE FROM снимки_остатков
+WHERE дата = p_date;
+INSERT INTO снимки_остатков (дата, вид, id_позиции, количество)
+SELECT p_date,
+    a.вид,
+    a.id_позиции,
+    a.количество
+FROM sp_stock_as_of((p_date + 1)::TIMESTAMPTZ) a;
+GET DIAGNOSTICS v_rows = ROW_COUNT;
+status := 'OK';
+message := 'Снимок на ' || to_char(p_date, 'DD.MM.YYYY') || ': позиций ' || v_rows;
+RETURN NEXT;
+END;
+$$;
+
+-- 7. Счетчики как кеш журнала: сверка и перестройка
+CREATE OR REPLACE VIEW v_остатки_счетчики AS
+SELECT 'материал'::VARCHAR AS вид,
+    id_материала AS id_позиции,
+    COALESCE(количество_на_складе, 0) AS количество
+FROM материалы
+UNION ALL
+SELECT 'заготовка',
+    id_заготовки,
+    COALESCE(количество_готовых, 0)
+FROM заготовки
+UNION ALL
+SELECT 'изделие',
+    id_изделия,
+    COALESCE(количество_на_складе, 0)
+FROM изделия;
+
+DROP FUNCTION IF EXISTS sp_check_stock_cache();
+CREATE OR REPLACE FUNCTION sp_check_stock_cache() RETURNS TABLE (
+        вид VARCHAR,
+        id_позиции INTEGER,
+        в_счетчике INTEGER,
+        по_журналу INTEGER
+    ) LANGUAGE sql STABLE AS $$
+SELECT c.вид,
+    c.id_позиции,
+    c.количество,
+    COALESCE(j.количество, 0)
+FROM v_остатки_счетчики c
+    LEFT JOIN sp_stock_as_of('infinity') j ON j.вид = c.вид
+    AND j.id_позиции = c.id_позиции
+WHERE c.количество <> COALESCE(j.количество, 0)
+ORDER BY 1,
+    2;
+$$;
+
+DROP FUNCTION IF EXISTS sp_rebuild_stock_cache();
+CREATE OR REPLACE FUNCTION sp_rebuild_stock_cache() RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_fixed INTEGER;
+BEGIN
+SELECT COUNT(*) INTO v_fixed
+FROM sp_check_stock_cache();
+-- Приводим счетчики к журналу, не записывая это как движения
+PERFORM set_config('nova.без_журнала', 'on', true);
+UPDATE материалы m
+SET количество_на_складе = COALESCE(j.количество, 0)
+FROM материалы m2
+    LEFT JOIN sp_stock_as_of('infinity', 'материал') j ON j.id_позиции = m2.id_материала
+WHERE m.id_материала = m2.id_материала
+    AND COALESCE(m.количество_на_складе, 0) <> COALESCE(j.количество, 0);
+UPDATE заготовки z
+SET количество_готовых = COALESCE(j.количество, 0)
+FROM заготовки z2
+    LEFT JOIN sp_stock_as_of('infinity', 'заготовка') j ON j.id_позиции = z2.id_заготовки
+WHERE z.id_заготовки = z2.id_заготовки
+    AND COALESCE(z.количество_готовых, 0) <> COALESCE(j.количество, 0);
+UPDATE изделия i
+SET количество_на_складе = COALESCE(j.количество, 0)
+FROM изделия i2
+    LEFT JOIN sp_stock_as_of('infinity', 'изделие') j ON j.id_позиции = i2.id_изделия
+WHERE i.id_изделия = i2.id_изделия
+    AND COALESCE(i.количество_на_складе, 0) <> COALESCE(j.количество, 0);
+PERFORM set_config('nova.без_журнала', 'off', true);
+status := 'OK';
+message := 'Счетчики остатков приведены к журналу: исправлено позиций ' || v_fixed;
+RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,231 @@
+-- Phase 19: Множественные операции в процедурах сборщика
+-- ======================================================
+-- sp_взять_задачу_в_работу (fix_error_message.sql, schema_migration_v5.sql)
+-- проверял и списывал материалы циклом — SELECT и UPDATE на каждую строку
+-- расход_материалов — и падал на первой же нехватке. Теперь:
+--   * резерв — блокировка и проверка всех материалов одним оператором,
+--     списание — одним UPDATE ... FROM; в ошибке перечислены все нехватки;
+--   * sp_сдать_работу — вместо чтения и двух обновлений один UPDATE с
+--     условием на статус (параллельная сдача не теряет количество и
+--     статус); если строка не обновилась (IF NOT FOUND), статус читается
+--     отдельным SELECT только для текста ошибки;
+--   * sp_report_defect — задания на доизготовление одним INSERT ... SELECT
+--     ... ON CONFLICT вместо цикла по состав_изделия.
+
+-- 1. Резерв материалов: блокировка + проверка (CTE), затем одно списание.
+--    FOR NO KEY UPDATE возвращает актуальную версию строки после ожидания,
+--    поэтому проверка идет по остаткам, которые уже никто не изменит.
+CREATE OR REPLACE FUNCTION sp_reserve_task_materials(p_id_заготовки INTEGER, p_количество INTEGER) RETURNS JSONB LANGUAGE plpgsql AS $$
+DECLARE v_shortages JSONB;
+BEGIN IF p_количество <= 0 THEN RETURN NULL;
+END IF;
+WITH need AS (
+    SELECT n.id_материала,
+        n.количество_материала * p_количество AS нужно
+    FROM v_нормы_расхода n
+    WHERE n.id_заготовки = p_id_заготовки
+),
+locked AS (
+    -- Блокировки строго по возрастанию id_материала
+    SELECT m.id_материала,
+        m.наименование,
+        COALESCE(m.количество_на_складе, 0) AS есть
+    FROM материалы m
+    WHERE m.id_материала IN (
+            SELECT id_материала
+            FROM need
+        )
+    ORDER BY m.id_материала FOR NO KEY UPDATE
+)
+SELECT jsonb_agg(
+        jsonb_build_object(
+            'id_материала',
+            l.id_материала,
+            'наименование',
+            l.наименование,
+            'нужно',
+            n.нужно,
+            'есть',
+            l.есть
+        )
+        ORDER BY l.id_материала
+    ) INTO v_shortages
+FROM locked l
+    JOIN need n ON n.id_материала = l.id_материала
+WHERE l.есть < n.нужно;
+IF v_shortages IS NOT NULL THEN RETURN v_shortages;
+END IF;
+
+UPDATE материалы m
+SET количество_на_складе = m.количество_на_складе - n.количество_материала * p_количество
+FROM v_нормы_расхода n
+WHERE n.id_заготовки = p_id_заготовки
+    AND n.id_материала = m.id_материала;
+RETURN NULL;
+END;
+$$;
+
+-- Текст ошибки со всеми нехватками: "Недостаточно материала: "A" (нужно: 10, есть: 4); ..."
+CREATE OR REPLACE FUNCTION fn_format_shortages(p_shortages JSONB) RETURNS TEXT LANGUAGE sql IMMUTABLE AS $$
+SELECT 'Недостаточно материала: ' || string_agg(
+        format(
+            '"%s" (нужно: %s, есть: %s)',
+            s->>'наименование',
+            s->>'нужно',
+            s->>'есть'
+        ),
+        '; '
+        ORDER BY (s->>'id_материала')::INTEGER
+    )
+FROM jsonb_array_elements(p_shortages) AS s;
+$$;
+
+-- 2. Взять задачу в работу
+CREATE OR REPLACE PROCEDURE sp_взять_задачу_в_работу(
+        p_id_заготовки INTEGER,
+        p_id_заказа INTEGER,
+        p_id_сборщика INTEGER
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_status VARCHAR;
+v_current_worker INTEGER;
+v_qty INTEGER;
+v_shortages JSONB;
+BEGIN
+SELECT статус,
+    id_сотрудника,
+    GREATEST(плановое_количество - фактическое_количество, 0) INTO v_status,
+    v_current_worker,
+    v_qty
+FROM план_заготовок
+WHERE id_заготовки = p_id_заготовки
+    AND id_заказа = p_id_заказа FOR NO KEY UPDATE;
+IF NOT FOUND THEN RAISE EXCEPTION 'Задача не найдена';
+END IF;
+IF v_status NOT IN ('принято', 'просрочено') THEN RAISE EXCEPTION 'Задача уже в работе или завершена (статус: %)',
+v_status;
+END IF;
+IF v_current_worker IS NOT NULL
+AND v_current_worker != p_id_сборщика THEN RAISE EXCEPTION 'Задача уже назначена другому сборщику';
+END IF;
+
+v_shortages := sp_reserve_task_materials(p_id_заготовки, v_qty);
+IF v_shortages IS NOT NULL THEN RAISE EXCEPTION '%',
+fn_format_shortages(v_shortages);
+END IF;
+
+UPDATE план_заготовок
+SET статус = 'в_работе',
+    id_сотрудника = p_id_сборщика
+WHERE id_заготовки = p_id_заготовки
+    AND id_заказа = p_id_заказа;
+END;
+$$;
+
+-- 3. Сдать работу
+CREATE OR REPLACE PROCEDURE sp_сдать_работу(
+        p_id_заготовки INTEGER,
+        p_id_заказа INTEGER,
+        p_количество INTEGER
+    ) LANGUAGE plpgsql AS $$
+DECLARE v_status VARCHAR;
+BEGIN
+UPDATE план_заготовок
+SET фактическое_количество = фактическое_количество + p_количество,
+    дата_факт = CURRENT_DATE,
+    статус = CASE
+        WHEN фактическое_количество + p_количество >= плановое_количество THEN 'выполнено'
+        ELSE статус
+    END
+WHERE id_заготовки = p_id_заготовки
+    AND id_заказа = p_id_заказа
+    AND статус NOT IN ('выполнено', 'отменено');
+IF NOT FOUND THEN
+SELECT статус INTO v_status
+FROM план_заготовок
+WHERE id_заготовки = p_id_заготовки
+    AND id_заказа = p_id_заказа;
+IF NOT FOUND THEN RAISE EXCEPTION 'Задача не найдена';
+ELSIF v_status = 'выполнено' THEN RAISE EXCEPTION 'Задача уже выполнена';
+ELSE RAISE EXCEPTION 'Задача отменена';
+END IF;
+END IF;
+
+UPDATE заготовки
+SET количество_готовых = количество_готовых + p_количество
+WHERE id_заготовки = p_id_заготовки;
+END;
+$$;
+
+-- 4. Брак: уменьшение позиции и задания на доизготовление
+DROP FUNCTION IF EXISTS sp_report_defect(INTEGER, INTEGER, INTEGER, VARCHAR);
+CREATE OR REPLACE FUNCTION sp_report_defect(
+        p_order_id INTEGER,
+        p_product_id INTEGER,
+        p_defect_qty INTEGER,
+        p_reason VARCHAR
+    ) RETURNS TABLE (status VARCHAR, message VARCHAR) LANGUAGE plpgsql AS $$
+DECLARE v_current_qty INTEGER;
+v_tasks INTEGER;
+BEGIN
+SELECT количество_изделий INTO v_current_qty
+FROM состав_заказа
+WHERE id_заказа = p_order_id
+    AND id_изделия = p_product_id FOR NO KEY UPDATE;
+IF NOT FOUND THEN status := 'ERROR';
+message := 'Позиция не найдена в заказе';
+RETURN NEXT;
+RETURN;
+END IF;
+IF p_defect_qty > v_current_qty THEN status := 'ERROR';
+message := 'Количество брака превышает количество в заказе';
+RETURN NEXT;
+RETURN;
+END IF;
+
+UPDATE состав_заказа
+SET количество_изделий = количество_изделий - p_defect_qty
+WHERE id_заказа = p_order_id
+    AND id_изделия = p_product_id;
+
+UPDATE заказы
+SET статус = 'в_работе'
+WHERE id_заказа = p_order_id
+    AND статус IN ('выполнен', 'готов_к_отгрузке');
+
+-- Задания по всем заготовкам изделия одним оператором; уже выполненное
+-- или отмененное задание снова открывается на доизготовление
+INSERT INTO план_заготовок (
+        id_заготовки,
+        id_заказа,
+        плановое_количество,
+        дата_план,
+        статус
+    )
+SELECT si.id_заготовки,
+    p_order_id,
+    SUM(si.количество_заготовки * p_defect_qty),
+    COALESCE(z.дата_готовности - 1, CURRENT_DATE),
+    'принято'
+FROM состав_изделия si
+    JOIN заказы z ON z.id_заказа = p_order_id
+WHERE si.id_изделия = p_product_id
+GROUP BY si.id_заготовки,
+    z.дата_готовности ON CONFLICT (id_заготовки, id_заказа) DO
+UPDATE
+SET плановое_количество = план_заготовок.плановое_количество + EXCLUDED.плановое_количество,
+    статус = CASE
+        WHEN план_заготовок.статус IN ('выполнено', 'отменено') THEN 'принято'
+        ELSE план_заготовок.статус
+    END;
+GET DIAGNOSTICS v_tasks = ROW_COUNT;
+
+status := 'WARNING';
+message := 'Брак зафиксирован (' || p_defect_qty || ' шт). Созданы задания на доизготовление ('
+    || v_tasks || '). Причина: ' || p_reason;
+RETURN NEXT;
+EXCEPTION
+WHEN OTHERS THEN status := 'ERROR';
+message := 'Ошибка: ' || SQLERRM;
+RETURN NEXT;
+END;
+$$;
@@ -0,0 +1,111 @@
+-- Phase 11: Индексы для поиска по подстроке (pg_trgm)
+-- ===================================================
+-- Поиск в интерфейсе — это "содержит", т.е. ILIKE '%текст%'. Обычный B-tree
+-- такой шаблон не ускоряет, GIN с gin_trgm_ops — ускоряет (от 3 символов).
+-- Условия должны ставиться на сам столбец (col ILIKE ...), а не на LOWER(col):
+-- тогда они же проталкиваются в ветки UNION ALL представления v_склад_общий
+-- и доходят до индексов материалов, заготовок и изделий.
+
+-- 1-2. Расширение и триграммные индексы на столбцы поиска.
+--      pg_trgm входит в contrib и есть не на каждом сервере: без него
+--      индексы не создаются, поиск работает (ILIKE), но без ускорения.
+DO $$ BEGIN IF EXISTS (
+    SELECT 1
+    FROM pg_available_extensions
+    WHERE name = 'pg_trgm'
+) THEN
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_клиенты_фио_trgm ON клиенты USING GIN (фио gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_клиенты_телефон_trgm ON клиенты USING GIN (номер_телефона gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_материалы_наименование_trgm ON материалы USING GIN (наименование gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_материалы_артикул_trgm ON материалы USING GIN (артикул_материала gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_заготовки_наименование_trgm ON заготовки USING GIN (наименование gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_заготовки_артикул_trgm ON заготовки USING GIN (артикул_заготовки gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_изделия_наименование_trgm ON изделия USING GIN (наименование gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_изделия_артикул_trgm ON изделия USING GIN (артикул_изделия gin_trgm_ops);
+ELSE RAISE NOTICE 'pg_trgm недоступен: триграммные индексы не созданы';
+END IF;
+END $$;
+
+-- 3. Поиск заказов по клиенту: ILIKE по клиенты.фио вместо LOWER(...) LIKE.
+--    Шаблон собирается заранее и передается параметром, чтобы планировщик
+--    видел константу и мог выбрать индекс.
+DROP FUNCTION IF EXISTS sp_search_orders_page(INTEGER, VARCHAR, VARCHAR, DATE, DATE, DATE, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION sp_search_orders_page(
+        p_manager_id INTEGER,
+        p_search_text VARCHAR DEFAULT NULL,
+        p_status VARCHAR DEFAULT 'Все статусы',
+        p_date_from DATE DEFAULT NULL,
+        p_date_to DATE DEFAULT NULL,
+        p_after_date DATE DEFAULT NULL,
+        p_after_id INTEGER DEFAULT NULL,
+        p_limit INTEGER DEFAULT 200
+    ) RETURNS TABLE (
+        id_заказа INTEGER,
+        клиент VARCHAR,
+        менеджер VARCHAR,
+        дата_заказа DATE,
+        дата_готовности DATE,
+        статус_заказа VARCHAR,
+        сумма_заказа NUMERIC,
+        позиций_в_заказе BIGINT,
+        состояние_сроков TEXT
+    ) LANGUAGE plpgsql STABLE AS $$
+DECLARE v_where TEXT := '';
+v_pattern TEXT := '%' || COALESCE(p_search_text, '') || '%';
+BEGIN
+-- Параметры в EXECUTE: $1 текст, $2 статус, $3/$4 период, $5/$6 ключ, $7 лимит, $8 шаблон
+IF p_search_text ~ '^[0-9]+$' THEN v_where := v_where || ' AND z.id_заказа = $1::INTEGER';
+ELSIF COALESCE(p_search_text, '') <> '' THEN v_where := v_where || ' AND k.фио ILIKE $8';
+END IF;
+IF p_status = 'ПРОСРОЧЕН' THEN v_where := v_where || ' AND z.дата_готовности < CURRENT_DATE'
+    || ' AND z.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'')';
+ELSIF p_status IS NOT NULL
+AND p_status <> 'Все статусы' THEN v_where := v_where || ' AND z.статус = $2';
+END IF;
+IF p_date_from IS NOT NULL THEN v_where := v_where || ' AND z.дата_заказа >= $3';
+END IF;
+IF p_date_to IS NOT NULL THEN v_where := v_where || ' AND z.дата_заказа <= $4';
+END IF;
+IF p_after_date IS NOT NULL
+AND p_after_id IS NOT NULL THEN v_where := v_where || ' AND (z.дата_заказа, z.id_заказа) < ($5, $6)';
+END IF;
+
+RETURN QUERY EXECUTE '
+SELECT z.id_заказа,
+    COALESCE(k.фио, ''Неизвестный клиент'')::VARCHAR,
+    COALESCE(s.фио, ''—'')::VARCHAR,
+    z.дата_заказа,
+    z.дата_готовности,
+    z.статус::VARCHAR,
+    COALESCE(z.сумма_заказа, 0)::NUMERIC,
+    (
+        SELECT COUNT(*)
+        FROM состав_заказа sz
+        WHERE sz.id_заказа = z.id_заказа
+    )::BIGINT,
+    CASE
+        WHEN z.статус = ''выполнено'' THEN ''Готов к отгрузке''
+        WHEN z.статус = ''отменен'' THEN ''Отмена''
+        WHEN z.статус = ''завершен'' THEN ''Завершен''
+        WHEN z.статус = ''отгружен'' THEN ''Отгружен''
+        WHEN z.дата_готовности < CURRENT_DATE
+        AND z.статус NOT IN (''выполнено'', ''отгружен'', ''завершен'', ''отменен'') THEN ''ПРОСРОЧЕН''
+        ELSE ''В норме''
+    END::TEXT
+FROM заказы z
+    LEFT JOIN клиенты k ON z.id_клиента = k.id_клиента
+    LEFT JOIN сотрудники s ON z.id_менеджера = s.id_сотрудника
+WHERE TRUE' || v_where || '
+ORDER BY z.дата_заказа DESC,
+    z.id_заказа DESC
+LIMIT $7' USING p_search_text,
+    p_status,
+    p_date_from,
+    p_date_to,
+    p_after_date,
+    p_after_id,
+    p_limit,
+    v_pattern;
+END;
+$$;
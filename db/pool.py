@@ -0,0 +1,179 @@
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(Exception):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений psycopg2.
+
+    - соединения создаются по требованию, но не более max_size;
+    - простаивающие дольше idle_timeout закрываются (пока в пуле больше min_size);
+    - при выдаче соединение проверяется: закрытые отбрасываются, а простоявшие
+      дольше healthcheck_interval пингуются запросом SELECT 1;
+    - при возврате незавершенная транзакция откатывается.
+    """
+
+    def __init__(
+        self,
+        dsn,
+        min_size=1,
+        max_size=10,
+        idle_timeout=300.0,
+        healthcheck_interval=30.0,
+        checkout_timeout=10.0,
+        connect=psycopg2.connect,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Некорректные размеры пула")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.checkout_timeout = checkout_timeout
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        self._idle = []  # стек (conn, время возврата в пул)
+        self._size = 0  # всего открытых соединений (свободные + выданные)
+        self._closed = False
+
+    # --- Выдача / возврат ---
+
+    def getconn(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            conn, released_at = self._acquire_slot(deadline)
+            if conn is None:
+                return self._open_new()
+            if self._is_healthy(conn, released_at):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn, discard=False):
+        if discard or conn.closed:
+            self._discard(conn)
+            return
+
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def clear_idle(self):
+        """Закрывает все свободные соединения (например, после рестарта сервера)"""
+        with self._cond:
+            stale = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(stale)
+            self._cond.notify_all()
+        for conn in stale:
+            self._close_quietly(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+        self.clear_idle()
+
+    # --- Статистика (для отладки и бенчмарков) ---
+
+    @property
+    def size(self):
+        with self._cond:
+            return self._size
+
+    @property
+    def idle_count(self):
+        with self._cond:
+            return len(self._idle)
+
+    # --- Внутреннее ---
+
+    def _acquire_slot(self, deadline):
+        """
+        Возвращает (conn, время_возврата) свободного соединения,
+        либо (None, None), если зарезервировано место под новое.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Пул соединений закрыт")
+                self._evict_idle_locked()
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Нет свободных соединений (max={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+    def _open_new(self):
+        try:
+            return self._connect(self.dsn)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _is_healthy(self, conn, released_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - released_at < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_idle_locked(self):
+        """Закрывает долго простаивающие соединения сверх min_size"""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        # Самые старые лежат в начале стека
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.idle_timeout
+        ):
+            conn, _ = self._idle.pop(0)
+            self._size -= 1
+            self._close_quietly(conn)
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,143 @@
+"""
+Подготовленные запросы для вызовов хранимых процедур (Database.call_procedure).
+
+Первый вызов процедуры с данным числом аргументов на соединении делает
+PREPARE "SELECT * FROM proc($1, ...)", следующие — только EXECUTE: сервер
+не разбирает и не планирует запрос заново. Реестр подготовленного ведется
+на каждое соединение отдельно.
+
+Реестр устаревает, если схему поменяли (миграции) или соединение сменило
+серверный процесс (пулер в режиме transaction, DISCARD ALL). Оба случая
+распознаются по ошибке сервера, и вызов повторяется:
+
+    26000 нет такого запроса        — подготовить заново (PREPARE + EXECUTE
+                                      в одной транзакции, т.е. на одном сервере)
+    42P05 запрос уже подготовлен    — серверный процесс общий: только EXECUTE
+    0A000 план не может сменить тип
+          результата                — сменилась схема: новое поколение имен
+
+Ошибка узнается по функции сервера, которая ее подняла (diag.source_function
+не переводится, в отличие от текста), и только вне тела процедуры (без
+CONTEXT): все три случая возникают до выполнения процедуры. Любая другая
+ошибка, в том числе 0A000 из самой процедуры, пробрасывается без повтора.
+
+utils/apply_migration.py сбрасывает реестр (invalidate) в своем процессе,
+остальные процессы восстанавливаются по ошибкам выше. Процедуры, типы
+аргументов которых сервер не выводит сам (перегрузки), вызываются
+обычным запросом.
+"""
+import hashlib
+import threading
+import weakref
+
+import psycopg2
+from psycopg2 import errors
+
+_MAX_ATTEMPTS = 3
+_NOT_PREPARABLE = (errors.AmbiguousFunction, errors.IndeterminateDatatype)
+# Функция сервера -> что случилось с подготовленным запросом
+_STALE = {
+    "FetchPreparedStatement": "lost",
+    "StorePreparedStatement": "exists",
+    "RevalidateCachedQuery": "changed",
+}
+
+
+def _stale_reason(error):
+    """Причина из _STALE, если ошибка — устаревший реестр, а не сбой процедуры"""
+    diag = error.diag
+    if diag.context is not None:
+        return None
+    return _STALE.get(diag.source_function)
+
+
+def plain_query(proc_name, arity):
+    placeholders = ",".join(["%s"] * arity)
+    return f"SELECT * FROM {proc_name}({placeholders})"
+
+
+class PreparedStatements:
+    """Реестр PREPARE по соединениям; ключ — (процедура, число аргументов)"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._connections = weakref.WeakKeyDictionary()  # conn -> (поколение, {имя})
+        self._not_preparable = set()
+        self.prepares = 0
+
+    def invalidate(self):
+        """Схема поменялась: все соединения подготовят запросы заново под новыми именами"""
+        with self._lock:
+            self._generation += 1
+
+    def statement_name(self, proc_name, arity):
+        # Имя процедуры может быть кириллицей и длинным — в имени запроса хеш
+        digest = hashlib.md5(proc_name.encode()).hexdigest()[:12]
+        return f"nova_{digest}_{arity}_g{self._generation}"
+
+    def execute(self, cur, proc_name, params=None):
+        """
+        Выполняет SELECT * FROM proc_name(params) на курсоре, подготовив
+        запрос при первом вызове. Может откатить текущую транзакцию
+        соединения, поэтому вызывается только в начале своей транзакции.
+        """
+        params = list(params or [])
+        key = (proc_name, len(params))
+        if not self.enabled or key in self._not_preparable:
+            cur.execute(plain_query(*key), params)
+            return
+
+        conn = cur.connection
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            prepared = self._prepared(cur)
+            name = self.statement_name(*key)
+            try:
+                if name not in prepared:
+                    try:
+                        self._prepare(cur, name, *key)
+                    except _NOT_PREPARABLE:
+                        # PREPARE процедуру не выполнял: обычный запрос — первый вызов
+                        conn.rollback()
+                        self._not_preparable.add(key)
+                        cur.execute(plain_query(*key), params)
+                        return
+                    prepared.add(name)
+                if params:
+                    cur.execute(f"EXECUTE {name}({','.join(['%s'] * len(params))})", params)
+                else:
+                    cur.execute(f"EXECUTE {name}")
+                return
+            except psycopg2.Error as e:
+                reason = _stale_reason(e)
+                if reason is None or attempt == _MAX_ATTEMPTS:
+                    raise
+                conn.rollback()
+                if reason == "changed":
+                    self.invalidate()
+                elif reason == "exists":
+                    prepared.add(name)
+                else:
+                    prepared.discard(name)
+
+    def _prepared(self, cur):
+        """
+        Множество подготовленных имен соединения. Если соединение помнит
+        прошлое поколение, его запросы удаляются (DEALLOCATE ALL).
+        """
+        conn = cur.connection
+        with self._lock:
+            generation, names = self._connections.get(conn, (None, None))
+            if generation == self._generation:
+                return names
+            names = set()
+            self._connections[conn] = (self._generation, names)
+        if generation is not None:
+            cur.execute("DEALLOCATE ALL")
+        return names
+
+    def _prepare(self, cur, name, proc_name, arity):
+        placeholders = ",".join(f"${i}" for i in range(1, arity + 1))
+        cur.execute(f"PREPARE {name} AS SELECT * FROM {proc_name}({placeholders})")
+        self.prepares += 1
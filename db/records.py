@@ -0,0 +1,57 @@
+"""
+Доменные записи для частых выборок (db.rows.Record с __slots__).
+
+Поля — колонки соответствующих таблиц/представлений; лишние колонки
+запроса отбрасываются, недостающие — ошибка.
+
+    tasks = Database.fetch_all("SELECT * FROM v_задачи_сборщика", mode=Task)
+    tasks[0].осталось, tasks[0]["статус"]
+"""
+from db.rows import record_class
+
+
+class Order(record_class("Order", (
+    "id_заказа", "клиент", "менеджер", "дата_заказа", "дата_готовности",
+    "статус_заказа", "сумма_заказа", "позиций_в_заказе", "состояние_сроков",
+))):
+    """Строка списка заказов (sp_search_orders_page)"""
+
+    __slots__ = ()
+
+    @property
+    def просрочен(self):
+        return self.состояние_сроков == "ПРОСРОЧЕН"
+
+
+class Task(record_class("Task", (
+    "id_заготовки", "id_заказа", "заготовка", "плановое_количество",
+    "фактическое_количество", "дедлайн", "статус", "id_сборщика",
+))):
+    """Задача сборщика (v_задачи_сборщика)"""
+
+    __slots__ = ()
+
+    @property
+    def осталось(self):
+        return max((self.плановое_количество or 0) - (self.фактическое_количество or 0), 0)
+
+
+class Material(record_class("Material", (
+    "id_материала", "артикул_материала", "наименование", "количество_на_складе",
+    "единица_измерения", "минимальный_остаток", "цена_за_единицу",
+))):
+    """Материал на складе (материалы)"""
+
+    __slots__ = ()
+
+    @property
+    def ниже_минимума(self):
+        return (self.количество_на_складе or 0) < (self.минимальный_остаток or 0)
+
+
+class Client(record_class("Client", (
+    "id_клиента", "фио", "инн", "номер_телефона", "адрес", "дата_регистрации",
+))):
+    """Клиент (клиенты)"""
+
+    __slots__ = ()
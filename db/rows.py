@@ -0,0 +1,169 @@
+"""
+Компактные строки результата запроса вместо RealDictRow.
+
+RealDictRow — словарь на каждую строку с длинными ключами-именами колонок.
+Для больших выборок (и кешей вроде истории SearchController) это лишняя
+память и время разбора. Database.fetch_all(..., mode=...) умеет отдавать:
+
+    mode="record"       [запись с __slots__]   r.фио, r["фио"], r.get(...), dict(r)
+    mode="namedtuple"   [namedtuple]           кортеж: r.фио, r[0], r._fields
+    mode="columns"      Columns                c["фио"] -> список значений колонки
+    mode=Client         [доменная запись]      классы из db.records (поля по имени)
+
+Классы записей создаются один раз на набор колонок и кешируются.
+"""
+import collections
+import keyword
+import operator
+from functools import lru_cache
+from itertools import starmap
+
+MODES = ("dict", "record", "namedtuple", "columns")
+
+
+class Record:
+    """
+    Основа записей с __slots__. Поддерживает доступ как к словарю
+    (r["поле"], get, keys, values, items, dict(r)), чтобы заменять
+    RealDictRow без правок вызывающего кода.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    _slots = ()
+    _slot_of = {}
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, self._slot_of[field])
+        except KeyError:
+            raise KeyError(field) from None
+
+    def get(self, field, default=None):
+        slot = self._slot_of.get(field)
+        return default if slot is None else getattr(self, slot)
+
+    def __contains__(self, field):
+        return field in self._slot_of
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def keys(self):
+        return list(self._fields)
+
+    def values(self):
+        return tuple(getattr(self, slot) for slot in self._slots)
+
+    def items(self):
+        return list(zip(self._fields, self.values()))
+
+    def _asdict(self):
+        return dict(zip(self._fields, self.values()))
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self._fields == other._fields and self.values() == other.values()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        body = ", ".join(f"{f}={v!r}" for f, v in zip(self._fields, self.values()))
+        return f"{type(self).__name__}({body})"
+
+
+def _slot_names(fields):
+    """Имена атрибутов: имя колонки, а если оно не идентификатор — _номер"""
+    seen = set()
+    slots = []
+    for i, field in enumerate(fields):
+        name = field
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_") or name in seen:
+            name = f"_{i}"
+        seen.add(name)
+        slots.append(name)
+    return tuple(slots)
+
+
+def record_class(name, fields, base=Record):
+    """Класс записи с __slots__ по списку колонок (конструктор — по позициям)"""
+    fields = tuple(fields)
+    slots = _slot_names(fields)
+    # Конструктор генерируется, как в collections.namedtuple: без цикла по полям
+    args = ", ".join(slots)
+    body = "".join(f"\n    self.{s} = {s}" for s in slots) or "\n    pass"
+    namespace = {}
+    exec(f"def __init__(self, {args}):{body}", namespace)
+    return type(name, (base,), {
+        "__slots__": slots,
+        "__init__": namespace["__init__"],
+        "_fields": fields,
+        "_slots": slots,
+        "_slot_of": dict(zip(fields, slots)),
+    })
+
+
+@lru_cache(maxsize=256)
+def _record_type(fields):
+    return record_class("Row", fields)
+
+
+@lru_cache(maxsize=256)
+def _namedtuple_type(fields):
+    return collections.namedtuple("Row", fields, rename=True)
+
+
+class Columns:
+    """Результат по колонкам: c["поле"] -> список, len(c) — число строк"""
+
+    __slots__ = ("fields", "columns", "_count")
+
+    def __init__(self, fields, rows):
+        self.fields = tuple(fields)
+        transposed = zip(*rows) if rows else [()] * len(self.fields)
+        self.columns = dict(zip(self.fields, map(list, transposed)))
+        self._count = len(rows)
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Строки кортежами (в порядке fields)"""
+        return zip(*self.columns.values()) if self.fields else iter(())
+
+    def __repr__(self):
+        return f"Columns({self._count} строк: {', '.join(self.fields)})"
+
+
+def decode(fields, rows, mode):
+    """Строки-кортежи курсора -> строки в нужном режиме"""
+    fields = tuple(fields)
+    if mode == "record":
+        return list(starmap(_record_type(fields), rows))
+    if mode == "namedtuple":
+        return list(map(_namedtuple_type(fields)._make, rows))
+    if mode == "columns":
+        return Columns(fields, rows)
+    if isinstance(mode, type) and issubclass(mode, Record):
+        return list(starmap(mode, _reorder(fields, mode._fields, rows)))
+    raise ValueError(f"Неизвестный режим выборки: {mode!r} (ожидается один из {MODES} или класс записи)")
+
+
+def _reorder(fields, wanted, rows):
+    """Значения колонок wanted в их порядке; лишние колонки запроса отбрасываются"""
+    if fields == wanted:
+        return rows
+    missing = [f for f in wanted if f not in fields]
+    if missing:
+        raise ValueError(f"В результате запроса нет колонок: {', '.join(missing)}")
+    index = [fields.index(f) for f in wanted]
+    if len(index) == 1:
+        return ((row[index[0]],) for row in rows)
+    return map(operator.itemgetter(*index), rows)
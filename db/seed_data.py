@@ -29,7 +29,7 @@ def seed():
         "план_заготовок",
         "состав_закупки",
         "закупки_материалов",
-        "график_работы",
+        "график_периоды",
         "состав_заказа",
         "состав_изделия",
         "расход_материалов",
@@ -228,24 +228,19 @@ def seed():
     start_date = today.replace(day=1)  # Первое число текущего месяца
     days_to_generate = 60
 
-    for emp_id in employees_ids:
-        for day_offset in range(days_to_generate):
-            current_day = start_date + timedelta(days=day_offset)
-            weekday = current_day.weekday()  # 0=ПН, 5=СБ, 6=ВС
-
-            # Логика по умолчанию
-            if weekday >= 5:
-                status = "выходной"
-            else:
-                status = "рабочий"
-
-            cur.execute(
-                """
-                INSERT INTO график_работы (id_сотрудника, дата, статус)
-                VALUES (%s, %s, %s)
-            """,
-                (emp_id, current_day, status),
-            )
+    # Одной записью на всех сотрудников и все дни (сжимается в отрезки)
+    cur.execute(
+        """
+        SELECT sp_записать_график(
+            array_agg(e),
+            array_agg(d::DATE),
+            array_agg(CASE WHEN EXTRACT(ISODOW FROM d) >= 6 THEN 'выходной' ELSE 'рабочий' END)
+        )
+        FROM unnest(%s::INTEGER[]) AS e
+        CROSS JOIN generate_series(%s::DATE, %s::DATE, INTERVAL '1 day') AS d
+    """,
+        (employees_ids, start_date, start_date + timedelta(days=days_to_generate - 1)),
+    )
 
     # --- 6. КЛИЕНТЫ (минимум 100) ---
     print("🌱 6. Генерация клиентов (100+)...")
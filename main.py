@@ -1,10 +1,7 @@
 import os
 import sys
 
-from PyQt6.QtWidgets import QApplication
-
-from ui.windows.login_window import LoginWindow
-from ui.windows.main_window import MainWindow
+from utils import startup_profile
 
 STYLE_PATH = os.path.join(os.path.dirname(__file__), "ui", "resources", "styles.qss")
 
@@ -18,6 +15,8 @@ class AppController:
 
     def show_login(self):
         """Показать окно входа"""
+        from ui.windows.login_window import LoginWindow
+
         self.login_window = LoginWindow()
         self.login_window.loginSuccess.connect(self.show_main)
 
@@ -30,10 +29,16 @@ class AppController:
 
     def show_main(self, user_id, role, fio):
         """Показать главное окно"""
+        startup_profile.mark("вход выполнен")
+        # Виджеты вкладок, qtawesome и т.д. — только после входа
+        from ui.windows.main_window import MainWindow
+
         self.main_window = MainWindow(user_id, role, fio)
         self.main_window.logoutSignal.connect(
             self.show_login
         )  # При выходе -> снова логин
+        if startup_profile.enabled():
+            self.main_window.interactive.connect(self.on_profiled_interactive)
 
         # Закрываем логин
         if self.login_window:
@@ -42,8 +47,18 @@ class AppController:
 
         self.main_window.show()
 
+    def on_profiled_interactive(self, _tti_ms):
+        self.main_window.interactive.disconnect(self.on_profiled_interactive)
+        startup_profile.mark("главное окно готово")
+        startup_profile.report()
+
 
 def main():
+    startup_profile.restart_with_importtime()
+    # До окна входа — только ядро PyQt
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+
     app = QApplication(sys.argv)
 
     # Загрузка стилей
@@ -51,6 +66,9 @@ def main():
         with open(STYLE_PATH, "r") as f:
             app.setStyleSheet(f.read())
 
+    # Веха — после первой отрисовки окна входа, раньше его отложенных импортов
+    QTimer.singleShot(0, lambda: startup_profile.mark(startup_profile.LOGIN_SHOWN))
+
     # Запуск контроллера
     controller = AppController()
     controller.show_login()
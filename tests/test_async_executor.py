@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtCore import QObject
+from PyQt6.QtWidgets import QApplication
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.async_executor import AsyncExecutor
+from db.database import Database
+
+
+class TestAsyncExecutor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.executor = AsyncExecutor(max_threads=4)
+        self.owner = QObject()
+        self.results = []
+
+    def wait_idle(self, owner, key, timeout=10):
+        deadline = time.monotonic() + timeout
+        while self.executor.is_pending(owner, key) and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.executor.wait_for_done()
+        self.app.processEvents()
+
+    def slow(self, value, delay):
+        time.sleep(delay)
+        return value
+
+    def test_result_delivered(self):
+        self.executor.submit(self.owner, self.slow, 1, 0, on_result=self.results.append)
+        self.wait_idle(self.owner, "default")
+        self.assertEqual(self.results, [1])
+
+    def test_stale_result_dropped(self):
+        self.executor.submit(self.owner, self.slow, "old", 0.2, on_result=self.results.append, key="load")
+        self.executor.submit(self.owner, self.slow, "new", 0, on_result=self.results.append, key="load")
+        self.wait_idle(self.owner, "load")
+        self.assertEqual(self.results, ["new"])
+
+    def test_keys_are_independent(self):
+        self.executor.submit(self.owner, self.slow, "a", 0.05, on_result=self.results.append, key="a")
+        self.executor.submit(self.owner, self.slow, "b", 0, on_result=self.results.append, key="b")
+        self.wait_idle(self.owner, "a")
+        self.assertEqual(sorted(self.results), ["a", "b"])
+
+    def test_error_goes_to_on_error(self):
+        errors = []
+
+        def fail():
+            raise ValueError("boom")
+
+        self.executor.submit(self.owner, fail, on_result=self.results.append, on_error=errors.append)
+        self.wait_idle(self.owner, "default")
+        self.assertEqual(self.results, [])
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_idle_after_chained_requests(self):
+        idle = []
+        self.executor.idle.connect(lambda: idle.append(list(self.results)))
+
+        def chain(value):
+            self.results.append(value)
+            if value == 1:
+                self.executor.submit(self.owner, self.slow, 2, 0.05, on_result=chain, key="next")
+
+        self.executor.submit(self.owner, self.slow, 1, 0, on_result=chain)
+        deadline = time.monotonic() + 5
+        while not idle and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.assertEqual(idle, [[1, 2]])
+        self.assertFalse(self.executor.has_pending())
+
+    def test_stale_query_is_cancelled_on_server(self):
+        start = time.monotonic()
+        self.executor.submit(
+            self.owner, Database.fetch_all, "SELECT pg_sleep(10)",
+            on_result=self.results.append, key="load",
+        )
+        time.sleep(0.3)  # дать запросу дойти до сервера
+        self.executor.submit(
+            self.owner, Database.fetch_all, "SELECT 42 AS x",
+            on_result=self.results.append, key="load",
+        )
+        self.wait_idle(self.owner, "load")
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(self.results), 1)
+        self.assertEqual(self.results[0][0]["x"], 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
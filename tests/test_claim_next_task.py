@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+import threading
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+WORKERS = 50
+TASKS = 100
+TASK_QTY = 10
+# Четные заготовки расходуют M1 и M2, нечетные — M2 и M3 (на единицу)
+STOCK = {"TEST-CLAIM-M1": 300, "TEST-CLAIM-M2": 1300, "TEST-CLAIM-M3": 250}
+
+
+class TestClaimNextTask(unittest.TestCase):
+    """Данные коммитятся: сборщики работают в отдельных соединениях"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        cur = self.cur
+        cur.execute("SELECT id_клиента FROM клиенты LIMIT 1")
+        cur.execute("INSERT INTO заказы (id_клиента) VALUES (%s) RETURNING id_заказа", (cur.fetchone()[0],))
+        self.order_id = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе)"
+            " SELECT a, a, q FROM unnest(%s::text[], %s::int[]) AS t(a, q) ORDER BY a RETURNING id_материала",
+            (list(STOCK), list(STOCK.values())),
+        )
+        self.m1, self.m2, self.m3 = [r[0] for r in cur.fetchall()]
+        cur.execute(
+            "INSERT INTO заготовки (артикул_заготовки, наименование)"
+            " SELECT 'TEST-CLAIM-B' || g, 'Тест ' || g FROM generate_series(1, %s) g RETURNING id_заготовки",
+            (TASKS,),
+        )
+        self.blanks = [r[0] for r in cur.fetchall()]
+        for i, blank in enumerate(self.blanks):
+            materials = (self.m1, self.m2) if i % 2 == 0 else (self.m2, self.m3)
+            for material in materials:
+                cur.execute(
+                    "INSERT INTO расход_материалов (id_заготовки, id_материала, количество_материала) VALUES (%s, %s, 1)",
+                    (blank, material),
+                )
+        cur.execute(
+            "INSERT INTO план_заготовок (id_заготовки, id_заказа, плановое_количество, дата_план)"
+            " SELECT b, %s, %s, CURRENT_DATE + (b %% 7) FROM unnest(%s::int[]) b",
+            (self.order_id, TASK_QTY, self.blanks),
+        )
+        cur.execute("SELECT id_сотрудника FROM сотрудники WHERE должность = 'сборщик'")
+        self.worker_ids = [r[0] for r in cur.fetchall()]
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.cur.execute("DELETE FROM заказы WHERE id_заказа = %s", (self.order_id,))
+        self.cur.execute("DELETE FROM заготовки WHERE id_заготовки = ANY(%s)", (self.blanks,))
+        self.cur.execute("DELETE FROM материалы WHERE id_материала IN (%s, %s, %s)", (self.m1, self.m2, self.m3))
+        self.conn.commit()
+
+    def worker(self, worker_id, claims, failures):
+        conn = psycopg2.connect(config.DATABASE_URL)
+        try:
+            cur = conn.cursor()
+            filters = json.dumps({"id_заказа": self.order_id})
+            while True:
+                cur.execute(
+                    "SELECT status, message, claimed_blank_id FROM sp_claim_next_task(%s, %s)",
+                    (worker_id, filters),
+                )
+                status, message, blank = cur.fetchone()
+                conn.commit()
+                if status == "OK":
+                    claims.append(blank)
+                elif status == "WARNING":
+                    return
+                elif "Повторите" not in message:
+                    failures.append(message)
+                    return
+        finally:
+            conn.close()
+
+    def test_concurrent_workers(self):
+        claims, failures = [], []
+        threads = [
+            threading.Thread(target=self.worker, args=(self.worker_ids[i % len(self.worker_ids)], claims, failures))
+            for i in range(WORKERS)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(60)
+
+        self.assertEqual(failures, [])
+        # Ни одна задача не взята дважды
+        self.assertEqual(len(claims), len(set(claims)))
+        self.cur.execute(
+            "SELECT id_заготовки FROM план_заготовок WHERE id_заказа = %s AND статус = 'в_работе'", (self.order_id,))
+        self.assertEqual(sorted(r[0] for r in self.cur.fetchall()), sorted(claims))
+
+        # Остатки уменьшились ровно на взятое (без потерянных обновлений)
+        even = sum(1 for b in claims if self.blanks.index(b) % 2 == 0)
+        odd = len(claims) - even
+        expected = {
+            self.m1: STOCK["TEST-CLAIM-M1"] - even * TASK_QTY,
+            self.m2: STOCK["TEST-CLAIM-M2"] - len(claims) * TASK_QTY,
+            self.m3: STOCK["TEST-CLAIM-M3"] - odd * TASK_QTY,
+        }
+        self.cur.execute(
+            "SELECT id_материала, количество_на_складе FROM материалы WHERE id_материала = ANY(%s)", (list(expected),))
+        self.assertEqual(dict(self.cur.fetchall()), expected)
+
+        # Осталось только то, на что действительно не хватает материалов
+        self.assertEqual((even, odd), (30, 25))
+        self.cur.execute(
+            "SELECT COUNT(*) FROM план_заготовок WHERE id_заказа = %s AND статус = 'принято'"
+            " AND sp_task_material_shortages(id_заготовки, плановое_количество) IS NULL",
+            (self.order_id,),
+        )
+        self.assertEqual(self.cur.fetchone()[0], 0)
+
+    def test_shortage_reported_and_nothing_reserved(self):
+        self.cur.execute("UPDATE материалы SET количество_на_складе = 5 WHERE id_материала IN (%s, %s, %s)",
+                         (self.m1, self.m2, self.m3))
+        self.cur.execute(
+            "SELECT status, shortages FROM sp_claim_next_task(%s, %s)",
+            (self.worker_ids[0], json.dumps({"id_заказа": self.order_id, "id_заготовки": self.blanks[:1]})),
+        )
+        status, shortages = self.cur.fetchone()
+        self.assertEqual(status, "WARNING")
+        self.assertEqual([(s["id_материала"], s["нужно"], s["есть"]) for s in shortages],
+                         [(self.m1, 10, 5), (self.m2, 10, 5)])
+        self.cur.execute("SELECT SUM(количество_на_складе) FROM материалы WHERE id_материала IN (%s, %s, %s)",
+                         (self.m1, self.m2, self.m3))
+        self.assertEqual(self.cur.fetchone()[0], 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+class TestCreateOrderWithItems(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor(cursor_factory=RealDictCursor)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.cur.execute("SELECT id_клиента FROM клиенты LIMIT 1")
+        self.client_id = self.cur.fetchone()["id_клиента"]
+        # Два изделия с составом: у первого на складе 5, у второго 0
+        self.cur.execute(
+            "SELECT id_изделия FROM изделия i"
+            " WHERE EXISTS (SELECT 1 FROM состав_изделия s WHERE s.id_изделия = i.id_изделия)"
+            " ORDER BY id_изделия LIMIT 2"
+        )
+        self.stocked, self.empty = (r["id_изделия"] for r in self.cur.fetchall())
+        self.cur.execute("UPDATE изделия SET количество_на_складе = 5 WHERE id_изделия = %s", (self.stocked,))
+        self.cur.execute("UPDATE изделия SET количество_на_складе = 0 WHERE id_изделия = %s", (self.empty,))
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def create(self, items, client_id=None):
+        self.cur.execute(
+            "SELECT * FROM sp_create_order_with_items(%s, NULL, CURRENT_DATE + 10, %s)",
+            (client_id or self.client_id, Json(items)),
+        )
+        return self.cur.fetchone()
+
+    def stock(self, product_id):
+        self.cur.execute("SELECT количество_на_складе FROM изделия WHERE id_изделия = %s", (product_id,))
+        return self.cur.fetchone()["количество_на_складе"]
+
+    def test_reserves_stock_and_plans_shortfall(self):
+        res = self.create([
+            {"id_изделия": self.stocked, "количество": 3},
+            {"id_изделия": self.empty, "количество": 2},
+            {"id_изделия": self.stocked, "количество": 4},  # повтор складывается: 7 при остатке 5
+        ])
+        self.assertEqual(res["status"], "WARNING")
+        order_id = res["new_order_id"]
+        self.assertEqual(sorted(w["id_изделия"] for w in res["warnings"]), sorted([self.stocked, self.empty]))
+        self.assertEqual(self.stock(self.stocked), 0)
+
+        self.cur.execute(
+            "SELECT id_изделия, количество_изделий FROM состав_заказа WHERE id_заказа = %s ORDER BY 1",
+            (order_id,),
+        )
+        self.assertEqual(
+            [(r["id_изделия"], r["количество_изделий"]) for r in self.cur.fetchall()],
+            sorted([(self.stocked, 7), (self.empty, 2)]),
+        )
+
+        # Задания: нехватка 2 и 2 шт., по одной строке на заготовку
+        self.cur.execute(
+            "SELECT s.id_заготовки, SUM(s.количество_заготовки * 2) AS нужно"
+            " FROM состав_изделия s WHERE s.id_изделия IN (%s, %s) GROUP BY 1 ORDER BY 1",
+            (self.stocked, self.empty),
+        )
+        expected = [(r["id_заготовки"], r["нужно"]) for r in self.cur.fetchall()]
+        self.cur.execute(
+            "SELECT id_заготовки, плановое_количество FROM план_заготовок WHERE id_заказа = %s ORDER BY 1",
+            (order_id,),
+        )
+        self.assertEqual([(r["id_заготовки"], r["плановое_количество"]) for r in self.cur.fetchall()], expected)
+
+        self.cur.execute("SELECT сумма_заказа FROM заказы WHERE id_заказа = %s", (order_id,))
+        self.assertGreater(self.cur.fetchone()["сумма_заказа"], 0)
+
+    def test_enough_stock_is_ok(self):
+        res = self.create([{"id_изделия": self.stocked, "количество": 5}])
+        self.assertEqual(res["status"], "OK")
+        self.assertEqual(res["warnings"], [])
+        self.assertEqual(self.stock(self.stocked), 0)
+
+    def test_failure_leaves_nothing_behind(self):
+        self.cur.execute("SELECT COUNT(*) AS n FROM заказы")
+        before = self.cur.fetchone()["n"]
+        for items, client_id in (
+            ([], None),
+            ([{"id_изделия": -1, "количество": 1}], None),
+            ([{"id_изделия": self.stocked, "количество": 1}], -1),  # нарушение FK клиента
+        ):
+            with self.subTest(items=items, client_id=client_id):
+                self.assertEqual(self.create(items, client_id)["status"], "ERROR")
+        self.cur.execute("SELECT COUNT(*) AS n FROM заказы")
+        self.assertEqual(self.cur.fetchone()["n"], before)
+        self.assertEqual(self.stock(self.stocked), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+import psycopg2
+from psycopg2 import extensions
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db import database
+from db.database import Database
+from db.pool import ConnectionPool, PoolTimeoutError
+
+
+class _FakeInfo:
+    def __init__(self):
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.conn.pings += 1
+        if self.conn.dead:
+            self.conn.closed = 2
+            raise psycopg2.OperationalError("server closed the connection")
+
+
+class _FakeConnection:
+    """Минимальная замена psycopg2-соединения для проверки логики пула"""
+
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.info = _FakeInfo()
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def make_pool(self, **kwargs):
+        self.created = []
+
+        def connect(dsn):
+            conn = _FakeConnection()
+            self.created.append(conn)
+            return conn
+
+        params = dict(min_size=1, max_size=3, healthcheck_interval=60, checkout_timeout=0.2)
+        params.update(kwargs)
+        return ConnectionPool("dsn", connect=connect, **params)
+
+    def test_reuses_connection(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(len(self.created), 1)
+
+    def test_max_size_and_timeout(self):
+        pool = self.make_pool(max_size=2)
+        a, b = pool.getconn(), pool.getconn()
+        with self.assertRaises(PoolTimeoutError):
+            pool.getconn()
+
+        # Освобожденное соединение достается ожидающему потоку
+        got = []
+        t = threading.Thread(target=lambda: got.append(pool.getconn()))
+        t.start()
+        time.sleep(0.05)
+        pool.putconn(a)
+        t.join(1)
+        self.assertEqual(got, [a])
+        self.assertEqual(pool.size, 2)
+        pool.putconn(b)
+
+    def test_rolls_back_unfinished_transaction(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        self.assertEqual(conn.rollbacks, 1)
+
+    def test_closed_connection_is_replaced(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.closed = 2
+        fresh = pool.getconn()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(pool.size, 1)
+
+    def test_healthcheck_detects_dead_server(self):
+        pool = self.make_pool(healthcheck_interval=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.dead = True  # сервер перезапущен, сокет мертв
+        fresh = pool.getconn()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(conn.pings, 1)
+        self.assertEqual(pool.size, 1)
+
+    def test_idle_timeout_keeps_min_size(self):
+        pool = self.make_pool(min_size=1, idle_timeout=0.01)
+        conns = [pool.getconn() for _ in range(3)]
+        for c in conns:
+            pool.putconn(c)
+        time.sleep(0.03)
+        pool.putconn(pool.getconn())
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(sum(1 for c in conns if c.closed), 2)
+
+    def test_clear_idle(self):
+        pool = self.make_pool()
+        a, b = pool.getconn(), pool.getconn()
+        pool.putconn(a)
+        pool.clear_idle()
+        self.assertTrue(a.closed)
+        self.assertEqual(pool.size, 1)
+        pool.putconn(b)
+
+
+class TestRunRetry(unittest.TestCase):
+    """Database._run повторяет после разрыва только то, что разрешил вызывающий"""
+
+    def setUp(self):
+        self.created = []
+
+        def connect(dsn):
+            conn = _FakeConnection()
+            self.created.append(conn)
+            return conn
+
+        self.saved_pool = database._pool
+        database._pool = ConnectionPool("dsn", connect=connect, min_size=0, max_size=2, healthcheck_interval=60)
+        self.calls = 0
+
+    def tearDown(self):
+        database._pool = self.saved_pool
+
+    def work(self, conn):
+        # Первый вызов — сервер разорвал соединение посреди запроса
+        self.calls += 1
+        if self.calls == 1:
+            conn.dead = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        return "ok"
+
+    def test_write_is_not_repeated(self):
+        with self.assertRaises(psycopg2.OperationalError):
+            Database._run(self.work)
+        self.assertEqual(self.calls, 1)
+
+    def test_read_is_repeated_on_new_connection(self):
+        self.assertEqual(Database._run(self.work, retry=True), "ok")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(self.created), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Те же показатели, посчитанные напрямую по исходным таблицам
+EXPECTED = """
+SELECT d.день,
+       COALESCE(SUM(z.сумма_заказа) FILTER (WHERE z.статус IN ('выполнен', 'завершен', 'отгружен')), 0),
+       COUNT(z.*) FILTER (WHERE z.статус IN ('выполнен', 'завершен', 'отгружен')),
+       COUNT(z.*) FILTER (WHERE z.статус = 'отменен'),
+       COUNT(z.*),
+       COALESCE((SELECT SUM(sz.количество * sz.цена_закупки)
+                 FROM закупки_материалов zm JOIN состав_закупки sz ON sz.id_закупки = zm.id_закупки
+                 WHERE zm.статус = 'выполнено' AND zm.дата_закупки = d.день), 0)
+FROM (SELECT дата_заказа AS день FROM заказы
+      UNION SELECT дата_закупки FROM закупки_материалов WHERE статус = 'выполнено') d
+LEFT JOIN заказы z ON z.дата_заказа = d.день
+WHERE d.день IS NOT NULL
+GROUP BY d.день
+"""
+
+ACTUAL = "SELECT день, выручка, заказов_закрыто, отмен, заказов_всего, расходы FROM kpi_daily"
+
+
+class TestKpiDaily(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def assertRollupMatches(self):
+        self.cur.execute(EXPECTED)
+        expected = {r[0]: r[1:] for r in self.cur.fetchall() if r[4] or r[5]}
+        self.cur.execute(ACTUAL)
+        actual = {r[0]: r[1:] for r in self.cur.fetchall()}
+        self.assertEqual(actual, expected)
+
+    def test_orders_lifecycle(self):
+        self.assertRollupMatches()
+        self.cur.execute(
+            "INSERT INTO заказы (id_клиента, дата_заказа, статус)"
+            " SELECT id_клиента, DATE '2001-02-03', 'принят' FROM клиенты LIMIT 3 RETURNING id_заказа"
+        )
+        ids = [r[0] for r in self.cur.fetchall()]
+        self.cur.execute(
+            "INSERT INTO состав_заказа (id_заказа, id_изделия, цена_фиксированная, количество_изделий)"
+            " SELECT o, (SELECT MIN(id_изделия) FROM изделия), 150, 2 FROM unnest(%s::int[]) o",
+            (ids,),
+        )
+        self.cur.execute("UPDATE заказы SET статус = 'выполнен' WHERE id_заказа = ANY(%s)", (ids[:2],))
+        self.cur.execute("UPDATE заказы SET статус = 'отменен' WHERE id_заказа = %s", (ids[2],))
+        self.assertRollupMatches()
+
+        self.cur.execute("SELECT выручка, заказов_закрыто, отмен, средний_чек FROM kpi_daily WHERE день = '2001-02-03'")
+        self.assertEqual(self.cur.fetchone(), (600, 2, 1, 300))
+
+        self.cur.execute("UPDATE заказы SET дата_заказа = '2001-02-04' WHERE id_заказа = %s", (ids[0],))
+        self.cur.execute("DELETE FROM заказы WHERE id_заказа = ANY(%s)", (ids[1:],))
+        self.assertRollupMatches()
+
+    def test_purchases_lifecycle(self):
+        self.cur.execute(
+            "INSERT INTO закупки_материалов (дата_закупки, поставщик, статус)"
+            " VALUES ('2001-03-04', 'Тест', 'ожидает_подтверждения') RETURNING id_закупки"
+        )
+        purchase_id = self.cur.fetchone()[0]
+        self.cur.execute(
+            "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки)"
+            " SELECT %s, id_материала, 10, 5 FROM материалы LIMIT 2",
+            (purchase_id,),
+        )
+        self.assertRollupMatches()
+
+        self.cur.execute("UPDATE закупки_материалов SET статус = 'выполнено' WHERE id_закупки = %s", (purchase_id,))
+        self.cur.execute("SELECT расходы FROM kpi_daily WHERE день = '2001-03-04'")
+        self.assertEqual(self.cur.fetchone()[0], 100)
+
+        self.cur.execute("UPDATE состав_закупки SET количество = 20 WHERE id_закупки = %s", (purchase_id,))
+        self.assertRollupMatches()
+
+        # Позиции удаляются каскадом вместе с закупкой
+        self.cur.execute("DELETE FROM закупки_материалов WHERE id_закупки = %s", (purchase_id,))
+        self.assertRollupMatches()
+
+    def test_dashboard_kpis(self):
+        self.cur.execute("SELECT выручка, заказов_закрыто, средний_чек FROM sp_dashboard_kpis('1900-01-01', '2999-01-01')")
+        revenue, closed, avg_check = self.cur.fetchone()
+        self.cur.execute(
+            "SELECT COALESCE(SUM(сумма_заказа), 0), COUNT(*) FROM заказы"
+            " WHERE статус IN ('выполнен', 'завершен', 'отгружен')"
+        )
+        self.assertEqual((revenue, closed), self.cur.fetchone())
+        if closed:
+            self.assertAlmostEqual(float(avg_check), float(revenue) / closed, places=2)
+
+
+    def test_concurrent_writers_same_day(self):
+        # Два писателя одного дня: второй ждет первого и не затирает его итог
+        day = "2001-05-06"
+        other = psycopg2.connect(config.DATABASE_URL)
+        insert = (
+            "INSERT INTO заказы (id_клиента, дата_заказа, статус)"
+            " SELECT MIN(id_клиента), %s, 'принят' FROM клиенты RETURNING id_заказа"
+        )
+        try:
+            other_cur = other.cursor()
+            other_cur.execute(insert, (day,))
+            ids = [other_cur.fetchone()[0]]
+
+            def second_writer():
+                with psycopg2.connect(config.DATABASE_URL) as conn, conn.cursor() as cur:
+                    cur.execute(insert, (day,))
+                    ids.append(cur.fetchone()[0])
+                conn.close()
+
+            thread = threading.Thread(target=second_writer)
+            thread.start()
+            thread.join(0.3)
+            self.assertTrue(thread.is_alive(), "второй писатель должен ждать блокировку дня")
+            other.commit()
+            thread.join(5)
+
+            self.cur.execute("SELECT заказов_всего FROM kpi_daily WHERE день = %s", (day,))
+            self.assertEqual(self.cur.fetchone()[0], 2)
+        finally:
+            other.rollback()
+            other_cur.execute("DELETE FROM заказы WHERE дата_заказа = %s", (day,))
+            other.commit()
+            other.close()
+        self.conn.rollback()
+        self.assertRollupMatches()
+
+
+if __name__ == "__main__":
+    unittest.main()
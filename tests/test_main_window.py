@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtWidgets import QApplication
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from db.async_executor import executor
+from ui.widgets.dashboard_tab import DashboardTab
+from ui.widgets.nomenclature_tab import NomenclatureTab
+from ui.windows.main_window import TAB_REGISTRY, MainWindow
+
+
+class TestMainWindowTabs(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.window = MainWindow(1, "директор", "Тест")
+
+    def tearDown(self):
+        self.window.close()
+        executor().wait_for_done()
+        self.app.processEvents()
+
+    def wait(self, condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+        return condition()
+
+    def test_only_first_tab_is_built(self):
+        stack = self.window.stacked_widget
+        self.assertEqual(stack.count(), len(TAB_REGISTRY["директор"]))
+        self.assertIsInstance(stack.widget(0), DashboardTab)
+        self.assertEqual(len(self.window._factories), stack.count() - 1)
+
+        stack.setCurrentIndex(2)
+        self.assertIsInstance(stack.currentWidget(), NomenclatureTab)
+        self.assertIs(stack.widget(2), stack.currentWidget())
+        self.assertNotIn(2, self.window._factories)
+
+    def test_interactive_then_prefetch(self):
+        delay, config.TAB_PREFETCH_DELAY_MS = config.TAB_PREFETCH_DELAY_MS, 0
+        try:
+            self.window.show()
+            self.assertTrue(self.wait(lambda: self.window.tti_ms is not None))
+            self.assertTrue(self.wait(lambda: not self.window._factories))
+        finally:
+            config.TAB_PREFETCH_DELAY_MS = delay
+        self.assertEqual(self.window.stacked_widget.currentIndex(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
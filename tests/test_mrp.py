@@ -0,0 +1,137 @@
+import datetime
+import os
+import sys
+import unittest
+
+import numpy as np
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from business_logic.mrp import (
+    SparseBOM, explode, first_need, material_requirements, material_shortages, net_requirements)
+from config import config
+
+
+class TestMrp(unittest.TestCase):
+
+    def test_sparse_product_matches_dense(self):
+        rng = np.random.default_rng(1)
+        dense_bom = rng.integers(0, 4, (30, 20)) * (rng.random((30, 20)) < 0.2)
+        rows, cols = np.nonzero(dense_bom)
+        bom = SparseBOM(rows, cols, dense_bom[rows, cols], dense_bom.shape)
+        demand = rng.integers(0, 10, (7, 30)).astype(float)
+        np.testing.assert_allclose(bom.rmatmul(demand), demand @ dense_bom)
+
+    def test_from_ids_drops_unknown(self):
+        bom = SparseBOM.from_ids([10, 20, 99], [5, 7, 5], [2, 3, 4], np.array([10, 20]), np.array([5, 7]))
+        np.testing.assert_allclose(bom.rmatmul(np.array([[1.0, 1.0]])), [[2.0, 3.0]])
+
+    def test_stock_covers_earliest_dates(self):
+        gross = np.array([[5.0, 0.0], [5.0, 2.0], [5.0, 2.0]])
+        net = net_requirements(gross, np.array([7.0, 10.0]))
+        np.testing.assert_allclose(net, [[0, 0], [3, 0], [5, 0]])
+
+    def test_explode_two_levels(self):
+        # Изделие 0 = 2 x заготовка 0; заготовка 0 = 3 x материал 0 + 1 x материал 1
+        product_bom = SparseBOM([0], [0], [2], (1, 1))
+        blank_bom = SparseBOM([0, 0], [0, 1], [3, 1], (1, 2))
+        dates = np.array(["2025-03-01", "2025-03-10"], dtype="datetime64[D]")
+        demand = np.array([[2.0], [4.0]])
+        result = explode(demand, np.array([1.0]), np.array([2.0]), np.array([10.0, 100.0]), product_bom, blank_bom)
+
+        # Изделий к производству 1 и 4 -> заготовок 2 и 8 -> с учетом 2 готовых 0 и 8
+        np.testing.assert_allclose(result["заготовки"], [[0], [8]])
+        np.testing.assert_allclose(result["материалы_брутто"], [[0, 0], [24, 8]])
+        np.testing.assert_allclose(result["материалы"], [[0, 0], [14, 0]])
+        need_by = first_need(result["материалы"], dates)
+        self.assertEqual(need_by[0], np.datetime64("2025-03-10"))
+        self.assertTrue(np.isnat(need_by[1]))
+
+    def test_material_shortages_from_db(self):
+        rows = material_shortages()
+        for row in rows:
+            self.assertGreater(row["нехватка"], 0)
+            self.assertEqual(row["нехватка"], max(row["потребность"] - row["на_складе"], 0))
+            self.assertIsInstance(row["нужно_к"], datetime.date)
+        self.assertEqual(rows, sorted(rows, key=lambda r: (r["нужно_к"], -r["нехватка"])))
+
+
+
+class TestMrpDemand(unittest.TestCase):
+    """Потребность от заказов в БД (данные коммитятся: mrp читает через пул)"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        cur = self.cur
+        cur.execute(
+            "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе)"
+            " VALUES ('TEST-MRP-M', 'Тест MRP', 100) RETURNING id_материала"
+        )
+        self.material_id = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO заготовки (артикул_заготовки, наименование) VALUES ('TEST-MRP-B', 'Тест MRP') RETURNING id_заготовки"
+        )
+        self.blank_id = cur.fetchone()[0]
+        cur.execute("INSERT INTO расход_материалов VALUES (%s, %s, 3)", (self.blank_id, self.material_id))
+        cur.execute(
+            "INSERT INTO изделия (артикул_изделия, наименование, стоимость, количество_на_складе)"
+            " VALUES ('TEST-MRP-P', 'Тест MRP', 1, 5) RETURNING id_изделия"
+        )
+        self.product_id = cur.fetchone()[0]
+        cur.execute("INSERT INTO состав_изделия VALUES (%s, %s, 2)", (self.product_id, self.blank_id))
+        self.conn.commit()
+        self.orders = []
+
+    def tearDown(self):
+        self.conn.rollback()
+        cur = self.cur
+        cur.execute("DELETE FROM заказы WHERE id_заказа = ANY(%s)", (self.orders,))
+        cur.execute("DELETE FROM изделия WHERE id_изделия = %s", (self.product_id,))
+        cur.execute("DELETE FROM заготовки WHERE id_заготовки = %s", (self.blank_id,))
+        cur.execute("DELETE FROM материалы WHERE id_материала = %s", (self.material_id,))
+        self.conn.commit()
+
+    def create_order(self, qty):
+        self.cur.execute(
+            "SELECT status, new_order_id FROM sp_create_order_with_items("
+            " (SELECT MIN(id_клиента) FROM клиенты), (SELECT MIN(id_сотрудника) FROM сотрудники), %s, %s)",
+            (datetime.date.today() + datetime.timedelta(days=10), f'[{{"id_изделия": {self.product_id}, "количество": {qty}}}]'),
+        )
+        status, order_id = self.cur.fetchone()
+        self.conn.commit()
+        self.orders.append(order_id)
+        return status, order_id
+
+    def requirement(self):
+        row = next(r for r in material_requirements() if r["id_материала"] == self.material_id)
+        return row["потребность"], row["нехватка"]
+
+    def test_order_covered_from_stock_needs_nothing(self):
+        self.assertEqual(self.create_order(5)[0], "OK")
+        self.assertEqual(self.requirement(), (0, 0))
+
+    def test_only_open_task_remainder_counts(self):
+        # 5 изделий со склада, на 2 — задание: 4 заготовки x 3 материала
+        status, order_id = self.create_order(7)
+        self.assertEqual(status, "WARNING")
+        self.assertEqual(self.requirement(), (12, 0))
+
+        # Взятое в работу задание материалы уже списало
+        self.cur.execute("SELECT MIN(id_сотрудника) FROM сотрудники")
+        self.cur.execute(
+            "CALL sp_взять_задачу_в_работу(%s, %s, %s)", (self.blank_id, order_id, self.cur.fetchone()[0])
+        )
+        self.conn.commit()
+        self.assertEqual(self.requirement(), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+class TestOrderSearchProjection(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def assertConsistent(self):
+        self.cur.execute("SELECT * FROM sp_check_order_search()")
+        self.assertEqual(self.cur.fetchall(), [])
+
+    def projection(self, order_id):
+        self.cur.execute(
+            "SELECT клиент, менеджер, статус, позиций FROM заказы_поиск WHERE id_заказа = %s",
+            (order_id,),
+        )
+        return self.cur.fetchone()
+
+    def test_initially_consistent(self):
+        self.assertConsistent()
+
+    def test_order_and_lines_are_tracked(self):
+        self.cur.execute("SELECT id_клиента FROM клиенты LIMIT 1")
+        client_id = self.cur.fetchone()[0]
+        self.cur.execute(
+            "INSERT INTO заказы (id_клиента, статус) VALUES (%s, 'принят') RETURNING id_заказа",
+            (client_id,),
+        )
+        order_id = self.cur.fetchone()[0]
+        self.assertEqual(self.projection(order_id)[3], 0)
+
+        self.cur.execute(
+            "INSERT INTO состав_заказа (id_заказа, id_изделия, цена_фиксированная, количество_изделий)"
+            " SELECT %s, id_изделия, 100, 1 FROM изделия LIMIT 3",
+            (order_id,),
+        )
+        self.cur.execute("UPDATE заказы SET статус = 'в_работе' WHERE id_заказа = %s", (order_id,))
+        self.assertEqual(self.projection(order_id)[2:], ("в_работе", 3))
+        self.assertConsistent()
+
+        self.cur.execute("DELETE FROM заказы WHERE id_заказа = %s", (order_id,))
+        self.assertIsNone(self.projection(order_id))
+        self.assertConsistent()
+
+    def test_renames_are_propagated(self):
+        self.cur.execute("SELECT id_заказа, id_клиента, id_менеджера FROM заказы_поиск WHERE id_менеджера IS NOT NULL LIMIT 1")
+        order_id, client_id, manager_id = self.cur.fetchone()
+        self.cur.execute("UPDATE клиенты SET фио = 'Новое Имя Клиента' WHERE id_клиента = %s", (client_id,))
+        self.cur.execute("UPDATE сотрудники SET фио = 'Новое Имя Менеджера' WHERE id_сотрудника = %s", (manager_id,))
+        self.assertEqual(self.projection(order_id)[:2], ("Новое Имя Клиента", "Новое Имя Менеджера"))
+        self.assertConsistent()
+
+    def test_check_reports_drift_and_rebuild_fixes_it(self):
+        # Портим проекцию напрямую: одна строка пропала, одна устарела
+        self.cur.execute("SELECT id_заказа FROM заказы_поиск ORDER BY id_заказа LIMIT 2")
+        first, second = (r[0] for r in self.cur.fetchall())
+        self.cur.execute("DELETE FROM заказы_поиск WHERE id_заказа = %s", (first,))
+        self.cur.execute("UPDATE заказы_поиск SET позиций = позиций + 1 WHERE id_заказа = %s", (second,))
+        self.cur.execute("SELECT COUNT(*) FROM sp_check_order_search()")
+        self.assertEqual(self.cur.fetchone()[0], 2)
+
+        self.cur.execute("SELECT status FROM sp_rebuild_order_search()")
+        self.assertEqual(self.cur.fetchone()[0], "OK")
+        self.assertConsistent()
+
+    def test_rename_during_order_insert(self):
+        # Заказ клиенту еще не закоммичен, а клиента переименовывают: переименование
+        # ждет заказа и обновляет его строку проекции
+        self.cur.execute(
+            "INSERT INTO клиенты (фио, номер_телефона) VALUES ('ТЕСТ Старое имя', '+70000000000') RETURNING id_клиента"
+        )
+        client_id = self.cur.fetchone()[0]
+        self.conn.commit()
+        other = psycopg2.connect(config.DATABASE_URL)
+        try:
+            other_cur = other.cursor()
+            other_cur.execute(
+                "INSERT INTO заказы (id_клиента, статус) VALUES (%s, 'принят') RETURNING id_заказа", (client_id,)
+            )
+            order_id = other_cur.fetchone()[0]
+
+            def rename():
+                with psycopg2.connect(config.DATABASE_URL) as conn, conn.cursor() as cur:
+                    cur.execute("UPDATE клиенты SET фио = 'ТЕСТ Новое имя' WHERE id_клиента = %s", (client_id,))
+                conn.close()
+
+            thread = threading.Thread(target=rename)
+            thread.start()
+            thread.join(0.3)
+            self.assertTrue(thread.is_alive(), "переименование должно ждать заказ")
+            other.commit()
+            thread.join(5)
+
+            self.assertEqual(self.projection(order_id)[0], "ТЕСТ Новое имя")
+            self.assertConsistent()
+        finally:
+            other.rollback()
+            other_cur.execute("DELETE FROM заказы WHERE id_клиента = %s", (client_id,))
+            other_cur.execute("DELETE FROM клиенты WHERE id_клиента = %s", (client_id,))
+            other.commit()
+            other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+class TestOrderSumTriggers(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def new_order(self):
+        self.cur.execute(
+            "INSERT INTO заказы (id_клиента) SELECT id_клиента FROM клиенты LIMIT 1 RETURNING id_заказа"
+        )
+        return self.cur.fetchone()[0]
+
+    def total(self, order_id):
+        self.cur.execute("SELECT сумма_заказа FROM заказы WHERE id_заказа = %s", (order_id,))
+        return self.cur.fetchone()[0]
+
+    def expected(self, order_id):
+        self.cur.execute(
+            "SELECT COALESCE(SUM(количество_изделий * цена_фиксированная), 0)"
+            " FROM состав_заказа WHERE id_заказа = %s",
+            (order_id,),
+        )
+        return self.cur.fetchone()[0]
+
+    def test_multi_order_statements(self):
+        a, b = self.new_order(), self.new_order()
+        self.cur.execute(
+            "INSERT INTO состав_заказа (id_заказа, id_изделия, цена_фиксированная, количество_изделий)"
+            " SELECT CASE WHEN n <= 2 THEN o ELSE %s END, id_изделия, 10 * id_изделия, 2"
+            " FROM (SELECT id_изделия, row_number() OVER (ORDER BY id_изделия) n FROM изделия LIMIT 4) i,"
+            " unnest(%s::int[]) o WHERE n <= 2 OR o = %s",
+            (a, [a, b], a),
+        )
+        self.assertEqual(self.total(a), self.expected(a))
+        self.assertNotEqual(self.total(b), 0)
+
+        # Изменение количества и перенос позиции в другой заказ
+        self.cur.execute(
+            "UPDATE состав_заказа SET количество_изделий = количество_изделий + 1 WHERE id_заказа IN (%s, %s)",
+            (a, b),
+        )
+        self.cur.execute(
+            "UPDATE состав_заказа SET id_заказа = %s WHERE id_заказа = %s"
+            " AND id_изделия = (SELECT MAX(id_изделия) FROM состав_заказа WHERE id_заказа = %s)",
+            (b, a, a),
+        )
+        self.assertEqual(self.cur.rowcount, 1)
+        for order_id in (a, b):
+            self.assertEqual(self.total(order_id), self.expected(order_id))
+
+        self.cur.execute("DELETE FROM состав_заказа WHERE id_заказа IN (%s, %s)", (a, b))
+        self.assertEqual(self.total(a), Decimal(0))
+        self.assertEqual(self.total(b), Decimal(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
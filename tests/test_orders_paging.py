@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+PAGE_QUERY = "SELECT * FROM sp_search_orders_page(%s, %s, %s, %s, %s, %s, %s, %s)"
+
+
+class TestOrdersPaging(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.rollback()
+        cls.conn.close()
+
+    def all_pages(self, text, status, page_size):
+        rows, after_date, after_id = [], None, None
+        while True:
+            self.cur.execute(PAGE_QUERY, (None, text, status, None, None, after_date, after_id, page_size))
+            page = self.cur.fetchall()
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            after_date, after_id = page[-1][3], page[-1][0]
+
+    def full_result(self, text, status):
+        self.cur.execute("SELECT * FROM sp_search_orders(%s, %s, %s, %s, %s)", (None, text, status, None, None))
+        return sorted(self.cur.fetchall(), key=lambda r: (r[3], r[0]), reverse=True)
+
+    def test_pages_cover_full_result(self):
+        for text, status in ((None, None), ("а", None), (None, "принят"), (None, "ПРОСРОЧЕН")):
+            with self.subTest(text=text, status=status):
+                self.assertEqual(self.all_pages(text, status, 7), self.full_result(text, status))
+
+    def test_wildcards_are_literal(self):
+        # Как OrdersTab.order_matches: % _ \ в тексте — обычные символы
+        everything = self.full_result(None, None)
+        for text in ("%", "_", "\\", "а_"):
+            with self.subTest(text=text):
+                expected = [r for r in everything if text in r[1].lower()]
+                self.assertEqual(self.all_pages(text, None, 7), expected)
+
+    def test_order_number_out_of_integer_range(self):
+        # Как OrdersTab.order_matches: такого номера нет — пустой результат, не ошибка
+        for text in ("2147483648", "99999999999", "1" * 30):
+            with self.subTest(text=text):
+                self.assertEqual(self.all_pages(text, None, 7), [])
+                self.assertEqual(self.full_result(text, None), [])
+        self.cur.execute("SELECT max(id_заказа) FROM заказы")
+        last = self.cur.fetchone()[0]
+        self.assertEqual([r[0] for r in self.all_pages(f"000{last}", None, 7)], [last])
+
+    def test_first_page_reads_only_limit_rows_from_index(self):
+        self.cur.execute("SET LOCAL enable_seqscan = off")
+        self.cur.execute(
+            "EXPLAIN SELECT id_заказа FROM заказы z ORDER BY z.дата_заказа DESC, z.id_заказа DESC LIMIT 50"
+        )
+        plan = "\n".join(r[0] for r in self.cur.fetchall())
+        self.assertIn("idx_заказы_дата_id", plan)
+        self.assertNotIn("Sort", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from db.prepared import PreparedStatements
+
+FUNCTION = "test_prepared_fn"
+
+
+class TestPreparedStatements(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.prepared = PreparedStatements()
+        self.define("status TEXT, message TEXT", "'OK', 'x' || p")
+
+    def tearDown(self):
+        self.conn.rollback()
+        self.cur.execute(f"DROP FUNCTION IF EXISTS {FUNCTION}(INT)")
+        self.cur.execute(f"DROP FUNCTION IF EXISTS {FUNCTION}(BIGINT)")
+        self.cur.execute("DROP SEQUENCE IF EXISTS test_prepared_calls")
+        self.cur.execute("DEALLOCATE ALL")
+        self.conn.commit()
+
+    def define(self, columns, values, arg_type="INT"):
+        """Функция-процедура в стиле репозитория (миграция — отдельным коммитом)"""
+        self.cur.execute(f"DROP FUNCTION IF EXISTS {FUNCTION}({arg_type})")
+        self.cur.execute(
+            f"CREATE FUNCTION {FUNCTION}(p {arg_type}) RETURNS TABLE({columns})"
+            f" LANGUAGE sql AS $$ SELECT {values} $$"
+        )
+        self.conn.commit()
+
+    def call(self, *params):
+        self.prepared.execute(self.cur, FUNCTION, params)
+        row = self.cur.fetchone()
+        self.conn.commit()
+        return row
+
+    def server_statements(self):
+        self.cur.execute("SELECT count(*) FROM pg_prepared_statements WHERE name LIKE 'nova_%'")
+        return self.cur.fetchone()[0]
+
+    def test_prepares_once_per_connection(self):
+        self.assertEqual(self.call(1), ("OK", "x1"))
+        self.assertEqual(self.call(2), ("OK", "x2"))
+        self.assertEqual(self.call(None), ("OK", None))
+        self.assertEqual(self.prepared.prepares, 1)
+        self.assertEqual(self.server_statements(), 1)
+
+    def test_result_type_change_after_migration(self):
+        self.call(1)
+        self.define("status TEXT, message TEXT, extra INT", "'OK', 'y' || p, p")
+        self.assertEqual(self.call(3), ("OK", "y3", 3))
+        # Старое поколение удалено, осталось одно подготовленное
+        self.assertEqual(self.server_statements(), 1)
+
+    def test_statement_lost_on_server(self):
+        # Пулер в режиме transaction или DISCARD ALL: сервер запрос забыл
+        self.call(1)
+        self.cur.execute("DEALLOCATE ALL")
+        self.conn.commit()
+        self.assertEqual(self.call(2), ("OK", "x2"))
+        self.assertEqual(self.prepared.prepares, 2)
+
+    def test_statement_already_on_server(self):
+        # Серверный процесс общий: запрос подготовил другой клиент пулера
+        self.call(1)
+        self.prepared = PreparedStatements()
+        self.assertEqual(self.call(2), ("OK", "x2"))
+        self.assertEqual(self.server_statements(), 1)
+
+    def test_procedure_error_is_not_repeated(self):
+        # 0A000 и 26000 из тела процедуры — не устаревший реестр: без повтора
+        self.cur.execute("CREATE SEQUENCE test_prepared_calls")
+        for condition in ("feature_not_supported", "invalid_sql_statement_name"):
+            with self.subTest(condition=condition):
+                self.cur.execute(f"DROP FUNCTION IF EXISTS {FUNCTION}(INT)")
+                self.cur.execute(
+                    f"CREATE FUNCTION {FUNCTION}(p INT) RETURNS TABLE(status TEXT, message TEXT)"
+                    f" LANGUAGE plpgsql AS $$ BEGIN PERFORM nextval('test_prepared_calls'); RAISE {condition}; END $$"
+                )
+                self.conn.commit()
+                with self.assertRaises(psycopg2.Error):
+                    self.call(1)
+                self.conn.rollback()
+                # nextval не откатывается: процедура выполнилась ровно один раз
+                self.cur.execute("SELECT nextval('test_prepared_calls') - 1")
+                count = self.cur.fetchone()[0]
+                self.cur.execute("SELECT setval('test_prepared_calls', 1, false)")
+                self.conn.commit()
+                self.assertEqual(count, 1)
+
+    def test_overloaded_function_uses_plain_query(self):
+        self.define("status TEXT, message TEXT", "'OK', 'big' || p", arg_type="BIGINT")
+        self.assertEqual(self.call(5), ("OK", "x5"))
+        self.assertEqual(self.call(6), ("OK", "x6"))
+        self.assertEqual(self.server_statements(), 0)
+
+    def test_disabled(self):
+        self.prepared.enabled = False
+        self.assertEqual(self.call(1), ("OK", "x1"))
+        self.assertEqual(self.prepared.prepares, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
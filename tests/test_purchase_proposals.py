@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+class TestPurchaseProposals(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.cur.execute(
+            """
+            INSERT INTO материалы (артикул_материала, наименование, количество_на_складе, минимальный_остаток, цена_за_единицу)
+            VALUES ('TEST-PP-1', 'Тест 1', 5, 10, 3), ('TEST-PP-2', 'Тест 2', 0, 4, 3), ('TEST-PP-3', 'Тест 3', 0, 2, 3)
+            RETURNING id_материала
+            """
+        )
+        self.m1, self.m2, self.m3 = [r[0] for r in self.cur.fetchall()]
+        # Старый и новый поставщик материалов 1 и 2; у материала 3 закупок не было
+        for supplier, date, price in (("TEST Старый", "2020-01-01", 7), ("TEST Новый", "2020-02-01", 9)):
+            self.add_purchase(supplier, date, "выполнено", [(self.m1, 1, price), (self.m2, 1, price)])
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def add_purchase(self, supplier, date, status, lines):
+        self.cur.execute(
+            "INSERT INTO закупки_материалов (поставщик, дата_закупки, статус) VALUES (%s, %s, %s) RETURNING id_закупки",
+            (supplier, date, status),
+        )
+        purchase_id = self.cur.fetchone()[0]
+        for material_id, qty, price in lines:
+            self.cur.execute(
+                "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES (%s, %s, %s, %s)",
+                (purchase_id, material_id, qty, price),
+            )
+        return purchase_id
+
+    def proposals(self, requirements):
+        self.cur.execute(
+            "SELECT id_материала, количество, поставщик, цена, нужно_к, замечание FROM sp_purchase_proposals(%s)"
+            " WHERE id_материала = ANY(%s)",
+            (json.dumps(requirements), [self.m1, self.m2, self.m3]),
+        )
+        return {r[0]: r[1:] for r in self.cur.fetchall()}
+
+    def test_quantity_supplier_and_price(self):
+        rows = self.proposals([{"id_материала": self.m1, "потребность": 20, "нужно_к": "2030-05-01"}])
+        # 20 потребность + 10 минимум - 5 на складе
+        self.assertEqual(rows[self.m1][:3], (25, "TEST Новый", 9))
+        self.assertEqual(str(rows[self.m1][3]), "2030-05-01")
+        # Только нарушение минимального остатка
+        self.assertEqual(rows[self.m2][:2], (4, "TEST Новый"))
+        self.assertEqual(rows[self.m3][:3], (2, None, 3))
+        self.assertEqual(rows[self.m3][4], "Нет поставщика")
+        self.assertIsNone(rows[self.m1][4])
+
+    def test_pending_purchases_are_subtracted(self):
+        self.add_purchase("TEST Новый", "2020-03-01", "ожидает_подтверждения", [(self.m1, 25, 9)])
+        self.add_purchase("TEST Новый", "2020-03-02", "отменено", [(self.m2, 100, 9)])
+        rows = self.proposals([{"id_материала": self.m1, "потребность": 20}])
+        self.assertNotIn(self.m1, rows)
+        self.assertEqual(rows[self.m2][0], 4)
+
+    def test_drafts_one_purchase_per_supplier(self):
+        requirements = json.dumps([{"id_материала": self.m1, "потребность": 20}])
+        self.cur.execute("SELECT status, message, purchase_ids FROM sp_create_purchase_drafts(%s)", (requirements,))
+        status, message, purchase_ids = self.cur.fetchone()
+        # Материал 3 без поставщика: черновик не создается, он перечислен в сообщении
+        self.assertEqual(status, "WARNING", message)
+        self.assertIn("Тест 3 (Нет поставщика)", message)
+
+        self.cur.execute(
+            """
+            SELECT zm.поставщик, zm.статус, array_agg(sz.id_материала ORDER BY sz.id_материала), SUM(sz.количество)
+            FROM закупки_материалов zm JOIN состав_закупки sz ON sz.id_закупки = zm.id_закупки
+            WHERE zm.id_закупки = ANY(%s) AND sz.id_материала = ANY(%s)
+            GROUP BY zm.id_закупки
+            ORDER BY zm.поставщик
+            """,
+            (purchase_ids, [self.m1, self.m2, self.m3]),
+        )
+        self.assertEqual(self.cur.fetchall(), [
+            ("TEST Новый", "ожидает_подтверждения", [self.m1, self.m2], 29),
+        ])
+        # Повторный запуск ничего не дозаказывает, кроме строки без поставщика
+        self.assertEqual(list(self.proposals([{"id_материала": self.m1, "потребность": 20}])), [self.m3])
+
+    def test_unknown_price_is_not_zero(self):
+        self.cur.execute("UPDATE материалы SET цена_за_единицу = NULL WHERE id_материала = %s", (self.m3,))
+        rows = self.proposals([])
+        self.assertEqual(rows[self.m3][2:3] + rows[self.m3][4:], (None, "Нет поставщика и цены"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+PAGE_QUERY = "SELECT * FROM sp_get_purchases(%s, %s, %s, %s)"
+
+
+class TestPurchases(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        cur = self.cur
+        cur.execute(
+            "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе)"
+            " VALUES ('TEST-PU-1', 'Тест П1', 10), ('TEST-PU-2', 'Тест П2', 0) RETURNING id_материала"
+        )
+        self.materials = [r[0] for r in cur.fetchall()]
+        self.purchases = []
+        for lines in (((0, 5, 100), (1, 3, 10)), ((0, 7, 50),)):
+            cur.execute("INSERT INTO закупки_материалов (поставщик) VALUES ('ТЕСТ Поставщик') RETURNING id_закупки")
+            purchase = cur.fetchone()[0]
+            for material, qty, price in lines:
+                cur.execute(
+                    "INSERT INTO состав_закупки VALUES (%s, %s, %s, %s)",
+                    (purchase, self.materials[material], qty, price),
+                )
+            self.purchases.append(purchase)
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def stock(self):
+        self.cur.execute(
+            "SELECT количество_на_складе FROM материалы WHERE id_материала = ANY(%s) ORDER BY id_материала",
+            (self.materials,),
+        )
+        return [r[0] for r in self.cur.fetchall()]
+
+    def confirm(self, ids):
+        self.cur.execute("SELECT * FROM sp_confirm_purchase(%s)", (ids,))
+        return self.cur.fetchone()
+
+    def test_search_wildcards_are_literal(self):
+        self.cur.execute(
+            "UPDATE закупки_материалов SET поставщик = %s WHERE id_закупки = %s", ("ТЕСТ 100% хлопок", self.purchases[1])
+        )
+        self.cur.execute(PAGE_QUERY, ("тест%п", None, None, 10))
+        self.assertEqual(self.cur.fetchall(), [])
+        self.cur.execute(PAGE_QUERY, ("0% х", None, None, 10))
+        self.assertEqual([r[0] for r in self.cur.fetchall()], [self.purchases[1]])
+
+    def test_totals_match_lines(self):
+        self.cur.execute(PAGE_QUERY, ("тест поставщик", None, None, 10))
+        rows = {r[0]: (r[4], r[5]) for r in self.cur.fetchall()}
+        self.assertEqual(rows[self.purchases[0]], (530, 2))
+        self.assertEqual(rows[self.purchases[1]], (350, 1))
+
+    def test_pages_cover_full_list(self):
+        self.cur.execute(
+            "SELECT id_закупки FROM закупки_материалов ORDER BY дата_закупки DESC, id_закупки DESC"
+        )
+        expected = [r[0] for r in self.cur.fetchall()]
+        rows, after = [], (None, None)
+        while True:
+            self.cur.execute(PAGE_QUERY, (None,) + after + (4,))
+            page = self.cur.fetchall()
+            rows.extend(r[0] for r in page)
+            if len(page) < 4:
+                break
+            after = (page[-1][1], page[-1][0])
+        self.assertEqual(rows, expected)
+
+    def test_purchase_date_is_required(self):
+        # Ключ страниц (дата_закупки, id_закупки) не должен содержать NULL
+        with self.assertRaises(psycopg2.errors.NotNullViolation):
+            self.cur.execute("INSERT INTO закупки_материалов (поставщик, дата_закупки) VALUES ('ТЕСТ', NULL)")
+
+    def test_confirm_many_updates_status_and_stock(self):
+        status, message, confirmed = self.confirm(self.purchases)
+        self.assertEqual((status, confirmed), ("OK", 2), message)
+        self.assertEqual(self.stock(), [22, 3])
+        self.cur.execute("SELECT DISTINCT статус FROM закупки_материалов WHERE id_закупки = ANY(%s)", (self.purchases,))
+        self.assertEqual(self.cur.fetchall(), [("выполнено",)])
+
+    def test_confirm_is_all_or_nothing(self):
+        self.assertEqual(self.confirm([self.purchases[1]])[0], "OK")
+        status, message, confirmed = self.confirm(self.purchases)
+        self.assertEqual((status, confirmed), ("ERROR", 0))
+        self.assertIn(f"№{self.purchases[1]} уже выполнена", message)
+        self.assertEqual(self.stock(), [17, 0])
+        self.cur.execute("SELECT статус FROM закупки_материалов WHERE id_закупки = %s", (self.purchases[0],))
+        self.assertEqual(self.cur.fetchone()[0], "ожидает_подтверждения")
+
+    def test_legacy_procedure_raises_on_repeat(self):
+        self.cur.execute("CALL sp_подтвердить_закупку(%s)", (self.purchases[0],))
+        self.assertEqual(self.stock(), [15, 3])
+        with self.assertRaises(psycopg2.Error):
+            self.cur.execute("CALL sp_подтвердить_закупку(%s)", (self.purchases[0],))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import datetime
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.rows import decode
+from ui.widgets.record_table import Column, RecordTableView, or_dash
+
+ROWS = [
+    {"id": 1, "name": "Стол", "price": Decimal("10.50"), "day": datetime.date(2024, 3, 1), "note": None},
+    {"id": 2, "name": "Шкаф", "price": Decimal("2.00"), "day": datetime.date(2024, 1, 5), "note": "срочно"},
+    {"id": 3, "name": "стул", "price": Decimal("100.00"), "day": datetime.date(2024, 2, 9), "note": ""},
+]
+
+
+class TestRecordTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.styled = []
+
+        def row_style(row):
+            self.styled.append(row["id"])
+            return ("#FFEBEE", None) if row["id"] == 2 else (None, None)
+
+        self.table = RecordTableView([
+            Column("ID", "id"),
+            Column("Название", "name"),
+            Column("Цена", "price", fmt=lambda v, r: f"{v:.2f}"),
+            Column("Дата", "day"),
+            Column("Примечание", "note", fmt=or_dash),
+        ], row_style=row_style)
+        self.table.set_rows(ROWS)
+
+    def cell(self, row, col, role=Qt.ItemDataRole.DisplayRole):
+        return self.table.model().index(row, col).data(role)
+
+    def test_display_and_format(self):
+        self.assertEqual(self.table.rowCount(), 3)
+        self.assertEqual(self.cell(0, 2), "10.50")
+        self.assertEqual(self.cell(0, 3), "2024-03-01")
+        self.assertEqual(self.cell(0, 4), "—")
+        self.assertEqual(self.cell(1, 4), "срочно")
+
+    def test_style_is_lazy_and_cached(self):
+        self.assertEqual(self.styled, [])
+        self.assertIsNotNone(self.cell(1, 0, Qt.ItemDataRole.BackgroundRole))
+        self.assertIsNone(self.cell(0, 0, Qt.ItemDataRole.BackgroundRole))
+        self.cell(1, 1, Qt.ItemDataRole.BackgroundRole)
+        self.assertEqual(self.styled, [2, 1])
+
+    def test_sort_uses_raw_values(self):
+        self.table.sortByColumn(2, Qt.SortOrder.AscendingOrder)
+        self.assertEqual([self.table.record_at(i)["id"] for i in range(3)], [2, 1, 3])
+        self.table.sortByColumn(3, Qt.SortOrder.AscendingOrder)
+        self.assertEqual([self.table.record_at(i)["id"] for i in range(3)], [2, 3, 1])
+
+    def test_filter_and_selection_map_to_source(self):
+        self.table.set_filter_text("СТ")
+        self.assertEqual(self.table.rowCount(), 2)
+        self.table.selectRow(1)
+        self.assertEqual(self.table.selected_record()["name"], "стул")
+
+    def test_append_rows(self):
+        self.table.append_rows([{"id": 4, "name": "Полка", "price": Decimal(1), "day": None, "note": None}])
+        self.assertEqual(self.table.rowCount(), 4)
+        self.assertEqual(self.table.record_at(3)["name"], "Полка")
+
+
+    def test_compact_rows(self):
+        fields = tuple(ROWS[0])
+        tuples = [tuple(r.values()) for r in ROWS]
+        rows = decode(fields, tuples, "namedtuple")
+        self.table.set_rows(rows)
+        self.assertIs(self.table.source_model._rows[0], rows[0])  # без копирования
+        self.table.append_rows(decode(fields, tuples[:1], "namedtuple"))
+        self.assertEqual(self.table.rowCount(), 4)
+        self.assertEqual(self.cell(3, 1), "Стол")
+
+        self.table.set_rows(decode(fields, tuples, "record"))
+        self.assertEqual(self.table.record_at(1), ROWS[1])
+
+if __name__ == "__main__":
+    unittest.main()
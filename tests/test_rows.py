@@ -0,0 +1,68 @@
+import datetime
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import Database
+from db.records import Client, Task
+from db.rows import decode
+
+FIELDS = ("id_клиента", "фио", "инн", "номер_телефона", "адрес", "дата_регистрации")
+ROWS = [
+    (1, "Иванов И. И.", None, "+7 900", "Москва", datetime.date(2024, 1, 1)),
+    (2, "Петров П. П.", "7701", "+7 901", None, datetime.date(2024, 2, 1)),
+]
+
+
+class TestRowModes(unittest.TestCase):
+
+    def test_record_behaves_like_dict(self):
+        first, second = decode(FIELDS, ROWS, "record")
+        self.assertEqual(first.фио, "Иванов И. И.")
+        self.assertEqual(second["инн"], "7701")
+        self.assertEqual(first.get("нет такого", "—"), "—")
+        self.assertEqual(dict(first), dict(zip(FIELDS, ROWS[0])))
+        self.assertEqual(list(first.values()), list(ROWS[0]))
+        self.assertFalse(hasattr(first, "__dict__"))
+        with self.assertRaises(KeyError):
+            first["нет такого"]
+
+    def test_namedtuple_and_columns(self):
+        rows = decode(FIELDS, ROWS, "namedtuple")
+        self.assertEqual(rows[1].фио, "Петров П. П.")
+        self.assertEqual(tuple(rows[0]), ROWS[0])
+
+        columns = decode(FIELDS, ROWS, "columns")
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns["id_клиента"], [1, 2])
+        self.assertEqual(list(columns), ROWS)
+        self.assertEqual(len(decode(FIELDS, [], "columns")["фио"]), 0)
+
+    def test_domain_record_maps_by_name(self):
+        fields = ("лишняя",) + tuple(reversed(FIELDS))
+        rows = [("x",) + tuple(reversed(r)) for r in ROWS]
+        clients = decode(fields, rows, Client)
+        self.assertEqual([c.id_клиента for c in clients], [1, 2])
+        self.assertEqual(clients[0].keys(), list(FIELDS))
+        self.assertEqual(clients[0], decode(FIELDS, ROWS, Client)[0])
+        with self.assertRaises(ValueError):
+            decode(("id_клиента",), [(1,)], Client)
+
+    def test_unusual_column_names(self):
+        row = decode(("?column?", "class", "id"), [(1, 2, 3)], "record")[0]
+        self.assertEqual((row["?column?"], row["class"], row.id), (1, 2, 3))
+
+    def test_fetch_all_modes(self):
+        query = "SELECT * FROM v_задачи_сборщика ORDER BY дедлайн LIMIT 20"
+        dicts = Database.fetch_all(query)
+        tasks = Database.fetch_all(query, mode=Task)
+        self.assertEqual([dict(t) for t in tasks], [dict(d) for d in dicts])
+        for task in tasks:
+            self.assertEqual(task.осталось, max(task.плановое_количество - (task.фактическое_количество or 0), 0))
+        columns = Database.fetch_all("SELECT g AS n FROM generate_series(1, 3) g", mode="columns")
+        self.assertEqual(columns["n"], [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import datetime
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+DAY = datetime.date(2031, 3, 1)
+
+
+class TestSchedulePeriod(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.cur.execute("SELECT id_сотрудника FROM сотрудники ORDER BY id_сотрудника LIMIT 3")
+        self.employees = [r[0] for r in self.cur.fetchall()]
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def set_status(self, employees, days, status):
+        self.cur.execute("SELECT * FROM sp_установить_статус_периода(%s, %s::DATE[], %s)", (employees, days, status))
+        return self.cur.fetchone()
+
+    def statuses(self):
+        self.cur.execute(
+            "SELECT id_сотрудника, дата, статус FROM график_работы"
+            " WHERE id_сотрудника = ANY(%s) AND дата >= %s ORDER BY 1, 2",
+            (self.employees, DAY),
+        )
+        return self.cur.fetchall()
+
+    def test_dates_for_many_employees(self):
+        days = [DAY, DAY + datetime.timedelta(days=3), DAY]
+        status, message, updated = self.set_status(self.employees + self.employees[:1], days, "отпуск")
+        self.assertEqual((status, updated), ("OK", 6), message)
+        self.assertEqual(len(self.statuses()), 6)
+        self.assertEqual({r[2] for r in self.statuses()}, {"отпуск"})
+
+    def test_daterange_upserts_and_skips_unchanged(self):
+        self.set_status(self.employees[:1], [DAY], "больничный")
+        self.cur.execute(
+            "SELECT * FROM sp_установить_статус_периода(%s, daterange(%s, %s), %s)",
+            (self.employees, DAY, DAY + datetime.timedelta(days=31), "рабочий"),
+        )
+        self.assertEqual(self.cur.fetchone()[2], 31 * len(self.employees))
+        self.assertEqual(self.statuses()[0][2], "рабочий")
+
+        self.assertEqual(self.set_status(self.employees, [DAY], "рабочий")[2], 0)
+
+    def test_invalid_input(self):
+        self.assertEqual(self.set_status(self.employees, [DAY], "прогул")[0], "ERROR")
+        self.assertEqual(self.set_status(self.employees, [], "отпуск")[0], "ERROR")
+        self.assertEqual(self.set_status([0], [DAY], "отпуск")[1], "Сотрудник не найден")
+        self.assertEqual(self.statuses(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import datetime
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+START = datetime.date(2032, 5, 3)
+
+
+def day(n):
+    return START + datetime.timedelta(days=n)
+
+
+class TestScheduleRanges(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.cur.execute("SELECT id_сотрудника FROM сотрудники ORDER BY id_сотрудника LIMIT 1")
+        self.emp_id = self.cur.fetchone()[0]
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def set_days(self, days, status):
+        self.cur.execute(
+            "SELECT * FROM sp_установить_статус_периода(%s, %s::DATE[], %s)",
+            ([self.emp_id], days, status),
+        )
+        return self.cur.fetchone()
+
+    def runs(self):
+        self.cur.execute(
+            "SELECT lower(период), upper(период), статус FROM график_периоды"
+            " WHERE id_сотрудника = %s AND период && daterange(%s, %s) ORDER BY период",
+            (self.emp_id, day(-30), day(30)),
+        )
+        return self.cur.fetchall()
+
+    def test_days_are_merged_into_runs(self):
+        self.set_days([day(i) for i in range(5)], "рабочий")
+        self.assertEqual(self.runs(), [(day(0), day(5), "рабочий")])
+
+        status, message, updated = self.set_days([day(2)], "выходной")
+        self.assertEqual((status, updated), ("OK", 1), message)
+        self.assertEqual(
+            self.runs(),
+            [(day(0), day(2), "рабочий"), (day(2), day(3), "выходной"), (day(3), day(5), "рабочий")],
+        )
+
+        self.set_days([day(2)], "рабочий")
+        self.assertEqual(self.runs(), [(day(0), day(5), "рабочий")])
+        self.assertEqual(self.set_days([day(2)], "рабочий")[2], 0)
+
+    def test_overlapping_runs_are_rejected(self):
+        self.set_days([day(i) for i in range(5)], "рабочий")
+        with self.assertRaises(psycopg2.errors.ExclusionViolation):
+            self.cur.execute(
+                "INSERT INTO график_периоды (id_сотрудника, период, статус) VALUES (%s, daterange(%s, %s), 'отпуск')",
+                (self.emp_id, day(4), day(10)),
+            )
+
+    def test_period_query_returns_only_window(self):
+        self.set_days([day(i) for i in range(-10, 20)], "отпуск")
+        self.cur.execute(
+            "SELECT дата, статус FROM sp_график_за_период(%s, %s, %s)",
+            ([self.emp_id], day(0), day(6)),
+        )
+        self.assertEqual(self.cur.fetchall(), [(day(i), "отпуск") for i in range(7)])
+
+    def test_compatibility_view_writes(self):
+        self.cur.execute(
+            "INSERT INTO график_работы (id_сотрудника, дата, статус) VALUES (%s, %s, 'рабочий'), (%s, %s, 'рабочий')",
+            (self.emp_id, day(0), self.emp_id, day(1)),
+        )
+        self.assertEqual(self.runs(), [(day(0), day(2), "рабочий")])
+        self.cur.execute(
+            "UPDATE график_работы SET статус = 'больничный' WHERE id_сотрудника = %s AND дата = %s",
+            (self.emp_id, day(1)),
+        )
+        self.cur.execute(
+            "DELETE FROM график_работы WHERE id_сотрудника = %s AND дата = %s",
+            (self.emp_id, day(0)),
+        )
+        self.assertEqual(self.runs(), [(day(1), day(2), "больничный")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import datetime
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+START = datetime.date(2031, 3, 1)  # суббота
+END = datetime.date(2031, 3, 31)
+
+
+class TestScheduleTemplates(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.cur.execute("SELECT id_сотрудника FROM сотрудники ORDER BY id_сотрудника LIMIT 2")
+        self.employees = [r[0] for r in self.cur.fetchall()]
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def apply(self, template, shifts=None, keep_absences=True):
+        self.cur.execute(
+            "SELECT * FROM sp_apply_schedule_template(%s, %s, %s, %s, %s, %s)",
+            (template, self.employees, START, END, shifts, keep_absences),
+        )
+        return self.cur.fetchone()
+
+    def diff_count(self, template, shifts=None):
+        self.cur.execute(
+            "SELECT COUNT(*) FROM sp_schedule_template_diff(%s, %s, %s, %s, %s)",
+            (template, self.employees, START, END, shifts),
+        )
+        return self.cur.fetchone()[0]
+
+    def schedule(self, employee):
+        self.cur.execute(
+            "SELECT дата, статус FROM график_работы WHERE id_сотрудника = %s AND дата BETWEEN %s AND %s ORDER BY дата",
+            (employee, START, END),
+        )
+        return dict(self.cur.fetchall())
+
+    def test_five_two_with_holidays(self):
+        days = 31 * len(self.employees)
+        self.assertEqual(self.diff_count("5/2"), days)
+        status, message, updated = self.apply("5/2")
+        self.assertEqual((status, updated), ("OK", days), message)
+
+        schedule = self.schedule(self.employees[0])
+        for day, status in schedule.items():
+            if day.day == 8:  # праздник
+                self.assertEqual(status, "выходной")
+            else:
+                self.assertEqual(status, "выходной" if day.weekday() >= 5 else "рабочий", day)
+        self.assertEqual(self.diff_count("5/2"), 0)
+        self.assertEqual(self.apply("5/2")[2], 0)
+
+    def test_two_two_shifts(self):
+        self.apply("2/2", [0, 2])
+        first, second = (self.schedule(e) for e in self.employees)
+        for day in first:
+            self.assertNotEqual(first[day], second[day], day)
+        statuses = [first[START + datetime.timedelta(days=i)] for i in range(8)]
+        self.assertEqual(statuses[:4], statuses[4:])
+        self.assertEqual(sorted(statuses[:4]), ["выходной", "выходной", "рабочий", "рабочий"])
+
+    def test_absences_are_kept_by_default(self):
+        self.cur.execute(
+            "SELECT * FROM sp_установить_статус_периода(%s, daterange(%s, %s), 'отпуск')",
+            (self.employees, START, START + datetime.timedelta(days=10)),
+        )
+        self.assertEqual(self.apply("5/2")[2], 21 * len(self.employees))
+        self.assertEqual(self.schedule(self.employees[0])[START], "отпуск")
+        self.assertEqual(self.apply("5/2", keep_absences=False)[2], 10 * len(self.employees))
+        self.assertEqual(self.schedule(self.employees[0])[START], "выходной")
+
+    def test_invalid_input(self):
+        self.assertEqual(self.apply("нет такого")[0], "ERROR")
+        self.assertEqual(self.apply("2/2", [1])[0], "ERROR")
+        self.assertEqual(self.schedule(self.employees[0]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import datetime
+import json
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from business_logic.scheduler import WorkerCalendar, schedule
+from config import config
+
+MONDAY = datetime.date(2025, 3, 3)
+
+
+def day(n):
+    return MONDAY + datetime.timedelta(days=n)
+
+
+def task(blank, order, work, due, worker=None, started=False):
+    return {"id_заготовки": blank, "id_заказа": order, "заготовка": f"З{blank}", "трудоемкость": work,
+            "срок": due, "id_сотрудника": worker, "в_работе": started}
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_calendar_books_fractional_shifts(self):
+        calendar = WorkerCalendar(1, [day(0), day(1), day(3)])
+        self.assertEqual(calendar.finish_index(0.5), 0)
+        calendar.book(0.5)
+        self.assertEqual(calendar.finish_index(1.0), 1)
+        calendar.book(1.0)
+        self.assertEqual((calendar.position, calendar.used), (1, 0.5))
+        self.assertEqual(calendar.finish_index(1.5), 2)
+        self.assertIsNone(calendar.finish_index(2.0))
+
+    def test_earliest_due_date_first_and_balanced(self):
+        calendars = {1: WorkerCalendar(1, [day(i) for i in range(10)]),
+                     2: WorkerCalendar(2, [day(i) for i in range(10)])}
+        tasks = [task(1, 1, 2, day(9)), task(2, 2, 1, day(0)), task(3, 3, 1, day(0))]
+        assignments, late, unscheduled = schedule(tasks, calendars)
+        by_order = {a["id_заказа"]: a for a in assignments}
+        # Срочные задачи расходятся по разным сборщикам в первый день
+        self.assertEqual({by_order[2]["id_сотрудника"], by_order[3]["id_сотрудника"]}, {1, 2})
+        self.assertEqual(by_order[2]["дата_план"], day(0))
+        self.assertEqual(by_order[3]["дата_план"], day(0))
+        self.assertEqual(by_order[1]["дата_план"], day(2))
+        self.assertEqual((late, unscheduled), ([], []))
+
+    def test_days_off_and_started_tasks_take_capacity(self):
+        # У сборщика 1 выходные 0-2, сборщик 2 занят задачей в работе на 2 смены
+        calendars = {1: WorkerCalendar(1, [day(3), day(4)]),
+                     2: WorkerCalendar(2, [day(i) for i in range(5)])}
+        tasks = [task(9, 9, 2, day(4), worker=2, started=True), task(1, 1, 1, day(2))]
+        assignments, late, _ = schedule(tasks, calendars)
+        self.assertEqual(assignments, [
+            {"id_заготовки": 1, "id_заказа": 1, "id_сотрудника": 2, "дата_план": day(2)}])
+        self.assertEqual(late, [])
+
+    def test_infeasible_deadlines_are_reported(self):
+        calendars = {1: WorkerCalendar(1, [day(i) for i in range(3)])}
+        tasks = [task(1, 1, 2, day(0)), task(2, 2, 5, day(1))]
+        assignments, late, unscheduled = schedule(tasks, calendars)
+        self.assertEqual([(t["id_заказа"], t["опоздание"]) for t in late], [(1, 1)])
+        self.assertEqual([t["id_заказа"] for t in unscheduled], [2])
+        self.assertEqual(len(assignments), 1)
+
+
+class TestApplySchedule(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def test_batch_update_skips_started_tasks(self):
+        self.cur.execute(
+            "SELECT id_сотрудника FROM сотрудники WHERE должность = 'сборщик' ORDER BY id_сотрудника LIMIT 1")
+        worker = self.cur.fetchone()[0]
+        self.cur.execute(
+            """
+            (SELECT id_заготовки, id_заказа, статус FROM план_заготовок WHERE статус = 'принято' LIMIT 1)
+            UNION ALL
+            (SELECT id_заготовки, id_заказа, статус FROM план_заготовок WHERE статус = 'в_работе' LIMIT 1)
+            """
+        )
+        rows = self.cur.fetchall()
+        self.assertEqual([r[2] for r in rows], ["принято", "в_работе"])
+        payload = [{"id_заготовки": b, "id_заказа": o, "id_сотрудника": worker, "дата_план": "2031-01-15"}
+                   for b, o, _ in rows]
+        self.cur.execute("SELECT status, updated FROM sp_apply_production_schedule(%s)", (json.dumps(payload),))
+        self.assertEqual(self.cur.fetchone(), ("OK", 1))
+        self.cur.execute(
+            "SELECT статус, id_сотрудника, дата_план FROM план_заготовок WHERE id_заготовки = %s AND id_заказа = %s",
+            rows[0][:2])
+        self.assertEqual(self.cur.fetchone(), ("принято", worker, datetime.date(2031, 1, 15)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtWidgets import QApplication, QLineEdit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.async_executor import executor
+from db.database import Database
+from ui.widgets.search_controller import SearchController, contains_pattern
+
+
+def build_query(text):
+    query = "SELECT id_клиента, фио, номер_телефона FROM клиенты WHERE 1=1"
+    params = []
+    if text:
+        query += " AND (LOWER(фио) LIKE %s OR номер_телефона LIKE %s)"
+        params = [f"%{text}%", f"%{text}%"]
+    return query + " ORDER BY id_клиента", params
+
+
+def matches(row, text):
+    return text in row["фио"].lower() or text in (row["номер_телефона"] or "")
+
+
+class TestSearchController(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.edit = QLineEdit()
+        self.results = []
+        self.search = SearchController(
+            self.edit, build_query, self.results.append, matches=matches, debounce_ms=0
+        )
+
+    def type_text(self, text):
+        self.edit.setText(text)
+        self.search.run()
+        deadline = time.monotonic() + 5
+        while executor().is_pending(self.search, self.search.key) and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.app.processEvents()
+        return self.results[-1]
+
+    def ids(self, rows):
+        return [r["id_клиента"] for r in rows]
+
+    def test_extending_query_is_answered_from_memory(self):
+        word = Database.fetch_one("SELECT LOWER(фио) AS f FROM клиенты LIMIT 1")["f"].split()[0]
+
+        self.type_text(word[:1])
+        for i in range(2, len(word) + 1):
+            rows = self.type_text(word[:i])
+            expected = Database.fetch_all(*build_query(word[:i]))
+            self.assertEqual(self.ids(rows), self.ids(expected))
+        self.assertEqual(self.search.db_fetches, 1)
+
+    def test_unrelated_query_and_invalidate_hit_database(self):
+        self.type_text("а")
+        self.type_text("б")
+        self.assertEqual(self.search.db_fetches, 2)
+        self.search.refresh()
+        self.type_text("б")
+        self.assertEqual(self.search.db_fetches, 3)
+
+    def test_backspace_uses_history(self):
+        self.type_text("")
+        self.type_text("ан")
+        self.type_text("")
+        self.assertEqual(self.search.db_fetches, 1)
+
+    def test_incomplete_result_is_not_refined(self):
+        self.search.limit = 3
+        self.type_text("")
+        self.type_text("а")
+        self.assertEqual(self.search.db_fetches, 2)
+
+    def test_pattern_matches_literal_substring(self):
+        # Шаблон для SQL совпадает с фильтром в памяти (text in ...)
+        for value, text in (("скидка 50%", "50%"), ("a_b", "a_b"), ("c:\\dir", "\\d"), ("ab", "_"), ("ab", "%")):
+            with self.subTest(value=value, text=text):
+                row = Database.fetch_one("SELECT %s ILIKE %s AS found", (value, contains_pattern(text)))
+                self.assertEqual(row["found"], text in value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from utils import startup_profile
+
+HEAVY = ("reportlab", "qtawesome", "psycopg2", "numpy", "dotenv", "ui.widgets", "business_logic")
+
+
+class TestStartupProfile(unittest.TestCase):
+
+    def test_login_window_needs_only_pyqt(self):
+        code = (
+            "import sys, main\n"
+            "from PyQt6.QtWidgets import QApplication\n"
+            "app = QApplication([])\n"
+            "from ui.windows.login_window import LoginWindow\n"
+            "LoginWindow()\n"
+            f"print(sorted(m for m in sys.modules if m.startswith({HEAVY!r})))\n"
+        )
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "[]")
+
+    def test_top_level_imports_parsed(self):
+        lines = [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   encodings.utf_8",
+            "import time:       300 |       1500 | encodings",
+            "import time:      2000 |      26000 | db.database",
+            "предупреждение не из -X importtime",
+        ]
+        self.assertEqual(startup_profile._top_imports(lines), [(26.0, "db.database"), (1.5, "encodings")])
+
+
+if __name__ == "__main__":
+    unittest.main()
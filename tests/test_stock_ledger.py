@@ -0,0 +1,152 @@
+import datetime
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+class TestStockLedger(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        cur = self.cur
+        cur.execute(
+            "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе)"
+            " VALUES ('TEST-SL-1', 'Тест журнал', 100) RETURNING id_материала"
+        )
+        self.material = cur.fetchone()[0]
+        cur.execute("INSERT INTO заготовки (артикул_заготовки, наименование) VALUES ('TEST-SL-B', 'Тест') RETURNING id_заготовки")
+        self.blank = cur.fetchone()[0]
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def movements(self, kind, item_id):
+        self.cur.execute(
+            "SELECT количество, тип FROM движения_склада WHERE вид = %s AND id_позиции = %s ORDER BY id_движения",
+            (kind, item_id),
+        )
+        return self.cur.fetchall()
+
+    def as_of(self, moment, kind, item_id):
+        self.cur.execute("SELECT количество FROM sp_stock_as_of(%s, %s, %s)", (moment, kind, item_id))
+        row = self.cur.fetchone()
+        return row[0] if row else 0
+
+    def test_counter_changes_are_journaled(self):
+        self.cur.execute("INSERT INTO расход_материалов VALUES (%s, %s, 3)", (self.blank, self.material))
+        self.cur.execute("SELECT sp_reserve_task_materials(%s, 10)", (self.blank,))
+        self.cur.execute(
+            "UPDATE материалы SET количество_на_складе = количество_на_складе + 50 WHERE id_материала = %s",
+            (self.material,),
+        )
+        self.assertEqual(
+            self.movements("материал", self.material),
+            [(100, "начальный_остаток"), (-30, "резерв"), (50, "приход")],
+        )
+
+    def test_explicit_movement_type(self):
+        self.cur.execute("SELECT set_config('nova.тип_движения', 'брак', true), set_config('nova.основание', 'заказ 1', true)")
+        self.cur.execute(
+            "UPDATE материалы SET количество_на_складе = количество_на_складе - 4 WHERE id_материала = %s",
+            (self.material,),
+        )
+        self.cur.execute(
+            "SELECT тип, основание FROM движения_склада WHERE вид = 'материал' AND id_позиции = %s AND количество = -4",
+            (self.material,),
+        )
+        self.assertEqual(self.cur.fetchone(), ("брак", "заказ 1"))
+
+    def test_ledger_is_append_only(self):
+        with self.assertRaises(psycopg2.Error):
+            self.cur.execute("DELETE FROM движения_склада WHERE вид = 'материал' AND id_позиции = %s", (self.material,))
+
+    def test_counters_match_ledger(self):
+        self.cur.execute(
+            "UPDATE заготовки SET количество_готовых = количество_готовых + 7 WHERE id_заготовки = %s",
+            (self.blank,),
+        )
+        self.cur.execute("SELECT * FROM sp_check_stock_cache()")
+        self.assertEqual(self.cur.fetchall(), [])
+
+    def test_as_of_uses_snapshot_and_later_movements(self):
+        self.cur.execute(
+            "INSERT INTO движения_склада (момент, вид, id_позиции, количество, тип) VALUES"
+            " (CURRENT_DATE - 5, 'заготовка', %(b)s, 10, 'производство'),"
+            " (CURRENT_DATE - 3, 'заготовка', %(b)s, -4, 'списание'),"
+            " (CURRENT_DATE - 1, 'заготовка', %(b)s, 6, 'производство')",
+            {"b": self.blank},
+        )
+        today = datetime.date.today()
+        expected = [self.as_of(today - datetime.timedelta(days=d), "заготовка", self.blank) for d in (6, 4, 2)]
+        self.cur.execute("SELECT * FROM sp_snapshot_stock(CURRENT_DATE - 4)")
+        self.assertEqual(self.cur.fetchone()[0], "OK")
+        self.cur.execute("SELECT * FROM sp_snapshot_stock(CURRENT_DATE - 2)")
+        self.cur.execute(
+            "SELECT количество FROM снимки_остатков WHERE дата = CURRENT_DATE - 2 AND вид = 'заготовка' AND id_позиции = %s",
+            (self.blank,),
+        )
+        self.assertEqual(self.cur.fetchone()[0], 6)
+
+        self.assertEqual(expected, [0, 10, 6])
+        self.assertEqual(self.as_of("-infinity", "заготовка", self.blank), 0)
+        self.assertEqual(self.as_of("infinity", "заготовка", self.blank), 12)
+
+    def test_movement_time_is_insert_time(self):
+        self.cur.execute("SELECT pg_sleep(0.01)")
+        self.cur.execute(
+            "UPDATE материалы SET количество_на_складе = количество_на_складе + 1 WHERE id_материала = %s",
+            (self.material,),
+        )
+        self.cur.execute(
+            "SELECT момент > now() FROM движения_склада WHERE вид = 'материал' AND id_позиции = %s AND количество = 1",
+            (self.material,),
+        )
+        self.assertTrue(self.cur.fetchone()[0])
+        self.cur.execute("SELECT количество FROM sp_stock_as_of(p_kind => 'материал', p_id => %s)", (self.material,))
+        self.assertEqual(self.cur.fetchone()[0], 101)
+
+    def test_snapshot_waits_for_uncommitted_movements(self):
+        # Движение "вчера" еще не закоммичено: снимок за вчера его дождется
+        self.cur.execute(
+            "INSERT INTO движения_склада (момент, вид, id_позиции, количество, тип)"
+            " VALUES (CURRENT_DATE - 1, 'заготовка', %s, 5, 'производство')",
+            (self.blank,),
+        )
+        other = psycopg2.connect(config.DATABASE_URL)
+        try:
+            with other.cursor() as cur:
+                cur.execute("SET lock_timeout = '200ms'")
+                with self.assertRaises(psycopg2.errors.LockNotAvailable):
+                    cur.execute("SELECT * FROM sp_snapshot_stock(CURRENT_DATE - 1)")
+            other.rollback()
+        finally:
+            other.close()
+
+    def test_rebuild_restores_counters_from_ledger(self):
+        self.cur.execute("SELECT set_config('nova.без_журнала', 'on', true)")
+        self.cur.execute("UPDATE материалы SET количество_на_складе = 1 WHERE id_материала = %s", (self.material,))
+        self.cur.execute("SELECT set_config('nova.без_журнала', 'off', true)")
+        self.cur.execute("SELECT вид, id_позиции FROM sp_check_stock_cache()")
+        self.assertIn(("материал", self.material), self.cur.fetchall())
+
+        self.cur.execute("SELECT * FROM sp_rebuild_stock_cache()")
+        self.cur.execute("SELECT количество_на_складе FROM материалы WHERE id_материала = %s", (self.material,))
+        self.assertEqual(self.cur.fetchone()[0], 100)
+        self.assertEqual(self.movements("материал", self.material), [(100, "начальный_остаток")])
+
+
+if __name__ == "__main__":
+    unittest.main()
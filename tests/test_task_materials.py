@@ -0,0 +1,154 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+class TestTaskMaterials(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        cur = self.cur
+        cur.execute(
+            "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе)"
+            " VALUES ('TEST-TM-1', 'Тест М1', 100), ('TEST-TM-2', 'Тест М2', 100), ('TEST-TM-3', 'Тест М3', 100)"
+            " RETURNING id_материала"
+        )
+        self.materials = [r[0] for r in cur.fetchall()]
+        cur.execute("INSERT INTO заготовки (артикул_заготовки, наименование) VALUES ('TEST-TM-B', 'Тест') RETURNING id_заготовки")
+        self.blank = cur.fetchone()[0]
+        for material, per_unit in zip(self.materials, (1, 2, 3)):
+            cur.execute("INSERT INTO расход_материалов VALUES (%s, %s, %s)", (self.blank, material, per_unit))
+        cur.execute("SELECT id_клиента FROM клиенты LIMIT 1")
+        cur.execute(
+            "INSERT INTO заказы (id_клиента, дата_готовности) VALUES (%s, CURRENT_DATE + 10) RETURNING id_заказа",
+            (cur.fetchone()[0],),
+        )
+        self.order = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO план_заготовок (id_заготовки, id_заказа, плановое_количество, дата_план)"
+            " VALUES (%s, %s, 10, CURRENT_DATE)",
+            (self.blank, self.order),
+        )
+        cur.execute("SELECT id_сотрудника FROM сотрудники WHERE должность = 'сборщик' LIMIT 1")
+        self.worker = cur.fetchone()[0]
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def stock(self):
+        self.cur.execute(
+            "SELECT количество_на_складе FROM материалы WHERE id_материала = ANY(%s) ORDER BY id_материала",
+            (self.materials,),
+        )
+        return [r[0] for r in self.cur.fetchall()]
+
+    def task(self):
+        self.cur.execute(
+            "SELECT статус, id_сотрудника, фактическое_количество, плановое_количество FROM план_заготовок"
+            " WHERE id_заготовки = %s AND id_заказа = %s",
+            (self.blank, self.order),
+        )
+        return self.cur.fetchone()
+
+    def test_take_reserves_all_lines(self):
+        self.cur.execute("CALL sp_взять_задачу_в_работу(%s, %s, %s)", (self.blank, self.order, self.worker))
+        self.assertEqual(self.stock(), [90, 80, 70])
+        self.assertEqual(self.task()[:2], ("в_работе", self.worker))
+
+    def test_take_reports_every_shortage(self):
+        self.cur.execute("UPDATE материалы SET количество_на_складе = 15 WHERE id_материала = ANY(%s)", (self.materials,))
+        self.cur.execute("SAVEPOINT take")
+        with self.assertRaises(psycopg2.Error) as ctx:
+            self.cur.execute("CALL sp_взять_задачу_в_работу(%s, %s, %s)", (self.blank, self.order, self.worker))
+        self.cur.execute("ROLLBACK TO SAVEPOINT take")
+        message = ctx.exception.diag.message_primary
+        self.assertTrue(message.startswith("Недостаточно материала"))
+        self.assertIn('"Тест М2" (нужно: 20, есть: 15)', message)
+        self.assertIn('"Тест М3" (нужно: 30, есть: 15)', message)
+        self.assertNotIn("Тест М1", message)
+        self.assertEqual(self.stock(), [15, 15, 15])
+        self.assertEqual(self.task()[0], "принято")
+
+    def test_submit_work_completes_task(self):
+        self.cur.execute("CALL sp_взять_задачу_в_работу(%s, %s, %s)", (self.blank, self.order, self.worker))
+        self.cur.execute("CALL sp_сдать_работу(%s, %s, 4)", (self.blank, self.order))
+        self.assertEqual(self.task()[::2], ("в_работе", 4))
+        self.cur.execute("CALL sp_сдать_работу(%s, %s, 6)", (self.blank, self.order))
+        self.assertEqual(self.task()[::2], ("выполнено", 10))
+        self.cur.execute("SELECT количество_готовых FROM заготовки WHERE id_заготовки = %s", (self.blank,))
+        self.assertEqual(self.cur.fetchone()[0], 10)
+
+        self.cur.execute("SAVEPOINT submit")
+        with self.assertRaises(psycopg2.Error) as ctx:
+            self.cur.execute("CALL sp_сдать_работу(%s, %s, 1)", (self.blank, self.order))
+        self.cur.execute("ROLLBACK TO SAVEPOINT submit")
+        self.assertEqual(ctx.exception.diag.message_primary, "Задача уже выполнена")
+
+    def add_product(self):
+        """Изделие = 2 заготовки, в заказе 5 шт"""
+        self.cur.execute(
+            "INSERT INTO изделия (артикул_изделия, наименование, стоимость) VALUES ('TEST-TM-P', 'Тест', 100)"
+            " RETURNING id_изделия")
+        product = self.cur.fetchone()[0]
+        self.cur.execute("INSERT INTO состав_изделия (id_изделия, id_заготовки, количество_заготовки) VALUES (%s, %s, 2)",
+                         (product, self.blank))
+        self.cur.execute("INSERT INTO состав_заказа (id_заказа, id_изделия, количество_изделий, цена_фиксированная)"
+                         " VALUES (%s, %s, 5, 100)", (self.order, product))
+        return product
+
+    def test_defect_reopens_tasks_in_one_statement(self):
+        self.cur.execute("UPDATE план_заготовок SET статус = 'выполнено', фактическое_количество = 10"
+                         " WHERE id_заготовки = %s AND id_заказа = %s", (self.blank, self.order))
+        product = self.add_product()
+
+        self.cur.execute("SELECT status FROM sp_report_defect(%s, %s, 3, 'скол')", (self.order, product))
+        self.assertEqual(self.cur.fetchone()[0], "WARNING")
+        self.assertEqual(self.task(), ("принято", None, 10, 16))
+        self.cur.execute("SELECT количество_изделий FROM состав_заказа WHERE id_заказа = %s", (self.order,))
+        self.assertEqual(self.cur.fetchone()[0], 2)
+        # Переоткрытое задание резервирует материалы при взятии в работу
+        self.assertEqual(self.stock(), [100, 100, 100])
+
+    def test_defect_on_task_in_progress_reserves_extra(self):
+        self.cur.execute("CALL sp_взять_задачу_в_работу(%s, %s, %s)", (self.blank, self.order, self.worker))
+        self.assertEqual(self.stock(), [90, 80, 70])
+        product = self.add_product()
+
+        # 3 бракованных изделия = 6 заготовок добавки: списание 6 x (1, 2, 3)
+        self.cur.execute("SELECT status, message FROM sp_report_defect(%s, %s, 3, 'скол')", (self.order, product))
+        status, message = self.cur.fetchone()
+        self.assertEqual(status, "WARNING", message)
+        self.assertEqual(self.task(), ("в_работе", self.worker, 0, 16))
+        self.assertEqual(self.stock(), [84, 68, 52])
+
+    def test_defect_on_task_in_progress_rejected_without_materials(self):
+        self.cur.execute("CALL sp_взять_задачу_в_работу(%s, %s, %s)", (self.blank, self.order, self.worker))
+        product = self.add_product()
+        self.cur.execute("UPDATE материалы SET количество_на_складе = 5 WHERE id_материала = %s", (self.materials[2],))
+
+        self.cur.execute("SELECT status, message FROM sp_report_defect(%s, %s, 3, 'скол')", (self.order, product))
+        status, message = self.cur.fetchone()
+        self.assertEqual(status, "ERROR")
+        self.assertIn("Тест М3", message)
+        # Ничего не изменилось: ни позиция, ни задание, ни остатки
+        self.assertEqual(self.task(), ("в_работе", self.worker, 0, 10))
+        self.assertEqual(self.stock(), [90, 80, 5])
+        self.cur.execute("SELECT количество_изделий FROM состав_заказа WHERE id_заказа = %s", (self.order,))
+        self.assertEqual(self.cur.fetchone()[0], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import Database, TransactionError
+
+SUPPLIER = "ТЕСТ Транзакция"
+
+
+class TestTransaction(unittest.TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        Database.close_pool()
+
+    def setUp(self):
+        materials = Database.fetch_all("SELECT id_материала FROM материалы ORDER BY id_материала LIMIT 3")
+        self.material_ids = [m["id_материала"] for m in materials]
+
+    def tearDown(self):
+        Database.execute("DELETE FROM закупки_материалов WHERE поставщик = %s", (SUPPLIER,))
+
+    def purchase_lines(self):
+        return Database.fetch_all(
+            "SELECT sz.количество FROM закупки_материалов z"
+            " LEFT JOIN состав_закупки sz USING (id_закупки)"
+            " WHERE z.поставщик = %s ORDER BY sz.количество",
+            (SUPPLIER,),
+        )
+
+    def create_purchase(self, tx, quantities):
+        purchase_id = tx.fetch_one(
+            "INSERT INTO закупки_материалов (поставщик) VALUES (%s) RETURNING id_закупки", (SUPPLIER,)
+        )["id_закупки"]
+        tx.execute_values(
+            "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES %s",
+            [(purchase_id, material, qty, 10) for material, qty in zip(self.material_ids, quantities)],
+            template="(%s, %s, %s, %s)",
+            page_size=2,
+        )
+        return purchase_id
+
+    def test_commits_once_on_one_connection(self):
+        with Database.transaction() as tx:
+            self.create_purchase(tx, [1, 2, 3])
+            backend = tx.fetch_one("SELECT pg_backend_pid() AS pid")["pid"]
+            self.assertEqual(tx.fetch_one("SELECT pg_backend_pid() AS pid")["pid"], backend)
+            # До коммита другие соединения изменений не видят
+            self.assertEqual(self.purchase_lines(), [])
+        self.assertEqual([r["количество"] for r in self.purchase_lines()], [1, 2, 3])
+
+    def test_error_rolls_back_all_steps(self):
+        with self.assertRaises(psycopg2.errors.ForeignKeyViolation):
+            with Database.transaction() as tx:
+                purchase_id = self.create_purchase(tx, [1])
+                tx.executemany(
+                    "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES (%s, %s, 1, 1)",
+                    [(purchase_id, -1)],
+                )
+        self.assertEqual(self.purchase_lines(), [])
+
+    def test_procedure_error_status_rolls_back(self):
+        with self.assertRaises(TransactionError):
+            with Database.transaction() as tx:
+                self.create_purchase(tx, [1])
+                tx.call_procedure("sp_cancel_purchase", [-1])
+        self.assertEqual(self.purchase_lines(), [])
+
+    def test_connection_returns_to_pool(self):
+        idle = Database.pool().idle_count
+        with Database.transaction() as tx:
+            tx.execute("SELECT 1")
+        self.assertEqual(Database.pool().idle_count, max(idle, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
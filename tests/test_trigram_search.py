@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+SCALE = 20000
+
+WAREHOUSE_QUERY = (
+    "SELECT * FROM v_склад_общий WHERE 1=1"
+    " AND (наименование ILIKE %s OR артикул ILIKE %s)"
+)
+
+
+class TestTrigramSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = psycopg2.connect(config.DATABASE_URL)
+        cls.cur = cls.conn.cursor()
+        cls.cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        cls.has_trgm = cls.cur.fetchone() is not None
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def tearDown(self):
+        self.conn.rollback()
+
+    def explain(self, query, params):
+        self.cur.execute("EXPLAIN " + query, params)
+        return "\n".join(r[0] for r in self.cur.fetchall())
+
+    def scale_up(self):
+        """Много строк в транзакции теста, чтобы seq scan стал дороже индекса"""
+        self.cur.execute(
+            "INSERT INTO клиенты (фио, номер_телефона)"
+            " SELECT 'Клиент ' || md5(g::text), '+7' || (9000000000 + g)"
+            " FROM generate_series(1, %s) g",
+            (SCALE,),
+        )
+        for table, article in (
+            ("материалы", "артикул_материала"),
+            ("заготовки", "артикул_заготовки"),
+            ("изделия", "артикул_изделия"),
+        ):
+            self.cur.execute(
+                f"INSERT INTO {table} ({article}, наименование)"
+                " SELECT 'T-' || g, 'Позиция ' || md5(g::text) FROM generate_series(1, %s) g",
+                (SCALE,),
+            )
+            self.cur.execute(f"ANALYZE {table}")
+        self.cur.execute("ANALYZE клиенты")
+
+    def test_warehouse_filter_reaches_every_base_table(self):
+        plan = self.explain(WAREHOUSE_QUERY, ("%стол%", "%стол%"))
+        self.assertNotIn("Subquery Scan", plan)
+        self.assertEqual(plan.count("~~*"), 6)  # 3 таблицы x (наименование, артикул)
+
+        plan = self.explain(WAREHOUSE_QUERY + " AND тип = %s", ("%стол%", "%стол%", "Материал"))
+        self.assertIn("материалы", plan)
+        self.assertNotIn("заготовки", plan)
+        self.assertNotIn("изделия", plan)
+
+    def test_substring_search_uses_trigram_indexes(self):
+        if not self.has_trgm:
+            self.skipTest("pg_trgm не установлен (trigram_search_v11.sql не применена)")
+        self.scale_up()
+
+        plan = self.explain(
+            "SELECT * FROM клиенты WHERE (фио ILIKE %s OR номер_телефона ILIKE %s)",
+            ("%abcd%", "%abcd%"),
+        )
+        self.assertIn("idx_клиенты_фио_trgm", plan)
+        self.assertIn("idx_клиенты_телефон_trgm", plan)
+
+        plan = self.explain(WAREHOUSE_QUERY, ("%abcd%", "%abcd%"))
+        for index in (
+            "idx_материалы_наименование_trgm",
+            "idx_заготовки_наименование_trgm",
+            "idx_изделия_наименование_trgm",
+        ):
+            self.assertIn(index, plan)
+        self.assertNotIn("Seq Scan", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
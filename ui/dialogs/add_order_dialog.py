@@ -15,6 +15,8 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
 )
 
+from psycopg2.extras import Json
+
 from db.database import Database
 from ui.widgets.toast import Toast
 
@@ -188,35 +190,24 @@ class AddOrderDialog(QDialog):
         client_id = self.combo_client.itemData(client_idx)
         deadline = self.date_edit.date().toString("yyyy-MM-dd")
 
+        # Вся корзина уходит одним вызовом: шапка, позиции, резерв склада
+        # и задания на производство создаются в одной транзакции
+        items = [{"id_изделия": item["id"], "количество": item["qty"]} for item in self.cart_items]
+
         try:
-            # 1. Создаем заголовок заказа через процедуру
             res_order = Database.call_procedure(
-                'sp_create_order', 
-                [client_id, self.manager_id, deadline]
+                'sp_create_order_with_items',
+                [client_id, self.manager_id, deadline, Json(items)]
             )
 
-            if res_order.get('status') != 'OK':
+            if res_order.get('status') == 'ERROR':
                 raise Exception(res_order.get('message', 'Ошибка создания заказа'))
 
             order_id = res_order.get('new_order_id')
-            warnings = []
-
-            # 2. Добавление товаров через процедуру
-            for item in self.cart_items:
-                res_item = Database.call_procedure(
-                    'sp_add_order_item', 
-                    [order_id, item["id"], item["qty"]]
-                )
-
-                status = res_item.get('status')
-                msg = res_item.get('message', '')
-
-                if status == 'WARNING':
-                    warnings.append(f"- {item['name']}: {msg}")
-                elif status == 'ERROR':
-                    # Логируем, но не прерываем (или прерываем? по ТЗ - обработка всех исключений на БД)
-                    # Если БД вернула Error, значит позиция не добавлена.
-                    warnings.append(f"❌ Ошибка {item['name']}: {msg}")
+            warnings = [
+                f"- {w['наименование']}: {w['сообщение']}"
+                for w in res_order.get('warnings') or []
+            ]
 
             # Успех
             if warnings:
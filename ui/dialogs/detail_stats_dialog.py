@@ -9,10 +9,6 @@ from PyQt6.QtWidgets import (
     QPushButton,
     QVBoxLayout,
 )
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 
 from ui.widgets.custom_chart import CustomChart
 from ui.widgets.toast import Toast  # <--- Добавлен импорт
@@ -67,6 +63,12 @@ class DetailStatsDialog(QDialog):
             return
 
         try:
+            # reportlab — только при выгрузке
+            from reportlab.lib.pagesizes import A4
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            from reportlab.pdfgen import canvas
+
             # 1. Скриншот
             pixmap = self.chart.grab()
             img_path = "temp_chart.png"
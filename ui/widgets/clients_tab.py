@@ -1,19 +1,20 @@
 import qtawesome as qta
-from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QHBoxLayout,
     QHeaderView,
     QLineEdit,
     QMessageBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
 from db.database import Database
+from db.records import Client
 from ui.dialogs.add_client_dialog import AddClientDialog
+from ui.widgets.record_table import Column, RecordTableView, or_dash
+from ui.widgets.search_controller import SearchController, contains_pattern
 from ui.widgets.toast import Toast
 
 
@@ -31,7 +32,10 @@ class ClientsTab(QWidget):
 
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Поиск по ФИО или телефону...")
-        self.search_input.textChanged.connect(self.load_data)
+        self.search = SearchController(
+            self.search_input, self.build_search_query, self.populate_table,
+            matches=self.client_matches, fetch_mode=Client,
+        )
 
         self.btn_add = QPushButton("Добавить")
         self.btn_add.setIcon(qta.icon("fa5s.user-plus", color="white"))
@@ -60,69 +64,53 @@ class ClientsTab(QWidget):
         layout.addLayout(toolbar)
 
         # --- ТАБЛИЦА ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["ID", "ФИО", "Телефон", "ИНН", "Адрес"])
+        self.table = RecordTableView(
+            [
+                Column("ID", "id_клиента"),
+                Column("ФИО", "фио"),
+                Column("Телефон", "номер_телефона"),
+                Column("ИНН", "инн", fmt=or_dash),
+                Column("Адрес", "адрес", fmt=or_dash),
+            ]
+        )
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)  # ФИО тянется
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)  # Адрес тянется
 
-        self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(
-            QTableWidget.SelectionMode.SingleSelection
+            QTableView.SelectionMode.SingleSelection
         )  # Только одна строка
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
 
         layout.addWidget(self.table)
 
     def load_data(self):
-        search_text = self.search_input.text().strip().lower()
+        self.search.refresh()
 
+    def build_search_query(self, search_text):
         query = "SELECT * FROM клиенты WHERE 1=1"
         params = []
 
         if search_text:
-            query += " AND (LOWER(фио) LIKE %s OR номер_телефона LIKE %s)"
-            like_str = f"%{search_text}%"
+            query += " AND (фио ILIKE %s OR номер_телефона ILIKE %s)"
+            like_str = contains_pattern(search_text)
             params.append(like_str)
             params.append(like_str)
 
         query += " ORDER BY id_клиента DESC"
 
-        clients = Database.fetch_all(query, params)
-        self.populate_table(clients)
+        return query, params
+
+    @staticmethod
+    def client_matches(client, text):
+        return text in (client.фио or "").lower() or text in (client.номер_телефона or "")
 
     def populate_table(self, clients):
-        self.table.setRowCount(0)
-        # Сохраняем полные данные о клиентах, чтобы потом брать их для редактирования
-        self.current_clients_data = clients
-
-        for row_idx, client in enumerate(clients):
-            self.table.insertRow(row_idx)
-
-            # ID
-            self.table.setItem(row_idx, 0, QTableWidgetItem(str(client["id_клиента"])))
-            # ФИО
-            self.table.setItem(row_idx, 1, QTableWidgetItem(client["фио"]))
-            # Телефон
-            self.table.setItem(row_idx, 2, QTableWidgetItem(client["номер_телефона"]))
-            # ИНН
-            self.table.setItem(row_idx, 3, QTableWidgetItem(client["инн"] or "—"))
-            # Адрес
-            self.table.setItem(row_idx, 4, QTableWidgetItem(client["адрес"] or "—"))
-
-            # Сохраняем ID строки в UserRole элемента (для надежности)
-            self.table.item(row_idx, 0).setData(Qt.ItemDataRole.UserRole, client)
+        self.table.set_rows(clients)
 
     def get_selected_client(self):
         """Возвращает словарь данных выбранного клиента или None"""
-        row = self.table.currentRow()
-        if row == -1:
-            return None
-        # Данные спрятаны в первой ячейке
-        return self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        return self.table.selected_record()
 
     def add_client(self):
         dialog = AddClientDialog(self)
@@ -16,7 +16,9 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from db.async_executor import run_async
 from db.database import Database
+from ui.widgets.record_table import Column, RecordTableView
 from ui.widgets.toast import Toast
 
 
@@ -52,13 +54,14 @@ class ComponentsTab(QWidget):
         layout.addLayout(toolbar)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["ID", "Наименование", "На складе"])
+        self.table = RecordTableView([
+            Column("ID", "id_заготовки"),
+            Column("Наименование", "наименование"),
+            Column("На складе", "количество_на_складе", fmt=lambda v, c: str(v or 0)),
+        ])
+        self.table.verticalHeader().setVisible(True)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
         self.table.doubleClicked.connect(self.edit_component)
         layout.addWidget(self.table)
 
@@ -86,13 +89,14 @@ class ComponentsTab(QWidget):
         layout.addLayout(btn_layout)
 
     def load_data(self):
-        components = Database.fetch_all("SELECT * FROM sp_get_all_components()")
-        self.table.setRowCount(0)
-        for i, c in enumerate(components):
-            self.table.insertRow(i)
-            self.table.setItem(i, 0, QTableWidgetItem(str(c["id_заготовки"])))
-            self.table.setItem(i, 1, QTableWidgetItem(c["наименование"]))
-            self.table.setItem(i, 2, QTableWidgetItem(str(c["количество_на_складе"] or 0)))
+        run_async(
+            self, Database.fetch_all, "SELECT * FROM sp_get_all_components()",
+            on_result=self.populate_table, key="load",
+        )
+
+    def populate_table(self, components):
+        self.table.set_rows(components)
+        self.materials_table.setRowCount(0)
 
     def on_selection_changed(self):
         component_id = self.get_selected_id()
@@ -100,9 +104,13 @@ class ComponentsTab(QWidget):
             self.materials_table.setRowCount(0)
             return
 
-        materials = Database.fetch_all(
-            "SELECT * FROM sp_get_component_materials(%s)", (component_id,)
+        run_async(
+            self, Database.fetch_all,
+            "SELECT * FROM sp_get_component_materials(%s)", (component_id,),
+            on_result=self.populate_materials, key="materials",
         )
+
+    def populate_materials(self, materials):
         self.materials_table.setRowCount(0)
         for i, m in enumerate(materials):
             self.materials_table.insertRow(i)
@@ -111,11 +119,8 @@ class ComponentsTab(QWidget):
             self.materials_table.setItem(i, 2, QTableWidgetItem(str(m["количество"])))
 
     def get_selected_id(self):
-        selected = self.table.selectedItems()
-        if not selected:
-            return None
-        row = selected[0].row()
-        return int(self.table.item(row, 0).text())
+        component = self.table.selected_record()
+        return component["id_заготовки"] if component else None
 
     def add_component(self):
         name, ok = QInputDialog.getText(self, "Новая заготовка", "Наименование:")
@@ -128,12 +133,12 @@ class ComponentsTab(QWidget):
                 Toast.error(self, "Ошибка", result.get("message", "Неизвестная ошибка"))
 
     def edit_component(self):
-        component_id = self.get_selected_id()
-        if not component_id:
+        component = self.table.selected_record()
+        if not component:
             return
 
-        row = self.table.selectedItems()[0].row()
-        current_name = self.table.item(row, 1).text()
+        component_id = component["id_заготовки"]
+        current_name = component["наименование"]
 
         new_name, ok = QInputDialog.getText(self, "Редактировать", "Наименование:", text=current_name)
         if ok and new_name.strip():
@@ -145,15 +150,12 @@ class ComponentsTab(QWidget):
                 Toast.error(self, "Ошибка", result.get("message", "Неизвестная ошибка"))
 
     def manage_materials(self):
-        component_id = self.get_selected_id()
-        if not component_id:
+        component = self.table.selected_record()
+        if not component:
             Toast.warning(self, "Внимание", "Выберите заготовку")
             return
 
-        row = self.table.selectedItems()[0].row()
-        component_name = self.table.item(row, 1).text()
-
-        dialog = ComponentMaterialsDialog(self, component_id, component_name)
+        dialog = ComponentMaterialsDialog(self, component["id_заготовки"], component["наименование"])
         if dialog.exec():
             self.on_selection_changed()
 
@@ -280,23 +282,25 @@ class ComponentMaterialsDialog(QDialog):
             new_name = new_name_input.text().strip()
             qty = spin.value()
 
-            if new_name:
-                # Create new material first (generate article number)
-                import time
-                article = f"MAT-{int(time.time()) % 100000}"
-                res = Database.insert_returning(
-                    "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе) VALUES (%s, %s, 0) RETURNING id_материала",
-                    (article, new_name)
+            if not new_name:
+                result = Database.call_procedure(
+                    "sp_add_component_material", [self.component_id, combo.currentData(), qty]
                 )
-                if res:
-                    material_id = res["id_материала"]
-                else:
-                    Toast.error(self, "Ошибка", "Не удалось создать материал")
-                    return
             else:
-                material_id = combo.currentData()
+                # Новый материал и его привязка — одной транзакцией, чтобы
+                # при ошибке не оставался материал без заготовки
+                import time
+                article = f"MAT-{int(time.time()) % 100000}"
+                try:
+                    with Database.transaction() as tx:
+                        material_id = tx.fetch_one(
+                            "INSERT INTO материалы (артикул_материала, наименование, количество_на_складе) VALUES (%s, %s, 0) RETURNING id_материала",
+                            (article, new_name)
+                        )["id_материала"]
+                        result = tx.call_procedure("sp_add_component_material", [self.component_id, material_id, qty])
+                except Exception as e:
+                    result = {"status": "ERROR", "message": f"Не удалось создать материал: {e}"}
 
-            result = Database.call_procedure("sp_add_component_material", [self.component_id, material_id, qty])
             if result.get("status") == "OK":
                 Toast.success(self, "Успешно", result.get("message"))
                 self.load_materials()
@@ -20,8 +20,8 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from db.async_executor import run_async
 from db.database import Database
-from ui.dialogs.detail_stats_dialog import DetailStatsDialog
 from ui.widgets.toast import Toast
 
 
@@ -185,67 +185,27 @@ class DashboardTab(QWidget):
     def load_data(self):
         d_start = self.date_from.date().toString("yyyy-MM-dd")
         d_end = self.date_to.date().toString("yyyy-MM-dd")
+        run_async(self, self.fetch_metrics, d_start, d_end, on_result=self.show_metrics, key="load")
 
-        # SQL с учетом ВСЕХ финальных статусов
-        # 1. Выручка (выполнен + завершен + отгружен)
-        rev_res = Database.fetch_one(
-            """
-            SELECT COALESCE(SUM(сумма_заказа), 0) as rev, COUNT(*) as cnt 
-            FROM заказы 
-            WHERE status IN ('выполнен', 'завершен', 'отгружен') 
-              AND дата_заказа BETWEEN %s AND %s
-        """.replace(
-                "status", "статус"
-            ),
-            (d_start, d_end),
-        )  # fix column name just in case
-
-        revenue = float(rev_res["rev"])
-        orders_count = int(rev_res["cnt"])
-
-        # 2. Расходы
-        exp_res = Database.fetch_one(
-            """
-            SELECT COALESCE(SUM(sz.количество * sz.цена_закупки), 0) as exp
-            FROM закупки_материалов zm
-            JOIN состав_закупки sz ON zm.id_закупки = sz.id_закупки
-            WHERE zm.статус='выполнено' AND дата_закупки BETWEEN %s AND %s
-        """,
-            (d_start, d_end),
+    @staticmethod
+    def fetch_metrics(d_start, d_end):
+        """Выполняется в фоне: все показатели за период одним вызовом (по kpi_daily)"""
+        return Database.fetch_one(
+            "SELECT * FROM sp_dashboard_kpis(%s, %s)", (d_start, d_end)
         )
-        expenses = float(exp_res["exp"])
 
-        # 3. Отмены
-        cancel_res = Database.fetch_one(
-            """
-            SELECT COUNT(*) as cnt FROM заказы 
-            WHERE статус='отменен' AND дата_заказа BETWEEN %s AND %s
-        """,
-            (d_start, d_end),
-        )
-        cancels = int(cancel_res["cnt"])
+    def show_metrics(self, kpi):
+        if not kpi:
+            return
 
-        # 4. Сотрудники
-        staff_res = Database.fetch_one(
-            "SELECT COUNT(*) as cnt FROM сотрудники WHERE дата_увольнения IS NULL"
-        )
-        staff = staff_res["cnt"]
-
-        # Расчеты
-        profit = revenue - expenses
-        avg_check = revenue / orders_count if orders_count > 0 else 0
-        margin = (profit / revenue * 100) if revenue > 0 else 0
-        total_orders = orders_count + cancels
-        cancel_rate = (cancels / total_orders * 100) if total_orders > 0 else 0
-
-        self.c_revenue.set_value(f"{revenue:,.0f} ₽")
-        self.c_expense.set_value(f"{expenses:,.0f} ₽")
-        self.c_profit.set_value(f"{profit:,.0f} ₽")
-        self.c_orders.set_value(str(orders_count))
-        self.c_avg.set_value(f"{avg_check:,.0f} ₽")
-        self.c_margin.set_value(f"{margin:.1f} %")
-        self.c_cancel.set_value(f"{cancel_rate:.1f} %")
-        self.c_active.set_value(str(staff))
+        self.c_revenue.set_value(f"{kpi['выручка']:,.0f} ₽")
+        self.c_expense.set_value(f"{kpi['расходы']:,.0f} ₽")
+        self.c_profit.set_value(f"{kpi['прибыль']:,.0f} ₽")
+        self.c_orders.set_value(str(kpi["заказов_закрыто"]))
+        self.c_avg.set_value(f"{kpi['средний_чек']:,.0f} ₽")
+        self.c_margin.set_value(f"{kpi['рентабельность']:.1f} %")
+        self.c_cancel.set_value(f"{kpi['процент_отмен']:.1f} %")
+        self.c_active.set_value(str(kpi["сотрудников"]))
 
     def open_detail(self, title, metric_type):
         d_start = self.date_from.date().toString("yyyy-MM-dd")
@@ -255,8 +215,13 @@ class DashboardTab(QWidget):
         if not query:
             return
 
-        rows = Database.fetch_all(query, (d_start, d_end))
+        run_async(
+            self, Database.fetch_all, query, (d_start, d_end),
+            on_result=lambda rows: self.show_detail(title, metric_type, d_start, d_end, rows),
+            key="detail",
+        )
 
+    def show_detail(self, title, metric_type, d_start, d_end, rows):
         data = {}
         for row in rows:
             if row["d"]:
@@ -268,46 +233,44 @@ class DashboardTab(QWidget):
             )
             return
 
+        # Диалог тянет график и reportlab — импорт при первом открытии
+        from ui.dialogs.detail_stats_dialog import DetailStatsDialog
+
         dialog = DetailStatsDialog(
             self, title, metric_type, d_start, d_end, preloaded_data=data
         )
         dialog.exec()
 
     def get_metric_query(self, metric_type):
-        # ВАЖНО: Используем кириллицу 'статус' для названий колонок в WHERE
+        # Ряды по дням берутся из дневных итогов kpi_daily
         if metric_type == "revenue":
             return """
-                SELECT дата_заказа as d, SUM(сумма_заказа) as val FROM заказы 
-                WHERE статус IN ('выполнен', 'завершен', 'отгружен') 
-                AND дата_заказа BETWEEN %s AND %s GROUP BY d ORDER BY d
+                SELECT день as d, выручка as val FROM kpi_daily
+                WHERE заказов_закрыто > 0 AND день BETWEEN %s AND %s ORDER BY d
             """
         elif metric_type == "expenses":
             return """
-                SELECT дата_закупки as d, SUM(sz.количество * sz.цена_закупки) as val
-                FROM закупки_материалов zm JOIN состав_закупки sz ON zm.id_закупки = sz.id_закупки
-                WHERE zm.статус='выполнено' AND дата_закупки BETWEEN %s AND %s GROUP BY d ORDER BY d
+                SELECT день as d, расходы as val FROM kpi_daily
+                WHERE расходы > 0 AND день BETWEEN %s AND %s ORDER BY d
             """
         elif metric_type == "profit":
             return """
-                SELECT дата_заказа as d, SUM(сумма_заказа) * 0.3 as val FROM заказы 
-                WHERE статус IN ('выполнен', 'завершен', 'отгружен') 
-                AND дата_заказа BETWEEN %s AND %s GROUP BY d ORDER BY d
+                SELECT день as d, выручка * 0.3 as val FROM kpi_daily
+                WHERE заказов_закрыто > 0 AND день BETWEEN %s AND %s ORDER BY d
             """
         elif metric_type == "orders_count":
             return """
-                SELECT дата_заказа as d, COUNT(*) as val FROM заказы 
-                WHERE статус IN ('выполнен', 'завершен', 'отгружен') 
-                AND дата_заказа BETWEEN %s AND %s GROUP BY d ORDER BY d
+                SELECT день as d, заказов_закрыто as val FROM kpi_daily
+                WHERE заказов_закрыто > 0 AND день BETWEEN %s AND %s ORDER BY d
             """
         elif metric_type == "avg_check":
             return """
-                SELECT дата_заказа as d, AVG(сумма_заказа) as val FROM заказы 
-                WHERE статус IN ('выполнен', 'завершен', 'отгружен') 
-                AND дата_заказа BETWEEN %s AND %s GROUP BY d ORDER BY d
+                SELECT день as d, средний_чек as val FROM kpi_daily
+                WHERE заказов_закрыто > 0 AND день BETWEEN %s AND %s ORDER BY d
             """
         elif metric_type == "cancel_rate":
             return """
-                SELECT дата_заказа as d, (COUNT(*) FILTER (WHERE статус = 'отменен')::numeric / COUNT(*)) * 100 as val
-                FROM заказы WHERE дата_заказа BETWEEN %s AND %s GROUP BY d ORDER BY d
+                SELECT день as d, отмен::numeric / заказов_всего * 100 as val FROM kpi_daily
+                WHERE заказов_всего > 0 AND день BETWEEN %s AND %s ORDER BY d
             """
         return None
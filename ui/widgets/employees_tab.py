@@ -1,18 +1,17 @@
 import qtawesome as qta
-from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import (
     QHBoxLayout,
     QHeaderView,
     QMessageBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
+from db.async_executor import run_async
 from db.database import Database
 from ui.dialogs.add_employee_dialog import AddEmployeeDialog
+from ui.widgets.record_table import Column, RecordTableView
 from ui.widgets.toast import Toast
 
 
@@ -42,61 +41,49 @@ class EmployeesTab(QWidget):
         layout.addLayout(top)
 
         # Таблица
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "ФИО", "Должность", "Телефон", "ЗП", "Статус"]
+        self.table = RecordTableView(
+            [
+                Column("ID", "id_сотрудника"),
+                Column("ФИО", "фио"),
+                Column("Должность", "должность"),
+                Column("Телефон", "номер_телефона"),
+                Column("ЗП", "зарплата", fmt=lambda v, e: f"{v:,.0f}"),
+                Column("Статус", "дата_увольнения", fmt=lambda v, e: "Уволен" if v else "Работает"),
+            ],
+            row_style=self.employee_style,
         )
+        self.table.verticalHeader().setVisible(True)
         self.table.horizontalHeader().setSectionResizeMode(
             1, QHeaderView.ResizeMode.Stretch
         )
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         layout.addWidget(self.table)
 
     def load_data(self):
-        self.table.setRowCount(0)
         query = "SELECT * FROM сотрудники ORDER BY дата_увольнения NULLS FIRST, фио"
-        emps = Database.fetch_all(query)
-
-        for i, e in enumerate(emps):
-            self.table.insertRow(i)
-
-            status = "Работает"
-            color = None
-            if e["дата_увольнения"]:
-                status = "Уволен"
-                color = QColor("#FFCDD2")  # Красный
-
-            items = [
-                str(e["id_сотрудника"]),
-                e["фио"],
-                e["должность"],
-                e["номер_телефона"],
-                f"{e['зарплата']:,.0f}",
-                status,
-            ]
-
-            for j, val in enumerate(items):
-                item = QTableWidgetItem(val)
-                if color:
-                    item.setBackground(color)
-                self.table.setItem(i, j, item)
+        run_async(self, Database.fetch_all, query, on_result=self.populate_table, key="load")
+
+    def populate_table(self, emps):
+        self.table.set_rows(emps)
+
+    @staticmethod
+    def employee_style(emp):
+        if emp["дата_увольнения"]:
+            return "#FFCDD2", None  # Красный
+        return None, None
 
     def add_emp(self):
         if AddEmployeeDialog(self).exec():
             self.load_data()
 
     def fire_emp(self):
-        row = self.table.currentRow()
-        if row == -1:
+        emp = self.table.selected_record()
+        if not emp:
             return
 
-        emp_id = self.table.item(row, 0).text()
-        name = self.table.item(row, 1).text()
-        status = self.table.item(row, 5).text()
+        emp_id = emp["id_сотрудника"]
+        name = emp["фио"]
 
-        if status == "Уволен":
+        if emp["дата_увольнения"]:
             Toast.warning(self, "Ошибка", "Сотрудник уже уволен")
             return
 
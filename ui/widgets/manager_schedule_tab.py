@@ -1,3 +1,5 @@
+import datetime
+
 from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import (
@@ -6,6 +8,8 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QHeaderView,
     QLabel,
+    QListWidget,
+    QListWidgetItem,
     QPushButton,
     QSpinBox,
     QTableWidget,
@@ -14,6 +18,7 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from db.async_executor import executor, run_async
 from db.database import Database
 from ui.widgets.toast import Toast
 
@@ -45,10 +50,6 @@ class ManagerScheduleTab(QWidget):
         # --- 1. ПАНЕЛЬ ВЫБОРА ---
         top_layout = QHBoxLayout()
 
-        self.combo_emp = QComboBox()
-        self.combo_emp.setPlaceholderText("Выберите сотрудника")
-        self.combo_emp.currentIndexChanged.connect(self.load_schedule_colors)
-
         self.combo_month = QComboBox()
         self.combo_month.addItems(self.months)
         self.combo_month.setCurrentIndex(QDate.currentDate().month() - 1)
@@ -59,15 +60,24 @@ class ManagerScheduleTab(QWidget):
         self.spin_year.setValue(QDate.currentDate().year())
         self.spin_year.valueChanged.connect(self.generate_calendar_grid)
 
-        top_layout.addWidget(QLabel("Сотрудник:"))
-        top_layout.addWidget(self.combo_emp, 1)
         top_layout.addWidget(QLabel("Месяц:"))
         top_layout.addWidget(self.combo_month)
         top_layout.addWidget(self.spin_year)
 
+        top_layout.addStretch()
+
         layout.addLayout(top_layout)
 
-        # --- 2. ТАБЛИЦА-КАЛЕНДАРЬ ---
+        # --- 2. СОТРУДНИКИ (можно выделить нескольких) + ТАБЛИЦА-КАЛЕНДАРЬ ---
+        body = QHBoxLayout()
+
+        # Календарь раскрашивается по текущему сотруднику, статус ставится всем выделенным
+        self.list_emp = QListWidget()
+        self.list_emp.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        self.list_emp.setFixedWidth(300)
+        self.list_emp.currentItemChanged.connect(self.load_schedule_colors)
+        body.addWidget(self.list_emp)
+
         self.table = QTableWidget()
         self.table.setColumnCount(7)
         self.table.setRowCount(6)
@@ -103,10 +113,11 @@ class ManagerScheduleTab(QWidget):
         self.table.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
 
-        layout.addWidget(self.table)
+        body.addWidget(self.table, 1)
+        layout.addLayout(body)
 
         # --- 3. КНОПКИ СТАТУСОВ ---
-        ctrl_group = QGroupBox("Применить к выделенным дням")
+        ctrl_group = QGroupBox("Применить к выделенным дням выбранных сотрудников")
         btns_layout = QHBoxLayout(ctrl_group)
 
         self.btn_work = self.create_status_btn("Рабочий", "#27AE60", "рабочий")
@@ -137,13 +148,25 @@ class ManagerScheduleTab(QWidget):
         return btn
 
     def load_employees(self):
-        self.combo_emp.clear()
-        emps = Database.fetch_all(
-            "SELECT id_сотрудника, фио, должность FROM сотрудники ORDER BY фио"
+        run_async(
+            self, Database.fetch_all,
+            "SELECT id_сотрудника, фио, должность FROM сотрудники ORDER BY фио",
+            on_result=self.populate_employees, key="employees",
         )
+
+    def populate_employees(self, emps):
+        self.list_emp.clear()
         for e in emps:
-            self.combo_emp.addItem(f"{e['фио']} ({e['должность']})", e["id_сотрудника"])
-        self.combo_emp.setCurrentIndex(-1)
+            item = QListWidgetItem(f"{e['фио']} ({e['должность']})")
+            item.setData(Qt.ItemDataRole.UserRole, e["id_сотрудника"])
+            self.list_emp.addItem(item)
+        self.list_emp.setCurrentRow(-1)
+
+    def selected_employee_ids(self):
+        items = self.list_emp.selectedItems()
+        if not items and self.list_emp.currentItem():
+            items = [self.list_emp.currentItem()]
+        return [item.data(Qt.ItemDataRole.UserRole) for item in items]
 
     def generate_calendar_grid(self):
         self.table.clearContents()
@@ -183,8 +206,9 @@ class ManagerScheduleTab(QWidget):
         self.load_schedule_colors()
 
     def load_schedule_colors(self):
-        idx = self.combo_emp.currentIndex()
-        if idx == -1:
+        current = self.list_emp.currentItem()
+        if current is None:
+            executor().cancel(self, "colors")
             for row in range(6):
                 for col in range(7):
                     item = self.table.item(row, col)
@@ -193,10 +217,17 @@ class ManagerScheduleTab(QWidget):
                         item.setForeground(QColor("black"))
             return
 
-        emp_id = self.combo_emp.itemData(idx)
-        query = "SELECT дата, статус FROM график_работы WHERE id_сотрудника = %s"
-        schedule = Database.fetch_all(query, (emp_id,))
+        # Только видимый месяц
+        emp_id = current.data(Qt.ItemDataRole.UserRole)
+        first_day = QDate(self.spin_year.value(), self.combo_month.currentIndex() + 1, 1)
+        query = "SELECT дата, статус FROM sp_график_за_период(%s, %s, %s)"
+        run_async(
+            self, Database.fetch_all, query,
+            ([emp_id], first_day.toPyDate(), first_day.addMonths(1).addDays(-1).toPyDate()),
+            on_result=self.paint_schedule, key="colors",
+        )
 
+    def paint_schedule(self, schedule):
         # Словарь { 'yyyy-MM-dd': 'статус' }
         sched_map = {str(row["дата"]): row["статус"] for row in schedule}
 
@@ -228,40 +259,32 @@ class ManagerScheduleTab(QWidget):
                 item.setBackground(color)
                 item.setForeground(fg_color)
 
-    # --- ВОТ ЭТОТ МЕТОД, КОТОРЫЙ ТЕРЯЛСЯ ---
     def apply_status_to_selection(self, status_code, status_name):
-        """Применяет статус ко всем выделенным ячейкам"""
-        # 1. Проверка сотрудника
-        idx = self.combo_emp.currentIndex()
-        if idx == -1:
+        """Применяет статус ко всем выделенным дням всех выбранных сотрудников одним вызовом"""
+        # 1. Проверка сотрудников
+        emp_ids = self.selected_employee_ids()
+        if not emp_ids:
             Toast.warning(self, "Внимание", "Сначала выберите сотрудника!")
             return
 
-        emp_id = self.combo_emp.itemData(idx)
-
         # 2. Проверка выделения
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        dates = sorted({
+            datetime.date.fromisoformat(item.data(Qt.ItemDataRole.UserRole))
+            for item in self.table.selectedItems()
+            if item.data(Qt.ItemDataRole.UserRole)
+        })
+        if not dates:
             Toast.warning(self, "Внимание", "Выделите дни в календаре!")
             return
 
-        count = 0
-        try:
-            for item in selected_items:
-                date_str = item.data(Qt.ItemDataRole.UserRole)
-                if not date_str:
-                    continue
-
-                Database.execute(
-                    "CALL sp_установить_статус_дня(%s, %s, %s)",
-                    (emp_id, date_str, status_code),
-                )
-                count += 1
+        run_async(
+            self, Database.call_procedure, "sp_установить_статус_периода", [emp_ids, dates, status_code],
+            on_result=self.on_status_applied, key="apply",
+        )
 
-            Toast.success(
-                self, "Успешно", f"Статус '{status_name}' установлен\nдля {count} дн."
-            )
+    def on_status_applied(self, result):
+        if result.get("status") == "OK":
+            Toast.success(self, "Успешно", result.get("message"))
             self.load_schedule_colors()
-
-        except Exception as e:
-            Toast.error(self, "Ошибка", str(e))
+        else:
+            Toast.error(self, "Ошибка", result.get("message", "Неизвестная ошибка"))
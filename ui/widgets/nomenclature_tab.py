@@ -14,7 +14,10 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from db.async_executor import run_async
 from db.database import Database
+from ui.widgets.record_table import Column, RecordTableView
+from ui.widgets.search_controller import contains_pattern
 from ui.widgets.toast import Toast
 
 
@@ -51,14 +54,19 @@ class NomenclatureTab(QWidget):
         layout.addLayout(toolbar)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(["ID", "Артикул", "Наименование", "Тип", "Размеры", "Цена", "На складе"])
+        self.table = RecordTableView([
+            Column("ID", "id_изделия"),
+            Column("Артикул", "артикул"),
+            Column("Наименование", "наименование"),
+            Column("Тип", "тип"),
+            Column("Размеры", "размеры"),
+            Column("Цена", "стоимость", fmt=lambda v, p: f"{v:,.2f} ₽"),
+            Column("На складе", "количество_на_складе"),
+        ])
+        self.table.verticalHeader().setVisible(True)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         self.table.doubleClicked.connect(self.edit_product)
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
         layout.addWidget(self.table)
 
         # Components panel (below table)
@@ -84,17 +92,14 @@ class NomenclatureTab(QWidget):
         layout.addLayout(btn_layout)
 
     def load_data(self):
-        products = Database.fetch_all("SELECT * FROM sp_get_products()")
-        self.table.setRowCount(0)
-        for i, p in enumerate(products):
-            self.table.insertRow(i)
-            self.table.setItem(i, 0, QTableWidgetItem(str(p["id_изделия"])))
-            self.table.setItem(i, 1, QTableWidgetItem(p["артикул"]))
-            self.table.setItem(i, 2, QTableWidgetItem(p["наименование"]))
-            self.table.setItem(i, 3, QTableWidgetItem(p["тип"]))
-            self.table.setItem(i, 4, QTableWidgetItem(p["размеры"]))
-            self.table.setItem(i, 5, QTableWidgetItem(f"{p['стоимость']:,.2f} ₽"))
-            self.table.setItem(i, 6, QTableWidgetItem(str(p["количество_на_складе"])))
+        run_async(
+            self, Database.fetch_all, "SELECT * FROM sp_get_products()",
+            on_result=self.populate_table, key="load",
+        )
+
+    def populate_table(self, products):
+        self.table.set_rows(products)
+        self.components_table.setRowCount(0)
 
     def on_selection_changed(self):
         """При выборе изделия показываем его состав"""
@@ -103,9 +108,13 @@ class NomenclatureTab(QWidget):
             self.components_table.setRowCount(0)
             return
 
-        components = Database.fetch_all(
-            "SELECT * FROM sp_get_product_components(%s)", (product_id,)
+        run_async(
+            self, Database.fetch_all,
+            "SELECT * FROM sp_get_product_components(%s)", (product_id,),
+            on_result=self.populate_components, key="components",
         )
+
+    def populate_components(self, components):
         self.components_table.setRowCount(0)
         for i, c in enumerate(components):
             self.components_table.insertRow(i)
@@ -113,35 +122,27 @@ class NomenclatureTab(QWidget):
             self.components_table.setItem(i, 1, QTableWidgetItem(str(c["количество"])))
 
     def get_selected_id(self):
-        selected = self.table.selectedItems()
-        if not selected:
-            return None
-        row = selected[0].row()
-        return int(self.table.item(row, 0).text())
+        product = self.table.selected_record()
+        return product["id_изделия"] if product else None
 
     def edit_product(self):
-        product_id = self.get_selected_id()
-        if not product_id:
+        product = self.table.selected_record()
+        if not product:
             return
 
-        row = self.table.selectedItems()[0].row()
-        current_name = self.table.item(row, 1).text()
-        current_price = self.table.item(row, 2).text().replace(" ₽", "").replace(",", "")
-
-        dialog = EditProductDialog(self, product_id, current_name, float(current_price))
+        dialog = EditProductDialog(
+            self, product["id_изделия"], product["наименование"], float(product["стоимость"])
+        )
         if dialog.exec():
             self.load_data()
 
     def show_components(self):
-        product_id = self.get_selected_id()
-        if not product_id:
+        product = self.table.selected_record()
+        if not product:
             Toast.warning(self, "Внимание", "Выберите изделие")
             return
 
-        row = self.table.selectedItems()[0].row()
-        product_name = self.table.item(row, 1).text()
-
-        dialog = ProductComponentsDialog(self, product_id, product_name)
+        dialog = ProductComponentsDialog(self, product["id_изделия"], product["артикул"])
         dialog.exec()
 
     def add_product(self):
@@ -425,8 +426,8 @@ class AddProductDialog(QDialog):
         query = "SELECT id_заготовки, наименование, количество_готовых FROM заготовки WHERE 1=1"
         params = []
         if text:
-            query += " AND LOWER(наименование) LIKE %s"
-            params.append(f"%{text}%")
+            query += " AND наименование ILIKE %s"
+            params.append(contains_pattern(text))
         
         rows = Database.fetch_all(query, params)
         self.table_comps.setRowCount(0)
@@ -500,23 +501,22 @@ class AddProductDialog(QDialog):
         import string
         sku = "PRD-" + "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
         
-        res_prod = Database.insert_returning(
-            "INSERT INTO изделия (артикул_изделия, наименование, тип, размеры, стоимость, количество_на_складе) VALUES (%s, %s, %s, %s, %s, 0) RETURNING id_изделия",
-            (sku, name, self.type_input.text(), self.size_input.text(), price)
-        )
-        if not res_prod:
-             Toast.error(self, "Ошибка", "Не удалось создать изделие")
-             return
-             
-        p_id = res_prod["id_изделия"]
-        
-        # 2. Insert components
-        for c in self.chosen_components:
-            Database.execute(
-                "INSERT INTO состав_изделия (id_изделия, id_заготовки, количество_заготовки) VALUES (%s, %s, %s)",
-                (p_id, c["id"], c["qty"])
-            )
-            
+        try:
+            with Database.transaction() as tx:
+                p_id = tx.fetch_one(
+                    "INSERT INTO изделия (артикул_изделия, наименование, тип, размеры, стоимость, количество_на_складе) VALUES (%s, %s, %s, %s, %s, 0) RETURNING id_изделия",
+                    (sku, name, self.type_input.text(), self.size_input.text(), price)
+                )["id_изделия"]
+
+                # 2. Insert components (одной пачкой, в той же транзакции)
+                tx.execute_values(
+                    "INSERT INTO состав_изделия (id_изделия, id_заготовки, количество_заготовки) VALUES %s",
+                    [(p_id, c["id"], c["qty"]) for c in self.chosen_components],
+                )
+        except Exception as e:
+            Toast.error(self, "Ошибка", f"Не удалось создать изделие: {e}")
+            return
+
         Toast.success(self, "Успешно", f"Изделие '{name}' создано")
         super().accept()
 
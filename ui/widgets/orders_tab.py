@@ -1,6 +1,5 @@
 import qtawesome as qta
 from PyQt6.QtCore import QDate
-from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import QFileDialog
 from PyQt6.QtWidgets import (
     QComboBox,
@@ -11,22 +10,29 @@ from PyQt6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
-from business_logic.pdf_generator import PDFGenerator
+from config import config
+from db.async_executor import executor, run_async
 from db.database import Database
 from ui.dialogs.add_order_dialog import AddOrderDialog
+from ui.widgets.record_table import Column, RecordTableView, or_dash
+from ui.widgets.search_controller import SearchController
 from ui.widgets.toast import Toast
 
 
+PAGE_QUERY = "SELECT * FROM sp_search_orders_page(%s, %s, %s, %s, %s, %s, %s, %s)"
+
+
 class OrdersTab(QWidget):
     def __init__(self, current_user_id):
         super().__init__()
         self.current_user_id = current_user_id
+        self.page_size = config.ORDERS_PAGE_SIZE
+        self._filters = None  # фильтры последнего запроса первой страницы
+        self._has_more = False
         self.setup_ui()
         self.load_data()
 
@@ -41,7 +47,14 @@ class OrdersTab(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Клиент или № заказа...")
         self.search_input.setFixedWidth(200)
-        self.search_input.textChanged.connect(self.load_data)
+        self.search = SearchController(
+            self.search_input,
+            self.build_search_query,
+            self.populate_table,
+            matches=self.order_matches,
+            can_refine=self.order_search_refines,
+            limit=self.page_size,
+        )
 
         # 2. Фильтр статусов (обновлен список)
         self.status_filter = QComboBox()
@@ -111,17 +124,23 @@ class OrdersTab(QWidget):
         layout.addWidget(filter_group)
 
         # --- ТАБЛИЦА ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Клиент", "Менеджер", "Дата Заказа", "Статус", "Сумма", "Инфо"]
+        self.table = RecordTableView(
+            [
+                Column("ID", "id_заказа"),
+                Column("Клиент", "клиент"),
+                Column("Менеджер", "менеджер", fmt=or_dash),
+                Column("Дата Заказа", "дата_заказа"),
+                Column("Статус", "статус_заказа"),
+                Column("Сумма", "сумма_заказа", fmt=lambda v, r: f"{v:,.2f} ₽"),
+                Column("Инфо", "состояние_сроков"),
+            ],
+            row_style=self.order_style,
         )
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        # Следующая страница — когда пользователь докрутил почти до конца
+        self.table.verticalScrollBar().valueChanged.connect(self.on_scroll)
 
         layout.addWidget(self.table)
 
@@ -156,72 +175,81 @@ class OrdersTab(QWidget):
         layout.addLayout(status_btn_layout)
 
     def load_data(self):
-        """Загрузка данных через Хранимую Процедуру"""
-        try:
-            text_search = self.search_input.text().strip()
-            if not text_search:
-                text_search = None # Ensure it's None if empty
-
-            status = self.status_filter.currentText()
-            # If "Все статусы" is selected, pass None to the stored procedure
-            if status == "Все статусы":
-                status = None
-
-            d_from = self.date_from.date().toString("yyyy-MM-dd")
-            d_to = self.date_to.date().toString("yyyy-MM-dd")
-
-            # Вызываем функцию поиска (возвращает таблицу)
-            # Параметры: p_manager_id, p_search_text, p_status, p_date_from, p_date_to
-            query = "SELECT * FROM sp_search_orders(%s, %s, %s, %s, %s)"
-            params = (self.current_user_id, text_search, status, d_from, d_to)
-
-            orders = Database.fetch_all(query, params)
-            self.populate_table(orders)
-
-        except Exception as e:
-            print(f"Ошибка загрузки заказов: {e}")
+        """Полная перезагрузка (смена фильтров, обновление, изменение данных)"""
+        self.search.refresh()
+
+    def build_search_query(self, text_search):
+        """Запрос через Хранимую Процедуру (текст поиска уже в нижнем регистре)"""
+        if not text_search:
+            text_search = None # Ensure it's None if empty
+
+        status = self.status_filter.currentText()
+        # If "Все статусы" is selected, pass None to the stored procedure
+        if status == "Все статусы":
+            status = None
+
+        d_from = self.date_from.date().toString("yyyy-MM-dd")
+        d_to = self.date_to.date().toString("yyyy-MM-dd")
+
+        # Первая страница постраничного поиска (возвращает таблицу)
+        # Параметры: p_manager_id, p_search_text, p_status, p_date_from, p_date_to,
+        # ключ последней строки (p_after_date, p_after_id), p_limit
+        self._filters = (self.current_user_id, text_search, status, d_from, d_to)
+        return PAGE_QUERY, self._filters + (None, None, self.page_size)
+
+    @staticmethod
+    def order_matches(order, text):
+        """То же условие, что и в sp_search_orders_page"""
+        if text.isdigit():
+            return order["id_заказа"] == int(text)
+        return text in (order["клиент"] or "").lower()
+
+    @staticmethod
+    def order_search_refines(old_text, new_text):
+        # Число ищет по номеру заказа (точное совпадение), текст — по клиенту
+        if old_text == "":
+            return True
+        return old_text in new_text and not old_text.isdigit() and not new_text.isdigit()
 
     def populate_table(self, orders):
-        self.table.setRowCount(0)
-
-        for row_idx, order in enumerate(orders):
-            self.table.insertRow(row_idx)
-
-            items = [
-                str(order["id_заказа"]),
-                order["клиент"],
-                order["менеджер"] if order["менеджер"] else "—",
-                str(order["дата_заказа"]),
-                order["статус_заказа"],
-                f"{order['сумма_заказа']:,.2f} ₽",
-                order["состояние_сроков"],
-            ]
-
-            # --- ЛОГИКА ЦВЕТОВ ---
-            row_color = None
-            st = order["статус_заказа"]
-            cond = order["состояние_сроков"]
-
-            if cond == "ПРОСРОЧЕН":
-                row_color = QColor("#FFCDD2")  # Красный (Просрочено)
-            elif st == "в_работе":
-                row_color = QColor("#FFF9C4")  # Желтый (В работе) - NEW!
-            elif st == "выполнен":
-                row_color = QColor("#C8E6C9")  # Зеленый (Выполнен)
-            elif st == "отгружен" or st == "завершен":
-                row_color = QColor("#F5F5F5")  # Серый (Архив)
-                # Делаем текст серым для архива
-
-            for col_idx, text in enumerate(items):
-                item = QTableWidgetItem(text)
-                if row_color:
-                    item.setBackground(row_color)
-
-                # Для архива серый текст
-                if st in ["отгружен", "завершен"]:
-                    item.setForeground(QColor("#9E9E9E"))
+        # Новая первая страница: догрузка по старым фильтрам больше не нужна
+        executor().cancel(self, "page")
+        self.table.set_rows(orders)
+        self._has_more = len(orders) >= self.page_size
+
+    def on_scroll(self, value):
+        bar = self.table.verticalScrollBar()
+        if bar.maximum() - value <= bar.pageStep():
+            self.load_next_page()
+
+    def load_next_page(self):
+        if not self._has_more or executor().is_pending(self, "page"):
+            return
+        model = self.table.source_model
+        last = model.rowCount() - 1
+        after = (model.value(last, "дата_заказа"), model.value(last, "id_заказа"))
+        run_async(
+            self, Database.fetch_all, PAGE_QUERY, self._filters + after + (self.page_size,),
+            on_result=self.append_page, key="page",
+        )
 
-                self.table.setItem(row_idx, col_idx, item)
+    def append_page(self, orders):
+        self.table.append_rows(orders)
+        self._has_more = len(orders) >= self.page_size
+
+    @staticmethod
+    def order_style(order):
+        """Цвет строки по статусу и срокам: (фон, текст)"""
+        st = order["статус_заказа"]
+        if order["состояние_сроков"] == "ПРОСРОЧЕН":
+            return "#FFCDD2", None  # Красный (Просрочено)
+        if st == "в_работе":
+            return "#FFF9C4", None  # Желтый (В работе)
+        if st == "выполнен":
+            return "#C8E6C9", None  # Зеленый (Выполнен)
+        if st in ("отгружен", "завершен"):
+            return "#F5F5F5", "#9E9E9E"  # Серый (Архив), текст тоже серый
+        return None, None
 
     def open_add_order_dialog(self):
         # Передаем ID менеджера в диалог
@@ -231,14 +259,12 @@ class OrdersTab(QWidget):
 
     def print_order(self):
         # 1. Получаем ID выделенного заказа
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        order = self.table.selected_record()
+        if not order:
             Toast.warning(self, "Внимание", "Выберите заказ для печати")
             return
 
-        # ID у нас в 0-м столбце
-        row = selected_items[0].row()
-        order_id = self.table.item(row, 0).text()
+        order_id = str(order["id_заказа"])
 
         # 2. Спрашиваем куда сохранить
         file_path, _ = QFileDialog.getSaveFileName(
@@ -250,6 +276,8 @@ class OrdersTab(QWidget):
 
         # 3. Генерация
         try:
+            from business_logic.pdf_generator import PDFGenerator  # reportlab — только при печати
+
             generator = PDFGenerator(file_path)
             success, msg = generator.generate_order_blank(order_id)
 
@@ -263,13 +291,12 @@ class OrdersTab(QWidget):
 
     def change_status(self, new_status):
         """Изменение статуса выбранного заказа"""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        order = self.table.selected_record()
+        if not order:
             Toast.warning(self, "Внимание", "Выберите заказ")
             return
 
-        row = selected_items[0].row()
-        order_id = int(self.table.item(row, 0).text())
+        order_id = order["id_заказа"]
 
         result = Database.call_procedure("sp_update_order_status", [order_id, new_status])
         status = result.get("status")
@@ -285,13 +312,12 @@ class OrdersTab(QWidget):
         """Зафиксировать брак для выбранного заказа"""
         from PyQt6.QtWidgets import QDialog, QComboBox, QSpinBox
         
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        order = self.table.selected_record()
+        if not order:
             Toast.warning(self, "Внимание", "Выберите заказ")
             return
 
-        row = selected_items[0].row()
-        order_id = int(self.table.item(row, 0).text())
+        order_id = order["id_заказа"]
         
         # Get order items
         order_items = Database.fetch_all(
@@ -8,13 +8,14 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QPushButton,
     QSpinBox,
-    QTableWidget,
-    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
+from business_logic import scheduler
+from db.async_executor import run_async
 from db.database import Database
+from ui.widgets.record_table import Column, RecordTableView
 from ui.widgets.toast import Toast
 
 
@@ -43,20 +44,30 @@ class ProductionPlanningTab(QWidget):
         btn_add_task.setIcon(qta.icon("fa5s.plus"))
         btn_add_task.clicked.connect(self.add_manual_task)
 
+        self.btn_auto_plan = QPushButton("Автопланирование")
+        self.btn_auto_plan.setIcon(qta.icon("fa5s.calendar-check"))
+        self.btn_auto_plan.setToolTip("Распределить непринятые задачи по сборщикам и рабочим дням")
+        self.btn_auto_plan.clicked.connect(self.auto_plan)
+
         toolbar.addStretch()
+        toolbar.addWidget(self.btn_auto_plan)
         toolbar.addWidget(btn_refresh)
         toolbar.addWidget(btn_add_task)
         layout.addLayout(toolbar)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "ID заготовки", "ID заказа", "Заготовка", "План", "Факт", "Дедлайн", "Статус", "Сборщик"
+        self.table = RecordTableView([
+            Column("ID заготовки", "id_заготовки"),
+            Column("ID заказа", "id_заказа"),
+            Column("Заготовка", "заготовка"),
+            Column("План", "плановое_количество"),
+            Column("Факт", "фактическое_количество", fmt=lambda v, t: str(v or 0)),
+            Column("Дедлайн", "дедлайн"),
+            Column("Статус", "статус"),
+            Column("Сборщик", "сборщик"),
         ])
+        self.table.verticalHeader().setVisible(True)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         layout.addWidget(self.table)
 
         # Buttons
@@ -76,28 +87,20 @@ class ProductionPlanningTab(QWidget):
         layout.addLayout(btn_layout)
 
     def load_data(self):
-        tasks = Database.fetch_all("SELECT * FROM sp_get_production_plan_full()")
-        self.table.setRowCount(0)
-        for i, t in enumerate(tasks):
-            self.table.insertRow(i)
-            self.table.setItem(i, 0, QTableWidgetItem(str(t["id_заготовки"])))
-            self.table.setItem(i, 1, QTableWidgetItem(str(t["id_заказа"])))
-            self.table.setItem(i, 2, QTableWidgetItem(t["заготовка"]))
-            self.table.setItem(i, 3, QTableWidgetItem(str(t["плановое_количество"])))
-            self.table.setItem(i, 4, QTableWidgetItem(str(t["фактическое_количество"] or 0)))
-            self.table.setItem(i, 5, QTableWidgetItem(str(t["дедлайн"])))
-            self.table.setItem(i, 6, QTableWidgetItem(t["статус"]))
-            self.table.setItem(i, 7, QTableWidgetItem(t["сборщик"]))
+        run_async(
+            self, Database.fetch_all, "SELECT * FROM sp_get_production_plan_full()",
+            on_result=self.populate_table, key="load",
+        )
+
+    def populate_table(self, tasks):
+        self.table.set_rows(tasks)
 
     def get_selected_composite_key(self):
         """Returns (id_заготовки, id_заказа) or None"""
-        selected = self.table.selectedItems()
-        if not selected:
+        task = self.table.selected_record()
+        if not task:
             return None, None
-        row = selected[0].row()
-        id_заготовки = int(self.table.item(row, 0).text())
-        id_заказа = int(self.table.item(row, 1).text())
-        return id_заготовки, id_заказа
+        return task["id_заготовки"], task["id_заказа"]
 
     def assign_worker(self):
         id_заготовки, id_заказа = self.get_selected_composite_key()
@@ -125,6 +128,57 @@ class ProductionPlanningTab(QWidget):
         else:
             Toast.error(self, "Ошибка", msg)
 
+    def auto_plan(self):
+        self.btn_auto_plan.setEnabled(False)
+        run_async(
+            self, scheduler.build_schedule,
+            on_result=self.confirm_plan, on_error=self.on_plan_error, key="plan",
+        )
+
+    def confirm_plan(self, plan):
+        self.btn_auto_plan.setEnabled(True)
+        assignments, late = plan["назначения"], plan["опаздывают"]
+        if not assignments:
+            Toast.warning(self, "Автопланирование", "Нет задач, которые можно распределить")
+            return
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Автопланирование")
+        box.setIcon(QMessageBox.Icon.Question)
+        text = f"Будет распределено задач: {len(assignments)}."
+        if late:
+            text += f"\nНе успевают к сроку: {len(late)}."
+        if plan["не_распределены"]:
+            text += f"\nНет рабочих дней в графике для: {len(plan['не_распределены'])}."
+        box.setText(text + "\n\nПрименить план?")
+        if late:
+            box.setDetailedText("\n".join(
+                f"Заказ {t['id_заказа']}, {t['заготовка']}: срок {t['срок']:%d.%m.%Y},"
+                f" план {t['дата_план']:%d.%m.%Y} (+{t['опоздание']} дн.)"
+                for t in sorted(late, key=lambda t: -t["опоздание"])
+            ))
+        box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if box.exec() != QMessageBox.StandardButton.Yes:
+            return
+
+        self.btn_auto_plan.setEnabled(False)
+        run_async(
+            self, scheduler.apply_schedule, assignments,
+            on_result=self.on_plan_applied, on_error=self.on_plan_error, key="plan",
+        )
+
+    def on_plan_applied(self, result):
+        self.btn_auto_plan.setEnabled(True)
+        if result.get("status") == "OK":
+            Toast.success(self, "Успешно", result.get("message"))
+            self.load_data()
+        else:
+            Toast.error(self, "Ошибка", result.get("message", "Неизвестная ошибка"))
+
+    def on_plan_error(self, error):
+        self.btn_auto_plan.setEnabled(True)
+        Toast.error(self, "Ошибка", f"Не удалось построить план: {error}")
+
     def add_manual_task(self):
         dialog = AddManualTaskDialog(self)
         if dialog.exec():
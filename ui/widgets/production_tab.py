@@ -1,6 +1,4 @@
 import qtawesome as qta
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import (
     QComboBox,
     QFileDialog,
@@ -9,14 +7,15 @@ from PyQt6.QtWidgets import (
     QInputDialog,
     QLabel,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
+from psycopg2.extras import Json
 
-from business_logic.pdf_generator import PDFGenerator
+from db.async_executor import run_async
 from db.database import Database
+from db.records import Task
+from ui.widgets.record_table import Column, RecordTableView
 from ui.widgets.toast import Toast
 
 
@@ -57,16 +56,23 @@ class ProductionTab(QWidget):
         layout.addLayout(top_layout)
 
         # --- ТАБЛИЦА ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels(
-            ["ID заготовки", "ID заказа", "Заготовка", "План", "Факт", "Дедлайн", "Статус", "Исполнитель"]
+        self.table = RecordTableView(
+            [
+                Column("ID заготовки", "id_заготовки"),
+                Column("ID заказа", "id_заказа"),
+                Column("Заготовка", "заготовка"),
+                Column("План", "плановое_количество"),
+                Column("Факт", "фактическое_количество"),
+                Column("Дедлайн", "дедлайн"),
+                Column("Статус", "статус"),
+                Column("Исполнитель", "id_сборщика", fmt=self.executor_label),
+            ],
+            row_style=self.task_style,
         )
+        self.table.verticalHeader().setVisible(True)
         self.table.horizontalHeader().setSectionResizeMode(
             1, QHeaderView.ResizeMode.Stretch
         )
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
 
         layout.addWidget(self.table)
 
@@ -77,6 +83,11 @@ class ProductionTab(QWidget):
         self.btn_take.setObjectName("PrimaryButton")
         self.btn_take.clicked.connect(self.take_task)
 
+        self.btn_take_next = QPushButton("Взять следующую")
+        self.btn_take_next.setIcon(qta.icon("fa5s.forward"))
+        self.btn_take_next.setToolTip("Взять самую срочную свободную задачу, на которую хватает материалов")
+        self.btn_take_next.clicked.connect(self.take_next_task)
+
         self.btn_report = QPushButton("Сдать работу (+ кол-во)")
         self.btn_report.setStyleSheet(
             "background-color: #27AE60; color: white; padding: 12px; border-radius: 5px;"
@@ -84,6 +95,7 @@ class ProductionTab(QWidget):
         self.btn_report.clicked.connect(self.report_progress)
 
         action_layout.addWidget(self.btn_take)
+        action_layout.addWidget(self.btn_take_next)
         action_layout.addWidget(self.btn_report)
 
         layout.addLayout(action_layout)
@@ -107,58 +119,35 @@ class ProductionTab(QWidget):
         # ИСПРАВЛЕНО: дата_план -> дедлайн (так называется колонка во View)
         query += " ORDER BY дедлайн ASC"
 
-        try:
-            tasks = Database.fetch_all(query, params)
-            self.populate_table(tasks)
-        except Exception as e:
-            print("Ошибка загрузки задач:", e)
+        run_async(
+            self, Database.fetch_all, query, params, Task,
+            on_result=self.populate_table,
+            on_error=lambda e: print("Ошибка загрузки задач:", e),
+            key="load",
+        )
 
     def populate_table(self, tasks):
-        self.table.setRowCount(0)
-        for row_idx, task in enumerate(tasks):
-            self.table.insertRow(row_idx)
-
-            # Сохраняем составной ключ задачи
-            id_заготовки = task["id_заготовки"]
-            id_заказа = task["id_заказа"]
-
-            items = [
-                str(id_заготовки),
-                str(id_заказа),
-                task["заготовка"],
-                str(task["плановое_количество"]),
-                str(task["фактическое_количество"]),
-                str(task["дедлайн"]),
-                task["статус"],
-                # Корректное отображение исполнителя
-                "Свободно" if task["id_сборщика"] is None else ("Я" if task["id_сборщика"] == self.user_id else "Занято"),
-            ]
-
-            # Цвета
-            row_color = None
-            if task["статус"] == "принято":
-                row_color = QColor("#E3F2FD")  # Голубой (свободно)
-            if task["статус"] == "в_работе":
-                row_color = QColor("#FFF9C4")  # Желтый
-            if task["статус"] == "выполнено":
-                row_color = QColor("#C8E6C9")  # Зеленый
-            if task["статус"] == "просрочено":
-                row_color = QColor("#FFCDD2")  # Красный
-
-            for col_idx, text in enumerate(items):
-                item = QTableWidgetItem(text)
-                if row_color:
-                    item.setBackground(row_color)
-                self.table.setItem(row_idx, col_idx, item)
-
-            # Храним данные в 0-й ячейке
-            self.table.item(row_idx, 0).setData(Qt.ItemDataRole.UserRole, task)
+        self.table.set_rows(tasks)
+
+    def executor_label(self, value, task):
+        # Корректное отображение исполнителя
+        if value is None:
+            return "Свободно"
+        return "Я" if value == self.user_id else "Занято"
+
+    @staticmethod
+    def task_style(task):
+        # Цвета
+        color = {
+            "принято": "#E3F2FD",  # Голубой (свободно)
+            "в_работе": "#FFF9C4",  # Желтый
+            "выполнено": "#C8E6C9",  # Зеленый
+            "просрочено": "#FFCDD2",  # Красный
+        }.get(task["статус"])
+        return color, None
 
     def get_selected_task(self):
-        row = self.table.currentRow()
-        if row == -1:
-            return None
-        return self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        return self.table.selected_record()
 
     def take_task(self):
         task = self.get_selected_task()
@@ -219,6 +208,24 @@ class ProductionTab(QWidget):
         except Exception as e:
             Toast.error(self, "Критическая ошибка", str(e))
 
+    def take_next_task(self):
+        result = Database.call_procedure("sp_claim_next_task", [self.user_id, Json({})])
+        status = result.get("status")
+        if status == "OK":
+            Toast.success(self, "В работе", f"{result.get('message')}.\nМатериалы списаны.")
+            self.load_data()
+        elif status == "WARNING":
+            Toast.warning(self, "Очередь", self.describe_shortages(result))
+        else:
+            Toast.error(self, "Ошибка", self.describe_shortages(result))
+
+    @staticmethod
+    def describe_shortages(result):
+        lines = [result.get("message", "Неизвестная ошибка")]
+        for s in result.get("shortages") or []:
+            lines.append(f"{s['наименование']}: нужно {s['нужно']}, есть {s['есть']}")
+        return "\n".join(lines)
+
     def report_progress(self):
         task = self.get_selected_task()
         if not task:
@@ -262,6 +269,8 @@ class ProductionTab(QWidget):
             return
 
         try:
+            from business_logic.pdf_generator import PDFGenerator  # reportlab — только при печати
+
             gen = PDFGenerator(file_path)
             success, msg = gen.generate_assembler_tasks(self.user_id)
             if success:
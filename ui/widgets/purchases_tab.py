@@ -9,25 +9,36 @@ from PyQt6.QtWidgets import (
     QLineEdit,
     QPushButton,
     QSpinBox,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
+from config import config
+from db.async_executor import executor, run_async
 from db.database import Database
+from ui.widgets.record_table import Column, RecordTableView
+from ui.widgets.search_controller import SearchController, contains_pattern
 from ui.widgets.toast import Toast
 
+PAGE_QUERY = "SELECT * FROM sp_get_purchases(%s, %s, %s, %s)"
+
 
 class PurchasesTab(QWidget):
     """Tab for director to manage material purchases.
 
     Allows: list purchases, create new purchase with several materials,
+    generate draft purchases from shortages and minimum stock,
     change status and confirm executed purchases (which increases stock).
     """
 
     def __init__(self):
         super().__init__()
+        self.page_size = config.PURCHASES_PAGE_SIZE
+        self._search = None
+        self._has_more = False
         self.setup_ui()
         self.load_purchases()
 
@@ -44,6 +55,11 @@ class PurchasesTab(QWidget):
         btn_new.setIcon(qta.icon("fa5s.plus"))
         btn_new.clicked.connect(self.open_new_purchase_dialog)
 
+        self.btn_propose = QPushButton("Сформировать закупку")
+        self.btn_propose.setIcon(qta.icon("fa5s.magic"))
+        self.btn_propose.setToolTip("Черновики закупок по нехватке под открытые заказы и минимальному остатку")
+        self.btn_propose.clicked.connect(self.propose_purchases)
+
         btn_refresh = QPushButton()
         btn_refresh.setIcon(qta.icon("fa5s.sync-alt"))
         btn_refresh.clicked.connect(self.load_purchases)
@@ -57,108 +73,147 @@ class PurchasesTab(QWidget):
 
         toolbar.addWidget(self.search_input)
         toolbar.addWidget(btn_new)
+        toolbar.addWidget(self.btn_propose)
         toolbar.addWidget(btn_confirm)
         toolbar.addWidget(btn_cancel)
         toolbar.addWidget(btn_refresh)
 
         layout.addLayout(toolbar)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Дата", "Поставщик", "Статус", "Сумма"]
-        )
+        self.table = RecordTableView([
+            Column("ID", "id_закупки"),
+            Column("Дата", "дата_закупки"),
+            Column("Поставщик", "поставщик"),
+            Column("Статус", "статус"),
+            Column("Сумма", "сумма", fmt=lambda v, r: f"{v:.2f}"),
+        ])
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         self.table.doubleClicked.connect(self.show_details)
+        self.table.verticalScrollBar().valueChanged.connect(self.on_scroll)
         layout.addWidget(self.table)
 
     def load_purchases(self):
-        text = self.search_input.text().strip().lower()
-        query = "SELECT id_закупки, дата_закупки, поставщик, статус FROM закупки_материалов WHERE 1=1"
-        params = []
-        if text:
-            query += " AND (LOWER(поставщик) LIKE %s OR LOWER(статус) LIKE %s)"
-            like = f"%{text}%"
-            params.extend([like, like])
-        query += " ORDER BY дата_закупки DESC"
+        # Первая страница; остальные догружаются при прокрутке (load_next_page)
+        self._search = self.search_input.text().strip() or None
+        run_async(
+            self, Database.fetch_all, PAGE_QUERY, (self._search, None, None, self.page_size),
+            on_result=self.populate_table, key="load",
+        )
 
-        rows = Database.fetch_all(query, params)
-        # compute sum per purchase
-        self.table.setRowCount(0)
-        for i, r in enumerate(rows):
-            self.table.insertRow(i)
-            self.table.setItem(i, 0, QTableWidgetItem(str(r["id_закупки"])))
-            self.table.setItem(i, 1, QTableWidgetItem(str(r["дата_закупки"])))
-            self.table.setItem(i, 2, QTableWidgetItem(r["поставщик"] or ""))
-            self.table.setItem(i, 3, QTableWidgetItem(r["статус"] or ""))
-
-            sum_row = Database.fetch_one(
-                "SELECT COALESCE(SUM(количество * цена_закупки), 0) AS s FROM состав_закупки WHERE id_закупки = %s",
-                (r["id_закупки"],),
-            )
-            total = float(sum_row["s"]) if sum_row else 0.0
-            self.table.setItem(i, 4, QTableWidgetItem(f"{total:.2f}"))
+    def populate_table(self, rows):
+        executor().cancel(self, "page")
+        self.table.set_rows(rows)
+        self._has_more = len(rows) >= self.page_size
+
+    def on_scroll(self, value):
+        bar = self.table.verticalScrollBar()
+        if bar.maximum() - value <= bar.pageStep():
+            self.load_next_page()
+
+    def load_next_page(self):
+        if not self._has_more or executor().is_pending(self, "page"):
+            return
+        model = self.table.source_model
+        last = model.rowCount() - 1
+        after = (model.value(last, "дата_закупки"), model.value(last, "id_закупки"))
+        run_async(
+            self, Database.fetch_all, PAGE_QUERY, (self._search,) + after + (self.page_size,),
+            on_result=self.append_page, key="page",
+        )
+
+    def append_page(self, rows):
+        self.table.append_rows(rows)
+        self._has_more = len(rows) >= self.page_size
 
     def open_new_purchase_dialog(self):
         d = NewPurchaseDialog(self)
         if d.exec():
             supplier, items = d.get_data()
-            # Insert into закупки_материалов
-            res = Database.insert_returning(
-                "INSERT INTO закупки_материалов (поставщик, статус) VALUES (%s, %s) RETURNING id_закупки",
-                (supplier, "ожидает_подтверждения"),
-            )
-            if not res:
-                Toast.error(self, "Ошибка", "Не удалось создать закупку")
+            # Шапка и позиции — одной транзакцией: без позиций закупка не создается
+            try:
+                with Database.transaction() as tx:
+                    purchase_id = tx.fetch_one(
+                        "INSERT INTO закупки_материалов (поставщик, статус) VALUES (%s, %s) RETURNING id_закупки",
+                        (supplier, "ожидает_подтверждения"),
+                    )["id_закупки"]
+                    tx.execute_values(
+                        "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES %s",
+                        [(purchase_id, mat["id"], mat["qty"], mat["price"]) for mat in items],
+                    )
+            except Exception as e:
+                Toast.error(self, "Ошибка", f"Не удалось создать закупку: {e}")
                 return
-            purchase_id = res["id_закупки"]
-            # Insert items
-            for mat in items:
-                Database.execute(
-                    "INSERT INTO состав_закупки (id_закупки, id_материала, количество, цена_закупки) VALUES (%s, %s, %s, %s)",
-                    (purchase_id, mat["id"], mat["qty"], mat["price"]),
-                )
             Toast.success(self, "ОК", "Закупка создана")
             self.load_purchases()
 
-    def confirm_selected(self):
-        selected = self.table.currentRow()
-        if selected < 0:
-            Toast.error(self, "Ошибка", "Выберите закупку")
-            return
-        purchase_id = int(self.table.item(selected, 0).text())
-        # Update status to выполнено and add quantities to materials
-        ok, msg = Database.execute(
-            "UPDATE закупки_материалов SET статус = %s WHERE id_закупки = %s",
-            ("выполнено", purchase_id),
+    def propose_purchases(self):
+        self.btn_propose.setEnabled(False)
+        run_async(
+            self, self.fetch_proposals,
+            on_result=self.show_proposals, on_error=self.on_proposals_error, key="propose",
         )
-        if not ok:
-            Toast.error(self, "Ошибка", msg)
+
+    @staticmethod
+    def fetch_proposals():
+        """Выполняется в фоне: потребность по MRP и предложения по ней"""
+        from business_logic import purchase_planner  # numpy — только при расчете
+
+        requirements = purchase_planner.requirements_payload()
+        return requirements, purchase_planner.propose_purchases(requirements)
+
+    def show_proposals(self, result):
+        self.btn_propose.setEnabled(True)
+        requirements, proposals = result
+        if not proposals:
+            Toast.success(self, "Закупка", "Закупать нечего: остатков достаточно")
             return
-        # Add quantities to materials (increase stock)
-        items = Database.fetch_all(
-            "SELECT id_материала, количество FROM состав_закупки WHERE id_закупки = %s",
-            (purchase_id,),
-        )
-        for it in items:
-            Database.execute(
-                "UPDATE материалы SET количество_на_складе = COALESCE(количество_на_складе,0) + %s WHERE id_материала = %s",
-                (it["количество"], it["id_материала"]),
+        if PurchaseProposalsDialog(proposals, self).exec():
+            from business_logic import purchase_planner
+
+            self.btn_propose.setEnabled(False)
+            run_async(
+                self, purchase_planner.create_purchase_drafts, requirements,
+                on_result=self.on_drafts_created, on_error=self.on_proposals_error, key="propose",
             )
-        Toast.success(self, "ОК", "Закупка подтверждена и склад обновлён")
-        self.load_purchases()
+
+    def on_drafts_created(self, result):
+        self.btn_propose.setEnabled(True)
+        if result.get("status") == "OK":
+            Toast.success(self, "ОК", result.get("message"))
+            self.load_purchases()
+        elif result.get("status") == "WARNING":
+            # Часть строк без поставщика или цены в черновики не вошла
+            Toast.warning(self, "Внимание", result.get("message"))
+            self.load_purchases()
+        else:
+            Toast.error(self, "Ошибка", result.get("message", "Неизвестная ошибка"))
+
+    def on_proposals_error(self, error):
+        self.btn_propose.setEnabled(True)
+        Toast.error(self, "Ошибка", f"Не удалось сформировать закупку: {error}")
+
+    def confirm_selected(self):
+        purchases = self.table.selected_records()
+        if not purchases:
+            Toast.error(self, "Ошибка", "Выберите закупку")
+            return
+        # Статус и остатки всех выбранных закупок — одной транзакцией в БД
+        result = Database.call_procedure("sp_confirm_purchase", [[p["id_закупки"] for p in purchases]])
+        if result.get("status") == "OK":
+            Toast.success(self, "ОК", result.get("message"))
+            self.load_purchases()
+        else:
+            Toast.error(self, "Ошибка", result.get("message", "Неизвестная ошибка"))
 
     def cancel_selected(self):
-        selected = self.table.currentRow()
-        if selected < 0:
+        purchase = self.table.selected_record()
+        if not purchase:
             Toast.error(self, "Ошибка", "Выберите закупку")
             return
-        purchase_id = int(self.table.item(selected, 0).text())
+        purchase_id = purchase["id_закупки"]
         
         result = Database.call_procedure("sp_cancel_purchase", [purchase_id])
         if result.get("status") == "OK":
@@ -169,11 +224,11 @@ class PurchasesTab(QWidget):
 
     def show_details(self):
         """Show popup with purchase details"""
-        selected = self.table.currentRow()
-        if selected < 0:
+        purchase = self.table.selected_record()
+        if not purchase:
             return
             
-        purchase_id = int(self.table.item(selected, 0).text())
+        purchase_id = purchase["id_закупки"]
         
         # Get items for this purchase
         items = Database.fetch_all(
@@ -215,6 +270,53 @@ class PurchasesTab(QWidget):
         d.exec()
         
 
+class PurchaseProposalsDialog(QDialog):
+    """Предпросмотр черновиков закупок перед созданием"""
+
+    def __init__(self, proposals, parent=None):
+        super().__init__(parent)
+        suppliers = {p["поставщик"] for p in proposals if not p["замечание"]}
+        self.setWindowTitle(f"Сформировать закупку: {len(suppliers)} пост., {len(proposals)} поз.")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout(self)
+        table = RecordTableView([
+            Column("Поставщик", "поставщик", fmt=lambda v, r: v or "Поставщик не определен"),
+            Column("Материал", "наименование"),
+            Column("На складе", "на_складе"),
+            Column("В пути", "в_пути"),
+            Column("Потребность", "потребность"),
+            Column("Мин. остаток", "минимальный_остаток"),
+            Column("Заказать", "количество", fmt=lambda v, r: f"{v} {r['единица_измерения'] or ''}"),
+            Column("Цена", "цена", fmt=lambda v, r: f"{v:.2f}" if v is not None else "—"),
+            Column("Нужно к", "нужно_к", fmt=lambda v, r: v.strftime("%d.%m.%Y") if v else "—"),
+            Column("Замечание", "замечание", fmt=lambda v, r: v or ""),
+        ])
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        table.set_rows(proposals)
+        layout.addWidget(table)
+
+        ready = [p for p in proposals if not p["замечание"]]
+        total = sum(p["количество"] * p["цена"] for p in ready)
+        layout.addWidget(QLabel(f"Итого: {total:,.2f} ₽"))
+        skipped = len(proposals) - len(ready)
+        if skipped:
+            layout.addWidget(QLabel(
+                f"Без поставщика или цены: {skipped} поз. — в черновики не войдут, закажите их вручную"
+            ))
+
+        btns = QHBoxLayout()
+        btns.addStretch()
+        btn_create = QPushButton("Создать черновики")
+        btn_create.setIcon(qta.icon("fa5s.check"))
+        btn_create.clicked.connect(self.accept)
+        btn_cancel = QPushButton("Отмена")
+        btn_cancel.clicked.connect(self.reject)
+        btns.addWidget(btn_create)
+        btns.addWidget(btn_cancel)
+        layout.addLayout(btns)
+
+
 class NewPurchaseDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -234,7 +336,10 @@ class NewPurchaseDialog(QDialog):
         self.material_search.setPlaceholderText(
             "Поиск материала по наименованию или артикулу"
         )
-        self.material_search.textChanged.connect(self.load_materials)
+        self.search = SearchController(
+            self.material_search, self.build_materials_query, self.populate_materials,
+            matches=self.material_matches,
+        )
         top.addWidget(self.material_search)
 
         layout.addLayout(top)
@@ -276,16 +381,24 @@ class NewPurchaseDialog(QDialog):
         self.load_materials()
 
     def load_materials(self):
-        q = self.material_search.text().strip().lower()
+        self.search.refresh()
+
+    def build_materials_query(self, q):
         sql = "SELECT id_материала, артикул_материала AS артикул, наименование FROM материалы WHERE 1=1"
         params = []
         if q:
             sql += (
-                " AND (LOWER(наименование) LIKE %s OR LOWER(артикул_материала) LIKE %s)"
+                " AND (наименование ILIKE %s OR артикул_материала ILIKE %s)"
             )
-            like = f"%{q}%"
+            like = contains_pattern(q)
             params.extend([like, like])
-        rows = Database.fetch_all(sql, params)
+        return sql, params
+
+    @staticmethod
+    def material_matches(row, text):
+        return text in (row["наименование"] or "").lower() or text in (row["артикул"] or "").lower()
+
+    def populate_materials(self, rows):
         self.materials_table.setRowCount(0)
         for i, r in enumerate(rows):
             self.materials_table.insertRow(i)
@@ -0,0 +1,256 @@
+"""
+Таблица записей на модели/представлении вместо QTableWidget.
+
+Строки хранятся кортежами значений (одна общая схема полей на всю таблицу),
+текст, цвета и иконки вычисляются в data() только для видимых ячеек
+и кешируются. Сортировка и фильтрация — через QSortFilterProxyModel.
+
+    self.table = RecordTableView([
+        Column("ID", "id_заказа"),
+        Column("Сумма", "сумма_заказа", fmt=lambda v, r: f"{v:,.2f} ₽"),
+    ], row_style=self.order_style)
+    self.table.set_rows(rows)
+    order = self.table.selected_record()  # dict или None
+"""
+import datetime
+from decimal import Decimal
+
+import qtawesome as qta
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt6.QtGui import QBrush, QColor
+from PyQt6.QtWidgets import QAbstractItemView, QTableView
+
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class Column:
+    """
+    Описание колонки: заголовок, поле записи и необязательные функции
+    fmt(value, row) -> str, icon(row) -> (имя_иконки, цвет) | None,
+    foreground(row) -> цвет текста ячейки | None, tooltip(row) -> str | None.
+    """
+
+    __slots__ = ("title", "field", "fmt", "icon", "align", "foreground", "tooltip")
+
+    def __init__(self, title, field, fmt=None, icon=None, align=None, foreground=None, tooltip=None):
+        self.title = title
+        self.field = field
+        self.fmt = fmt
+        self.icon = icon
+        self.align = align
+        self.foreground = foreground
+        self.tooltip = tooltip
+
+
+class RowView:
+    """Доступ к полям строки-кортежа по имени (для fmt/icon/row_style)"""
+
+    __slots__ = ("_values", "_index")
+
+    def __init__(self, values, index):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, field):
+        return self._values[self._index[field]]
+
+    def get(self, field, default=None):
+        i = self._index.get(field)
+        return default if i is None else self._values[i]
+
+
+def or_dash(value, row=None):
+    """fmt для колонок, где пустое значение показывается прочерком"""
+    return "—" if value is None or value == "" else str(value)
+
+
+def _is_namedtuple(row):
+    return isinstance(row, tuple) and hasattr(row, "_fields")
+
+
+def _sort_value(value):
+    """Значение, которое Qt умеет сравнивать сам (без вызовов Python)"""
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    row_style(row) -> (фон, цвет_текста) — строки с цветом ('#RRGGBB') или None.
+    """
+
+    def __init__(self, columns, row_style=None, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.row_style = row_style
+        self.fields = []
+        self._index = {}
+        self._rows = []
+        self._style_cache = {}
+        self._brushes = {}
+        self._icons = {}
+
+    # --- Данные ---
+
+    def set_rows(self, rows):
+        """
+        Заменяет данные списком словарей (например, результат Database.fetch_all)
+        или записей db.rows; строки-namedtuple хранятся как есть, без копирования
+        """
+        rows = list(rows)
+        if rows and _is_namedtuple(rows[0]):
+            self.set_tuples(rows[0]._fields, rows)
+            return
+        fields = list(rows[0].keys()) if rows else self.fields
+        self.set_tuples(fields, [tuple(r.values()) for r in rows])
+
+    def set_tuples(self, fields, tuples):
+        self.beginResetModel()
+        self.fields = list(fields)
+        self._index = {f: i for i, f in enumerate(self.fields)}
+        self._rows = tuples if isinstance(tuples, list) else list(tuples)
+        self._style_cache.clear()
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """Добавляет строки в конец (подгрузка следующей страницы)"""
+        rows = list(rows)
+        if not rows:
+            return
+        if not self.fields:
+            self.set_rows(rows)
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        if _is_namedtuple(rows[0]) and list(rows[0]._fields) == self.fields:
+            self._rows.extend(rows)
+        else:
+            self._rows.extend(tuple(r[f] for f in self.fields) for r in rows)
+        self.endInsertRows()
+
+    def record(self, row):
+        return dict(zip(self.fields, self._rows[row]))
+
+    def value(self, row, field):
+        return self._rows[row][self._index[field]]
+
+    # --- Qt API ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section].title
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        column = self.columns[col]
+        values = self._rows[row]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = values[self._index[column.field]]
+            if column.fmt is not None:
+                return column.fmt(value, RowView(values, self._index))
+            return "" if value is None else str(value)
+        if role == SORT_ROLE:
+            return _sort_value(values[self._index[column.field]])
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._style(row)[0]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if column.foreground is not None:
+                color = column.foreground(RowView(values, self._index))
+                if color is not None:
+                    return self._brush(color)
+            return self._style(row)[1]
+        if role == Qt.ItemDataRole.ToolTipRole and column.tooltip is not None:
+            return column.tooltip(RowView(values, self._index))
+        if role == Qt.ItemDataRole.DecorationRole and column.icon is not None:
+            spec = column.icon(RowView(values, self._index))
+            return self._icon(spec) if spec else None
+        if role == Qt.ItemDataRole.TextAlignmentRole and column.align is not None:
+            return column.align
+        return None
+
+    # --- Ленивые стили ---
+
+    def _style(self, row):
+        style = self._style_cache.get(row)
+        if style is None:
+            bg = fg = None
+            if self.row_style is not None:
+                bg, fg = self.row_style(RowView(self._rows[row], self._index))
+            style = self._style_cache[row] = (self._brush(bg), self._brush(fg))
+        return style
+
+    def _brush(self, color):
+        if color is None:
+            return None
+        brush = self._brushes.get(color)
+        if brush is None:
+            brush = self._brushes[color] = QBrush(QColor(color))
+        return brush
+
+    def _icon(self, spec):
+        icon = self._icons.get(spec)
+        if icon is None:
+            name, color = spec
+            icon = self._icons[spec] = qta.icon(name, color=color)
+        return icon
+
+
+class RecordTableView(QTableView):
+    """QTableView с RecordTableModel и прокси для сортировки/фильтрации"""
+
+    def __init__(self, columns, row_style=None, parent=None):
+        super().__init__(parent)
+        self.source_model = RecordTableModel(columns, row_style, self)
+
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.source_model)
+        self.proxy.setSortRole(SORT_ROLE)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.proxy.setFilterKeyColumn(-1)
+        self.setModel(self.proxy)
+
+        self.verticalHeader().setVisible(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        # Пока пользователь не кликнул по заголовку — порядок как пришел из БД
+        self.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.setSortingEnabled(True)
+
+    def set_rows(self, rows):
+        self.source_model.set_rows(rows)
+
+    def append_rows(self, rows):
+        self.source_model.append_rows(rows)
+
+    def set_filter_text(self, text):
+        self.proxy.setFilterFixedString(text)
+
+    def rowCount(self):
+        return self.proxy.rowCount()
+
+    def record_at(self, view_row):
+        source = self.proxy.mapToSource(self.proxy.index(view_row, 0))
+        return self.source_model.record(source.row())
+
+    def selected_records(self):
+        rows = sorted(idx.row() for idx in self.selectionModel().selectedRows())
+        return [self.record_at(r) for r in rows]
+
+    def selected_record(self):
+        rows = self.selectionModel().selectedRows()
+        return self.record_at(rows[0].row()) if rows else None
@@ -12,7 +12,7 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from business_logic.pdf_generator import PDFGenerator
+from db.async_executor import run_async
 from db.database import Database
 from ui.widgets.toast import Toast
 
@@ -61,6 +61,8 @@ class ScheduleTab(QWidget):
         """
         )
 
+        # График подгружается помесячно при листании
+        self.calendar.currentPageChanged.connect(self.load_schedule)
         layout.addWidget(self.calendar)
 
     def create_legend_item(self, color, text):
@@ -78,11 +80,19 @@ class ScheduleTab(QWidget):
         l.addWidget(lbl)
         return container
 
-    def load_schedule(self):
-        # Получаем график сотрудника
-        query = "SELECT дата, статус FROM график_работы WHERE id_сотрудника = %s"
-        schedule = Database.fetch_all(query, (self.user_id,))
+    def load_schedule(self, *_):
+        # График сотрудника за видимый месяц с соседними днями сетки (±6 дней)
+        first_day = QDate(self.calendar.yearShown(), self.calendar.monthShown(), 1)
+        query = "SELECT дата, статус FROM sp_график_за_период(%s, %s, %s)"
+        run_async(
+            self, Database.fetch_all, query,
+            ([self.user_id], first_day.addDays(-6).toPyDate(), first_day.addMonths(1).addDays(5).toPyDate()),
+            on_result=self.paint_schedule, key="load",
+        )
 
+    def paint_schedule(self, schedule):
+        # Сбрасываем раскраску прошлого месяца
+        self.calendar.setDateTextFormat(QDate(), QTextCharFormat())
         for entry in schedule:
             date_obj = entry["дата"]  # datetime.date
             status = entry["статус"]
@@ -115,6 +125,8 @@ class ScheduleTab(QWidget):
             return
 
         try:
+            from business_logic.pdf_generator import PDFGenerator  # reportlab — только при печати
+
             gen = PDFGenerator(file_path)
             success, msg = gen.generate_assembler_schedule(self.user_id)
             if success:
@@ -0,0 +1,133 @@
+from PyQt6.QtCore import QObject, QTimer
+
+from config import config
+from db.async_executor import executor, run_async
+from db.database import Database
+
+
+def contains_refinement(old_text, new_text):
+    """Поиск по подстроке: результат для new_text ⊆ результата для old_text"""
+    return old_text in new_text
+
+
+def contains_pattern(text):
+    r"""
+    Шаблон ILIKE "содержит text" (в SQL — fn_contains_pattern). %, _ и \
+    экранируются (\ — экранирующий символ LIKE по умолчанию): SQL ищет ту же
+    буквальную подстроку, что и фильтр в памяти (text in ...).
+    """
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SearchController(QObject):
+    """
+    Поиск с задержкой ввода и уточнением результатов в памяти.
+
+    - запрос уходит только после паузы debounce_ms;
+    - если новый текст уточняет один из недавних (по умолчанию: содержит его),
+      строки фильтруются в памяти через matches(row, text) без обращения к БД;
+    - иначе запрос build_query(text) -> (sql, params) выполняется в фоне
+      (db.async_executor), а результат кешируется. Если вернулось limit строк,
+      набор считается неполным и для уточнения не используется.
+
+    build_query вызывается в GUI-потоке, поэтому может читать остальные фильтры.
+
+    fetch_mode — вид строк результата (Database.fetch_all(..., mode=...)):
+    компактные записи дешевле держать в истории уточнений.
+
+    Вкладка вызывает invalidate() при смене остальных фильтров или данных.
+    """
+
+    HISTORY_SIZE = 8
+
+    def __init__(
+        self,
+        line_edit,
+        build_query,
+        on_results,
+        matches,
+        can_refine=contains_refinement,
+        debounce_ms=None,
+        limit=None,
+        key="search",
+        fetch_mode="dict",
+    ):
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.build_query = build_query
+        self.on_results = on_results
+        self.matches = matches
+        self.can_refine = can_refine
+        self.limit = limit
+        self.key = key
+        self.fetch_mode = fetch_mode
+
+        self._history = []  # [(text, rows)] — полные наборы, новые в конце
+        self._pending_text = None
+        self.db_fetches = 0  # для статистики/тестов
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(config.SEARCH_DEBOUNCE_MS if debounce_ms is None else debounce_ms)
+        self.timer.timeout.connect(self.run)
+        line_edit.textChanged.connect(self.timer.start)
+
+    @staticmethod
+    def normalize(text):
+        return text.strip().lower()
+
+    def current_text(self):
+        return self.normalize(self.line_edit.text())
+
+    def invalidate(self):
+        self._history.clear()
+        self._pending_text = None
+
+    def refresh(self):
+        """Сбрасывает кеш и сразу загружает данные из БД"""
+        self.invalidate()
+        self.run()
+
+    def run(self):
+        self.timer.stop()
+        text = self.current_text()
+        base = self._find_base(text)
+        if base is None:
+            if self._pending_text == text and executor().is_pending(self, self.key):
+                return  # такой же запрос уже выполняется
+            self._pending_text = text
+            self.db_fetches += 1
+            query, params = self.build_query(text)
+            run_async(
+                self, Database.fetch_all, query, params, self.fetch_mode,
+                on_result=lambda rows: self._on_fetched(text, rows), key=self.key,
+            )
+            return
+
+        # Ответ из кеша: более старый запрос в полете уже не нужен
+        executor().cancel(self, self.key)
+        base_text, base_rows = base
+        rows = base_rows if base_text == text else [r for r in base_rows if self.matches(r, text)]
+        self._remember(text, rows)
+        self.on_results(rows)
+
+    def _find_base(self, text):
+        best = None
+        for old_text, rows in self._history:
+            if old_text == text or self.can_refine(old_text, text):
+                if best is None or len(old_text) >= len(best[0]):
+                    best = (old_text, rows)
+        return best
+
+    def _on_fetched(self, text, rows):
+        self._pending_text = None
+        rows = list(rows)
+        if self.limit is None or len(rows) < self.limit:
+            self._remember(text, rows)
+        self.on_results(rows)
+
+    def _remember(self, text, rows):
+        self._history = [(t, r) for t, r in self._history if t != text]
+        self._history.append((text, rows))
+        del self._history[: -self.HISTORY_SIZE]
@@ -1,19 +1,17 @@
 import qtawesome as qta
 from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import (
     QComboBox,
     QHBoxLayout,
     QHeaderView,
     QLineEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
-from db.database import Database
+from ui.widgets.record_table import Column, RecordTableView
+from ui.widgets.search_controller import SearchController, contains_pattern
 
 
 class WarehouseTab(QWidget):
@@ -31,7 +29,10 @@ class WarehouseTab(QWidget):
         # 1. Поиск
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Поиск по Артикулу или Названию...")
-        self.search_input.textChanged.connect(self.load_data)
+        self.search = SearchController(
+            self.search_input, self.build_search_query, self.populate_table,
+            matches=self.item_matches,
+        )
 
         # 2. Фильтр по Типу
         self.type_filter = QComboBox()
@@ -51,10 +52,22 @@ class WarehouseTab(QWidget):
         layout.addLayout(toolbar)
 
         # --- ТАБЛИЦА ---
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(
-            ["Тип", "Артикул", "Наименование", "Количество", "Ед. изм."]
+        # Кол-во 0 -> Красный цвет текста
+        out_of_stock = self.is_out_of_stock
+        self.table = RecordTableView(
+            [
+                Column("Тип", "тип", icon=self.type_icon),
+                Column("Артикул", "артикул"),
+                Column("Наименование", "наименование"),
+                Column(
+                    "Количество",
+                    "количество",
+                    align=Qt.AlignmentFlag.AlignCenter,
+                    foreground=lambda item: "#E74C3C" if out_of_stock(item) else None,
+                    tooltip=lambda item: "Нет на складе!" if out_of_stock(item) else None,
+                ),
+                Column("Ед. изм.", "единица_измерения"),
+            ]
         )
 
         # Настройка ширины
@@ -66,26 +79,23 @@ class WarehouseTab(QWidget):
             0, QHeaderView.ResizeMode.ResizeToContents
         )  # Тип по ширине текста
 
-        self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(
-            QTableWidget.EditTrigger.NoEditTriggers
-        )  # Запрет редактирования
-
         layout.addWidget(self.table)
 
     def load_data(self):
-        search_text = self.search_input.text().strip().lower()
+        self.search.refresh()
+
+    def build_search_query(self, search_text):
         selected_type = self.type_filter.currentText()
 
         # Запрос к нашему VIEW
         query = "SELECT * FROM v_склад_общий WHERE 1=1"
         params = []
 
-        # 1. Фильтр поиска
+        # 1. Фильтр поиска (ILIKE по самому столбцу проталкивается в ветки VIEW
+        #    и использует триграммные индексы таблиц)
         if search_text:
-            query += " AND (LOWER(наименование) LIKE %s OR LOWER(артикул) LIKE %s)"
-            like_str = f"%{search_text}%"
+            query += " AND (наименование ILIKE %s OR артикул ILIKE %s)"
+            like_str = contains_pattern(search_text)
             params.append(like_str)
             params.append(like_str)
 
@@ -101,50 +111,25 @@ class WarehouseTab(QWidget):
         # Сортировка: Сначала тип, потом имя
         query += " ORDER BY тип, наименование"
 
-        items = Database.fetch_all(query, params)
-        self.populate_table(items)
+        return query, params
+
+    @staticmethod
+    def item_matches(item, text):
+        return text in (item["наименование"] or "").lower() or text in (item["артикул"] or "").lower()
 
     def populate_table(self, items):
-        self.table.setRowCount(0)
-
-        for row_idx, item in enumerate(items):
-            self.table.insertRow(row_idx)
-
-            # Иконка для типа
-            item_type = item["тип"]
-            icon_name = "fa5s.box"  # дефолт
-            if item_type == "Материал":
-                icon_name = "fa5s.layer-group"
-            elif item_type == "Заготовка":
-                icon_name = "fa5s.puzzle-piece"
-            elif item_type == "Изделие":
-                icon_name = "fa5s.chair"
-
-            # Кол-во 0 -> Красный цвет текста
-            qty = item["количество"]
-            text_color = QColor("black")
-            if qty == 0:
-                text_color = QColor("#E74C3C")  # Красный
-
-            # Заполнение ячеек
-            # 0. Тип (с иконкой)
-            type_item = QTableWidgetItem(item_type)
-            type_item.setIcon(qta.icon(icon_name, color="#2C3E50"))
-            self.table.setItem(row_idx, 0, type_item)
-
-            # 1. Артикул
-            self.table.setItem(row_idx, 1, QTableWidgetItem(str(item["артикул"])))
-
-            # 2. Наименование
-            self.table.setItem(row_idx, 2, QTableWidgetItem(item["наименование"]))
-
-            # 3. Количество
-            qty_item = QTableWidgetItem(str(qty))
-            qty_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            qty_item.setForeground(text_color)
-            if qty == 0:
-                qty_item.setToolTip("Нет на складе!")
-            self.table.setItem(row_idx, 3, qty_item)
-
-            # 4. Ед. изм.
-            self.table.setItem(row_idx, 4, QTableWidgetItem(item["единица_измерения"]))
+        self.table.set_rows(items)
+
+    @staticmethod
+    def is_out_of_stock(item):
+        return item["количество"] == 0
+
+    @staticmethod
+    def type_icon(item):
+        # Иконка для типа
+        icon_name = {
+            "Материал": "fa5s.layer-group",
+            "Заготовка": "fa5s.puzzle-piece",
+            "Изделие": "fa5s.chair",
+        }.get(item["тип"], "fa5s.box")
+        return icon_name, "#2C3E50"
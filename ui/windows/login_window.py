@@ -1,8 +1,7 @@
 import os
 import sys
 
-import qtawesome as qta
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QColor, QPixmap
 from PyQt6.QtWidgets import (
     QFrame,
@@ -19,8 +18,6 @@ sys.path.append(
     os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 )
 
-from db.database import Database
-from config import config
 
 
 class LoginWindow(QWidget):
@@ -35,6 +32,9 @@ class LoginWindow(QWidget):
 
         # Настройка интерфейса
         self.setup_ui()
+        # Окно входа показывается только с ядром PyQt; иконки (qtawesome) и
+        # драйвер БД подгружаются после первой отрисовки
+        QTimer.singleShot(0, self.load_deferred)
 
     def setup_ui(self):
         # Основной слой
@@ -87,19 +87,10 @@ class LoginWindow(QWidget):
         # 3. Поля ввода
         self.login_input = QLineEdit()
         self.login_input.setPlaceholderText("Логин")
-        # Добавляем иконку внутрь поля (Action)
-        self.login_input.addAction(
-            qta.icon("fa5s.user", color="#95A5A6"),
-            QLineEdit.ActionPosition.LeadingPosition,
-        )
 
         self.password_input = QLineEdit()
         self.password_input.setPlaceholderText("Пароль")
         self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
-        self.password_input.addAction(
-            qta.icon("fa5s.lock", color="#95A5A6"),
-            QLineEdit.ActionPosition.LeadingPosition,
-        )
         # Обработка Enter
         self.password_input.returnPressed.connect(self.handle_login)
 
@@ -129,7 +120,24 @@ class LoginWindow(QWidget):
 
         main_layout.addWidget(container)
 
+    def load_deferred(self):
+        import qtawesome as qta
+
+        import db.database  # прогрев: psycopg2 и config загружаются до нажатия «Войти»
+
+        # Добавляем иконку внутрь поля (Action)
+        self.login_input.addAction(
+            qta.icon("fa5s.user", color="#95A5A6"),
+            QLineEdit.ActionPosition.LeadingPosition,
+        )
+        self.password_input.addAction(
+            qta.icon("fa5s.lock", color="#95A5A6"),
+            QLineEdit.ActionPosition.LeadingPosition,
+        )
+
     def handle_login(self):
+        from db.database import Database
+
         login = self.login_input.text().strip()
         password = self.password_input.text().strip()
 
@@ -1,6 +1,8 @@
 
+import time
+
 import qtawesome as qta
-from PyQt6.QtCore import QSize, Qt, pyqtSignal
+from PyQt6.QtCore import QSize, Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (
     QFrame,
     QHBoxLayout,
@@ -12,28 +14,65 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from ui.widgets.clients_tab import ClientsTab
-from ui.widgets.components_tab import ComponentsTab
-from ui.widgets.dashboard_tab import DashboardTab
-from ui.widgets.employees_tab import EmployeesTab
-from ui.widgets.manager_schedule_tab import ManagerScheduleTab
-from ui.widgets.nomenclature_tab import NomenclatureTab
-from ui.widgets.orders_tab import OrdersTab
-from ui.widgets.production_planning_tab import ProductionPlanningTab
-from ui.widgets.production_tab import ProductionTab
-from ui.widgets.purchases_tab import PurchasesTab
-from ui.widgets.schedule_tab import ScheduleTab
-from ui.widgets.warehouse_tab import WarehouseTab
+from config import config
+from db.async_executor import executor
+
+
+def lazy_tab(module, class_name, *window_attrs):
+    """Фабрика вкладки: модуль вкладки импортируется при первом создании"""
+
+    def factory(window):
+        # __import__, а не importlib.import_module: так импорт виден в -X importtime
+        cls = getattr(__import__(module, fromlist=[class_name]), class_name)
+        return cls(*(getattr(window, attr) for attr in window_attrs))
+
+    return factory
+
+
+# Вкладки по ролям: (название, иконка, фабрика(окно) -> виджет).
+# Вкладка создается при первом открытии, остальные — в фоне после того,
+# как первая загрузила данные.
+TAB_REGISTRY = {
+    "директор": [
+        ("Дашборд", "fa5s.chart-line", lazy_tab("ui.widgets.dashboard_tab", "DashboardTab")),
+        ("Персонал", "fa5s.users", lazy_tab("ui.widgets.employees_tab", "EmployeesTab")),
+        ("Номенклатура", "fa5s.boxes", lazy_tab("ui.widgets.nomenclature_tab", "NomenclatureTab")),
+        ("Заготовки", "fa5s.puzzle-piece", lazy_tab("ui.widgets.components_tab", "ComponentsTab")),
+        ("Закупки", "fa5s.shopping-cart", lazy_tab("ui.widgets.purchases_tab", "PurchasesTab")),
+        ("Склад", "fa5s.warehouse", lazy_tab("ui.widgets.warehouse_tab", "WarehouseTab")),
+        ("Заказы", "fa5s.file-invoice", lazy_tab("ui.widgets.orders_tab", "OrdersTab", "user_id")),
+        ("Графики", "fa5s.calendar-check", lazy_tab("ui.widgets.manager_schedule_tab", "ManagerScheduleTab")),
+    ],
+    "менеджер": [
+        ("Заказы", "fa5s.clipboard-list", lazy_tab("ui.widgets.orders_tab", "OrdersTab", "user_id")),
+        ("План работ", "fa5s.tasks", lazy_tab("ui.widgets.production_planning_tab", "ProductionPlanningTab")),
+        ("Клиенты", "fa5s.address-book", lazy_tab("ui.widgets.clients_tab", "ClientsTab")),
+        ("Склад", "fa5s.boxes", lazy_tab("ui.widgets.warehouse_tab", "WarehouseTab")),
+        ("Графики", "fa5s.calendar-check", lazy_tab("ui.widgets.manager_schedule_tab", "ManagerScheduleTab")),
+    ],
+    "сборщик": [
+        ("Мои Задачи", "fa5s.tools", lazy_tab("ui.widgets.production_tab", "ProductionTab", "user_id")),
+        ("График", "fa5s.calendar-alt", lazy_tab("ui.widgets.schedule_tab", "ScheduleTab", "user_id")),
+    ],
+}
 
 
 class MainWindow(QMainWindow):
     # Сигнал для выхода из учетной записи
     logoutSignal = pyqtSignal()
+    # Первая вкладка построена и загрузила данные (время с входа, мс)
+    interactive = pyqtSignal(float)
 
-    def __init__(self, user_id, role, fio):
+    def __init__(self, user_id, role, fio, started_at=None):
         super().__init__()
         self.user_id = user_id
         self.fio = fio
+        # Отсчет времени до готовности — с момента входа
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.tti_ms = None
+        self._factories = {}  # индекс страницы -> фабрика еще не созданной вкладки
+        self._building = False
+        self._closed = False
 
         # 1. НОРМАЛИЗАЦИЯ РОЛИ (Сразу при старте!)
         # Приводим к нижнему регистру и убираем пробелы
@@ -57,6 +96,8 @@ class MainWindow(QMainWindow):
         self.setup_sidebar()
         self.setup_content_area()
         self.populate_menu_by_role()
+        # После первой отрисовки ждем данные первой вкладки
+        QTimer.singleShot(0, lambda: self.when_idle(self.on_interactive))
 
     def setup_sidebar(self):
         """Создание левой боковой панели"""
@@ -116,6 +157,7 @@ class MainWindow(QMainWindow):
         self.content_area.setObjectName("ContentArea")
 
         self.stacked_widget = QStackedWidget()
+        self.stacked_widget.currentChanged.connect(self.ensure_tab)
 
         content_layout = QVBoxLayout(self.content_area)
         content_layout.setContentsMargins(20, 20, 20, 20)
@@ -123,15 +165,16 @@ class MainWindow(QMainWindow):
 
         self.main_layout.addWidget(self.content_area)
 
-    def add_menu_item(self, title, icon_name, widget):
-        """Добавляет кнопку в меню и страницу в стек"""
+    def add_menu_item(self, title, icon_name, factory):
+        """Добавляет кнопку в меню и страницу в стек; вкладка создается при первом открытии"""
         btn = QPushButton(title)
         btn.setProperty("class", "NavButton")
         btn.setIcon(qta.icon(icon_name, color="#BDC3C7"))  # Цвет иконки по умолчанию
         btn.setCheckable(True)
         btn.setAutoExclusive(True)
 
-        index = self.stacked_widget.addWidget(widget)
+        index = self.stacked_widget.addWidget(QWidget())
+        self._factories[index] = factory
 
         btn.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(index))
 
@@ -139,6 +182,61 @@ class MainWindow(QMainWindow):
 
         if self.stacked_widget.count() == 1:
             btn.setChecked(True)
+            self.ensure_tab(index)
+
+    def ensure_tab(self, index):
+        """Создает вкладку index, если она еще не создана, на месте заглушки"""
+        if self._building or index not in self._factories:
+            return
+        factory = self._factories.pop(index)
+        self._building = True
+        try:
+            placeholder = self.stacked_widget.widget(index)
+            was_current = self.stacked_widget.currentIndex() == index
+            widget = factory(self)
+            self.stacked_widget.insertWidget(index, widget)
+            if was_current:
+                self.stacked_widget.setCurrentWidget(widget)
+            self.stacked_widget.removeWidget(placeholder)
+            placeholder.deleteLater()
+        finally:
+            self._building = False
+        return widget
+
+    def when_idle(self, callback):
+        """Вызывает callback, когда завершатся все фоновые запросы"""
+        pool = executor()
+        if not pool.has_pending():
+            callback()
+            return
+
+        def on_idle():
+            pool.idle.disconnect(on_idle)
+            callback()
+
+        pool.idle.connect(on_idle)
+
+    def on_interactive(self):
+        if self._closed or self.tti_ms is not None:
+            return
+        self.tti_ms = (time.perf_counter() - self.started_at) * 1000
+        over = f" (цель {config.TTI_TARGET_MS} мс)" if self.tti_ms > config.TTI_TARGET_MS else ""
+        print(f"⏱ Главное окно готово за {self.tti_ms:.0f} мс{over}")
+        self.interactive.emit(self.tti_ms)
+        self.prefetch_next()
+
+    def prefetch_next(self):
+        """Фоновая подгрузка: по одной вкладке, следующая — после данных предыдущей"""
+        if self._closed or not self._factories or config.TAB_PREFETCH_DELAY_MS < 0:
+            return
+
+        def build():
+            if self._closed or not self._factories:
+                return
+            self.ensure_tab(min(self._factories))
+            self.when_idle(self.prefetch_next)
+
+        QTimer.singleShot(config.TAB_PREFETCH_DELAY_MS, build)
 
     def create_placeholder(self, text):
         """Создает временную заглушку"""
@@ -149,36 +247,22 @@ class MainWindow(QMainWindow):
 
     def populate_menu_by_role(self):
         """Заполняет меню в зависимости от роли"""
-
-        if self.role == "директор":
-            self.add_menu_item("Дашборд", "fa5s.chart-line", DashboardTab())
-            self.add_menu_item("Персонал", "fa5s.users", EmployeesTab())
-            self.add_menu_item("Номенклатура", "fa5s.boxes", NomenclatureTab())
-            self.add_menu_item("Заготовки", "fa5s.puzzle-piece", ComponentsTab())
-            self.add_menu_item("Закупки", "fa5s.shopping-cart", PurchasesTab())
-            self.add_menu_item("Склад", "fa5s.warehouse", WarehouseTab())
-            self.add_menu_item("Заказы", "fa5s.file-invoice", OrdersTab(self.user_id))
-            self.add_menu_item("Графики", "fa5s.calendar-check", ManagerScheduleTab())
-
-        elif self.role == "менеджер":
-            self.add_menu_item("Заказы", "fa5s.clipboard-list", OrdersTab(self.user_id))
-            self.add_menu_item("План работ", "fa5s.tasks", ProductionPlanningTab())
-            self.add_menu_item("Клиенты", "fa5s.address-book", ClientsTab())
-            self.add_menu_item("Склад", "fa5s.boxes", WarehouseTab())
-            self.add_menu_item("Графики", "fa5s.calendar-check", ManagerScheduleTab())
-
-        elif self.role == "сборщик":
-            self.add_menu_item("Мои Задачи", "fa5s.tools", ProductionTab(self.user_id))
-            self.add_menu_item("График", "fa5s.calendar-alt", ScheduleTab(self.user_id))
-
-        else:
+        tabs = TAB_REGISTRY.get(self.role)
+        if tabs is None:
             # Если роль не совпала, показываем ошибку в меню
-            self.add_menu_item(
+            tabs = [(
                 "Ошибка доступа",
                 "fa5s.exclamation-circle",
-                self.create_placeholder(f"Роль '{self.role}' не найдена"),
-            )
+                lambda w: w.create_placeholder(f"Роль '{w.role}' не найдена"),
+            )]
+        for title, icon_name, factory in tabs:
+            self.add_menu_item(title, icon_name, factory)
 
     def handle_logout(self):
         self.logoutSignal.emit()
         self.close()
+
+    def closeEvent(self, event):
+        # Окно закрыто — фоновую подгрузку вкладок прекращаем
+        self._closed = True
+        super().closeEvent(event)
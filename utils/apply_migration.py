@@ -0,0 +1,43 @@
+"""
+Применение файлов миграций по имени.
+
+    python utils/apply_migration.py search_orders_v10.sql [еще.sql ...]
+"""
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from db.database import Database
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "migrations"
+)
+
+
+def apply(*names):
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        with conn.cursor() as cur:
+            for name in names:
+                path = name if os.path.exists(name) else os.path.join(MIGRATIONS_DIR, name)
+                with open(path, "r", encoding="utf-8") as f:
+                    cur.execute(f.read())
+                print(f"✅ Применена миграция: {os.path.basename(path)}")
+        conn.commit()
+        # Процедуры могли смениться: подготовленные вызовы этого процесса устарели
+        Database.invalidate_prepared()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    apply(*sys.argv[1:])
@@ -0,0 +1,51 @@
+"""
+Обслуживание проекции заказы_поиск.
+
+    python utils/order_search_projection.py check     # показать расхождения
+    python utils/order_search_projection.py rebuild   # перестроить с нуля
+"""
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+def check(cur):
+    cur.execute("SELECT * FROM sp_check_order_search()")
+    problems = cur.fetchall()
+    for order_id, problem in problems:
+        print(f"  заказ {order_id}: {problem}")
+    if problems:
+        print(f"❌ Расхождений: {len(problems)} (исправить: rebuild)")
+    else:
+        print("✅ Проекция заказы_поиск согласована с исходными таблицами")
+    return not problems
+
+
+def rebuild(cur):
+    cur.execute("SELECT * FROM sp_rebuild_order_search()")
+    print(f"✅ {cur.fetchone()[1]}")
+    return True
+
+
+def main():
+    commands = {"check": check, "rebuild": rebuild}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(1)
+
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        with conn.cursor() as cur:
+            ok = commands[sys.argv[1]](cur)
+        conn.commit()
+    finally:
+        conn.close()
+    sys.exit(0 if ok else 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Пакетное формирование закупок по нехватке материалов и минимальному остатку
+(например, по расписанию cron).
+
+    python utils/purchase_proposals.py preview   # показать, что будет заказано
+    python utils/purchase_proposals.py create    # создать черновики закупок
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from business_logic import purchase_planner
+from db.database import Database
+
+
+def preview(requirements):
+    rows = purchase_planner.propose_purchases(requirements)
+    supplier = object()
+    for r in rows:
+        if r["поставщик"] != supplier:
+            supplier = r["поставщик"]
+            print(f"\n{supplier or 'Поставщик не определен'}:")
+        need_by = r["нужно_к"].strftime("%d.%m.%Y") if r["нужно_к"] else "—"
+        price = f"{r['цена']:>10.2f}" if r["цена"] is not None else f"{'—':>10}"
+        note = f"  ⚠ {r['замечание']}, в черновик не войдет" if r["замечание"] else ""
+        print(f"  {r['артикул_материала']:<12} {r['наименование']:<40} "
+              f"{r['количество']:>8} {r['единица_измерения'] or '':<6} x {price}  к {need_by}{note}")
+    print(f"\nПозиций к заказу: {len(rows)}" if rows else "✅ Закупать нечего: остатков достаточно")
+    return True
+
+
+def create(requirements):
+    result = purchase_planner.create_purchase_drafts(requirements)
+    if result.get("status") not in ("OK", "WARNING"):
+        print(f"❌ {result.get('message')}")
+        return False
+    ids = ", ".join(str(i) for i in result.get("purchase_ids") or [])
+    mark = "✅" if result.get("status") == "OK" else "⚠"
+    print(f"{mark} {result.get('message')}" + (f" (№ {ids})" if ids else ""))
+    return True
+
+
+def main():
+    commands = {"preview": preview, "create": create}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(1)
+    try:
+        ok = commands[sys.argv[1]](purchase_planner.requirements_payload())
+    finally:
+        Database.close_pool()
+    sys.exit(0 if ok else 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Заполнение график_работы по шаблонам (5/2, 2/2, 3/3, свои чередования).
+
+    python utils/schedule_templates.py list
+    python utils/schedule_templates.py diff  ШАБЛОН С ПО [СОТРУДНИКИ]   # пробный прогон
+    python utils/schedule_templates.py apply ШАБЛОН С ПО [СОТРУДНИКИ]
+
+СОТРУДНИКИ — должность ("сборщик") или id через запятую, у каждого
+необязательный сдвиг цикла ("6:0,7:2" — две смены 2/2). По умолчанию — все
+работающие сотрудники. Отпуск и больничный шаблон не затирает.
+
+    python utils/schedule_templates.py apply 5/2 2025-01-01 2025-12-31 сборщик
+"""
+import collections
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+POSITIONS = ("сборщик", "менеджер", "директор")
+
+
+def parse_employees(cur, spec):
+    """(id сотрудников, сдвиги или None) по аргументу командной строки"""
+    if not spec or spec in POSITIONS:
+        cur.execute(
+            "SELECT id_сотрудника FROM сотрудники WHERE дата_увольнения IS NULL"
+            " AND (%s::VARCHAR IS NULL OR должность = %s) ORDER BY id_сотрудника",
+            (spec, spec),
+        )
+        return [r[0] for r in cur.fetchall()], None
+    ids, shifts = [], []
+    for part in spec.split(","):
+        emp_id, _, shift = part.partition(":")
+        ids.append(int(emp_id))
+        shifts.append(int(shift or 0))
+    return ids, shifts if any(shifts) else None
+
+
+def list_templates(cur, *_):
+    cur.execute("SELECT наименование, цикл, начало_цикла, календарь FROM шаблоны_графика ORDER BY наименование")
+    for name, cycle, anchor, calendar in cur.fetchall():
+        days = "".join("Р" if s == "рабочий" else "В" for s in cycle)
+        print(f"  {name:<10} {days:<14} с {anchor:%d.%m.%Y}  праздники: {calendar or '—'}")
+    return True
+
+
+def diff(cur, template, date_from, date_to, employees=None):
+    cur.execute("SELECT 1 FROM шаблоны_графика WHERE наименование = %s", (template,))
+    if cur.fetchone() is None:
+        print(f"❌ Шаблон графика не найден: {template}")
+        return False
+    ids, shifts = parse_employees(cur, employees)
+    cur.execute(
+        "SELECT id_сотрудника, было, станет FROM sp_schedule_template_diff(%s, %s, %s, %s, %s)",
+        (template, ids, date_from, date_to, shifts),
+    )
+    changes = collections.Counter((was or "нет записи", becomes) for _, was, becomes in cur.fetchall())
+    for (was, becomes), count in sorted(changes.items()):
+        print(f"  {was:>12} → {becomes:<10} {count:>8} дн.")
+    total = sum(changes.values())
+    print(f"Изменится дней: {total} (сотрудников: {len(ids)})" if total else "✅ График уже совпадает с шаблоном")
+    return True
+
+
+def apply(cur, template, date_from, date_to, employees=None):
+    ids, shifts = parse_employees(cur, employees)
+    cur.execute(
+        "SELECT * FROM sp_apply_schedule_template(%s, %s, %s, %s, %s)",
+        (template, ids, date_from, date_to, shifts),
+    )
+    status, message, _ = cur.fetchone()
+    print(f"{'✅' if status == 'OK' else '❌'} {message}")
+    return status == "OK"
+
+
+def main():
+    commands = {"list": list_templates, "diff": diff, "apply": apply}
+    command = commands.get(sys.argv[1]) if len(sys.argv) > 1 else None
+    args = sys.argv[2:]
+    if command is None or len(args) not in ((0,) if command is list_templates else (3, 4)):
+        print(__doc__)
+        sys.exit(1)
+
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        with conn.cursor() as cur:
+            ok = command(cur, *args)
+        conn.commit()
+    finally:
+        conn.close()
+    sys.exit(0 if ok else 2)
+
+
+if __name__ == "__main__":
+    main()
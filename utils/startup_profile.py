@@ -0,0 +1,114 @@
+"""
+Профиль холодного старта приложения.
+
+    python main.py --profile-startup
+
+Процесс перезапускается с -X importtime (вывод импорта пишется во
+временный файл, stderr возвращается после входа), отмечаются вехи
+от старта процесса: окно входа показано → вход выполнен → главное окно
+готово. После готовности главного окна печатаются вехи и самые долгие
+импорты верхнего уровня — отдельно до окна входа и после него.
+"""
+import os
+import sys
+import time
+
+FLAG = "--profile-startup"
+_ENV_LOG = "NOVA_IMPORTTIME_LOG"
+_ENV_STDERR = "NOVA_STDERR_FD"
+TOP_IMPORTS = 12
+LOGIN_SHOWN = "окно входа показано"
+
+
+def _process_started_at():
+    """time.time() старта процесса (Linux, /proc); иначе — момент импорта модуля"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+_started_at = _process_started_at()
+_marks = []  # (веха, мс от старта процесса, позиция в логе импорта)
+
+
+def enabled():
+    return FLAG in sys.argv
+
+
+def restart_with_importtime():
+    """Перезапускает процесс с -X importtime, если профиль включен и еще не перезапущен"""
+    if not enabled() or "importtime" in sys._xoptions:
+        return
+    import tempfile
+
+    log = tempfile.NamedTemporaryFile(prefix="nova_importtime_", suffix=".log", delete=False)
+    saved_stderr = os.dup(2)
+    os.set_inheritable(saved_stderr, True)
+    os.environ[_ENV_LOG] = log.name
+    os.environ[_ENV_STDERR] = str(saved_stderr)
+    os.dup2(log.fileno(), 2)
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable, "-X", "importtime", *sys.argv])
+
+
+def mark(name):
+    """Веха: время от старта процесса и текущая позиция в логе импорта"""
+    if not enabled():
+        return
+    sys.stderr.flush()
+    log_path = os.environ.get(_ENV_LOG)
+    position = os.path.getsize(log_path) if log_path and os.path.exists(log_path) else 0
+    _marks.append((name, (time.time() - _started_at) * 1000, position))
+
+
+def _top_imports(lines):
+    """(мс с зависимостями, модуль) для импортов верхнего уровня"""
+    result = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # заголовок
+        if len(name) - len(name.lstrip()) == 1:
+            result.append((cumulative / 1000, name.strip()))
+    return sorted(result, reverse=True)[:TOP_IMPORTS]
+
+
+def report():
+    """Печатает вехи и импорты; возвращает stderr на место"""
+    if not enabled() or not _marks:
+        return
+    sys.stderr.flush()
+    lines_by_stage = []
+    log_path = os.environ.get(_ENV_LOG)
+    if log_path and os.path.exists(log_path):
+        with open(log_path, "rb") as f:
+            log = f.read()
+        boundary = next((pos for name, _, pos in _marks if name == LOGIN_SHOWN), len(log))
+        lines_by_stage = [
+            ("до окна входа", log[:boundary].decode(errors="replace").splitlines()),
+            ("после окна входа", log[boundary:].decode(errors="replace").splitlines()),
+        ]
+        saved_stderr = os.environ.get(_ENV_STDERR)
+        if saved_stderr:
+            os.dup2(int(saved_stderr), 2)
+        os.unlink(log_path)
+
+    print("⏱ Холодный старт (мс от запуска процесса):")
+    for name, elapsed, _ in _marks:
+        print(f"  {name:<28} {elapsed:>8.0f}")
+    for stage, lines in lines_by_stage:
+        top = _top_imports(lines)
+        print(f"Импорт {stage} (верхний уровень, с зависимостями, мс):")
+        for elapsed, module in top:
+            print(f"  {module:<40} {elapsed:>8.1f}")
+        if not top:
+            print("  —")
@@ -0,0 +1,81 @@
+"""
+Обслуживание журнала движения_склада и счетчиков остатков.
+
+    python utils/stock_ledger.py check              # расхождения счетчиков с журналом
+    python utils/stock_ledger.py rebuild            # привести счетчики к журналу
+    python utils/stock_ledger.py snapshot [ДАТА]    # снимок на конец дня (по умолчанию вчера)
+    python utils/stock_ledger.py asof МОМЕНТ        # остатки на момент, напр. "2025-03-01 12:00"
+"""
+import datetime
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+def check(cur, *_):
+    cur.execute("SELECT * FROM sp_check_stock_cache()")
+    problems = cur.fetchall()
+    for kind, item_id, cached, ledger in problems:
+        print(f"  {kind} {item_id}: в счетчике {cached}, по журналу {ledger}")
+    if problems:
+        print(f"❌ Расхождений: {len(problems)} (исправить: rebuild)")
+    else:
+        print("✅ Счетчики остатков согласованы с журналом движений")
+    return not problems
+
+
+def rebuild(cur, *_):
+    cur.execute("SELECT * FROM sp_rebuild_stock_cache()")
+    print(f"✅ {cur.fetchone()[1]}")
+    return True
+
+
+def snapshot(cur, day=None):
+    day = day or (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    cur.execute("SELECT * FROM sp_snapshot_stock(%s)", (day,))
+    status, message = cur.fetchone()
+    print(f"{'✅' if status == 'OK' else '❌'} {message}")
+    return status == "OK"
+
+
+def as_of(cur, moment=None):
+    if not moment:
+        print(__doc__)
+        return False
+    cur.execute(
+        """
+        SELECT a.вид, a.id_позиции, COALESCE(m.наименование, z.наименование, i.наименование), a.количество
+        FROM sp_stock_as_of(%s) a
+        LEFT JOIN материалы m ON a.вид = 'материал' AND m.id_материала = a.id_позиции
+        LEFT JOIN заготовки z ON a.вид = 'заготовка' AND z.id_заготовки = a.id_позиции
+        LEFT JOIN изделия i ON a.вид = 'изделие' AND i.id_изделия = a.id_позиции
+        """,
+        (moment,),
+    )
+    for kind, item_id, name, qty in cur.fetchall():
+        print(f"  {kind:<9} {item_id:>6}  {name or '—'}: {qty}")
+    return True
+
+
+def main():
+    commands = {"check": check, "rebuild": rebuild, "snapshot": snapshot, "asof": as_of}
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(1)
+
+    conn = psycopg2.connect(config.DATABASE_URL)
+    try:
+        with conn.cursor() as cur:
+            ok = commands[sys.argv[1]](cur, *sys.argv[2:])
+        conn.commit()
+    finally:
+        conn.close()
+    sys.exit(0 if ok else 2)
+
+
+if __name__ == "__main__":
+    main()